@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+Batched Google Sheets Value Writer (single session)
+
+Replaces one `claude mcp call ... modify_sheet_values` subprocess per 10 rows
+with one authenticated HTTP session that sends large multi-range
+values:batchUpdate requests.
+
+- One session: Application Default Credentials (gcloud auth application-default
+  login, or GOOGLE_APPLICATION_CREDENTIALS for a service account)
+- Big batches: rows are split into ranges, several ranges per request
+- Quota-aware: at most MAX_WORKERS requests in flight and at most
+  WRITES_PER_MINUTE requests per minute (Sheets allows 60/min/user)
+- Retries 429/5xx with exponential backoff
+- Resumable: finished ranges are checkpointed to a JSON file, so a re-run
+  only sends what is left (the checkpoint records the spreadsheet ID and a
+  hash of the CSV, and is ignored if either changed)
+- Diff planning: diff_sheet_rows() compares the current sheet (read with
+  valueRenderOption=FORMULA) with the CSV by a key column so a sync only
+  touches rows that changed
+
+Testing against a local fake endpoint (execution/sheets_fake_server.py):
+    python execution/sheets_fake_server.py --port 8085 --fail 429 503 &
+    SHEETS_API_BASE=http://localhost:8085 python execution/upload-centner-outliers.py file.csv
+    (no credentials are used when SHEETS_API_BASE is set)
+
+    python execution/sheets_fake_server.py --self-test
+    (checks request batching, 429/5xx retries with backoff and checkpoint resume)
+
+Requires: pip install google-auth requests
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional, Sequence
+
+import requests
+
+SHEETS_API_BASE = 'https://sheets.googleapis.com'
+SHEETS_SCOPES = ['https://www.googleapis.com/auth/spreadsheets']
+
+ROWS_PER_RANGE = 500
+RANGES_PER_REQUEST = 4
+MAX_WORKERS = 2
+WRITES_PER_MINUTE = 55
+MAX_RETRIES = 5
+
+
+# =============================================================================
+# HELPERS
+# =============================================================================
+
+def column_letter(index: int) -> str:
+    """0 → A, 25 → Z, 26 → AA"""
+    letters = ''
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def plan_ranges(sheet: str, rows: Sequence[Sequence], start_row: int, rows_per_range: int = ROWS_PER_RANGE) -> List[Dict]:
+    """Split rows into A1 ranges of up to rows_per_range rows, starting at start_row (1-indexed)."""
+    width = max((len(r) for r in rows), default=1)
+    last_column = column_letter(width - 1)
+    ranges = []
+    for i in range(0, len(rows), rows_per_range):
+        chunk = [list(r) for r in rows[i:i + rows_per_range]]
+        first = start_row + i
+        last = first + len(chunk) - 1
+        ranges.append({'range': f"{sheet}!A{first}:{last_column}{last}", 'values': chunk})
+    return ranges
+
+
+# Day 0 of Sheets date serial numbers
+SHEETS_EPOCH = datetime(1899, 12, 30)
+_DATE_FORMATS = ['%Y-%m-%d', '%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%d %H:%M']
+
+
+def _normalize_cell(value) -> str:
+    """
+    Compare cells the way Sheets stores them. The sheet is read with
+    valueRenderOption=FORMULA (raw numbers, dates as serial numbers, formulas
+    as typed), so CSV text is parsed the way USER_ENTERED would store it:
+    1.50 == 1.5, 1,200 == 1200, $5 == 5, 12% == 0.12, true == TRUE,
+    2024-01-05 == 45296, trailing spaces ignored.
+    """
+    if isinstance(value, bool):
+        return 'TRUE' if value else 'FALSE'
+    text = str(value).strip() if value is not None else ''
+    if text.upper() in ('TRUE', 'FALSE'):
+        return text.upper()
+    if text.startswith('='):
+        return text
+    for date_format in _DATE_FORMATS:
+        try:
+            serial = (datetime.strptime(text, date_format) - SHEETS_EPOCH) / timedelta(days=1)
+        except ValueError:
+            continue
+        return repr(float(serial))
+    number_text = text.replace(',', '').lstrip('$')
+    scale = 1.0
+    if number_text.endswith('%'):
+        number_text, scale = number_text[:-1], 0.01
+    try:
+        number = float(number_text) * scale
+    except ValueError:
+        return text
+    return repr(number) if number == number else text
+
+
+def _normalize_row(row: Sequence, width: int) -> List[str]:
+    cells = [_normalize_cell(v) for v in list(row)[:width]]
+    cells += [''] * (width - len(cells))
+    return cells
+
+
+def row_runs(row_numbers: Sequence[int]) -> List[List[int]]:
+    """Group sorted 1-indexed row numbers into runs of consecutive rows."""
+    runs = []
+    for number in sorted(row_numbers):
+        if runs and number == runs[-1][-1] + 1:
+            runs[-1].append(number)
+        else:
+            runs.append([number])
+    return runs
+
+
+def diff_sheet_rows(current: List[List], desired: List[List], key_column: str) -> Dict:
+    """
+    Compare the sheet's current values with the desired table (both include
+    the header row) and plan the smallest set of writes. `current` should be
+    read with valueRenderOption=FORMULA; see _normalize_cell.
+
+    Rows are matched by `key_column`. Returns:
+        updates  - [{'range', 'values'}] for changed rows, consecutive rows merged
+        appends  - new rows, in CSV order, to add after the last row
+        deletes  - 1-indexed sheet rows to remove (descending)
+        header_changed, and changed / inserted / deleted / unchanged row counts
+
+    Raises ValueError if the key column is missing or duplicated in the CSV,
+    or if the sheet's header row differs from the CSV's (rows could not be
+    lined up column by column; do a full replace instead).
+    Sheet rows with a blank or repeated key are treated as deletions.
+    """
+    header = list(desired[0]) if desired else []
+    if key_column not in header:
+        raise ValueError(f"Key column '{key_column}' not found in CSV header")
+    key_index = header.index(key_column)
+    width = max(len(header), max((len(r) for r in current), default=0))
+    last_column = column_letter(width - 1)
+
+    # Sheet cells are matched to CSV columns by position, so the headers must agree
+    if current and _normalize_row(current[0], width) != _normalize_row(header, width):
+        raise ValueError("Sheet header differs from the CSV header; run a full replace (without --key)")
+
+    def row_key(row) -> str:
+        return _normalize_cell(row[key_index]) if key_index < len(row) else ''
+
+    desired_by_key = {}
+    for row in desired[1:]:
+        key = row_key(row)
+        if not key:
+            raise ValueError(f"CSV has a row with an empty '{key_column}'")
+        if key in desired_by_key:
+            raise ValueError(f"CSV has duplicate '{key_column}' value: {row[key_index]}")
+        desired_by_key[key] = row
+
+    changed_rows = {}
+    deletes = []
+    seen = set()
+
+    # Row 1 is the header; it only needs writing into an empty sheet
+    if not current:
+        changed_rows[1] = header
+
+    for sheet_row, row in enumerate(current[1:], start=2):
+        key = row_key(row)
+        if not key or key in seen or key not in desired_by_key:
+            if any(str(v).strip() for v in row):
+                deletes.append(sheet_row)
+            continue
+        seen.add(key)
+        if _normalize_row(row, width) != _normalize_row(desired_by_key[key], width):
+            changed_rows[sheet_row] = desired_by_key[key]
+
+    appends = [list(row) for key, row in desired_by_key.items() if key not in seen]
+
+    updates = []
+    for run in row_runs(changed_rows):
+        values = [list(changed_rows[n]) + [''] * (width - len(changed_rows[n])) for n in run]
+        updates.append({'range': f"A{run[0]}:{last_column}{run[-1]}", 'values': values})
+
+    changed = sum(1 for n in changed_rows if n != 1)
+    return {
+        'updates': updates,
+        'appends': appends,
+        'deletes': sorted(deletes, reverse=True),
+        'header_changed': 1 in changed_rows,
+        'changed': changed,
+        'inserted': len(appends),
+        'deleted': len(deletes),
+        'unchanged': len(seen) - changed,
+    }
+
+
+class RateLimiter:
+    """Spaces request starts evenly so we stay under the per-minute write quota."""
+
+    def __init__(self, per_minute: int):
+        self.interval = 60.0 / per_minute
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+def file_hash(path: str) -> str:
+    """sha256 of a file's bytes, e.g. to tie a checkpoint to the CSV it was made from."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class Checkpoint:
+    """
+    JSON file listing ranges that were written successfully, for one
+    spreadsheet and one version of the source CSV. A saved checkpoint whose
+    spreadsheet_id or source_hash differs from this run's is discarded
+    (`stale` is set) instead of skipping ranges that were never written there.
+    """
+
+    def __init__(self, path: Optional[str], spreadsheet_id: Optional[str] = None,
+                 source_hash: Optional[str] = None):
+        self.path = path
+        self.spreadsheet_id = spreadsheet_id
+        self.source_hash = source_hash
+        self._lock = threading.Lock()
+        self.done = set()
+        self.stale = False
+        if path and os.path.exists(path):
+            with open(path) as f:
+                saved = json.load(f)
+            if (saved.get('spreadsheet_id') == spreadsheet_id
+                    and saved.get('source_hash') == source_hash):
+                self.done = set(saved.get('done', []))
+            else:
+                self.stale = True
+
+    def mark(self, ranges: List[str]):
+        with self._lock:
+            self.done.update(ranges)
+            if self.path:
+                tmp = f"{self.path}.tmp"
+                with open(tmp, 'w') as f:
+                    json.dump({
+                        'spreadsheet_id': self.spreadsheet_id,
+                        'source_hash': self.source_hash,
+                        'done': sorted(self.done),
+                    }, f)
+                os.replace(tmp, self.path)
+
+    def clear(self):
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+# =============================================================================
+# CLIENT
+# =============================================================================
+
+class SheetsBatchWriter:
+    """One authenticated session that writes value ranges in batches."""
+
+    def __init__(self, spreadsheet_id: str, session: requests.Session, api_base: str = SHEETS_API_BASE,
+                 max_workers: int = MAX_WORKERS, writes_per_minute: int = WRITES_PER_MINUTE):
+        self.spreadsheet_id = spreadsheet_id
+        self.session = session
+        self.api_base = api_base.rstrip('/')
+        self.max_workers = max_workers
+        self.limiter = RateLimiter(writes_per_minute)
+        self.requests_sent = 0
+
+    @classmethod
+    def connect(cls, spreadsheet_id: str, **kwargs) -> 'SheetsBatchWriter':
+        """
+        Build a writer with Application Default Credentials, or an
+        unauthenticated session when SHEETS_API_BASE points at a fake endpoint.
+        """
+        api_base = os.getenv('SHEETS_API_BASE')
+        if api_base:
+            return cls(spreadsheet_id, requests.Session(), api_base=api_base, **kwargs)
+
+        import google.auth
+        from google.auth.transport.requests import AuthorizedSession
+
+        credentials, _ = google.auth.default(scopes=SHEETS_SCOPES)
+        return cls(spreadsheet_id, AuthorizedSession(credentials), **kwargs)
+
+    def batch_update(self, data: List[Dict], value_input_option: str = 'USER_ENTERED') -> Dict:
+        """POST one values:batchUpdate request, retrying quota and server errors."""
+        url = f"{self.api_base}/v4/spreadsheets/{self.spreadsheet_id}/values:batchUpdate"
+        body = {'valueInputOption': value_input_option, 'data': data}
+
+        for attempt in range(MAX_RETRIES + 1):
+            self.limiter.wait()
+            response = self.session.post(url, json=body, timeout=120)
+            self.requests_sent += 1
+            if response.status_code == 429 or response.status_code >= 500:
+                if attempt == MAX_RETRIES:
+                    break
+                time.sleep(min(2 ** attempt, 32))
+                continue
+            break
+
+        response.raise_for_status()
+        return response.json()
+
+    def write_ranges(self, ranges: List[Dict], checkpoint: Checkpoint,
+                     ranges_per_request: int = RANGES_PER_REQUEST,
+                     value_input_option: str = 'USER_ENTERED') -> Dict:
+        """
+        Write every range not already in the checkpoint.
+        Returns {'written', 'skipped', 'failed', 'errors'}; failures don't
+        stop in-flight batches and are left out of the checkpoint for the next run.
+        """
+        pending = [r for r in ranges if r['range'] not in checkpoint.done]
+        batches = [pending[i:i + ranges_per_request] for i in range(0, len(pending), ranges_per_request)]
+        result = {'written': 0, 'skipped': len(ranges) - len(pending), 'failed': 0, 'errors': []}
+        stop = threading.Event()
+
+        def send(batch):
+            if stop.is_set():
+                return batch, None, False
+            try:
+                self.batch_update(batch, value_input_option)
+                checkpoint.mark([r['range'] for r in batch])
+                return batch, None, True
+            except Exception as e:
+                stop.set()  # Don't start new batches once the quota or auth is failing
+                return batch, e, False
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            for future in as_completed([pool.submit(send, b) for b in batches]):
+                batch, error, ok = future.result()
+                names = [r['range'] for r in batch]
+                if ok:
+                    result['written'] += len(batch)
+                    label = names[0] if len(names) == 1 else f"{names[0]} … {names[-1]}"
+                    print(f"✅ {label} uploaded")
+                else:
+                    result['failed'] += len(batch)
+                    if error:
+                        result['errors'].append(f"{names[0]}: {error}")
+
+        return result
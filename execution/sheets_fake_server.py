@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Local Fake Sheets Values Endpoint
+
+A stand-in for https://sheets.googleapis.com that accepts
+values:batchUpdate requests, keeps the written ranges in memory and can be
+told to answer the first requests with error statuses (429, 503, ...). Point
+SheetsBatchWriter at it with SHEETS_API_BASE (see sheets_batch.py).
+
+Usage:
+    # Serve on localhost:8085, failing the first request with 429 and the second with 503
+    python execution/sheets_fake_server.py --port 8085 --fail 429 503
+    SHEETS_API_BASE=http://localhost:8085 python execution/upload-centner-outliers.py file.csv
+
+    # Check batching, retry/backoff and checkpoint resume against it, then exit
+    python execution/sheets_fake_server.py --self-test
+"""
+
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence
+
+BATCH_UPDATE_PATH = re.compile(r'^/v4/spreadsheets/([^/]+)/values:batchUpdate$')
+
+
+# =============================================================================
+# SERVER
+# =============================================================================
+
+class FakeSheetsServer:
+    """
+    values:batchUpdate on 127.0.0.1, in a background thread.
+
+    `fail_statuses` are answered, in order, to the first requests (with a
+    Sheets-style error body) before requests start succeeding. `requests`
+    lists every request received as {'spreadsheet_id', 'status', 'body'};
+    `values` maps each written A1 range to its rows.
+    """
+
+    def __init__(self, port: int = 0, fail_statuses: Sequence[int] = ()):
+        self.fail_statuses = list(fail_statuses)
+        self.requests: List[Dict] = []
+        self.values: Dict[str, List[List]] = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', port), self._handler())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                match = BATCH_UPDATE_PATH.match(self.path.split('?')[0])
+                if not match:
+                    return self._reply(404, {'error': {'code': 404, 'message': f"Unknown path {self.path}"}})
+                body = json.loads(self.rfile.read(int(self.headers.get('Content-Length') or 0)) or b'{}')
+                with fake._lock:
+                    status = fake.fail_statuses.pop(0) if fake.fail_statuses else 200
+                    fake.requests.append({'spreadsheet_id': match.group(1), 'status': status, 'body': body})
+                    if status == 200:
+                        for value_range in body.get('data', []):
+                            fake.values[value_range['range']] = value_range['values']
+                if status != 200:
+                    return self._reply(status, {'error': {'code': status, 'message': 'Injected failure'}})
+                self._reply(200, {
+                    'spreadsheetId': match.group(1),
+                    'totalUpdatedRows': sum(len(r['values']) for r in body.get('data', [])),
+                    'responses': [{'updatedRange': r['range']} for r in body.get('data', [])],
+                })
+
+            def _reply(self, status: int, payload: Dict):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> 'FakeSheetsServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def serve(self):
+        """Serve in the foreground until Ctrl-C."""
+        try:
+            self._server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._server.server_close()
+
+    def __enter__(self) -> 'FakeSheetsServer':
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+# =============================================================================
+# SELF-TEST
+# =============================================================================
+
+def _writer(server: FakeSheetsServer):
+    import requests
+    from sheets_batch import SheetsBatchWriter
+
+    # High quota so the rate limiter doesn't slow the checks down
+    return SheetsBatchWriter('fake-sheet', requests.Session(), api_base=server.url, writes_per_minute=60_000)
+
+
+def run_self_test() -> bool:
+    """Run SheetsBatchWriter against the fake endpoint; prints each check and returns True if all pass."""
+    from sheets_batch import Checkpoint, plan_ranges
+
+    failures = []
+
+    def check(name: str, ok: bool, detail: str = ''):
+        print(f"  {'✅' if ok else '❌'} {name}" + (f" ({detail})" if detail and not ok else ''))
+        if not ok:
+            failures.append(name)
+
+    rows = [[f"row {n}", n] for n in range(1, 21)]
+    ranges = plan_ranges('Sheet1', rows, start_row=1, rows_per_range=2)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print("\n📦 Batching: 10 ranges, 4 per request")
+        checkpoint_path = os.path.join(tmp, 'progress.json')
+        with FakeSheetsServer() as server:
+            writer = _writer(server)
+            result = writer.write_ranges(ranges, Checkpoint(checkpoint_path, 'fake-sheet', 'v1'),
+                                         ranges_per_request=4)
+            sizes = sorted(len(r['body']['data']) for r in server.requests)
+            check("3 batchUpdate requests carrying 4 + 4 + 2 ranges", sizes == [2, 4, 4], f"got {sizes}")
+            check("requests_sent counts them", writer.requests_sent == 3, f"got {writer.requests_sent}")
+            check("every range written once", result['written'] == 10 and server.values == {
+                r['range']: r['values'] for r in ranges}, f"result {result}")
+            check("valueInputOption is USER_ENTERED",
+                  all(r['body']['valueInputOption'] == 'USER_ENTERED' for r in server.requests))
+
+        print("\n⏯️  Resume: same checkpoint, nothing left to send")
+        with FakeSheetsServer() as server:
+            result = _writer(server).write_ranges(ranges, Checkpoint(checkpoint_path, 'fake-sheet', 'v1'))
+            check("all 10 ranges skipped, no requests", result['skipped'] == 10 and not server.requests,
+                  f"result {result}, {len(server.requests)} requests")
+
+        print("\n🔁 Retry: 429 then 503, then success")
+        with FakeSheetsServer(fail_statuses=[429, 503]) as server:
+            writer = _writer(server)
+            started = time.monotonic()
+            result = writer.write_ranges(ranges[:1], Checkpoint(None))
+            elapsed = time.monotonic() - started
+            statuses = [r['status'] for r in server.requests]
+            check("same batch re-sent until it succeeds", statuses == [429, 503, 200], f"got {statuses}")
+            check("range written", result['written'] == 1 and not result['failed'], f"result {result}")
+            check("backed off 1s then 2s", elapsed >= 3, f"took {elapsed:.1f}s")
+
+        print("\n🛑 No retry on a client error (400)")
+        with FakeSheetsServer(fail_statuses=[400]) as server:
+            checkpoint = Checkpoint(None)
+            result = _writer(server).write_ranges(ranges[:1], checkpoint)
+            check("one request, range reported failed", len(server.requests) == 1 and result['failed'] == 1,
+                  f"{len(server.requests)} requests, result {result}")
+            check("failed range left out of the checkpoint", not checkpoint.done)
+
+    print(f"\n{'✅ All checks passed' if not failures else f'❌ {len(failures)} checks failed'}\n")
+    return not failures
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Local fake of the Sheets values:batchUpdate endpoint')
+    parser.add_argument('--port', type=int, default=8085, help='Port to listen on (default: 8085)')
+    parser.add_argument('--fail', type=int, nargs='*', default=[], metavar='STATUS',
+                        help='Answer the first requests with these statuses, in order (e.g. 429 503)')
+    parser.add_argument('--self-test', action='store_true',
+                        help='Check SheetsBatchWriter batching, retries and resume against a fake server, then exit')
+    args = parser.parse_args()
+
+    if args.self_test:
+        sys.exit(0 if run_self_test() else 1)
+
+    server = FakeSheetsServer(args.port, args.fail)
+    print(f"🧪 Fake Sheets API on {server.url} (SHEETS_API_BASE={server.url})")
+    server.serve()
+    print(f"\n📊 {len(server.requests)} requests, {len(server.values)} ranges written")
@@ -1,18 +1,27 @@
 #!/usr/bin/env python3
 """
-Upload Content Outliers to Google Sheets using MCP
+Upload Content Outliers to Google Sheets
 
-Prepares data with IMAGE formulas for thumbnails and uploads in batches
-to avoid MCP JSON parsing limits.
+Prepares data with IMAGE formulas for thumbnails and uploads it through one
+authenticated Sheets API session with large multi-range batch updates
+(see sheets_batch.py). Progress is checkpointed per range, so a failed run
+can simply be re-run and resumes where it stopped.
+
+Usage:
+    python execution/upload-centner-outliers.py [path/to/outliers.csv] [--restart]
+
+Requires: pip install google-auth requests
 """
 
+import argparse
 import csv
-import json
-import subprocess
 import sys
 
+from sheets_batch import Checkpoint, SheetsBatchWriter, file_hash, plan_ranges
+
 SPREADSHEET_ID = "1Y8km8-iAAhOEB2BsIfIMT15b1BKpGOHDUz_g0yx5UrE"
-USER_EMAIL = "connor@columnline.com"
+SHEET_NAME = "Outliers"
+DEFAULT_CSV = 'outputs/content_outliers_instagram_data_centner_combined_latest.csv'
 
 def parse_csv(file_path):
     """Parse CSV and return headers + rows"""
@@ -41,34 +50,12 @@ def format_row(row, headers):
 
     return formatted
 
-def upload_batch(range_name, values):
-    """Upload a batch of rows using MCP tool"""
-    # Prepare data as JSON string
-    data = json.dumps(values)
-
-    # Call MCP tool via subprocess
-    cmd = [
-        'claude', 'mcp', 'call',
-        'google-workspace', 'modify_sheet_values',
-        '--user_google_email', USER_EMAIL,
-        '--spreadsheet_id', SPREADSHEET_ID,
-        '--range_name', range_name,
-        '--value_input_option', 'USER_ENTERED',  # This parses formulas
-        '--values', data
-    ]
-
-    print(f"📤 Uploading {range_name}...")
-    result = subprocess.run(cmd, capture_output=True, text=True)
-
-    if result.returncode != 0:
-        print(f"❌ Error: {result.stderr}")
-        return False
-
-    print(f"✅ {range_name} uploaded")
-    return True
-
 def main():
-    csv_path = sys.argv[1] if len(sys.argv) > 1 else 'outputs/content_outliers_instagram_data_centner_combined_latest.csv'
+    parser = argparse.ArgumentParser(description='Upload content outliers to Google Sheets')
+    parser.add_argument('csv_path', nargs='?', default=DEFAULT_CSV, help='Outliers CSV')
+    parser.add_argument('--restart', action='store_true', help='Ignore saved progress and upload everything')
+    args = parser.parse_args()
+    csv_path = args.csv_path
 
     print(f"\n📊 Preparing to upload: {csv_path}\n")
 
@@ -76,26 +63,29 @@ def main():
     headers, rows = parse_csv(csv_path)
     print(f"✅ Parsed {len(rows)} outliers with {len(headers)} columns")
 
-    # Prepare header row
-    header_row = [headers]
-
-    # Upload header
-    if not upload_batch('Outliers!A1', header_row):
+    # Header goes in row 1, formatted data from row 2
+    formatted = [headers] + [format_row(row, headers) for row in rows]
+    ranges = plan_ranges(SHEET_NAME, formatted, start_row=1)
+
+    progress_path = f"{csv_path}.sheets-progress.json"
+    if args.restart:
+        Checkpoint(progress_path).clear()
+    checkpoint = Checkpoint(progress_path, SPREADSHEET_ID, file_hash(csv_path))
+    if checkpoint.stale:
+        print("⚠️  Saved progress is for a different spreadsheet or CSV version; uploading everything")
+
+    writer = SheetsBatchWriter.connect(SPREADSHEET_ID)
+    print(f"📤 Uploading {len(ranges)} ranges in batched requests...")
+    result = writer.write_ranges(ranges, checkpoint)
+
+    if result['failed']:
+        print(f"\n❌ {result['failed']} ranges failed ({result['written']} written, {result['skipped']} already done)")
+        for error in result['errors']:
+            print(f"   - {error}")
+        print(f"   Progress saved to {checkpoint.path}; re-run the same command to resume.")
         sys.exit(1)
 
-    # Format and upload data in batches of 10 rows
-    batch_size = 10
-    for i in range(0, len(rows), batch_size):
-        batch = rows[i:i+batch_size]
-        formatted_batch = [format_row(row, headers) for row in batch]
-
-        start_row = i + 2  # +1 for header, +1 for 1-indexed
-        end_row = start_row + len(batch) - 1
-        range_name = f'Outliers!A{start_row}:S{end_row}'
-
-        if not upload_batch(range_name, formatted_batch):
-            print(f"❌ Failed at batch {i//batch_size + 1}")
-            sys.exit(1)
+    checkpoint.clear()
 
     print("\n━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
     print("✨ Upload Complete!")
@@ -107,6 +97,7 @@ def main():
     print(f"   - Columns: {len(headers)}")
     print(f"   - Thumbnails: IMAGE formulas added (may not render if Instagram blocks)")
     print(f"   - Post URLs: Clickable 'View Post' hyperlinks")
+    print(f"   - API requests: {writer.requests_sent} ({result['skipped']} ranges resumed from a previous run)")
     print("\n━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n")
 
 if __name__ == '__main__':
@@ -2,36 +2,128 @@
 """
 Upload CSV to Google Sheets using gspread (standard method)
 Requires: pip install gspread oauth2client
+
+Modes:
+    Full replace (default): clear the sheet and upload the whole CSV.
+
+    Incremental sync (--key COLUMN): read the sheet once, match rows by COLUMN
+    and send only what changed:
+      - changed rows      → one values batch update (consecutive rows merged)
+      - deleted rows      → one deleteDimension request
+      - new rows          → one append
+    A run with no changes costs one read and zero writes, and the sheet is
+    never empty while it runs. New rows are appended at the bottom, so sheet
+    order can drift from CSV order; use a full replace to reorder. The sheet's
+    header row must match the CSV's; after adding, removing or reordering
+    columns, do one full replace.
+
+Usage:
+    python execution/upload-to-sheets-standard.py
+    python execution/upload-to-sheets-standard.py outputs/file.csv --key post_url
+    python execution/upload-to-sheets-standard.py --key post_url --dry-run
 """
 
+import argparse
 import csv
+import sys
+
 import gspread
 from oauth2client.service_account import ServiceAccountCredentials
 
+from sheets_batch import diff_sheet_rows
+
 # If you have a service account JSON, put path here
 # Otherwise we'll use oauth
 SHEET_ID = '1U3W7BiaRZ94WLKnsLASdai1RhYr4FR9ur8loSrSHTvc'
 CSV_PATH = 'outputs/content_outliers_instagram_data_centner_combined_latest.csv'
 
-# Read CSV
-with open(CSV_PATH, 'r', encoding='utf-8-sig') as f:
-    reader = csv.reader(f)
-    data = list(reader)
 
-print(f"📊 Loaded {len(data)} rows from CSV")
+def full_replace(worksheet, data):
+    """Clear the sheet and upload every row in one request."""
+    worksheet.clear()
+    worksheet.update('A1', data, value_input_option='USER_ENTERED')
+    print(f"✅ Uploaded {len(data)} rows to Google Sheets")
+
+
+def incremental_sync(sh, worksheet, data, key_column, dry_run=False):
+    """Diff the sheet against the CSV by key_column and write only the changes."""
+    # Raw values and formulas as typed, not display text (see _normalize_cell)
+    current = worksheet.get_all_values(value_render_option='FORMULA')
+    print(f"📖 Read {len(current)} rows from sheet")
+
+    try:
+        plan = diff_sheet_rows(current, data, key_column)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    print(f"   Changed: {plan['changed']}  New: {plan['inserted']}  "
+          f"Deleted: {plan['deleted']}  Unchanged: {plan['unchanged']}"
+          f"{'  (header changed)' if plan['header_changed'] else ''}")
+
+    if dry_run:
+        print("\n🔎 Dry run - nothing written")
+        return
+
+    writes = 0
+
+    # Updates use the row numbers we just read, so they go before deletions
+    if plan['updates']:
+        worksheet.batch_update(plan['updates'], value_input_option='USER_ENTERED')
+        writes += 1
+
+    if plan['deletes']:
+        sh.batch_update({'requests': [
+            {'deleteDimension': {'range': {
+                'sheetId': worksheet.id,
+                'dimension': 'ROWS',
+                'startIndex': row - 1,
+                'endIndex': row,
+            }}}
+            for row in plan['deletes']  # Descending, so earlier indexes stay valid
+        ]})
+        writes += 1
+
+    if plan['appends']:
+        worksheet.append_rows(plan['appends'], value_input_option='USER_ENTERED', table_range='A1')
+        writes += 1
+
+    if writes:
+        print(f"✅ Synced with {writes} write request(s)")
+    else:
+        print("✅ Sheet already up to date (0 writes)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Upload a CSV to Google Sheets')
+    parser.add_argument('csv_path', nargs='?', default=CSV_PATH, help='CSV file to upload')
+    parser.add_argument('--sheet-id', default=SHEET_ID, help='Spreadsheet ID (first worksheet is used)')
+    parser.add_argument('--key', metavar='COLUMN',
+                        help='Incremental sync: match rows by this column instead of replacing the sheet')
+    parser.add_argument('--dry-run', action='store_true', help='With --key, print the diff without writing')
+    args = parser.parse_args()
+
+    # Read CSV
+    with open(args.csv_path, 'r', encoding='utf-8-sig') as f:
+        reader = csv.reader(f)
+        data = list(reader)
+
+    print(f"📊 Loaded {len(data)} rows from CSV")
+
+    # Authorize with gspread (uses default credentials)
+    gc = gspread.oauth()
 
-# Authorize with gspread (uses default credentials)
-gc = gspread.oauth()
+    # Open sheet
+    sh = gc.open_by_key(args.sheet_id)
+    worksheet = sh.get_worksheet(0)
 
-# Open sheet
-sh = gc.open_by_key(SHEET_ID)
-worksheet = sh.get_worksheet(0)
+    if args.key:
+        incremental_sync(sh, worksheet, data, args.key, dry_run=args.dry_run)
+    else:
+        full_replace(worksheet, data)
 
-# Clear existing content
-worksheet.clear()
+    print(f"\n🔗 https://docs.google.com/spreadsheets/d/{args.sheet_id}/edit\n")
 
-# Upload all data at once
-worksheet.update('A1', data, value_input_option='USER_ENTERED')
 
-print(f"✅ Uploaded {len(data)} rows to Google Sheets")
-print(f"\n🔗 https://docs.google.com/spreadsheets/d/{SHEET_ID}/edit\n")
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+-- Migration: Natural Key for hist_timeline Events
+-- Purpose: Stop re-imports from duplicating contact_created / purchased events
+-- Date: 2025-12-26
+--
+-- Importers now compute event_key = md5(email|event_type|event_date|source)
+-- client-side (scripts/hist_timeline.py) and write with ON CONFLICT DO NOTHING.
+-- event_date in the key is the UTC timestamp formatted as YYYY-MM-DDTHH:MM:SS.
+
+-- ============================================
+-- STEP 1: Add the key column
+-- ============================================
+
+ALTER TABLE hist_timeline ADD COLUMN IF NOT EXISTS event_key TEXT;
+
+COMMENT ON COLUMN hist_timeline.event_key IS 'md5(email|event_type|event_date UTC|source) - natural key, computed by importers';
+
+-- ============================================
+-- STEP 2: Backfill existing rows (same formula as hist_timeline.py)
+-- ============================================
+
+UPDATE hist_timeline
+SET event_key = md5(
+    email || '|' ||
+    event_type || '|' ||
+    to_char(event_date AT TIME ZONE 'UTC', 'YYYY-MM-DD"T"HH24:MI:SS') || '|' ||
+    COALESCE(source, '')
+)
+WHERE event_key IS NULL;
+
+-- ============================================
+-- STEP 3: Remove duplicates created by earlier re-imports
+-- Keeps the earliest inserted copy of each event
+-- ============================================
+
+DELETE FROM hist_timeline t
+USING hist_timeline d
+WHERE t.event_key = d.event_key
+  AND (t.created_at, t.id) > (d.created_at, d.id);
+
+-- ============================================
+-- STEP 4: Enforce uniqueness
+-- ============================================
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_hist_timeline_event_key ON hist_timeline(event_key);
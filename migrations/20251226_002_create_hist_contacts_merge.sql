@@ -0,0 +1,149 @@
+-- Migration: Server-Side Merge for Historical Contact Imports
+-- Purpose: Let importers push raw mapped rows and reconcile them in one SQL call
+-- Date: 2025-12-26
+--
+-- Before: import_airtable.py downloaded every existing email/source pair,
+-- decided 'merged' vs 'airtable' in Python, then re-uploaded full records.
+-- Now: importers insert raw rows into hist_contacts_staging and call
+-- merge_hist_contacts_staging(batch_id, source), which returns the counts
+-- that go into hist_import_logs.
+
+-- ============================================
+-- STEP 1: Staging table (same data columns as hist_contacts, no PK)
+-- ============================================
+
+CREATE UNLOGGED TABLE IF NOT EXISTS hist_contacts_staging (
+    staged_row BIGSERIAL,
+    email TEXT NOT NULL,
+    first_name TEXT,
+    last_name TEXT,
+    phone TEXT,
+    source TEXT,
+    import_batch_id UUID NOT NULL,
+    ad_type TEXT,
+    trigger_word TEXT,
+    campaign_name TEXT,
+    reached_stage TEXT,
+    has_purchase BOOLEAN,
+    first_seen TIMESTAMPTZ,
+    last_seen TIMESTAMPTZ,
+    purchase_date TIMESTAMPTZ,
+    data_quality_notes TEXT,
+    is_suspicious BOOLEAN,
+    staged_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_hist_contacts_staging_batch ON hist_contacts_staging(import_batch_id);
+
+COMMENT ON TABLE hist_contacts_staging IS 'Raw mapped rows from historical importers, consumed by merge_hist_contacts_staging()';
+
+-- ============================================
+-- STEP 2: Merge routine
+-- ============================================
+-- Rules (import_airtable.py's old client-side logic; import_google_sheets.py
+-- used a plain upsert, see 20251226_008 for the flag that keeps it):
+-- 1. Most complete row wins per email (most non-null fields, first staged on ties)
+-- 2. If the email already exists from a different source, source = 'merged'
+--    and data_quality_notes records "Merged from <existing> and <source>"
+-- 3. Winning rows upsert into hist_contacts (all columns overwritten)
+-- 4. Staged rows for the batch are deleted
+
+CREATE OR REPLACE FUNCTION merge_hist_contacts_staging(p_batch_id UUID, p_source TEXT)
+RETURNS TABLE (
+    rows_staged INTEGER,
+    rows_unique INTEGER,
+    rows_inserted INTEGER,
+    rows_updated INTEGER,
+    rows_merged INTEGER
+)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_staged INTEGER;
+    v_unique INTEGER;
+    v_inserted INTEGER;
+    v_updated INTEGER;
+    v_merged INTEGER;
+BEGIN
+    SELECT COUNT(*) INTO v_staged
+    FROM hist_contacts_staging
+    WHERE import_batch_id = p_batch_id;
+
+    WITH best AS (
+        SELECT DISTINCT ON (s.email) s.*
+        FROM hist_contacts_staging s
+        WHERE s.import_batch_id = p_batch_id
+        ORDER BY
+            s.email,
+            num_nonnulls(
+                s.first_name, s.last_name, s.phone, s.source, s.ad_type, s.trigger_word,
+                s.campaign_name, s.reached_stage, s.has_purchase, s.first_seen, s.last_seen,
+                s.purchase_date, s.data_quality_notes, s.is_suspicious
+            ) DESC,
+            s.staged_row
+    ),
+    resolved AS (
+        SELECT
+            b.*,
+            (e.email IS NOT NULL AND e.source IS DISTINCT FROM COALESCE(b.source, p_source)) AS is_merge,
+            e.source AS existing_source,
+            e.data_quality_notes AS existing_notes
+        FROM best b
+        LEFT JOIN hist_contacts e ON e.email = b.email
+    ),
+    upserted AS (
+        INSERT INTO hist_contacts (
+            email, first_name, last_name, phone, source, import_batch_id,
+            ad_type, trigger_word, campaign_name, reached_stage, has_purchase,
+            first_seen, last_seen, purchase_date, data_quality_notes, is_suspicious
+        )
+        SELECT
+            r.email, r.first_name, r.last_name, r.phone,
+            CASE WHEN r.is_merge THEN 'merged' ELSE COALESCE(r.source, p_source) END,
+            r.import_batch_id,
+            r.ad_type, r.trigger_word, r.campaign_name, r.reached_stage,
+            COALESCE(r.has_purchase, FALSE),
+            r.first_seen, r.last_seen, r.purchase_date,
+            CASE
+                WHEN r.is_merge AND r.existing_source <> 'merged' THEN concat_ws(
+                    '; ', r.data_quality_notes,
+                    'Merged from ' || r.existing_source || ' and ' || COALESCE(r.source, p_source)
+                )
+                WHEN r.is_merge THEN COALESCE(r.data_quality_notes, r.existing_notes)
+                ELSE r.data_quality_notes
+            END,
+            COALESCE(r.is_suspicious, FALSE)
+        FROM resolved r
+        ON CONFLICT (email) DO UPDATE SET
+            first_name = EXCLUDED.first_name,
+            last_name = EXCLUDED.last_name,
+            phone = EXCLUDED.phone,
+            source = EXCLUDED.source,
+            import_batch_id = EXCLUDED.import_batch_id,
+            ad_type = EXCLUDED.ad_type,
+            trigger_word = EXCLUDED.trigger_word,
+            campaign_name = EXCLUDED.campaign_name,
+            reached_stage = EXCLUDED.reached_stage,
+            has_purchase = EXCLUDED.has_purchase,
+            first_seen = EXCLUDED.first_seen,
+            last_seen = EXCLUDED.last_seen,
+            purchase_date = EXCLUDED.purchase_date,
+            data_quality_notes = EXCLUDED.data_quality_notes,
+            is_suspicious = EXCLUDED.is_suspicious
+        RETURNING (xmax = 0) AS was_inserted, hist_contacts.source = 'merged' AS is_merged
+    )
+    SELECT
+        COUNT(*),
+        COUNT(*) FILTER (WHERE was_inserted),
+        COUNT(*) FILTER (WHERE NOT was_inserted),
+        COUNT(*) FILTER (WHERE is_merged AND NOT was_inserted)
+    INTO v_unique, v_inserted, v_updated, v_merged
+    FROM upserted;
+
+    DELETE FROM hist_contacts_staging WHERE import_batch_id = p_batch_id;
+
+    RETURN QUERY SELECT v_staged, v_unique, v_inserted, v_updated, v_merged;
+END;
+$$;
+
+COMMENT ON FUNCTION merge_hist_contacts_staging IS 'Dedupe staged historical contacts (most complete wins), apply merged-source rules, upsert into hist_contacts and return counts';
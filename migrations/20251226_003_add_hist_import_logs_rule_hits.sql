@@ -0,0 +1,11 @@
+-- Migration: Per-Rule Data-Quality Hit Counts on Import Logs
+-- Purpose: Record how often each suspicious-data rule fired in an import
+-- Date: 2025-12-26
+--
+-- The importers evaluate the declarative rule sets in scripts/hist_rules.py
+-- and store {rule_name: hit_count} here, e.g.
+--   {"future_first_seen": 0, "purchase_before_first_contact": 12, "test_email": 3}
+
+ALTER TABLE hist_import_logs ADD COLUMN IF NOT EXISTS rule_hits JSONB;
+
+COMMENT ON COLUMN hist_import_logs.rule_hits IS 'Per-rule suspicious-data hit counts from scripts/hist_rules.py';
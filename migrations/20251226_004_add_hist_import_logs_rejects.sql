@@ -0,0 +1,11 @@
+-- Migration: Reject Summaries on Import Logs
+-- Purpose: Store per-reason reject counts instead of one warning string per skipped row
+-- Date: 2025-12-26
+--
+-- Rejected rows are written to <source>.rejects.csv by scripts/hist_rejects.py;
+-- the log keeps only the file name, counts per reason code and a bounded sample, e.g.
+--   {"file": "export.rejects.csv", "counts": {"no_email": 5746}, "sample": ["Row 11: no_email", ...]}
+
+ALTER TABLE hist_import_logs ADD COLUMN IF NOT EXISTS rejects JSONB;
+
+COMMENT ON COLUMN hist_import_logs.rejects IS 'Reject file, per-reason reject counts and a sample from scripts/hist_rejects.py';
@@ -0,0 +1,15 @@
+-- Migration: Live Progress on Import Logs
+-- Purpose: Let long imports report per-stage progress while they run
+-- Date: 2025-12-26
+--
+-- scripts/hist_progress.py inserts the run's log row when an import starts
+-- (import_completed_at stays NULL until it finishes) and updates this column
+-- every few seconds, e.g.
+--   {"map": {"done": 40260, "total": 40260, "rows_per_sec": 5942.7, "elapsed_seconds": 6.77,
+--            "eta_seconds": 0.0, "finished": true},
+--    "write": {"done": 8000, "total": 19500, "rows_per_sec": 3710.2, "eta_seconds": 3.1, ...}}
+-- The final value doubles as per-stage timings for comparing runs.
+
+ALTER TABLE hist_import_logs ADD COLUMN IF NOT EXISTS progress JSONB;
+
+COMMENT ON COLUMN hist_import_logs.progress IS 'Per-stage rows done/total, rows/sec and ETA from scripts/hist_progress.py';
@@ -0,0 +1,36 @@
+-- Migration: Precomputed Rollups of the Unified Contact Build
+-- Purpose: Let reports read a few hundred summary rows instead of rescanning every contact
+-- Date: 2025-12-26
+--
+-- scripts/create_unified_contacts.py --push-rollups (or
+-- scripts/hist_rollups.py --push) replaces the contents of this table with
+-- the rollups of the latest build: one row per (dimension, value), e.g.
+--   ('trigger_word', 'HEAL', 412, 37, 8.98, 98210.00, ...)
+--   ('subscription_month', '2025-09', 1210, 88, 7.27, ...)
+--   ('all', 'all', 4162, 402, 9.66, ...)
+-- Missing dimension values are grouped under '(none)'.
+
+CREATE TABLE IF NOT EXISTS hist_rollups (
+    dimension TEXT NOT NULL, -- trigger_word, paid_vs_organic, platform, ab_test, source, subscription_month, payment_method, all
+    value TEXT NOT NULL,
+
+    contacts INTEGER NOT NULL,
+    purchasers INTEGER NOT NULL,
+    conversion_rate NUMERIC(6, 2), -- percent of contacts with a purchase
+
+    total_revenue NUMERIC(14, 2),
+    stripe_revenue NUMERIC(14, 2),
+    denefits_revenue NUMERIC(14, 2),
+    revenue_per_contact NUMERIC(12, 2),
+    revenue_per_purchaser NUMERIC(12, 2),
+
+    avg_days_to_purchase NUMERIC(8, 1),
+    min_days_to_purchase INTEGER,
+    max_days_to_purchase INTEGER,
+
+    built_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+
+    PRIMARY KEY (dimension, value)
+);
+
+COMMENT ON TABLE hist_rollups IS 'Revenue, conversion and days-to-purchase per dimension value from the latest unified contact build (scripts/hist_rollups.py)';
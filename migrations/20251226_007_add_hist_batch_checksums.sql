@@ -0,0 +1,64 @@
+-- Migration: Per-Batch Checksums for Import Verification
+-- Purpose: Verify an import by comparing a few aggregates per batch instead of re-querying every row
+-- Date: 2025-12-26
+--
+-- Importers record, per table they wrote, the row count and an order-independent
+-- hash of each row's key fields in hist_import_logs.checksums, e.g.
+--   {"hist_payments": {"rows": 19480, "hash": "9f1c0e5b2a7d4c31"},
+--    "hist_timeline": {"rows": 955, "hash": "03b7..."}}
+-- scripts/hist_checksums.py verify calls hist_batch_checksums() with the logged
+-- batch IDs and reports only the batches whose count or hash differ.
+--
+-- Row hash: first 16 hex digits of md5(key text) as a signed 64-bit integer.
+-- Batch hash: the sum of the row hashes (returned as text, reduced mod 2^64 by
+-- the caller), so it doesn't depend on row order. Key text per table:
+--   hist_contacts  email
+--   hist_payments  email|external_id|amount in cents
+--   hist_timeline  event_key
+
+ALTER TABLE hist_import_logs ADD COLUMN IF NOT EXISTS checksums JSONB;
+
+COMMENT ON COLUMN hist_import_logs.checksums IS 'Per-table row count and key hash written by the import, from scripts/hist_checksums.py';
+
+-- Per-batch aggregates read only the batch's rows
+CREATE INDEX IF NOT EXISTS idx_hist_contacts_import_batch ON hist_contacts(import_batch_id);
+CREATE INDEX IF NOT EXISTS idx_hist_payments_import_batch ON hist_payments(import_batch_id);
+CREATE INDEX IF NOT EXISTS idx_hist_timeline_import_batch ON hist_timeline(import_batch_id);
+
+CREATE OR REPLACE FUNCTION hist_key_hash(p_key TEXT)
+RETURNS BIGINT
+LANGUAGE sql
+IMMUTABLE
+AS $$
+    SELECT ('x' || substr(md5(p_key), 1, 16))::bit(64)::bigint;
+$$;
+
+CREATE OR REPLACE FUNCTION hist_batch_checksums(p_batch_ids UUID[])
+RETURNS TABLE (
+    import_batch_id UUID,
+    table_name TEXT,
+    row_count BIGINT,
+    key_hash TEXT
+)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT c.import_batch_id, 'hist_contacts', COUNT(*), SUM(hist_key_hash(c.email)::numeric)::text
+    FROM hist_contacts c
+    WHERE c.import_batch_id = ANY(p_batch_ids)
+    GROUP BY c.import_batch_id
+    UNION ALL
+    SELECT p.import_batch_id, 'hist_payments', COUNT(*), SUM(hist_key_hash(
+        concat_ws('|', p.email, COALESCE(p.external_id, ''), ROUND(p.amount * 100)::bigint)
+    )::numeric)::text
+    FROM hist_payments p
+    WHERE p.import_batch_id = ANY(p_batch_ids)
+    GROUP BY p.import_batch_id
+    UNION ALL
+    SELECT t.import_batch_id, 'hist_timeline', COUNT(*), SUM(hist_key_hash(t.event_key)::numeric)::text
+    FROM hist_timeline t
+    WHERE t.import_batch_id = ANY(p_batch_ids)
+    GROUP BY t.import_batch_id;
+$$;
+
+COMMENT ON FUNCTION hist_batch_checksums IS 'Row count and order-independent key hash per (import batch, hist_* table), compared with hist_import_logs.checksums';
@@ -0,0 +1,122 @@
+-- Migration: Optional 'merged' Source Rule in the Contact Merge
+-- Purpose: Let Google Sheets imports keep their plain upsert semantics
+-- Date: 2025-12-26
+--
+-- merge_hist_contacts_staging() (20251226_002) marks a contact 'merged' when
+-- its email already exists from another source. That was import_airtable.py's
+-- old client-side rule. import_google_sheets.py used to upsert with
+-- source = 'google_sheets' and no notes, so routing it through the merge turned
+-- Airtable contacts into 'merged' rows on every Sheets re-import.
+--
+-- p_mark_merged (default TRUE, so existing callers are unchanged) switches
+-- rule 2 off: the winning row upserts with its own source and notes.
+--   import_airtable.py       -> merge_hist_contacts_staging(batch, 'airtable')
+--   import_google_sheets.py  -> merge_hist_contacts_staging(batch, 'google_sheets', FALSE)
+
+-- The two-argument version would make two-argument calls ambiguous
+DROP FUNCTION IF EXISTS merge_hist_contacts_staging(UUID, TEXT);
+
+CREATE OR REPLACE FUNCTION merge_hist_contacts_staging(
+    p_batch_id UUID,
+    p_source TEXT,
+    p_mark_merged BOOLEAN DEFAULT TRUE
+)
+RETURNS TABLE (
+    rows_staged INTEGER,
+    rows_unique INTEGER,
+    rows_inserted INTEGER,
+    rows_updated INTEGER,
+    rows_merged INTEGER
+)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_staged INTEGER;
+    v_unique INTEGER;
+    v_inserted INTEGER;
+    v_updated INTEGER;
+    v_merged INTEGER;
+BEGIN
+    SELECT COUNT(*) INTO v_staged
+    FROM hist_contacts_staging
+    WHERE import_batch_id = p_batch_id;
+
+    WITH best AS (
+        SELECT DISTINCT ON (s.email) s.*
+        FROM hist_contacts_staging s
+        WHERE s.import_batch_id = p_batch_id
+        ORDER BY
+            s.email,
+            num_nonnulls(
+                s.first_name, s.last_name, s.phone, s.source, s.ad_type, s.trigger_word,
+                s.campaign_name, s.reached_stage, s.has_purchase, s.first_seen, s.last_seen,
+                s.purchase_date, s.data_quality_notes, s.is_suspicious
+            ) DESC,
+            s.staged_row
+    ),
+    resolved AS (
+        SELECT
+            b.*,
+            (p_mark_merged AND e.email IS NOT NULL
+             AND e.source IS DISTINCT FROM COALESCE(b.source, p_source)) AS is_merge,
+            e.source AS existing_source,
+            e.data_quality_notes AS existing_notes
+        FROM best b
+        LEFT JOIN hist_contacts e ON e.email = b.email
+    ),
+    upserted AS (
+        INSERT INTO hist_contacts (
+            email, first_name, last_name, phone, source, import_batch_id,
+            ad_type, trigger_word, campaign_name, reached_stage, has_purchase,
+            first_seen, last_seen, purchase_date, data_quality_notes, is_suspicious
+        )
+        SELECT
+            r.email, r.first_name, r.last_name, r.phone,
+            CASE WHEN r.is_merge THEN 'merged' ELSE COALESCE(r.source, p_source) END,
+            r.import_batch_id,
+            r.ad_type, r.trigger_word, r.campaign_name, r.reached_stage,
+            COALESCE(r.has_purchase, FALSE),
+            r.first_seen, r.last_seen, r.purchase_date,
+            CASE
+                WHEN r.is_merge AND r.existing_source <> 'merged' THEN concat_ws(
+                    '; ', r.data_quality_notes,
+                    'Merged from ' || r.existing_source || ' and ' || COALESCE(r.source, p_source)
+                )
+                WHEN r.is_merge THEN COALESCE(r.data_quality_notes, r.existing_notes)
+                ELSE r.data_quality_notes
+            END,
+            COALESCE(r.is_suspicious, FALSE)
+        FROM resolved r
+        ON CONFLICT (email) DO UPDATE SET
+            first_name = EXCLUDED.first_name,
+            last_name = EXCLUDED.last_name,
+            phone = EXCLUDED.phone,
+            source = EXCLUDED.source,
+            import_batch_id = EXCLUDED.import_batch_id,
+            ad_type = EXCLUDED.ad_type,
+            trigger_word = EXCLUDED.trigger_word,
+            campaign_name = EXCLUDED.campaign_name,
+            reached_stage = EXCLUDED.reached_stage,
+            has_purchase = EXCLUDED.has_purchase,
+            first_seen = EXCLUDED.first_seen,
+            last_seen = EXCLUDED.last_seen,
+            purchase_date = EXCLUDED.purchase_date,
+            data_quality_notes = EXCLUDED.data_quality_notes,
+            is_suspicious = EXCLUDED.is_suspicious
+        RETURNING (xmax = 0) AS was_inserted, hist_contacts.source = 'merged' AS is_merged
+    )
+    SELECT
+        COUNT(*),
+        COUNT(*) FILTER (WHERE was_inserted),
+        COUNT(*) FILTER (WHERE NOT was_inserted),
+        COUNT(*) FILTER (WHERE is_merged AND NOT was_inserted)
+    INTO v_unique, v_inserted, v_updated, v_merged
+    FROM upserted;
+
+    DELETE FROM hist_contacts_staging WHERE import_batch_id = p_batch_id;
+
+    RETURN QUERY SELECT v_staged, v_unique, v_inserted, v_updated, v_merged;
+END;
+$$;
+
+COMMENT ON FUNCTION merge_hist_contacts_staging IS 'Dedupe staged historical contacts (most complete wins), apply merged-source rules (unless p_mark_merged is false), upsert into hist_contacts and return counts';
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Per-Batch Checksums for Import Verification
+
+Checking an import meant running the SELECT * queries from
+VERIFICATION_QUERIES.md, full scans on big tables. Instead:
+
+1. Each importer computes, per table it wrote, the row count and an
+   order-independent hash of the rows' key fields from the records it sent,
+   and stores them in hist_import_logs.checksums
+   (migrations/20251226_007_add_hist_batch_checksums.sql)
+2. `verify` asks the database for the same two aggregates per
+   import_batch_id (hist_batch_checksums(), one call per VERIFY_CHUNK
+   batches) and reports only the batches that differ
+
+The data read back is a few values per batch, however many rows it has.
+
+Row hash = first 16 hex digits of md5(key text) as a 64-bit integer; batch
+hash = sum of the row hashes mod 2^64, so row order doesn't matter. Key text:
+    hist_contacts  email                              (one row per email)
+    hist_payments  email|external_id|amount in cents
+    hist_timeline  event_key                          (only events this batch inserted)
+
+hist_contacts rows are upserted on email, so a later import of the same
+emails takes them over (their import_batch_id changes) and the earlier
+batch verifies short. verify points this out; it is not data loss.
+
+Usage (from an importer):
+    from hist_checksums import keys_checksum, table_checksum
+
+    checksums = {'hist_payments': table_checksum('hist_payments', payment_records)}
+    checksums['hist_timeline'] = keys_checksum(written_event_keys)
+    # or, chunk by chunk: total = add_checksums(total, keys_checksum(chunk_keys))
+    log_entry['checksums'] = checksums
+
+    python scripts/hist_checksums.py verify                    # every batch with checksums
+    python scripts/hist_checksums.py verify --last 5 --direct-db
+    python scripts/hist_checksums.py verify --batch 2d943fa0-f50e-4bf3-b247-05956d2cd2e8
+"""
+
+import hashlib
+import sys
+from typing import Dict, Iterable, List, Optional
+
+from hist_copy import is_missing
+
+CHECKSUM_TABLES = ['hist_contacts', 'hist_payments', 'hist_timeline']
+VERIFY_FUNCTION = 'hist_batch_checksums'
+LOG_TABLE = 'hist_import_logs'
+
+# Batch IDs per hist_batch_checksums() call
+VERIFY_CHUNK = 200
+
+_MOD = 1 << 64
+
+
+# =============================================================================
+# LOCAL CHECKSUMS
+# =============================================================================
+
+def _text(value) -> str:
+    """Key field as the database stores it (missing → '')."""
+    if is_missing(value):  # None / NaN / NaT / pd.NA
+        return ''
+    return str(value)
+
+
+def _cents(record: Dict) -> int:
+    if record.get('amount_cents') is not None:
+        return int(record['amount_cents'])
+    return int(round(float(record['amount']) * 100))
+
+
+def record_key(table: str, record: Dict) -> str:
+    """The key text hist_batch_checksums() hashes for one row of `table`."""
+    if table == 'hist_contacts':
+        return _text(record.get('email'))
+    if table == 'hist_payments':
+        return f"{_text(record.get('email'))}|{_text(record.get('external_id'))}|{_cents(record)}"
+    if table == 'hist_timeline':
+        return _text(record.get('event_key'))
+    raise ValueError(f"No checksum key for table {table}")
+
+
+def key_hash(keys: Iterable[str]) -> int:
+    """Order-independent hash of key texts (sum of 64-bit md5 prefixes mod 2^64)."""
+    total = 0
+    for key in keys:
+        total += int(hashlib.md5(key.encode('utf-8')).hexdigest()[:16], 16)
+    return total % _MOD
+
+
+def table_checksum(table: str, records: Iterable[Dict]) -> Dict:
+    """
+    {'rows': n, 'hash': '16 hex digits'} for the rows `records` leave in
+    `table`. hist_contacts records count once per email (the upsert keeps one).
+    """
+    keys = [record_key(table, record) for record in records]
+    if table == 'hist_contacts':
+        keys = list(dict.fromkeys(keys))
+    return keys_checksum(keys)
+
+
+def keys_checksum(keys: List[str]) -> Dict:
+    """Checksum of already-built key texts, e.g. the event_keys a timeline write inserted."""
+    return {'rows': len(keys), 'hash': f"{key_hash(keys):016x}"}
+
+
+def add_checksums(total: Optional[Dict], part: Dict) -> Dict:
+    """Running checksum over chunks: the checksum of both key sets (row hashes add up)."""
+    if total is None:
+        return dict(part)
+    return {
+        'rows': total['rows'] + part['rows'],
+        'hash': f"{(int(total['hash'], 16) + int(part['hash'], 16)) % _MOD:016x}",
+    }
+
+
+# =============================================================================
+# DATABASE CHECKSUMS
+# =============================================================================
+
+def _db_checksums(rows: Iterable) -> Dict[str, Dict[str, Dict]]:
+    """(batch id, table, count, hash sum text) rows → {batch: {table: checksum}}"""
+    result: Dict[str, Dict[str, Dict]] = {}
+    for batch_id, table, count, hash_sum in rows:
+        result.setdefault(str(batch_id), {})[table] = {
+            'rows': int(count),
+            'hash': f"{int(hash_sum) % _MOD:016x}",
+        }
+    return result
+
+
+def fetch_db_checksums_rest(supabase, batch_ids: List[str]) -> Dict[str, Dict[str, Dict]]:
+    rows = []
+    for i in range(0, len(batch_ids), VERIFY_CHUNK):
+        response = supabase.rpc(VERIFY_FUNCTION, {'p_batch_ids': batch_ids[i:i + VERIFY_CHUNK]}).execute()
+        rows.extend((r['import_batch_id'], r['table_name'], r['row_count'], r['key_hash']) for r in response.data)
+    return _db_checksums(rows)
+
+
+def fetch_db_checksums_direct(conn, batch_ids: List[str]) -> Dict[str, Dict[str, Dict]]:
+    rows = []
+    with conn.cursor() as cur:
+        for i in range(0, len(batch_ids), VERIFY_CHUNK):
+            cur.execute(f"SELECT * FROM {VERIFY_FUNCTION}(%s::uuid[])", (batch_ids[i:i + VERIFY_CHUNK],))
+            rows.extend(cur.fetchall())
+    return _db_checksums(rows)
+
+
+def fetch_logged_batches_rest(supabase, batch_ids: Optional[List[str]] = None,
+                              last: Optional[int] = None) -> List[Dict]:
+    query = supabase.table(LOG_TABLE).select('id, source_file, import_completed_at, checksums') \
+        .not_.is_('checksums', 'null').order('import_completed_at', desc=True)
+    if batch_ids:
+        query = query.in_('id', batch_ids)
+    if last:
+        query = query.limit(last)
+    return query.execute().data
+
+
+def fetch_logged_batches_direct(conn, batch_ids: Optional[List[str]] = None,
+                                last: Optional[int] = None) -> List[Dict]:
+    where = "checksums IS NOT NULL"
+    params: list = []
+    if batch_ids:
+        where += " AND id = ANY(%s::uuid[])"
+        params.append(batch_ids)
+    limit = ''
+    if last:
+        limit = ' LIMIT %s'
+        params.append(last)
+    with conn.cursor() as cur:
+        cur.execute(f"SELECT id, source_file, import_completed_at, checksums FROM {LOG_TABLE} "
+                    f"WHERE {where} ORDER BY import_completed_at DESC NULLS LAST{limit}", params)
+        return [
+            {'id': str(batch_id), 'source_file': source_file, 'import_completed_at': completed, 'checksums': checksums}
+            for batch_id, source_file, completed, checksums in cur.fetchall()
+        ]
+
+
+# =============================================================================
+# VERIFY
+# =============================================================================
+
+def compare_batch(expected: Dict[str, Dict], actual: Dict[str, Dict]) -> List[str]:
+    """Differences between a batch's logged and database checksums, one line per table."""
+    problems = []
+    for table in CHECKSUM_TABLES:
+        if table not in expected:
+            continue
+        want = expected[table]
+        have = actual.get(table, {'rows': 0, 'hash': f"{0:016x}"})
+        if want == have:
+            continue
+        if have['rows'] != want['rows']:
+            line = f"{table}: {have['rows']:,} rows in the database, {want['rows']:,} imported"
+            if table == 'hist_contacts' and have['rows'] < want['rows']:
+                line += " (fewer: a later import may have taken over some emails)"
+        else:
+            line = f"{table}: same row count ({want['rows']:,}), key hash {have['hash']} ≠ {want['hash']}"
+        problems.append(line)
+    return problems
+
+
+def verify_batches(direct_db: bool = False, batch_ids: Optional[List[str]] = None,
+                   last: Optional[int] = None) -> int:
+    """Compare logged checksums with the database; prints mismatching batches, returns their count."""
+    print(f"\n{'='*60}")
+    print("VERIFYING IMPORT BATCHES BY CHECKSUM")
+    print(f"{'='*60}\n")
+
+    if direct_db:
+        from hist_copy import connect_direct
+        with connect_direct() as conn:
+            logged = fetch_logged_batches_direct(conn, batch_ids, last)
+            actual = fetch_db_checksums_direct(conn, [b['id'] for b in logged]) if logged else {}
+    else:
+        from hist_supabase import create_supabase_client
+        supabase = create_supabase_client()
+        logged = fetch_logged_batches_rest(supabase, batch_ids, last)
+        actual = fetch_db_checksums_rest(supabase, [b['id'] for b in logged]) if logged else {}
+
+    if not logged:
+        print("No import batches with checksums found.\n")
+        return 0
+
+    mismatched = 0
+    for batch in logged:
+        problems = compare_batch(batch['checksums'], actual.get(batch['id'], {}))
+        if not problems:
+            continue
+        mismatched += 1
+        print(f"❌ {batch['id']}  {batch['source_file']}  ({batch['import_completed_at']})")
+        for problem in problems:
+            print(f"     {problem}")
+
+    tables = sum(len(b['checksums']) for b in logged)
+    if mismatched:
+        print(f"\n⚠️  {mismatched} of {len(logged)} batches differ ({tables} table checksums compared)\n")
+    else:
+        print(f"✅ All {len(logged)} batches match ({tables} table checksums compared)\n")
+    return mismatched
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Verify imports against their logged per-batch checksums')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    verify = subparsers.add_parser('verify', help='Compare logged checksums with the database, per batch')
+    verify.add_argument('--batch', action='append', metavar='ID', help='Only this import batch (repeatable)')
+    verify.add_argument('--last', type=int, metavar='N', help='Only the N most recent batches')
+    verify.add_argument('--direct-db', action='store_true',
+                        help='Query Postgres directly (needs SUPABASE_DB_URL) instead of the REST API')
+    args = parser.parse_args()
+
+    sys.exit(1 if verify_batches(direct_db=args.direct_db, batch_ids=args.batch, last=args.last) else 0)
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Column-Wise Funnel Stage and Ad-Type Classification
+
+The importers used to classify every row on its own: infer_reached_stage()
+probed `any(row.get(field) ...)` field by field, and extract_ad_attribution()
+ran substring checks ('paid', 'ad', 'facebook', ...) per row. Both are now
+computed once per loaded frame:
+
+- Stage: one truthy mask per field group, then a priority-ordered np.select
+  (first matching stage wins, default 'contacted')
+- Ad type: the first non-empty attribution source column, matched against
+  one compiled regex per ad type (first matching type wins)
+
+Importers store the results in the private columns STAGE_COLUMN and
+AD_TYPE_COLUMN before mapping, and the per-row mappers read them from there.
+The per-row helpers (reached_stage_for_row, ad_type_for_value) use the same
+tables for mappers called on their own.
+
+Configuration:
+    The tables below are the defaults. To change them without editing code,
+    point HIST_CLASSIFIER_CONFIG at a JSON file with any of:
+        {"stage_rules": [["purchased", ["purchase_date", "has_purchase"]], ...],
+         "default_stage": "contacted",
+         "ad_type_keywords": {"paid": ["paid", "ad"], "organic": ["organic"]}}
+
+Benchmark (column-wise vs. the old per-row functions):
+    python scripts/hist_classify.py --benchmark --rows 200000
+"""
+
+import json
+import os
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+STAGE_COLUMN = '_reached_stage'
+AD_TYPE_COLUMN = '_ad_type'
+
+# Highest stage first; a row gets the first stage whose fields are set
+STAGE_RULES: List[Tuple[str, List[str]]] = [
+    ('purchased', ['purchase_date', 'has_purchase']),
+    ('attended', ['meeting_held', 'attended', 'showed_up', 'attended_date']),
+    ('booked', ['meeting_booked', 'booked', 'booking_date', 'appointment_date']),
+    ('qualified', ['qualified', 'dm_qualified', 'q1', 'q2', 'symptoms']),
+]
+DEFAULT_STAGE = 'contacted'
+
+# Checked in order; substring match, case-insensitive
+AD_TYPE_KEYWORDS: Dict[str, List[str]] = {
+    'paid': ['paid', 'ad', 'facebook', 'meta'],
+    'organic': ['organic', 'free', 'direct'],
+}
+
+# Airtable columns that may hold the traffic source, in order of preference
+AD_SOURCE_COLUMNS = ['ad_type', 'Ad Type', 'Traffic Source', 'traffic_source', 'Source']
+
+
+def _load_config():
+    """Apply HIST_CLASSIFIER_CONFIG overrides to the module tables."""
+    global STAGE_RULES, DEFAULT_STAGE, AD_TYPE_KEYWORDS
+    path = os.getenv('HIST_CLASSIFIER_CONFIG')
+    if not path:
+        return
+    with open(path) as f:
+        config = json.load(f)
+    if 'stage_rules' in config:
+        STAGE_RULES = [(stage, list(fields)) for stage, fields in config['stage_rules']]
+    DEFAULT_STAGE = config.get('default_stage', DEFAULT_STAGE)
+    if 'ad_type_keywords' in config:
+        AD_TYPE_KEYWORDS = {k: list(v) for k, v in config['ad_type_keywords'].items()}
+
+
+_load_config()
+
+
+# =============================================================================
+# MASK HELPERS
+# =============================================================================
+
+def is_set(value) -> bool:
+    """
+    Per-row truthiness, as the old `row.get(field)` checks: '', False and 0
+    are not set, any other text (including 'no' or 'false') is. Missing
+    values (None / NaN / pd.NA) are not set.
+    """
+    if value is None or (pd.api.types.is_scalar(value) and pd.isna(value)):
+        return False
+    return bool(value)
+
+
+def _map_distinct(column: pd.Series, func) -> np.ndarray:
+    """
+    Apply `func` to each distinct value of `column` and broadcast the results
+    back. Export columns repeat a handful of values, so this is a hash pass
+    plus a few Python calls instead of one call per row.
+    """
+    codes, distinct = pd.factorize(column, use_na_sentinel=True)
+    results = np.array([func(value) for value in distinct] + [func(None)], dtype=object)
+    return results[codes]  # code -1 (missing) picks the trailing func(None)
+
+
+def set_mask(df: pd.DataFrame, fields: Sequence[str]) -> np.ndarray:
+    """True where any of `fields` (that exist in df) is set, same rules as is_set()."""
+    mask = np.zeros(len(df), dtype=bool)
+    for field in fields:
+        if field not in df.columns:
+            continue
+        column = df[field]
+        if pd.api.types.is_bool_dtype(column) or pd.api.types.is_numeric_dtype(column):
+            mask |= column.fillna(0).astype(bool).to_numpy()
+        elif pd.api.types.is_datetime64_any_dtype(column):
+            mask |= column.notna().to_numpy()
+        else:
+            mask |= _map_distinct(column, is_set).astype(bool)
+    return mask
+
+
+def first_set_value(df: pd.DataFrame, columns: Sequence[str]) -> pd.Series:
+    """Column-wise `row.get(a) or row.get(b) or ...`: first set value per row, else None."""
+    result = np.full(len(df), None, dtype=object)
+    missing = np.ones(len(df), dtype=bool)
+    for column in columns:
+        if column not in df.columns:
+            continue
+        take = missing & set_mask(df, [column])
+        result[take] = df[column].to_numpy(dtype=object)[take]
+        missing &= ~take
+    return pd.Series(result, index=df.index, dtype=object)
+
+
+# =============================================================================
+# STAGE
+# =============================================================================
+
+def infer_reached_stages(
+    df: pd.DataFrame,
+    stage_rules: Optional[List[Tuple[str, List[str]]]] = None,
+    default_stage: Optional[str] = None,
+) -> pd.Series:
+    """Furthest stage per row as a priority-ordered select over field masks."""
+    stage_rules = stage_rules if stage_rules is not None else STAGE_RULES
+    default_stage = default_stage if default_stage is not None else DEFAULT_STAGE
+    if not stage_rules:
+        return pd.Series(default_stage, index=df.index, dtype=object)
+    conditions = [set_mask(df, fields) for _, fields in stage_rules]
+    stages = [stage for stage, _ in stage_rules]
+    return pd.Series(np.select(conditions, stages, default=default_stage), index=df.index, dtype=object)
+
+
+def reached_stage_for_row(row: Dict, stage_rules: Optional[List[Tuple[str, List[str]]]] = None) -> str:
+    """Per-row equivalent of infer_reached_stages() for mappers called on their own."""
+    for stage, fields in (stage_rules if stage_rules is not None else STAGE_RULES):
+        if any(is_set(row.get(field)) for field in fields):
+            return stage
+    return DEFAULT_STAGE
+
+
+# =============================================================================
+# AD TYPE
+# =============================================================================
+
+def compile_ad_type_patterns(keywords: Optional[Dict[str, List[str]]] = None) -> List[Tuple[str, re.Pattern]]:
+    """One case-insensitive alternation regex per ad type, in table order."""
+    keywords = keywords if keywords is not None else AD_TYPE_KEYWORDS
+    return [
+        (ad_type, re.compile('|'.join(re.escape(word) for word in words), re.IGNORECASE))
+        for ad_type, words in keywords.items() if words
+    ]
+
+
+def classify_ad_types(
+    df: pd.DataFrame,
+    source_columns: Sequence[str] = AD_SOURCE_COLUMNS,
+    keywords: Optional[Dict[str, List[str]]] = None,
+) -> pd.Series:
+    """ad_type per row ('paid' / 'organic' / ...), None when the source is empty or unmatched."""
+    source = first_set_value(df, source_columns)
+    patterns = compile_ad_type_patterns(keywords)
+
+    def classify(value):
+        if value is None:
+            return None
+        text = str(value)
+        for ad_type, pattern in patterns:
+            if pattern.search(text):
+                return ad_type
+        return None
+
+    return pd.Series(_map_distinct(source, classify), index=df.index, dtype=object)
+
+
+def ad_type_for_value(value, keywords: Optional[Dict[str, List[str]]] = None) -> Optional[str]:
+    """Per-row equivalent of classify_ad_types() for one source value."""
+    if not is_set(value):
+        return None
+    for ad_type, pattern in compile_ad_type_patterns(keywords):
+        if pattern.search(str(value)):
+            return ad_type
+    return None
+
+
+# =============================================================================
+# BENCHMARK
+# =============================================================================
+
+def _legacy_infer_reached_stage(row: Dict) -> str:
+    """The old per-row import_google_sheets.infer_reached_stage, kept for comparison."""
+    if row.get('purchase_date') or row.get('has_purchase'):
+        return 'purchased'
+    if any(row.get(f) for f in ['meeting_held', 'attended', 'showed_up', 'attended_date']):
+        return 'attended'
+    if any(row.get(f) for f in ['meeting_booked', 'booked', 'booking_date', 'appointment_date']):
+        return 'booked'
+    if any(row.get(f) for f in ['qualified', 'dm_qualified', 'q1', 'q2', 'symptoms']):
+        return 'qualified'
+    return 'contacted'
+
+
+def _legacy_ad_type(row: Dict) -> Optional[str]:
+    """The old per-row ad_type branch of import_airtable.extract_ad_attribution."""
+    ad_type = (row.get('ad_type') or row.get('Ad Type') or row.get('Traffic Source') or
+               row.get('traffic_source') or row.get('Source'))
+    if ad_type:
+        ad_type = str(ad_type).lower()
+        if 'paid' in ad_type or 'ad' in ad_type or 'facebook' in ad_type or 'meta' in ad_type:
+            return 'paid'
+        elif 'organic' in ad_type or 'free' in ad_type or 'direct' in ad_type:
+            return 'organic'
+    return None
+
+
+def _synthetic_frame(rows: int, seed: int = 7) -> pd.DataFrame:
+    """Rows shaped like the exports: sparse stage fields, mixed traffic sources."""
+    rng = np.random.default_rng(seed)
+
+    def sparse(values, fill):
+        return np.where(rng.random(rows) < fill, rng.choice(values, rows), None)
+
+    return pd.DataFrame({
+        'purchase_date': sparse(['2025-01-03', '2025-02-11'], 0.05),
+        'attended': sparse([True], 0.08),
+        'booking_date': sparse(['2025-01-01'], 0.10),
+        'symptoms': sparse(['fatigue', 'brain fog'], 0.40),
+        'q1': sparse(['yes'], 0.20),
+        'Traffic Source': sparse(['Facebook Ads', 'Meta', 'Organic', 'direct', 'Referral'], 0.7),
+    }).astype(object)
+
+
+def run_benchmark(rows: int):
+    import time
+
+    df = _synthetic_frame(rows)
+    records = df.where(df.notna(), None).to_dict('records')
+    print(f"Classifying {rows:,} rows\n")
+
+    timings = {}
+    start = time.perf_counter()
+    legacy_stage = [_legacy_infer_reached_stage(r) for r in records]
+    timings['stage per-row'] = time.perf_counter() - start
+    start = time.perf_counter()
+    stages = infer_reached_stages(df)
+    timings['stage column-wise'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    legacy_ad = [_legacy_ad_type(r) for r in records]
+    timings['ad_type per-row'] = time.perf_counter() - start
+    start = time.perf_counter()
+    ad_types = classify_ad_types(df)
+    timings['ad_type column-wise'] = time.perf_counter() - start
+
+    for name, seconds in timings.items():
+        print(f"  {name:<22} {seconds:8.3f}s  {rows / seconds:>14,.0f} rows/s")
+
+    print(f"\n  stage speedup:   {timings['stage per-row'] / timings['stage column-wise']:.1f}x")
+    print(f"  ad_type speedup: {timings['ad_type per-row'] / timings['ad_type column-wise']:.1f}x")
+    stage_diff = int((stages.to_numpy() != np.array(legacy_stage, dtype=object)).sum())
+    ad_diff = int(sum(a != b for a, b in zip(ad_types.tolist(), legacy_ad)))
+    print(f"  rows classified differently: stage {stage_diff}, ad_type {ad_diff}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark column-wise stage / ad-type classification')
+    parser.add_argument('--benchmark', action='store_true', help='Compare against the old per-row functions')
+    parser.add_argument('--rows', type=int, default=200000, help='Synthetic rows to classify')
+    args = parser.parse_args()
+
+    if args.benchmark:
+        run_benchmark(args.rows)
+    else:
+        parser.print_help()
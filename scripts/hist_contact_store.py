@@ -0,0 +1,774 @@
+#!/usr/bin/env python3
+"""
+Columnar Contact Store for the Unified Contact Build
+
+create_unified_contacts.py kept every contact as a Python dict with up to ~40
+string keys, many of them added lazily (`if 'stripe_payments' not in
+contact`), and walked every source with iterrows(). At a few million contacts
+the per-dict overhead dominated RAM. ContactStore keeps one typed array per
+field instead, with rows addressed through a dense email index:
+
+- index: normalized email → row number (0..n-1, in first-seen order)
+- text fields (names, phone, IDs): object arrays, None when missing
+- low-cardinality fields (stage, trigger word, source, ...): int32 codes into
+  a per-column category list, -1 when missing
+- money: float64 (NaN when missing); counts: int32; dates: datetime64[ns]
+
+The merge and enrichment rules are column-wise passes over each source frame:
+
+1. add_google_main      - first row per email creates the contact
+2. merge_airtable       - first row per new email creates the contact; every
+                          other row enriches (IDs overwrite, trigger word /
+                          paid vs organic fill gaps) and marks source 'merged'
+3. enrich_google_simple - fills missing thread_id / ad_id
+4. link_stripe          - payment count, revenue, first/last date, package
+5. link_denefits        - contract count, revenue, first sign-up, status
+6. unified_frame        - derived metrics, output column order, sorted by
+                          total_revenue descending (ties in first-seen order)
+
+build_unified() runs all six over {source name: frame}.
+
+Usage:
+    from hist_contact_store import build_unified
+
+    df_unified, counts = build_unified({'google_main': df_google_main, 'airtable': df_airtable,
+                                        'google_simple': df_google_simple, 'stripe': df_stripe,
+                                        'denefits': df_denefits})
+
+    # or stage by stage
+    store = ContactStore()
+    add_google_main(store, df_google_main)
+    ...
+    df_unified = unified_frame(store)
+
+Peak memory of the old dict-per-contact representation vs this store, each
+in its own process, on synthetic contacts:
+    python scripts/hist_contact_store.py --benchmark 1000000 5000000
+"""
+
+import os
+import sys
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Field → storage kind. Derived metrics (total_revenue, has_purchase,
+# purchase_date, payment_method, days_to_purchase) are computed by unified_frame()
+CONTACT_FIELDS = {
+    'email': 'text',
+    'first_name': 'text',
+    'last_name': 'text',
+    'phone': 'text',
+    'instagram': 'text',
+    'facebook': 'text',
+    'mc_id': 'text',
+    'ghl_id': 'text',
+    'user_id': 'text',
+    'thread_id': 'text',
+    'ad_id': 'text',
+    'subscription_date': 'date',
+    'trigger_word': 'category',
+    'paid_vs_organic': 'category',
+    'platform': 'category',
+    'stage': 'category',
+    'symptoms': 'category',
+    'months_pp': 'category',
+    'objections': 'category',
+    'ab_test': 'category',
+    'sent_link': 'category',
+    'clicked_link': 'category',
+    'booked': 'category',
+    'attended': 'category',
+    'total_purchased_google': 'float',
+    'airtable_purchase_date': 'date',
+    'stripe_payments': 'count',
+    'stripe_revenue': 'float',
+    'stripe_first_payment': 'date',
+    'stripe_last_payment': 'date',
+    'stripe_package': 'category',
+    'denefits_contracts': 'count',
+    'denefits_revenue': 'float',
+    'denefits_signup_date': 'date',
+    'denefits_status': 'category',
+    'source': 'category',
+    'first_seen': 'position',
+}
+
+UNIFIED_COLUMNS = [
+    'email', 'first_name', 'last_name', 'phone', 'instagram', 'facebook',
+    'mc_id', 'ghl_id', 'user_id', 'thread_id', 'ad_id',
+    'subscription_date', 'trigger_word', 'paid_vs_organic', 'platform', 'stage',
+    'symptoms', 'months_pp', 'objections', 'ab_test',
+    'sent_link', 'clicked_link', 'booked', 'attended',
+    'has_purchase', 'purchase_date', 'payment_method', 'total_revenue',
+    'stripe_payments', 'stripe_revenue', 'stripe_first_payment', 'stripe_last_payment', 'stripe_package',
+    'denefits_contracts', 'denefits_revenue', 'denefits_signup_date', 'denefits_status',
+    'days_to_purchase', 'source',
+]
+
+_DTYPES = {'text': object, 'category': np.int32, 'float': np.float64, 'count': np.int32, 'date': 'datetime64[ns]',
+           'position': np.int64}
+_FILL = {'text': None, 'category': -1, 'float': np.nan, 'count': 0, 'date': np.datetime64('NaT', 'ns'),
+         'position': -1}
+
+# The five exports, in build order. A contact's first_seen is
+# SOURCE_ORDER.index(source) * FIRST_SEEN_STRIDE + its row in that export, so
+# "first seen" means the same thing however the rows were split up
+SOURCE_ORDER = ['google_main', 'airtable', 'google_simple', 'stripe', 'denefits']
+FIRST_SEEN_STRIDE = 1 << 40
+
+STRIPE_PAID_STATUS = 'Paid'
+DENEFITS_STATUSES = ['Active', 'Completed']
+
+INITIAL_CAPACITY = 1024
+
+# Arrays grow by this factor when full (each growth briefly holds old + new)
+GROWTH = 1.5
+
+
+# =============================================================================
+# COLUMN HELPERS
+# =============================================================================
+
+def column(df: pd.DataFrame, name: str) -> pd.Series:
+    """df[name], or an all-missing column when the export doesn't have it."""
+    if name in df.columns:
+        return df[name]
+    return pd.Series(np.nan, index=df.index, dtype=object)
+
+
+def normalize_emails(values: pd.Series) -> pd.Series:
+    """Stripped, lowercased emails; NaN where missing or without an '@'."""
+    text = values.astype(object).where(values.notna(), '').astype(str).str.strip().str.lower()
+    return text.where(text.str.contains('@', regex=False)).astype(object)
+
+
+def normalize_phones(values: pd.Series) -> pd.Series:
+    """Digits only; NaN when fewer than 10 digits."""
+    text = values.astype(object).where(values.notna(), '').astype(str)
+    digits = text.str.replace(r'\D', '', regex=True)
+    return digits.where(digits.str.len() >= 10).astype(object)
+
+
+def parse_dates(values: pd.Series) -> pd.Series:
+    """Flexible date parsing; unparseable → NaT, offsets converted to naive UTC."""
+    parsed = pd.to_datetime(values, errors='coerce', format='mixed', utc=True)
+    return parsed.dt.tz_localize(None).astype('datetime64[ns]')
+
+
+def amounts(values: pd.Series) -> pd.Series:
+    """Money column as float; anything unparseable counts as 0."""
+    return pd.to_numeric(values, errors='coerce').fillna(0.0).astype('float64')
+
+
+def filter_source(source: str, df: pd.DataFrame) -> pd.DataFrame:
+    """Only successful Stripe charges and active/completed Denefits contracts count."""
+    if source == 'stripe' and not df.empty:
+        return df[column(df, 'Status') == STRIPE_PAID_STATUS]
+    if source == 'denefits' and not df.empty:
+        return df[column(df, 'Payment Plan Status').isin(DENEFITS_STATUSES)]
+    return df
+
+
+def source_emails(source: str, df: pd.DataFrame) -> pd.Series:
+    """The normalized email each row of an export is matched on."""
+    if source in ('google_main', 'google_simple'):
+        return normalize_emails(column(df, 'Email Address'))
+    if source == 'airtable':
+        return normalize_emails(column(df, 'EMAIL')).fillna(normalize_emails(column(df, 'Email (Norm)')))
+    if source == 'stripe':
+        # Email from metadata first, then Customer Email
+        return normalize_emails(column(df, 'email (metadata)')).fillna(normalize_emails(column(df, 'Customer Email')))
+    if source == 'denefits':
+        return normalize_emails(column(df, 'Customer Email'))
+    raise ValueError(f"Unknown source: {source}")
+
+
+def first_seen(source: str, df: pd.DataFrame) -> np.ndarray:
+    """first_seen keys of an export's rows; the frame's index is the row number in the file."""
+    return SOURCE_ORDER.index(source) * FIRST_SEEN_STRIDE + df.index.to_numpy(dtype=np.int64)
+
+
+def text_values(values) -> np.ndarray:
+    """Values as an object array, None where missing or blank."""
+    array = pd.Series(values).to_numpy(dtype=object, na_value=None)
+    array[array == ''] = None
+    return array
+
+
+# =============================================================================
+# STORE
+# =============================================================================
+
+class ContactStore:
+    """One typed array per contact field, rows addressed by normalized email."""
+
+    def __init__(self, capacity: int = INITIAL_CAPACITY):
+        self.index: Dict[str, int] = {}
+        self.size = 0
+        self._capacity = 0
+        self._columns: Dict[str, np.ndarray] = {}
+        self._categories: Dict[str, List] = {}
+        self._codes: Dict[str, Dict] = {}
+        for name, kind in CONTACT_FIELDS.items():
+            if kind == 'category':
+                self._categories[name] = []
+                self._codes[name] = {}
+        self._grow(capacity)
+
+    def __len__(self):
+        return self.size
+
+    def _grow(self, needed: int):
+        if needed <= self._capacity:
+            return
+        capacity = max(needed, int(self._capacity * GROWTH), INITIAL_CAPACITY)
+        for name, kind in CONTACT_FIELDS.items():
+            fresh = np.full(capacity, _FILL[kind], dtype=_DTYPES[kind])
+            if name in self._columns:
+                fresh[:self.size] = self._columns[name][:self.size]
+            self._columns[name] = fresh
+        self._capacity = capacity
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the arrays themselves (not the strings they point to)."""
+        return sum(array.nbytes for array in self._columns.values())
+
+    # -------------------------------------------------------------------------
+    # Rows
+    # -------------------------------------------------------------------------
+
+    def rows_for(self, emails) -> np.ndarray:
+        """Row number per email; -1 where the email isn't in the store."""
+        lookup = self.index.get
+        return np.fromiter((lookup(email, -1) for email in emails), dtype=np.int64, count=len(emails))
+
+    def add(self, emails, seen: np.ndarray) -> np.ndarray:
+        """
+        Append new contacts (emails must be unique and not yet stored) with
+        their first_seen keys; returns their rows.
+        """
+        emails = list(emails)
+        start = self.size
+        self._grow(start + len(emails))
+        rows = np.arange(start, start + len(emails), dtype=np.int64)
+        self.index.update(zip(emails, range(start, start + len(emails))))
+        self._columns['email'][start:start + len(emails)] = emails
+        self._columns['first_seen'][start:start + len(emails)] = seen
+        self.size += len(emails)
+        return rows
+
+    # -------------------------------------------------------------------------
+    # Values
+    # -------------------------------------------------------------------------
+
+    def _encode(self, name: str, values) -> np.ndarray:
+        kind = CONTACT_FIELDS[name]
+        if kind == 'text':
+            return text_values(values)
+        if kind == 'float':
+            return pd.to_numeric(pd.Series(values), errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+        if kind in ('count', 'position'):
+            return np.asarray(values, dtype=_DTYPES[kind])
+        if kind == 'date':
+            return np.asarray(pd.Series(values).astype('datetime64[ns]'))
+
+        # category: map each distinct value to its code, adding new categories
+        uniques_codes = self._codes[name]
+        categories = self._categories[name]
+        inverse, uniques = pd.factorize(pd.Series(text_values(values), dtype=object), use_na_sentinel=True)
+        lookup = np.empty(len(uniques), dtype=np.int32)
+        for position, value in enumerate(uniques):
+            code = uniques_codes.get(value)
+            if code is None:
+                code = len(categories)
+                categories.append(value)
+                uniques_codes[value] = code
+            lookup[position] = code
+        return np.where(inverse < 0, -1, lookup[inverse] if len(lookup) else -1).astype(np.int32)
+
+    def _missing(self, name: str, array: np.ndarray) -> np.ndarray:
+        kind = CONTACT_FIELDS[name]
+        if kind == 'text':
+            return pd.isna(array)
+        if kind == 'category':
+            return array < 0
+        if kind == 'count':
+            return array == 0
+        if kind == 'position':
+            return array < 0
+        return np.isnan(array) if kind == 'float' else np.isnat(array)
+
+    def put(self, name: str, rows: np.ndarray, values):
+        """Set a field for these rows, missing values included."""
+        self._columns[name][rows] = self._encode(name, values)
+
+    def update(self, name: str, rows: np.ndarray, values, fill_only: bool = False) -> int:
+        """
+        Set a field where the new value is present; with fill_only, only where
+        the stored value is missing. Rows must be unique. Returns rows changed.
+        """
+        encoded = self._encode(name, values)
+        keep = ~self._missing(name, encoded)
+        if fill_only:
+            keep &= self._missing(name, self._columns[name][rows])
+        self._columns[name][rows[keep]] = encoded[keep]
+        return int(keep.sum())
+
+    def raw(self, name: str) -> np.ndarray:
+        """The stored array (codes for category fields), one entry per contact."""
+        return self._columns[name][:self.size]
+
+    def release(self, name: str):
+        """Free a field's array (after it has been gathered for output)."""
+        self._columns[name] = np.empty(0, dtype=self._columns[name].dtype)
+
+    def values(self, name: str, order: Optional[np.ndarray] = None):
+        """
+        A field for output, rows in `order` (default: first-seen): category
+        fields as pandas Categoricals (codes + labels, no per-row strings).
+        """
+        array = self.raw(name) if order is None else self.raw(name)[order]
+        if CONTACT_FIELDS[name] != 'category':
+            return array
+        return pd.Categorical.from_codes(array, categories=pd.Index(self._categories[name], dtype=object))
+
+
+# =============================================================================
+# BUILD STAGES
+# =============================================================================
+
+GOOGLE_MAIN_FIELDS = {
+    'first_name': 'First Name',
+    'last_name': 'Last Name',
+    'instagram': 'Instagram Name',
+    'facebook': 'Facebook Name',
+    'user_id': 'User ID',
+    'stage': 'Stage',
+    'symptoms': 'Symptoms',
+    'months_pp': 'Months PP',
+    'objections': 'Objections',
+    'trigger_word': 'TRIGGER WORD',
+    'paid_vs_organic': 'PAID VS ORGANIC',
+    'platform': 'IG or FB',
+    'ab_test': 'AB - Testing 1',
+    'sent_link': 'Sent Link',
+    'clicked_link': 'Clicked Link',
+}
+
+AIRTABLE_FIELDS = {
+    'first_name': 'FIRST_NAME',
+    'last_name': 'LAST_NAME',
+    'instagram': 'IG_USERNAME',
+    'mc_id': 'MC_ID',
+    'ghl_id': 'GHL_ID',
+    'ad_id': 'AD_ID',
+    'thread_id': 'THREAD_ID',
+    'trigger_word': 'TRIGGER_WORD',
+    'paid_vs_organic': 'PAID_VS_ORGANIC',
+    'stage': 'STAGE',
+}
+
+# Airtable values that replace what the contact already has / only fill gaps
+AIRTABLE_OVERWRITE = {'mc_id': 'MC_ID', 'ghl_id': 'GHL_ID', 'ad_id': 'AD_ID', 'thread_id': 'THREAD_ID'}
+AIRTABLE_FILL = {'trigger_word': 'TRIGGER_WORD', 'paid_vs_organic': 'PAID_VS_ORGANIC'}
+
+
+def either_column(df: pd.DataFrame, first: str, second: str) -> pd.Series:
+    """first column's value, or second's where first is missing."""
+    return column(df, first).astype(object).where(column(df, first).notna(), column(df, second).astype(object))
+
+
+def _per_row(rows: np.ndarray, values: pd.Series, how: str) -> pd.Series:
+    """Collapse several source rows per contact: first/last present value per store row."""
+    grouped = pd.Series(values.to_numpy(), index=rows).groupby(level=0, sort=False)
+    return grouped.first() if how == 'first' else grouped.last()
+
+
+def add_google_main(store: ContactStore, df: pd.DataFrame) -> Dict[str, int]:
+    """First row per email creates a contact with source 'google_sheets'."""
+    emails = source_emails('google_main', df)
+    present = emails.notna().to_numpy()
+    processed = int(present.sum())
+
+    new = present & ~emails.duplicated().to_numpy()
+    new &= store.rows_for(emails.to_numpy()) < 0
+    frame = df[new]
+    rows = store.add(emails[new], first_seen('google_main', frame))
+
+    for field, source_column in GOOGLE_MAIN_FIELDS.items():
+        store.put(field, rows, column(frame, source_column))
+    store.put('phone', rows, normalize_phones(column(frame, 'Phone Number')))
+    store.put('subscription_date', rows, parse_dates(column(frame, 'Subscription Date')))
+    store.put('total_purchased_google', rows, amounts(column(frame, 'Total Purchased')))
+    store.put('booked', rows, either_column(frame, 'Booked Paid DC', 'Booked Free DC'))
+    store.put('attended', rows, either_column(frame, 'Attended Paid DC', 'Attended Free DC'))
+    store.put('source', rows, np.full(len(rows), 'google_sheets', dtype=object))
+    return {'processed': processed, 'added': len(rows)}
+
+
+def merge_airtable(store: ContactStore, df: pd.DataFrame) -> Dict[str, int]:
+    """
+    Airtable rows in file order: the first row of an email not yet stored
+    creates it (source 'airtable'); every other row enriches its contact and
+    marks it 'merged'.
+    """
+    emails = source_emails('airtable', df)
+    present = emails.notna().to_numpy()
+    frame, emails = df[present], emails[present]
+
+    creates = (~emails.duplicated()).to_numpy() & (store.rows_for(emails.to_numpy()) < 0)
+    created = frame[creates]
+    rows = store.add(emails[creates], first_seen('airtable', created))
+    for field, source_column in AIRTABLE_FIELDS.items():
+        store.put(field, rows, column(created, source_column))
+    store.put('phone', rows, normalize_phones(column(created, 'PHONE')))
+    store.put('subscription_date', rows, parse_dates(column(created, 'SUBSCRIBED_DATE')))
+    store.put('airtable_purchase_date', rows, parse_dates(column(created, 'DATE_SET_PURCHASE')))
+    store.put('source', rows, np.full(len(rows), 'airtable', dtype=object))
+
+    merging = frame[~creates]
+    merge_rows = store.rows_for(emails[~creates].to_numpy())
+    for field, source_column in AIRTABLE_OVERWRITE.items():
+        latest = _per_row(merge_rows, column(merging, source_column), 'last')
+        store.update(field, latest.index.to_numpy(), latest)
+    for field, source_column in AIRTABLE_FILL.items():
+        earliest = _per_row(merge_rows, column(merging, source_column), 'first')
+        store.update(field, earliest.index.to_numpy(), earliest, fill_only=True)
+    purchase = _per_row(merge_rows, parse_dates(column(merging, 'DATE_SET_PURCHASE')), 'last')
+    store.update('airtable_purchase_date', purchase.index.to_numpy(), purchase)
+
+    merged_rows = np.unique(merge_rows)
+    store.put('source', merged_rows, np.full(len(merged_rows), 'merged', dtype=object))
+    return {'merged': int(len(merge_rows)), 'added': len(rows)}
+
+
+def enrich_google_simple(store: ContactStore, df: pd.DataFrame) -> Dict[str, int]:
+    """Fill missing thread_id / ad_id of existing contacts."""
+    rows = store.rows_for(source_emails('google_simple', df).to_numpy())
+    known = rows >= 0
+    frame, rows = df[known], rows[known]
+
+    thread_ids = _per_row(rows, column(frame, 'Thread ID'), 'first')
+    enriched = store.update('thread_id', thread_ids.index.to_numpy(), thread_ids, fill_only=True)
+    ad_ids = _per_row(rows, column(frame, 'Ad_Id'), 'first')
+    store.update('ad_id', ad_ids.index.to_numpy(), ad_ids, fill_only=True)
+    return {'enriched': enriched}
+
+
+def _accumulate_purchases(store: ContactStore, rows: np.ndarray, amount: pd.Series, dates: pd.Series,
+                          count_field: str, revenue_field: str, first_field: str, last_field: Optional[str] = None):
+    grouped = pd.DataFrame({'amount': amount.to_numpy(), 'date': dates.to_numpy()}, index=rows).groupby(level=0)
+    totals = grouped.agg(count=('amount', 'size'), revenue=('amount', 'sum'),
+                         first=('date', 'min'), last=('date', 'max'))
+    target = totals.index.to_numpy()
+
+    store.put(count_field, target, store.raw(count_field)[target] + totals['count'].to_numpy())
+    previous = store.raw(revenue_field)[target]
+    store.put(revenue_field, target, np.where(np.isnan(previous), 0.0, previous) + totals['revenue'].to_numpy())
+    first = store.raw(first_field)[target]
+    store.put(first_field, target, np.fmin(first, totals['first'].to_numpy()))
+    if last_field:
+        last = store.raw(last_field)[target]
+        store.put(last_field, target, np.fmax(last, totals['last'].to_numpy()))
+    return target
+
+
+def link_stripe(store: ContactStore, df: pd.DataFrame) -> Dict[str, float]:
+    """Paid Stripe charges by metadata email, then Customer Email."""
+    rows = store.rows_for(source_emails('stripe', df).to_numpy())
+    known = rows >= 0
+    frame, rows = df[known], rows[known]
+    amount = amounts(column(frame, 'Amount'))
+
+    _accumulate_purchases(store, rows, amount, parse_dates(column(frame, 'Created date (UTC)')),
+                          'stripe_payments', 'stripe_revenue', 'stripe_first_payment', 'stripe_last_payment')
+    packages = _per_row(rows, column(frame, 'package_name (metadata)'), 'first')
+    store.update('stripe_package', packages.index.to_numpy(), packages, fill_only=True)
+    return {'matched': int(known.sum()), 'revenue': float(amount.sum())}
+
+
+def link_denefits(store: ContactStore, df: pd.DataFrame) -> Dict[str, float]:
+    """Denefits contracts by Customer Email; status is the last contract's."""
+    rows = store.rows_for(source_emails('denefits', df).to_numpy())
+    known = rows >= 0
+    frame, rows = df[known], rows[known]
+    amount = amounts(column(frame, 'Payment Plan Amount'))
+
+    _accumulate_purchases(store, rows, amount, parse_dates(column(frame, 'Payment Plan Sign Up Date')),
+                          'denefits_contracts', 'denefits_revenue', 'denefits_signup_date')
+    status = _per_row(rows, column(frame, 'Payment Plan Status'), 'last')
+    store.update('denefits_status', status.index.to_numpy(), status)
+    return {'matched': int(known.sum()), 'revenue': float(amount.sum())}
+
+
+# =============================================================================
+# OUTPUT
+# =============================================================================
+
+def revenue_order(total_revenue: np.ndarray, seen: np.ndarray) -> np.ndarray:
+    """Positions sorted by total_revenue descending, ties by first_seen."""
+    return np.lexsort((seen, -total_revenue))
+
+
+def unified_frame(store: ContactStore, consume: bool = False, keep_first_seen: bool = False) -> pd.DataFrame:
+    """
+    Derived metrics + UNIFIED_COLUMNS, sorted by total_revenue descending
+    (ties in first-seen order). Each column is gathered straight into
+    sorted order instead of building a frame and sorting a copy of it; with
+    consume, each store column is freed once gathered, so the build never
+    holds two full copies (the store is empty afterwards). keep_first_seen
+    adds the first_seen column, for merging frames built separately.
+    """
+    stripe_rev = np.nan_to_num(store.raw('stripe_revenue'))
+    denefits_rev = np.nan_to_num(store.raw('denefits_revenue'))
+    google_rev = np.nan_to_num(store.raw('total_purchased_google'))
+
+    # Use max of actual payments vs Google Sheets estimate
+    total_revenue = np.maximum(stripe_rev + denefits_rev, google_rev)
+    order = revenue_order(total_revenue, store.raw('first_seen'))
+    stripe_rev, denefits_rev, google_rev = stripe_rev[order], denefits_rev[order], google_rev[order]
+
+    data = {}
+    for name in CONTACT_FIELDS:
+        data[name] = store.values(name, order)
+        if consume:
+            store.release(name)
+    for count_field in ('stripe_payments', 'denefits_contracts'):
+        counts = data[count_field]
+        data[count_field] = np.where(counts > 0, counts, np.nan)
+
+    data['total_revenue'] = total_revenue[order]
+    data['has_purchase'] = (stripe_rev > 0) | (denefits_rev > 0) | (google_rev > 0)
+    # Earliest purchase date from any source
+    purchase_date = np.fmin(np.fmin(data['stripe_first_payment'], data['denefits_signup_date']),
+                            data['airtable_purchase_date'])
+    data['purchase_date'] = purchase_date
+
+    payment_method = np.full(store.size, -1, dtype=np.int8)
+    payment_method[denefits_rev > 0] = 1
+    payment_method[stripe_rev > 0] = 0
+    payment_method[(stripe_rev > 0) & (denefits_rev > 0)] = 2
+    data['payment_method'] = pd.Categorical.from_codes(payment_method, categories=['Stripe', 'Denefits', 'Both'])
+
+    days = pd.Series(purchase_date - data['subscription_date']).dt.days
+    data['days_to_purchase'] = days.to_numpy(dtype=np.float64, na_value=np.nan)
+
+    columns = UNIFIED_COLUMNS + ['first_seen'] if keep_first_seen else UNIFIED_COLUMNS
+    return pd.DataFrame({name: data[name] for name in columns}, copy=False)
+
+
+def build_unified(sources: Dict[str, pd.DataFrame], consume: bool = True,
+                  keep_first_seen: bool = False) -> Tuple[pd.DataFrame, Dict[str, Dict]]:
+    """
+    Run every build stage over {source name: export frame} (SOURCE_ORDER
+    names; a missing source counts as empty). Returns the unified frame and
+    each stage's counts, keyed by source name.
+    """
+    def source(name):
+        return sources.get(name, pd.DataFrame())
+
+    store = ContactStore()
+    counts = {
+        'google_main': add_google_main(store, source('google_main')),
+        'airtable': merge_airtable(store, source('airtable')),
+        'google_simple': enrich_google_simple(store, source('google_simple')),
+        'stripe': link_stripe(store, source('stripe')),
+        'denefits': link_denefits(store, source('denefits')),
+    }
+    counts['contacts'] = {'total': len(store)}
+    return unified_frame(store, consume=consume, keep_first_seen=keep_first_seen), counts
+
+
+# =============================================================================
+# BENCHMARK
+# =============================================================================
+
+def _synthetic_contacts(start: int, count: int, seed: int) -> pd.DataFrame:
+    """Google-Sheets-shaped contact rows with unique emails (Arrow-backed, like read_csv)."""
+    rng = np.random.default_rng(seed)
+    ids = np.arange(start, start + count)
+    stages = np.array(['LEAD', 'SENT_LINK', 'CLICKED', 'BOOKED', 'BOUGHT_PACKAGE'], dtype=object)
+    words = np.array(['HEAL', 'BALANCE', 'SLEEP', 'ENERGY', 'GUT', 'RESET'], dtype=object)
+    string = pd.StringDtype('pyarrow', na_value=np.nan)
+    digits = rng.integers(2_000_000_000, 9_999_999_999, count)
+    days = rng.integers(0, 700, count)
+
+    def sometimes(values, share):
+        return pd.array(np.where(rng.random(count) < share, np.array(values, dtype=object), None), dtype=string)
+
+    frame = pd.DataFrame(index=ids, data={
+        'User ID': ids + 10_000_000,
+        'First Name': pd.array([f'First{i % 5000}' for i in ids], dtype=string),
+        'Last Name': pd.array([f'Last{i % 20000}' for i in ids], dtype=string),
+        'Instagram Name': sometimes([f'ig_user_{i}' for i in ids], 0.7),
+        'Facebook Name': sometimes([f'Facebook User {i}' for i in ids], 0.3),
+        'Email Address': pd.array([f'contact{i}@example.com' for i in ids], dtype=string),
+        'Phone Number': sometimes([f'+1 ({d // 10_000_000}) {d // 10_000 % 1000}-{d % 10_000}' for d in digits], 0.5),
+        'Subscription Date': pd.array((np.datetime64('2024-01-01') + days).astype(str), dtype=string),
+        'Stage': pd.array(stages[rng.integers(0, len(stages), count)], dtype=string),
+        'Symptoms': sometimes(['Anxiety, fatigue'] * count, 0.5),
+        'Months PP': sometimes(['3-6'] * count, 0.5),
+        'TRIGGER WORD': pd.array(words[rng.integers(0, len(words), count)], dtype=string),
+        'PAID VS ORGANIC': pd.array(np.where(rng.random(count) < 0.6, 'PAID', 'ORGANIC'), dtype=string),
+        'IG or FB': pd.array(np.where(rng.random(count) < 0.8, 'IG', 'FB'), dtype=string),
+        'Total Purchased': np.where(rng.random(count) < 0.05, 2997.0, 0.0),
+        'Sent Link': sometimes(['Yes'] * count, 0.3),
+    })
+    return frame
+
+
+def _synthetic_payments(contacts: pd.DataFrame, seed: int) -> pd.DataFrame:
+    """One paid Stripe charge for about 10% of the contacts."""
+    rng = np.random.default_rng(seed)
+    buyers = contacts[rng.random(len(contacts)) < 0.10]
+    return pd.DataFrame(index=buyers.index, data={
+        'email (metadata)': buyers['Email Address'].to_numpy(),
+        'Amount': rng.choice([997.0, 1697.0, 2997.0], len(buyers)),
+        'Created date (UTC)': buyers['Subscription Date'].to_numpy(),
+        'package_name (metadata)': 'Postpartum Reset',
+    })
+
+
+def _dict_build(chunks):
+    """The pre-columnar representation: one dict per contact, filled row by row."""
+    contacts = {}
+    for contacts_chunk, payments_chunk in chunks:
+        contacts_chunk = contacts_chunk.assign(**{'Subscription Date': pd.to_datetime(contacts_chunk['Subscription Date'])})
+        for row in contacts_chunk.to_dict('records'):
+            email = str(row['Email Address']).strip().lower()
+            contacts[email] = {
+                'email': email, 'first_name': row.get('First Name'), 'last_name': row.get('Last Name'),
+                'phone': ''.join(ch for ch in str(row.get('Phone Number')) if ch.isdigit()),
+                'instagram': row.get('Instagram Name'), 'facebook': row.get('Facebook Name'),
+                'user_id': row.get('User ID'),
+                'subscription_date': row.get('Subscription Date'),
+                'stage': row.get('Stage'), 'symptoms': row.get('Symptoms'), 'months_pp': row.get('Months PP'),
+                'objections': row.get('Objections'), 'trigger_word': row.get('TRIGGER WORD'),
+                'paid_vs_organic': row.get('PAID VS ORGANIC'), 'platform': row.get('IG or FB'),
+                'ab_test': row.get('AB - Testing 1'), 'total_purchased_google': float(row['Total Purchased']),
+                'source': 'google_sheets', 'sent_link': row.get('Sent Link'),
+                'clicked_link': row.get('Clicked Link'), 'booked': None, 'attended': None,
+            }
+        for row in payments_chunk.to_dict('records'):
+            contact = contacts[str(row['email (metadata)']).strip().lower()]
+            payment_date = pd.to_datetime(row['Created date (UTC)'])
+            contact.update({'stripe_payments': 1, 'stripe_revenue': row['Amount'],
+                            'stripe_first_payment': payment_date, 'stripe_last_payment': payment_date,
+                            'stripe_package': row['package_name (metadata)']})
+    for contact in contacts.values():
+        revenue = max(contact.get('stripe_revenue', 0.0), contact['total_purchased_google'])
+        contact.update({'total_revenue': revenue, 'has_purchase': revenue > 0,
+                        'purchase_date': contact.get('stripe_first_payment'),
+                        'payment_method': 'Stripe' if 'stripe_revenue' in contact else None,
+                        'days_to_purchase': None})
+    return contacts
+
+
+def _store_build(chunks):
+    store = ContactStore()
+    for contacts_chunk, payments_chunk in chunks:
+        add_google_main(store, contacts_chunk)
+        link_stripe(store, payments_chunk)
+    return store
+
+
+def _current_rss_mb() -> float:
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024 / 1024
+
+
+class _OverBudget(Exception):
+    pass
+
+
+def _benchmark_worker(mode: str, total: int, chunk_rows: int, limit_mb: int):
+    """
+    Runs in its own process: build `total` synthetic contacts, print RSS
+    after the build and the peak (which includes the output frame). With
+    limit_mb, stops once RSS passes it and reports how far it got.
+    """
+    import resource
+
+    done = {'contacts': 0}
+
+    def chunks():
+        for start in range(0, total, chunk_rows):
+            if limit_mb and _current_rss_mb() > limit_mb:
+                raise _OverBudget()
+            done['contacts'] = start
+            contacts_chunk = _synthetic_contacts(start, min(chunk_rows, total - start), seed=start)
+            yield contacts_chunk, _synthetic_payments(contacts_chunk, seed=start + 1)
+
+    try:
+        built = _dict_build(chunks()) if mode == 'dicts' else _store_build(chunks())
+    except (_OverBudget, MemoryError):
+        print(f"RESULT {mode} over {done['contacts']} {_current_rss_mb():.0f} 0")
+        return
+    after_build = _current_rss_mb()
+    count = len(built)
+    if mode == 'dicts':
+        df = pd.DataFrame.from_dict(built, orient='index')
+    else:
+        df = unified_frame(built, consume=True)
+    del df
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"RESULT {mode} ok {count} {after_build:.0f} {peak:.0f}")
+
+
+def run_benchmark(sizes: List[int], chunk_rows: int = 100_000, limit_mb: int = 0):
+    import subprocess
+    import time
+
+    print("\n⏱️  Dict-per-contact vs ContactStore (each run in its own process)")
+    if limit_mb:
+        print(f"   runs stop once RSS passes {limit_mb:,} MB; a stopped run's figure is a lower bound")
+    print()
+    print(f"  {'contacts':>10}  {'representation':<14} {'RSS after build':>16} {'peak RSS':>10} {'time':>8}")
+    for total in sizes:
+        results = {}
+        for mode in ('dicts', 'store'):
+            started = time.perf_counter()
+            completed = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--benchmark-worker', mode, str(total),
+                 str(chunk_rows), str(limit_mb)],
+                capture_output=True, text=True)
+            elapsed = time.perf_counter() - started
+            line = next((l for l in completed.stdout.splitlines() if l.startswith('RESULT')), None)
+            if line is None:
+                print(f"  {total:>10,}  {mode:<14} {'failed':>16} {'exit ' + str(completed.returncode):>10}")
+                continue
+            _, _, status, count, after_build, peak = line.split()
+            if status != 'ok':
+                print(f"  {total:>10,}  {mode:<14} {float(after_build):>13,.0f} MB at {int(count):,} contacts "
+                      f"(stopped at the limit: lower bound) {elapsed:>7.1f}s")
+                continue
+            results[mode] = (float(after_build), float(peak))
+            print(f"  {total:>10,}  {mode:<14} {float(after_build):>13,.0f} MB {float(peak):>7,.0f} MB "
+                  f"{elapsed:>7.1f}s")
+        if 'dicts' in results and 'store' in results:
+            build_ratio = results['dicts'][0] / results['store'][0]
+            peak_ratio = results['dicts'][1] / results['store'][1]
+            print(f"  {'':>10}  → store uses {build_ratio:.1f}x less after build, {peak_ratio:.1f}x less at peak")
+    print()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    if len(sys.argv) > 1 and sys.argv[1] == '--benchmark-worker':
+        _benchmark_worker(sys.argv[2], int(sys.argv[3]), int(sys.argv[4]), int(sys.argv[5]))
+        sys.exit(0)
+
+    parser = argparse.ArgumentParser(description='Benchmark the columnar contact store')
+    parser.add_argument('--benchmark', nargs='+', type=int, metavar='CONTACTS', required=True,
+                        help='Synthetic contact counts to measure, e.g. 1000000 5000000')
+    parser.add_argument('--chunk-rows', type=int, default=100_000,
+                        help='Synthetic rows generated per chunk (default: 100000)')
+    parser.add_argument('--memory-limit-mb', type=int, default=0,
+                        help='Stop a run once its RSS passes this many MB, so an oversized run '
+                             'reports how far it got instead of exhausting the machine')
+    args = parser.parse_args()
+    run_benchmark(args.benchmark, args.chunk_rows, args.memory_limit_mb)
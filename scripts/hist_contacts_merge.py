@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Server-Side Merge of Staged Historical Contacts
+
+Instead of downloading existing email/source pairs and reconciling in Python,
+importers push their raw mapped rows into hist_contacts_staging and call the
+merge_hist_contacts_staging() SQL routine
+(migrations/20251226_002_create_hist_contacts_merge.sql). The routine:
+- keeps the most complete row per email
+- sets source = 'merged' (with a data_quality_notes entry) when the email
+  already exists from a different source, unless mark_merged=False
+  (import_google_sheets.py, which always upserted its rows as they are)
+- upserts into hist_contacts and returns insert/update counts
+
+Usage (from an importer):
+    from hist_contacts_merge import stage_and_merge_contacts
+
+    counts = stage_and_merge_contacts(supabase, contacts, batch_id, 'airtable')
+    counts['rows_inserted'], counts['rows_updated']
+
+    # The rows the merge keeps, e.g. to build timeline events from:
+    merged_df = merged_contact_rows(contacts_df)
+"""
+
+import uuid
+from typing import Dict, List, Union
+
+import pandas as pd
+
+from hist_copy import connect_direct, copy_into, record_columns
+
+STAGING_TABLE = 'hist_contacts_staging'
+MERGE_FUNCTION = 'merge_hist_contacts_staging'
+STAGE_CHUNK_SIZE = 500
+
+MERGE_COUNT_FIELDS = ['rows_staged', 'rows_unique', 'rows_inserted', 'rows_updated', 'rows_merged']
+
+# Columns merge_hist_contacts_staging() counts with num_nonnulls() to pick the
+# most complete row per email (ties go to the earliest staged row)
+COMPLETENESS_COLUMNS = [
+    'first_name', 'last_name', 'phone', 'source', 'ad_type', 'trigger_word',
+    'campaign_name', 'reached_stage', 'has_purchase', 'first_seen', 'last_seen',
+    'purchase_date', 'data_quality_notes', 'is_suspicious',
+]
+
+
+def merged_contact_rows(contacts: pd.DataFrame) -> pd.DataFrame:
+    """
+    The one row per email the server-side merge keeps: most non-null
+    COMPLETENESS_COLUMNS, then first in staging order. `contacts` holds the
+    mapped rows in the order they are staged.
+    """
+    columns = [c for c in COMPLETENESS_COLUMNS if c in contacts.columns]
+    filled = contacts[columns].notna().sum(axis=1)
+    order = filled.sort_values(ascending=False, kind='stable').index
+    return contacts.loc[order].drop_duplicates('email').sort_index()
+
+
+def stage_contacts(supabase, contacts: List[Dict], chunk_size: int = STAGE_CHUNK_SIZE, progress=None) -> int:
+    """Insert raw mapped contact rows into the staging table via REST."""
+    for i in range(0, len(contacts), chunk_size):
+        chunk = contacts[i:i + chunk_size]
+        supabase.table(STAGING_TABLE).insert(chunk).execute()
+        if progress is not None:
+            progress.advance(len(chunk))
+    return len(contacts)
+
+
+def merge_staged_contacts(supabase, batch_id: Union[str, uuid.UUID], source: str,
+                          mark_merged: bool = True) -> Dict[str, int]:
+    """Run the SQL merge routine for one import batch and return its counts."""
+    response = supabase.rpc(MERGE_FUNCTION, {
+        'p_batch_id': str(batch_id),
+        'p_source': source,
+        'p_mark_merged': mark_merged,
+    }).execute()
+    return dict(response.data[0])
+
+
+def discard_staged_contacts(supabase, batch_id: Union[str, uuid.UUID]):
+    """Remove a batch's staged rows after a failed merge."""
+    supabase.table(STAGING_TABLE).delete().eq('import_batch_id', str(batch_id)).execute()
+
+
+def stage_and_merge_contacts(
+    supabase,
+    contacts: List[Dict],
+    batch_id: Union[str, uuid.UUID],
+    source: str,
+    direct_db: bool = False,
+    progress=None,
+    mark_merged: bool = True,
+) -> Dict[str, int]:
+    """
+    Stage raw mapped rows and merge them into hist_contacts server-side.
+    With direct_db, rows are staged with COPY and merged in the same
+    transaction, so a failed merge leaves nothing behind in staging.
+    `progress` counts staged rows (the merge itself is one statement).
+    mark_merged=False skips the 'merged' source rule: rows upsert with their
+    own source and notes.
+    """
+    if direct_db:
+        with connect_direct() as conn:
+            with conn.cursor() as cur:
+                copy_into(cur, STAGING_TABLE, record_columns(contacts), contacts, progress)
+                cur.execute(f"SELECT * FROM {MERGE_FUNCTION}(%s, %s, %s)", (str(batch_id), source, mark_merged))
+                row = cur.fetchone()
+        return dict(zip(MERGE_COUNT_FIELDS, row))
+
+    stage_contacts(supabase, contacts, progress=progress)
+    try:
+        return merge_staged_contacts(supabase, batch_id, source, mark_merged)
+    except Exception:
+        discard_staged_contacts(supabase, batch_id)
+        raise
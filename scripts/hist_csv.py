@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Shared CSV Reader for Historical Sources
+
+Every historical script used pd.read_csv with the default single-threaded C
+parser. read_csv() here reads with the multithreaded Arrow CSV engine when
+pyarrow is installed and returns a frame that behaves like the pandas one:
+
+- Local files are memory-mapped instead of copied into Python buffers
+- Text columns use Arrow-backed strings (NaN for missing, like pandas 'str')
+- Quoted multi-line values (captions, ad copy, webhook JSON) are supported
+- Date/time-looking columns stay text, as with pandas, so the importers'
+  own date parsing still applies
+- Duplicate headers are renamed like pandas does ("Email", "Email.1")
+- gzip / zstd files (.csv.gz, .csv.zst) are decompressed on the fly, and a
+  path whose plain .csv is missing falls back to its compressed variant, so
+  importers keep their unified_contacts.csv paths (see hist_output.py)
+
+Anything Arrow can't handle (bad encoding, ragged rows, unsupported
+options) falls back to pd.read_csv(low_memory=False) with a one-line note.
+
+Usage:
+    from hist_csv import read_csv, read_csv_chunks
+
+    df = read_csv('historical_data/airtable_contacts.csv')
+    df = read_csv(path, dtype={'Amount': str})
+    df = read_csv(path, dtype=str)                            # every column as text
+    df = read_csv('historical_data/unified_contacts.csv.zst')  # compressed
+
+    for chunk in read_csv_chunks(path, chunk_rows=100_000):   # bounded memory, all columns text
+        ...
+
+Benchmark against pd.read_csv for every file in historical_data/:
+    python scripts/hist_csv.py --benchmark
+"""
+
+import os
+import sys
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pa = None
+    pa_csv = None
+
+# Arrow reads in blocks of this size, one thread per block
+BLOCK_SIZE = 4 * 1024 * 1024
+
+# Options we can translate to Arrow; anything else goes straight to pandas
+_ARROW_KWARGS = {'dtype', 'usecols', 'low_memory'}
+
+# Rows per frame yielded by read_csv_chunks()
+CHUNK_ROWS = 100_000
+
+# Compressed variants looked for (in this order) when a .csv path is missing
+COMPRESSION_SUFFIXES = {'.zst': 'zstd', '.gz': 'gzip'}
+
+
+def _string_dtype():
+    """Arrow-backed string dtype with NaN as the missing value (pandas 'str' semantics)."""
+    try:
+        return pd.StringDtype('pyarrow', na_value=np.nan)
+    except TypeError:
+        try:
+            return pd.StringDtype('pyarrow_numpy')  # pandas 2.1 / 2.2
+        except TypeError:
+            return None
+
+
+def _dedupe_names(names: List[str]) -> List[str]:
+    """Rename repeated headers the way pandas does: X, X.1, X.2."""
+    seen: Dict[str, int] = {}
+    result = []
+    for name in names:
+        if name in seen:
+            seen[name] += 1
+            candidate = f"{name}.{seen[name]}"
+            while candidate in seen:
+                seen[name] += 1
+                candidate = f"{name}.{seen[name]}"
+            seen[candidate] = 0
+            result.append(candidate)
+        else:
+            seen[name] = 0
+            result.append(name)
+    return result
+
+
+def compression_for(path) -> Optional[str]:
+    """'zstd' / 'gzip' from the file extension, None for plain files."""
+    if not isinstance(path, (str, os.PathLike)):
+        return None
+    return COMPRESSION_SUFFIXES.get(os.path.splitext(os.fspath(path))[1].lower())
+
+
+def strip_compression(path: str) -> str:
+    """unified_contacts.csv.zst → unified_contacts.csv"""
+    return path[:-len(os.path.splitext(path)[1])] if compression_for(path) else path
+
+
+def resolve_path(path):
+    """
+    The file to read for `path`: itself if it exists, else the first existing
+    compressed variant (path.zst, path.gz). Unchanged if none exists, so the
+    caller's usual "file not found" error still names the requested path.
+    """
+    if not isinstance(path, (str, os.PathLike)) or os.path.exists(path):
+        return path
+    for suffix in COMPRESSION_SUFFIXES:
+        candidate = os.fspath(path) + suffix
+        if os.path.exists(candidate):
+            return candidate
+    return path
+
+
+def _open_source(path):
+    """Memory-map plain local files, decompress .gz/.zst; pass other sources through."""
+    if isinstance(path, (str, os.PathLike)) and os.path.isfile(path):
+        compression = compression_for(path)
+        if compression:
+            return pa.input_stream(os.fspath(path), compression=compression)
+        return pa.memory_map(os.fspath(path), 'r')
+    return path
+
+
+def _read_arrow(path, dtype: Optional[Dict] = None, usecols: Optional[List[str]] = None) -> pd.DataFrame:
+    read_options = pa_csv.ReadOptions(use_threads=True, block_size=BLOCK_SIZE)
+    parse_options = pa_csv.ParseOptions(newlines_in_values=True)
+
+    # Peek at the first block to find columns Arrow would turn into dates,
+    # times or timestamps; pandas leaves those as text and so do we
+    with pa_csv.open_csv(_open_source(path), read_options=read_options, parse_options=parse_options) as peek:
+        schema = peek.schema
+    names = _dedupe_names(schema.names)
+
+    column_types = {}
+    for field, name in zip(schema, names):
+        if pa.types.is_temporal(field.type):
+            column_types[field.name] = pa.string()
+    if dtype in (str, 'str'):
+        dtype = {name: str for name in schema.names}
+    for column, column_type in (dtype or {}).items():
+        if column in schema.names and column_type in (str, 'str', 'string', object):
+            column_types[column] = pa.string()
+
+    convert_options = pa_csv.ConvertOptions(
+        column_types=column_types,
+        strings_can_be_null=True,
+        include_columns=list(usecols) if usecols else None,
+    )
+    table = pa_csv.read_csv(
+        _open_source(path),
+        read_options=read_options,
+        parse_options=parse_options,
+        convert_options=convert_options,
+    )
+    if not usecols:
+        table = table.rename_columns(names)
+
+    string_dtype = _string_dtype()
+    mapper = None
+    if string_dtype is not None:
+        mapper = {pa.string(): string_dtype, pa.large_string(): string_dtype}.get
+    return table.to_pandas(types_mapper=mapper)
+
+
+def read_csv(path, **kwargs) -> pd.DataFrame:
+    """
+    Drop-in for pd.read_csv(path, **kwargs) using the Arrow engine when possible.
+    Supported with Arrow: dtype (str for every column, or {column: str}),
+    usecols. Other keyword arguments use pandas directly.
+    """
+    path = resolve_path(path)
+    dtype = kwargs.get('dtype')
+    if pa_csv is not None and set(kwargs) <= _ARROW_KWARGS and (dtype is str or not isinstance(dtype, type)):
+        try:
+            return _read_arrow(path, dtype=kwargs.get('dtype'), usecols=kwargs.get('usecols'))
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError, UnicodeDecodeError, KeyError) as e:
+            print(f"  ℹ️  Arrow CSV reader fell back to pandas for {os.path.basename(str(path))}: {e}")
+
+    kwargs.setdefault('low_memory', False)
+    return pd.read_csv(path, **kwargs)
+
+
+def read_csv_chunks(path, chunk_rows: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """
+    Stream a CSV as frames of about `chunk_rows` rows, every column as text,
+    so files larger than memory can be processed. Row labels continue across
+    chunks (0..n-1 over the whole file), like a single read_csv() would give.
+    """
+    path = resolve_path(path)
+    if pa_csv is None:
+        offset = 0
+        for chunk in pd.read_csv(path, dtype=str, chunksize=chunk_rows):
+            chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+            offset += len(chunk)
+            yield chunk
+        return
+
+    read_options = pa_csv.ReadOptions(use_threads=True, block_size=BLOCK_SIZE)
+    parse_options = pa_csv.ParseOptions(newlines_in_values=True)
+    with pa_csv.open_csv(_open_source(path), read_options=read_options, parse_options=parse_options) as peek:
+        schema = peek.schema
+    names = _dedupe_names(schema.names)
+    # Types inferred from the first block don't hold for later ones; read everything as text
+    convert_options = pa_csv.ConvertOptions(
+        column_types={name: pa.string() for name in schema.names},
+        strings_can_be_null=True,
+    )
+    string_dtype = _string_dtype()
+    mapper = {pa.string(): string_dtype}.get if string_dtype is not None else None
+
+    offset = 0
+    pending: List = []
+    pending_rows = 0
+
+    def to_frame(batches):
+        frame = pa.Table.from_batches(batches).rename_columns(names).to_pandas(types_mapper=mapper)
+        frame.index = pd.RangeIndex(offset, offset + len(frame))
+        return frame
+
+    with pa_csv.open_csv(_open_source(path), read_options=read_options, parse_options=parse_options,
+                         convert_options=convert_options) as reader:
+        for batch in reader:
+            pending.append(batch)
+            pending_rows += batch.num_rows
+            if pending_rows >= chunk_rows:
+                frame = to_frame(pending)
+                offset += len(frame)
+                pending, pending_rows = [], 0
+                yield frame
+    if pending_rows:
+        yield to_frame(pending)
+
+
+# =============================================================================
+# BENCHMARK
+# =============================================================================
+
+def run_benchmark(directory: str, repeat: int = 3):
+    import glob
+    import time
+
+    if pa_csv is None:
+        print("pyarrow is not installed (pip install pyarrow); nothing to compare.")
+        return
+
+    def best_of(func):
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = func()
+            best = min(best, time.perf_counter() - start)
+        return best, result
+
+    print(f"{'file':<45} {'MB':>6} {'rows':>8} {'pandas C':>9} {'arrow':>9} {'speedup':>8}  same shape")
+    for path in sorted(glob.glob(os.path.join(directory, '*.csv'))):
+        size_mb = os.path.getsize(path) / (1024 * 1024)
+        try:
+            pandas_time, pandas_df = best_of(lambda: pd.read_csv(path, low_memory=False))
+            arrow_time, arrow_df = best_of(lambda: read_csv(path))
+        except (pd.errors.ParserError, UnicodeDecodeError) as e:
+            print(f"{os.path.basename(path):<45} {size_mb:6.2f}  ⚠️  unreadable: {str(e).splitlines()[0]}")
+            continue
+        print(
+            f"{os.path.basename(path):<45} {size_mb:6.2f} {len(arrow_df):8,} "
+            f"{pandas_time:8.3f}s {arrow_time:8.3f}s {pandas_time / arrow_time:7.1f}x  "
+            f"{pandas_df.shape == arrow_df.shape}"
+        )
+    print(f"\nthreads: {pa.cpu_count()} (best of {repeat} runs)")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark the shared Arrow CSV reader')
+    parser.add_argument('--benchmark', action='store_true', help='Compare with pd.read_csv on historical_data/')
+    parser.add_argument('--dir', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'historical_data'))
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    if args.benchmark:
+        run_benchmark(args.dir, args.repeat)
+    else:
+        parser.print_help()
+        sys.exit(1)
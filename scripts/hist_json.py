@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Streaming Reader for JSON Array Backups
+
+json.load() holds the whole document plus every parsed object in memory,
+so a backup that is a top-level array of records (e.g.
+backup_instagram_historical_20250107.json) costs several times its file size
+in RAM. iter_json_array() reads the file in READ_SIZE blocks and decodes one
+element at a time with the standard library's C decoder. Only the current
+block and the element being decoded are held, so memory stays flat as the
+backup grows.
+
+Usage:
+    from hist_json import iter_json_array, iter_json_chunks
+
+    for record in iter_json_array('historical_data/backup_instagram_historical_20250107.json'):
+        ...
+
+    for records in iter_json_chunks(path, chunk_items=1000):   # lists of up to 1000 elements
+        ...
+"""
+
+import json
+from typing import Any, Iterator, List
+
+# Characters read from the file per block
+READ_SIZE = 1 << 20
+
+# Elements per list yielded by iter_json_chunks()
+CHUNK_ITEMS = 1000
+
+_WHITESPACE = ' \t\n\r'
+
+
+def iter_json_array(path: str, read_size: int = READ_SIZE) -> Iterator[Any]:
+    """Yield the elements of the top-level JSON array in `path`, one at a time."""
+    decoder = json.JSONDecoder()
+    with open(path, encoding='utf-8-sig') as f:
+        buffer = ''
+        pos = 0
+        eof = False
+
+        def more(size: int) -> bool:
+            nonlocal buffer, pos, eof
+            block = f.read(size)
+            if not block:
+                eof = True
+                return False
+            # Drop what has been consumed so the buffer stays one block or so
+            buffer = buffer[pos:] + block
+            pos = 0
+            return True
+
+        def next_char() -> str:
+            """Skip whitespace; the next significant character ('' at end of file)."""
+            nonlocal pos
+            while True:
+                while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                    pos += 1
+                if pos < len(buffer):
+                    return buffer[pos]
+                if not more(read_size):
+                    return ''
+
+        if next_char() != '[':
+            raise ValueError(f"{path}: expected a JSON array at the top level")
+        pos += 1
+
+        first = True
+        while True:
+            char = next_char()
+            if char == ']':
+                return
+            if char == '':
+                raise ValueError(f"{path}: unexpected end of file inside the top-level array")
+            if not first:
+                if char != ',':
+                    raise ValueError(f"{path}: expected ',' between array elements at offset {f.tell()}")
+                pos += 1
+                next_char()
+            first = False
+
+            while True:
+                try:
+                    element, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    # Element runs past the buffer: read more (doubling for large elements)
+                    if eof or not more(max(read_size, len(buffer))):
+                        raise
+                    continue
+                # A number cut at the block boundary ("1.5e" of "1.5e3") still decodes;
+                # only accept it once the character after it is in the buffer
+                if (isinstance(element, (int, float)) and not eof
+                        and (end == len(buffer) or buffer[end] not in _WHITESPACE + ',]')
+                        and more(read_size)):
+                    continue
+                break
+            pos = end
+            yield element
+
+
+def iter_json_chunks(path: str, chunk_items: int = CHUNK_ITEMS, read_size: int = READ_SIZE) -> Iterator[List[Any]]:
+    """iter_json_array() grouped into lists of up to `chunk_items` elements."""
+    chunk: List[Any] = []
+    for element in iter_json_array(path, read_size):
+        chunk.append(element)
+        if len(chunk) >= chunk_items:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Column-Level Money Parsing for Historical Imports
+
+Payment exports store amounts as "$1,234.56", "1234.56", "(45.00)" or as
+integer cents (Stripe API-style exports). Instead of a regex + Decimal per
+value and a per-row "> 10000 means cents" guess, this module parses a whole
+column at once and decides cents vs. dollars ONCE per column:
+
+1. Explicit unit ('cents' / 'dollars') from the caller or --amount-unit
+2. Header hints: "cents", "minor", "in cents" → cents;
+   "$", "usd", "dollars" → dollars
+3. Value distribution: any value with a decimal point → dollars;
+   all-integer values with a median of at least CENTS_MEDIAN_THRESHOLD → cents
+   (a column of $100+ charges written in cents); otherwise dollars
+
+Amounts come back as nullable Int64 cents, so every downstream sum is exact
+integer arithmetic. Convert with cents_to_dollars() only at the edge (database
+records, printed totals).
+
+Usage:
+    from hist_money import coalesce_money_columns, cents_to_dollars
+
+    cents, units = coalesce_money_columns(df, ['Amount', 'Gross', 'Total'])
+    total = int(cents.sum())
+    print(f"${cents_to_dollars(total):,.2f}")
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+UNITS = ('auto', 'dollars', 'cents')
+
+# All-integer columns with a median |value| at or above this are treated as cents
+CENTS_MEDIAN_THRESHOLD = 10000
+
+CENTS_HEADER_PATTERN = re.compile(r'cents|minor|in_cents|\(cents\)', re.IGNORECASE)
+DOLLARS_HEADER_PATTERN = re.compile(r'\$|usd|dollar', re.IGNORECASE)
+
+# Characters dropped before numeric parsing ("(" and ")" mark negatives)
+_STRIP_CHARS = str.maketrans('', '', '$€£¥, ()\t')
+_CURRENCY_CODE_PATTERN = r'(?i)usd|eur|gbp'
+
+
+# =============================================================================
+# PARSING
+# =============================================================================
+
+def parse_money_text(values: pd.Series) -> Tuple[pd.Series, pd.Series]:
+    """
+    Parse money text into integer minor units without choosing a scale.
+
+    Returns (units, has_fraction):
+        units        - Int64 value in hundredths when the text had a decimal
+                       point, or the raw integer when it did not
+        has_fraction - True where the text had a decimal point
+    Invalid or empty values are <NA>. "(12.50)" and "-12.50" are negative.
+
+    Exports repeat the same few prices, so only the distinct strings are
+    parsed and the results are broadcast back through the factorized codes.
+    """
+    codes, distinct = pd.factorize(values, use_na_sentinel=True)
+    text = pd.Series(distinct, dtype=object).astype(str).str.strip()
+
+    negative_parens = text.str.startswith('(').to_numpy(dtype=bool)
+    cleaned = text.str.translate(_STRIP_CHARS)
+    numbers = pd.to_numeric(cleaned, errors='coerce')
+
+    # Only values that still failed (e.g. "USD 12.00") pay for a regex pass
+    retry = numbers.isna() & cleaned.ne('')
+    if retry.any():
+        numbers[retry] = pd.to_numeric(
+            cleaned[retry].str.replace(_CURRENCY_CODE_PATTERN, '', regex=True), errors='coerce'
+        )
+
+    has_fraction = cleaned.str.contains('.', regex=False).to_numpy(dtype=bool)
+    numbers = numbers.to_numpy(dtype='float64')
+    units = np.where(has_fraction, np.rint(numbers * 100), numbers)
+    units = np.where(negative_parens, -np.abs(units), units)
+
+    valid = ~np.isnan(units)
+    distinct_units = pd.array(np.where(valid, units, 0).astype('int64'), dtype='Int64')
+    distinct_units[~valid] = pd.NA
+
+    # Broadcast back; code -1 is a missing input value
+    present = codes >= 0
+    result = pd.Series(pd.NA, index=values.index, dtype='Int64')
+    result[present] = distinct_units[codes[present]]
+    fraction = np.zeros(len(values), dtype=bool)
+    fraction[present] = has_fraction[codes[present]] & valid[codes[present]]
+    return result, pd.Series(fraction, index=values.index)
+
+
+def detect_money_unit(header: Optional[str], units: pd.Series, has_fraction: pd.Series) -> str:
+    """Decide 'cents' or 'dollars' for a whole column (see module docstring)."""
+    if header:
+        if CENTS_HEADER_PATTERN.search(header):
+            return 'cents'
+        if DOLLARS_HEADER_PATTERN.search(header):
+            return 'dollars'
+
+    present = units.dropna()
+    if present.empty or has_fraction.any():
+        return 'dollars'
+    if present.abs().median() >= CENTS_MEDIAN_THRESHOLD:
+        return 'cents'
+    return 'dollars'
+
+
+def parse_money_column(values: pd.Series, header: Optional[str] = None, unit: str = 'auto') -> Tuple[pd.Series, str]:
+    """
+    Parse one amount column to Int64 cents.
+    Returns (cents, unit_used). Numeric columns (already parsed by pandas)
+    skip the text pass.
+    """
+    if unit not in UNITS:
+        raise ValueError(f"unit must be one of {UNITS}, got {unit!r}")
+
+    if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+        numbers = pd.to_numeric(values, errors='coerce')
+        integral = numbers.dropna().eq(numbers.dropna().round()).all()
+        if unit == 'auto':
+            has_fraction = pd.Series(not integral, index=values.index)
+            unit = detect_money_unit(header, numbers, has_fraction)
+        scale = 1 if unit == 'cents' else 100
+        return (numbers * scale).round().astype('Int64'), unit
+
+    units, has_fraction = parse_money_text(values)
+    if unit == 'auto':
+        unit = detect_money_unit(header, units, has_fraction)
+
+    if unit == 'cents':
+        # "1234.00" in a cents column is still 1234 cents
+        cents = units.where(~has_fraction, units // 100)
+    else:
+        cents = units.where(has_fraction, units * 100)
+    return cents.astype('Int64'), unit
+
+
+def coalesce_money_columns(
+    df: pd.DataFrame,
+    candidates: List[str],
+    unit: Union[str, Dict[str, str]] = 'auto',
+) -> Tuple[pd.Series, Dict[str, str]]:
+    """
+    Parse every candidate column present in `df` and take the first non-null
+    amount per row, in candidate order (same precedence as the old
+    `row.get('Amount') or row.get('Gross') or ...` chains).
+    `unit` may also be the {column: unit} returned for an earlier chunk of the
+    same file, so every chunk is read in the same unit.
+    Returns (cents, {column: unit_used}).
+    """
+    cents = pd.Series(pd.NA, index=df.index, dtype='Int64')
+    units = {}
+    for column in candidates:
+        if column not in df.columns:
+            continue
+        column_unit = unit.get(column, 'auto') if isinstance(unit, dict) else unit
+        parsed, units[column] = parse_money_column(df[column], header=column, unit=column_unit)
+        cents = cents.fillna(parsed)
+    return cents, units
+
+
+# =============================================================================
+# CONVERSION
+# =============================================================================
+
+def cents_to_dollars(cents):
+    """Integer cents → dollars (float for scalars, float Series for columns); None stays None."""
+    if isinstance(cents, pd.Series):
+        return cents.astype('Float64') / 100
+    if cents is None or cents is pd.NA:
+        return None
+    return int(cents) / 100
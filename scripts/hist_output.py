@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Chunked, Compressed CSV Output with a Manifest
+
+unified_contacts.csv was written with one df.to_csv() call, uncompressed,
+straight to its final name: a job copying or importing the file while the
+build was still writing saw a truncated CSV, and nothing recorded what a
+complete file looks like. CsvOutputWriter writes it instead:
+
+1. Rows are written chunk by chunk (CHUNK_ROWS at a time) to a temporary
+   file next to the output, optionally through a zstd or gzip compressor
+   (the Arrow codecs, no extra dependency)
+2. Date columns use ONE format per column for the whole file (date only if
+   every value is midnight), so the chunks match a single to_csv() call
+3. On close the temporary file is fsynced and renamed over the output
+   (atomic on the same filesystem), then the manifest is written the same
+   way, and stale variants with another compression are removed so readers
+   never pick up an old file
+4. The manifest (<name>.manifest.json) records the file, compression, row
+   count, SHA-256 of the UNCOMPRESSED CSV text (the same for every
+   compression) and the column schema
+
+The importers read .csv.zst / .csv.gz transparently through hist_csv, which
+also falls back to the compressed variant when the plain .csv is missing.
+
+Usage:
+    from hist_output import write_frame, CsvOutputWriter
+
+    manifest = write_frame(df, 'historical_data/unified_contacts.csv', compression='zstd')
+
+    with CsvOutputWriter(path, columns, compression='gzip', date_formats=formats) as writer:
+        for chunk in chunks:
+            writer.write(chunk)
+    manifest = writer.manifest
+
+    python scripts/create_unified_contacts.py --compression zstd
+    python scripts/hist_output.py verify historical_data/unified_contacts.csv.zst
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import sys
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from hist_csv import COMPRESSION_SUFFIXES, pa, read_csv_chunks, resolve_path, strip_compression
+
+# Rows per chunk written
+CHUNK_ROWS = 100_000
+
+COMPRESSIONS = ['none', 'zstd', 'gzip']
+SUFFIX_FOR = {compression: suffix for suffix, compression in COMPRESSION_SUFFIXES.items()}
+
+MANIFEST_SUFFIX = '.manifest.json'
+
+# Bytes hashed per read when verifying
+VERIFY_BLOCK = 1 << 20
+
+
+def output_path(path: str, compression: Optional[str] = None) -> str:
+    """unified_contacts.csv + 'zstd' → unified_contacts.csv.zst"""
+    path = strip_compression(path)
+    if compression and compression != 'none':
+        return path + SUFFIX_FOR[compression]
+    return path
+
+
+def manifest_path_for(path: str) -> str:
+    """unified_contacts.csv[.zst|.gz] → unified_contacts.manifest.json"""
+    root, _ = os.path.splitext(strip_compression(path))
+    return root + MANIFEST_SUFFIX
+
+
+def read_manifest(path: str) -> Optional[Dict]:
+    """The manifest written alongside `path`, or None if there isn't one."""
+    manifest_file = manifest_path_for(path)
+    if not os.path.exists(manifest_file):
+        return None
+    with open(manifest_file) as f:
+        return json.load(f)
+
+
+def date_format(values: pd.Series) -> str:
+    """The format to_csv() picks for a whole datetime column."""
+    values = values.dropna()
+    if (values == values.dt.normalize()).all():
+        return '%Y-%m-%d'
+    if (values.dt.microsecond == 0).all():
+        return '%Y-%m-%d %H:%M:%S'
+    return '%Y-%m-%d %H:%M:%S.%f'
+
+
+def frame_date_formats(df: pd.DataFrame) -> Dict[str, str]:
+    return {name: date_format(df[name]) for name in df.columns if pd.api.types.is_datetime64_any_dtype(df[name])}
+
+
+def column_type(values: pd.Series) -> str:
+    """Schema type of a column as written: integer, float, boolean, datetime or string."""
+    if pd.api.types.is_bool_dtype(values):
+        return 'boolean'
+    if pd.api.types.is_integer_dtype(values):
+        return 'integer'
+    if pd.api.types.is_float_dtype(values):
+        return 'float'
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return 'datetime'
+    return 'string'
+
+
+def _open_compressed(path: str, compression: Optional[str]):
+    if compression in (None, 'none'):
+        return open(path, 'wb')
+    if pa is not None:
+        return pa.CompressedOutputStream(pa.OSFile(path, 'wb'), compression)
+    if compression == 'gzip':
+        return gzip.open(path, 'wb')
+    raise RuntimeError("zstd output needs pyarrow (pip install pyarrow); use --compression gzip")
+
+
+def _replace(temp_path: str, path: str):
+    """fsync, then rename over the destination (readers see the old or the new file, never half)."""
+    with open(temp_path, 'rb') as f:
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+class CsvOutputWriter:
+    """
+    Streams CSV chunks to `path` (compressed per `compression`), renaming it
+    into place and writing the manifest on close(). Used as a context
+    manager, an exception discards the temporary file and leaves any
+    previous output untouched.
+    """
+
+    def __init__(self, path: str, columns: List[str], compression: Optional[str] = None,
+                 date_formats: Optional[Dict[str, str]] = None):
+        self.compression = None if compression in (None, 'none') else compression
+        self.path = output_path(path, self.compression)
+        self.columns = list(columns)
+        self.date_formats = date_formats or {}
+        self.rows = 0
+        self.schema: Optional[List[Dict[str, str]]] = None
+        self.manifest: Optional[Dict] = None
+        self._temp_path = f"{self.path}.tmp-{os.getpid()}"
+        self._hash = hashlib.sha256()
+        self._stream = _open_compressed(self._temp_path, self.compression)
+        self._write_text(pd.DataFrame(columns=self.columns).to_csv(index=False))
+
+    def _write_text(self, text: str):
+        data = text.encode('utf-8')
+        self._hash.update(data)
+        self._stream.write(data)
+
+    def write(self, chunk: pd.DataFrame):
+        chunk = chunk[self.columns]
+        if self.schema is None:
+            self.schema = [{'name': name, 'type': 'datetime' if name in self.date_formats else column_type(chunk[name])}
+                           for name in self.columns]
+        if self.date_formats:
+            chunk = chunk.copy()
+            for name, fmt in self.date_formats.items():
+                chunk[name] = pd.to_datetime(chunk[name]).dt.strftime(fmt)
+        self._write_text(chunk.to_csv(index=False, header=False))
+        self.rows += len(chunk)
+
+    def close(self) -> Dict:
+        self._stream.close()
+        _replace(self._temp_path, self.path)
+
+        self.manifest = {
+            'file': os.path.basename(self.path),
+            'compression': self.compression or 'none',
+            'rows': self.rows,
+            'bytes': os.path.getsize(self.path),
+            'sha256': self._hash.hexdigest(),
+            'columns': self.schema or [{'name': name, 'type': 'string'} for name in self.columns],
+            'written_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        }
+        manifest_file = manifest_path_for(self.path)
+        with open(manifest_file + '.tmp', 'w') as f:
+            json.dump(self.manifest, f, indent=2)
+            f.write('\n')
+        _replace(manifest_file + '.tmp', manifest_file)
+
+        # A previous build with another compression would otherwise shadow or
+        # contradict this one (readers try the plain .csv first)
+        for compression in COMPRESSIONS:
+            stale = output_path(self.path, compression)
+            if stale != self.path and os.path.exists(stale):
+                os.remove(stale)
+        return self.manifest
+
+    def abort(self):
+        self._stream.close()
+        if os.path.exists(self._temp_path):
+            os.remove(self._temp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+
+def write_frame(df: pd.DataFrame, path: str, compression: Optional[str] = None,
+                chunk_rows: int = CHUNK_ROWS) -> Dict:
+    """Write a whole frame through CsvOutputWriter in chunks; returns the manifest."""
+    with CsvOutputWriter(path, list(df.columns), compression, frame_date_formats(df)) as writer:
+        for start in range(0, len(df), chunk_rows):
+            writer.write(df.iloc[start:start + chunk_rows])
+    return writer.manifest
+
+
+def verify_output(path: str) -> List[str]:
+    """Re-read an output and compare it with its manifest; returns the problems found."""
+    path = resolve_path(path)
+    manifest = read_manifest(path)
+    if manifest is None:
+        return [f"no manifest ({manifest_path_for(path)})"]
+    if manifest['file'] != os.path.basename(path):
+        return [f"manifest describes {manifest['file']}, not {os.path.basename(path)}"]
+
+    problems = []
+    digest = hashlib.sha256()
+    compression = manifest['compression']
+    if compression == 'none':
+        stream = open(path, 'rb')
+    elif pa is not None:
+        stream = pa.input_stream(path, compression=compression)
+    else:
+        stream = gzip.open(path, 'rb')
+    with stream:
+        while True:
+            block = stream.read(VERIFY_BLOCK)
+            if not block:
+                break
+            digest.update(block)
+    if digest.hexdigest() != manifest['sha256']:
+        problems.append(f"content hash {digest.hexdigest()[:12]}… ≠ manifest {manifest['sha256'][:12]}…")
+
+    rows = 0
+    columns = None
+    for chunk in read_csv_chunks(path):
+        columns = columns or list(chunk.columns)
+        rows += len(chunk)
+    if rows != manifest['rows']:
+        problems.append(f"{rows:,} rows ≠ manifest {manifest['rows']:,}")
+    expected = [column['name'] for column in manifest['columns']]
+    if columns is not None and columns != expected:
+        problems.append("columns differ from the manifest schema")
+    return problems
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Check a chunked CSV output against its manifest')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    verify = subparsers.add_parser('verify', help='Re-hash and count an output file')
+    verify.add_argument('path', help='Output file, e.g. historical_data/unified_contacts.csv.zst')
+    args = parser.parse_args()
+
+    problems = verify_output(args.path)
+    if problems:
+        for problem in problems:
+            print(f"❌ {problem}")
+        sys.exit(1)
+    manifest = read_manifest(resolve_path(args.path))
+    print(f"✅ {manifest['file']}: {manifest['rows']:,} rows, sha256 {manifest['sha256'][:12]}… matches")
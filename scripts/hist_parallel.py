@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Chunk-Parallel Row Mapping for Historical Importers
+
+Most mapping is column-wise now, but the per-row mappers
+(map_google_sheets_row, map_airtable_row, map_stripe_row, ...) and
+tenant-specific overrides of them stay per-row because they are too irregular
+to vectorize. map_rows() runs any such mapper over a loaded frame:
+
+- workers=1: in-process, same as the old `for idx, row in df.iterrows()` loop
+- workers>1: the frame is split into contiguous chunks that are mapped in a
+  process pool with the SAME mapper function; results are merged back in
+  original row order, and skipped rows / errors keep their original index
+
+The mapper must be a module-level function (so it can be pickled) with the
+signature mapper(row_dict, *mapper_args) -> Optional[Dict]; returning None
+means "skip this row", raising hist_rejects.RowRejected('reason') skips it
+with a reason code. Workers are forked on POSIX so they inherit the
+importer's already-loaded modules instead of re-importing them.
+
+Usage (from an importer):
+    from hist_parallel import map_rows
+
+    mapped = map_rows(df, map_airtable_row, batch_id, workers=args.workers)
+    contacts = mapped['records']
+    for idx, reason in mapped['skipped']: ...   # reason is None when the mapper returned None
+    for idx, message in mapped['errors']: ...
+
+Pass progress=<hist_progress stage> to count rows as each chunk finishes.
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from hist_rejects import RowRejected
+
+# Rows per chunk; large enough that pickling a chunk is cheap next to mapping it
+DEFAULT_CHUNK_SIZE = 5000
+
+
+def resolve_workers(workers: Optional[int]) -> int:
+    """None/0 → one worker per CPU core; negative counts are treated as 1."""
+    if not workers:
+        return os.cpu_count() or 1
+    return max(1, workers)
+
+
+def _map_chunk(chunk: pd.DataFrame, mapper: Callable, mapper_args: Tuple) -> Tuple[List[Dict], List, List[Tuple]]:
+    """Map one chunk; returns ([record], [(skipped idx, reason)], [(idx, error message)])."""
+    records, skipped, errors = [], [], []
+    for idx, row in chunk.iterrows():
+        try:
+            record = mapper(row.to_dict(), *mapper_args)
+        except RowRejected as e:
+            skipped.append((idx, e.reason))
+            continue
+        except Exception as e:
+            errors.append((idx, str(e)))
+            continue
+        if record:
+            records.append(record)
+        else:
+            skipped.append((idx, None))
+    return records, skipped, errors
+
+
+def _pool_context():
+    """Fork where available so workers don't re-run the importer's module setup."""
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('fork' if 'fork' in methods else None)
+
+
+def map_rows(
+    df: pd.DataFrame,
+    mapper: Callable,
+    *mapper_args,
+    workers: int = 1,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    progress=None,
+) -> Dict[str, list]:
+    """
+    Map every row of `df` with `mapper(row_dict, *mapper_args)`.
+
+    Returns {'records': [...], 'skipped': [(idx, reason), ...], 'errors': [(idx, message), ...]}
+    with records in the frame's original row order. `progress` (anything with
+    advance(rows)) is advanced once per finished chunk.
+    """
+    workers = resolve_workers(workers)
+
+    # Contiguous chunks, so concatenating results in submit order keeps row order
+    chunks = [df.iloc[i:i + chunk_size] for i in range(0, len(df), chunk_size)]
+    records, skipped, errors = [], [], []
+
+    def collect(chunk, result):
+        chunk_records, chunk_skipped, chunk_errors = result
+        records.extend(chunk_records)
+        skipped.extend(chunk_skipped)
+        errors.extend(chunk_errors)
+        if progress is not None:
+            progress.advance(len(chunk))
+
+    if workers == 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            collect(chunk, _map_chunk(chunk, mapper, mapper_args))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=_pool_context()) as pool:
+            futures = [pool.submit(_map_chunk, chunk, mapper, mapper_args) for chunk in chunks]
+            for chunk, future in zip(chunks, futures):
+                collect(chunk, future.result())
+
+    return {'records': records, 'skipped': skipped, 'errors': errors}
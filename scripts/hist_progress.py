@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Live Progress for Long Historical Imports
+
+Between "🔄 Processing rows..." and the final summary the importers used to
+print nothing, and the database write was one silent call. ImportProgress
+tracks each stage of a run (map, write, timeline) and reports:
+
+- on the terminal: rows done / total, current rows/sec and ETA per stage,
+  redrawn in place on a TTY, one line per PRINT_INTERVAL otherwise
+- in hist_import_logs: the run's log row is inserted when the import starts
+  and its `progress` column is updated every LOG_INTERVAL seconds, so long
+  backfills can be watched (and stage timings compared across runs) with
+    SELECT source_file, progress FROM hist_import_logs WHERE import_completed_at IS NULL;
+  (migrations/20251226_005_add_hist_import_logs_progress.sql)
+
+The in-progress row always gets a terminal status: complete() writes the
+importer's final log entry, fail() closes it as failed for importers that stop
+early, and a run that exits any other way (an uncaught exception, a
+sys.exit() without fail()) is closed as failed when the process exits.
+
+Reporting is throttled by time: advance() only adds to a counter and reads
+the monotonic clock, so callers can report per chunk (or even per row)
+without measurable overhead.
+
+Usage (from an importer):
+    from hist_progress import ImportProgress
+
+    progress = ImportProgress(supabase, batch_id, os.path.basename(csv_path), 'airtable', 'import_airtable.py')
+    progress.start()
+    with progress.stage('map', len(df)) as stage:
+        mapped = map_rows(df, map_airtable_row, batch_id, progress=stage)
+    if not mapped['records']:
+        progress.fail('No valid contacts to import')
+        sys.exit(1)
+    ...
+    log_entry['progress'] = progress.snapshot()
+    progress.complete(log_entry)
+"""
+
+import atexit
+import sys
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, Optional, Union
+
+# Seconds between terminal updates (TTY / redirected output)
+PRINT_INTERVAL = 0.5
+PRINT_INTERVAL_NO_TTY = 10.0
+
+# Seconds between hist_import_logs progress updates
+LOG_INTERVAL = 15.0
+
+LOG_TABLE = 'hist_import_logs'
+
+
+def format_duration(seconds: Optional[float]) -> str:
+    """Seconds → '4.2s' / 'm:ss' / 'h:mm:ss'; '?' when unknown."""
+    if seconds is None or seconds != seconds or seconds == float('inf'):
+        return '?'
+    if seconds < 60:
+        return f"{seconds:.1f}s"
+    seconds = int(round(seconds))
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+
+class StageProgress:
+    """Counter for one stage; created by ImportProgress.stage()."""
+
+    def __init__(self, owner: 'ImportProgress', name: str, total: Optional[int]):
+        self.owner = owner
+        self.name = name
+        self.total = total
+        self.done = 0
+        self.started = time.monotonic()
+        self.finished_at: Optional[float] = None
+        self.rate = 0.0  # rows/sec since the previous report
+        self._last_time = self.started
+        self._last_done = 0
+        self._next_report = self.started + owner.print_interval
+
+    def advance(self, rows: int = 1):
+        """Count `rows` more rows; reports only when the print interval has passed."""
+        self.done += rows
+        now = time.monotonic()
+        if now >= self._next_report:
+            self._report(now)
+
+    def _report(self, now: float):
+        elapsed = now - self._last_time
+        if elapsed > 0:
+            self.rate = (self.done - self._last_done) / elapsed
+        self._last_time, self._last_done = now, self.done
+        self._next_report = now + self.owner.print_interval
+        self.owner._render(self, now)
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished_at or time.monotonic()) - self.started
+
+    @property
+    def eta(self) -> Optional[float]:
+        if self.finished_at is not None:
+            return 0.0
+        if self.total is None:
+            return None
+        rate = self.rate or (self.done / self.elapsed if self.elapsed > 0 else 0)
+        return (self.total - self.done) / rate if rate > 0 else None
+
+    def finish(self):
+        if self.finished_at is None:
+            self.finished_at = time.monotonic()
+            self.owner._render(self, self.finished_at, final=True)
+
+    def as_dict(self) -> Dict:
+        elapsed = self.elapsed
+        return {
+            'done': self.done,
+            'total': self.total,
+            'rows_per_sec': round(self.done / elapsed, 1) if elapsed > 0 else None,
+            'elapsed_seconds': round(elapsed, 2),
+            'eta_seconds': None if self.eta is None else round(self.eta, 1),
+            'finished': self.finished_at is not None,
+        }
+
+    def __enter__(self) -> 'StageProgress':
+        return self
+
+    def __exit__(self, *exc):
+        self.finish()
+        return False
+
+
+class ImportProgress:
+    """
+    Progress for one import run: terminal output for every stage plus a
+    throttled `progress` update on the run's hist_import_logs row.
+    Pass supabase=None to report on the terminal only.
+    """
+
+    def __init__(
+        self,
+        supabase=None,
+        batch_id: Optional[Union[str, uuid.UUID]] = None,
+        source_file: Optional[str] = None,
+        source_type: Optional[str] = None,
+        imported_by: Optional[str] = None,
+        stream=None,
+        log_interval: float = LOG_INTERVAL,
+    ):
+        self.supabase = supabase
+        self.batch_id = str(batch_id) if batch_id else None
+        self.source_file = source_file
+        self.source_type = source_type
+        self.imported_by = imported_by
+        self.stream = stream or sys.stdout
+        self.tty = hasattr(self.stream, 'isatty') and self.stream.isatty()
+        self.print_interval = PRINT_INTERVAL if self.tty else PRINT_INTERVAL_NO_TTY
+        self.log_interval = log_interval
+        self.stages: Dict[str, StageProgress] = {}
+        self._next_log = 0.0
+        self._log_enabled = supabase is not None and self.batch_id is not None
+        self._open = False  # log row inserted but not yet completed or failed
+
+    def start(self):
+        """Insert the in-progress hist_import_logs row (import_completed_at stays NULL)."""
+        if not self._log_enabled:
+            return
+        self._write_log({
+            'id': self.batch_id,
+            'source_file': self.source_file,
+            'source_type': self.source_type,
+            'import_started_at': datetime.now().isoformat(),
+            'imported_by': self.imported_by,
+            'notes': 'In progress',
+            'progress': {},
+        }, insert=True)
+        self._next_log = time.monotonic() + self.log_interval
+        self._open = True
+        atexit.register(self._fail_if_open)
+
+    def complete(self, log_entry: Dict):
+        """
+        Upsert the importer's final hist_import_logs row over the in-progress
+        one. Raises if the write fails, like the upsert it replaces.
+        """
+        self._open = False
+        self.supabase.table(LOG_TABLE).upsert(log_entry).execute()
+
+    def fail(self, reason: str):
+        """Close the in-progress row as failed: completed now, `reason` in notes and errors."""
+        if not self._open:
+            return
+        self._open = False
+        if self._log_enabled:
+            self._write_log({
+                'import_completed_at': datetime.now().isoformat(),
+                'notes': f"Failed: {reason}",
+                'errors': [reason],
+                'progress': self.snapshot(),
+            })
+
+    def _fail_if_open(self):
+        self.fail('Import exited before it finished')
+
+    def stage(self, name: str, total: Optional[int] = None) -> StageProgress:
+        """Start a stage; use as a context manager or call finish()."""
+        stage = StageProgress(self, name, total)
+        self.stages[name] = stage
+        return stage
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """{stage: {done, total, rows_per_sec, elapsed_seconds, eta_seconds, finished}}"""
+        return {name: stage.as_dict() for name, stage in self.stages.items()}
+
+    def _render(self, stage: StageProgress, now: float, final: bool = False):
+        if final:
+            rate = stage.done / stage.elapsed if stage.elapsed > 0 else 0
+            line = f"  ✓ {stage.name}: {stage.done:,} rows in {format_duration(stage.elapsed)} ({rate:,.0f} rows/s)"
+        else:
+            total = f"/{stage.total:,}" if stage.total is not None else ''
+            line = (f"  ⏳ {stage.name}: {stage.done:,}{total} rows  "
+                    f"{stage.rate:,.0f} rows/s  ETA {format_duration(stage.eta)}")
+        if self.tty:
+            end = '\n' if final else ''
+            self.stream.write(f"\r\033[K{line}{end}")
+            self.stream.flush()
+        else:
+            print(line, file=self.stream, flush=True)
+
+        if self._log_enabled and (final or now >= self._next_log):
+            self._next_log = now + self.log_interval
+            self._write_log({'progress': self.snapshot()})
+
+    def _write_log(self, values: Dict, insert: bool = False):
+        """Best effort: a failing progress write never fails the import."""
+        try:
+            table = self.supabase.table(LOG_TABLE)
+            if insert:
+                table.upsert(values).execute()
+            else:
+                table.update(values).eq('id', self.batch_id).execute()
+        except Exception as e:
+            self._log_enabled = False
+            print(f"\n  ⚠️  Progress logging disabled: {e}", file=self.stream)
@@ -0,0 +1,492 @@
+#!/usr/bin/env python3
+"""
+Payment Reconciliation: Stripe / Denefits Exports vs. hist_payments
+
+Answers "is every charge in the export in hist_payments, and nothing else?"
+without the ad-hoc SQL that times out on full history. Both sides are
+reduced to compact keys and compared with a sorted merge:
+
+1. The export is streamed in chunks (hist_csv.read_csv_chunks) and normalized
+   with the importer's own mappers (map_stripe_row / map_denefits_row), so
+   emails, cents and refund signs match what an import would have written
+2. hist_payments is read in pages (keyset on id over REST, a server-side
+   cursor with --direct-db), filtered to the same source
+3. Each side goes through an external sort: sorted runs of RUN_SIZE keys are
+   spilled to temp files and merged with heapq.merge, so memory stays
+   bounded however many charges there are; total cost is O(n log n)
+4. Pass 1 merges on external_id (charge / contract ID). Same ID with a
+   different amount is an amount mismatch
+5. Rows left unmatched by pass 1 (including rows without an ID) are merged
+   again on (email, amount, payment day)
+6. What's still unmatched is missing (in the export, not in the database) or
+   extra (in the database, not in the export). Extra rows repeating an ID and
+   amount that already matched are reported as duplicates (a file imported
+   twice)
+
+Every discrepancy (and every pass-2 match, whose IDs differ) is written to a
+report CSV next to the export (<name>.reconcile.csv).
+
+Usage:
+    python scripts/hist_reconcile.py --stripe historical_data/stripe_unified_payments.csv
+    python scripts/hist_reconcile.py --denefits historical_data/denefits_contracts.csv --direct-db
+    python scripts/hist_reconcile.py --stripe stripe.csv --output /tmp/stripe_recon.csv
+
+Merge-engine benchmark on synthetic keys (time and peak memory):
+    python scripts/hist_reconcile.py --benchmark 1000000
+"""
+
+import csv
+import heapq
+import itertools
+import os
+import pickle
+import sys
+import tempfile
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Keys held in memory per sorted run before spilling to disk
+RUN_SIZE = 200_000
+
+# Keys per pickle block inside a run file
+SPILL_BLOCK = 10_000
+
+# hist_payments rows per page
+PAGE_SIZE = 1000
+
+# Export rows per chunk
+EXPORT_CHUNK_ROWS = 100_000
+
+REPORT_SUFFIX = '.reconcile.csv'
+REPORT_COLUMNS = ['kind', 'external_id', 'email', 'payment_day', 'export_amount', 'db_amount',
+                  'export_row', 'db_id']
+
+# A payment key: (external_id, email, amount_cents, payment_day, ref)
+# ref is the export row number or the hist_payments id
+PaymentKey = Tuple[str, str, int, str, str]
+
+
+# =============================================================================
+# EXTERNAL SORT
+# =============================================================================
+
+class ExternalSorter:
+    """Collects tuples and yields them sorted, spilling runs of `run_size` to temp files."""
+
+    def __init__(self, key: Optional[Callable] = None, run_size: int = RUN_SIZE, tmp_dir: Optional[str] = None):
+        self.key = key
+        self.run_size = run_size
+        self.tmp_dir = tmp_dir
+        self.count = 0
+        self._buffer: List[tuple] = []
+        self._runs: List[str] = []
+
+    def add(self, item: tuple):
+        self._buffer.append(item)
+        self.count += 1
+        if len(self._buffer) >= self.run_size:
+            self._spill()
+
+    def _spill(self):
+        self._buffer.sort(key=self.key)
+        fd, path = tempfile.mkstemp(prefix='hist_reconcile_', suffix='.run', dir=self.tmp_dir)
+        with os.fdopen(fd, 'wb') as f:
+            for start in range(0, len(self._buffer), SPILL_BLOCK):
+                pickle.dump(self._buffer[start:start + SPILL_BLOCK], f, protocol=pickle.HIGHEST_PROTOCOL)
+        self._runs.append(path)
+        self._buffer = []
+
+    @staticmethod
+    def _read_run(path: str) -> Iterator[tuple]:
+        with open(path, 'rb') as f:
+            while True:
+                try:
+                    block = pickle.load(f)
+                except EOFError:
+                    return
+                yield from block
+
+    def __iter__(self) -> Iterator[tuple]:
+        self._buffer.sort(key=self.key)
+        streams = [self._read_run(path) for path in self._runs] + [iter(self._buffer)]
+        try:
+            yield from heapq.merge(*streams, key=self.key)
+        finally:
+            self.close()
+
+    def close(self):
+        for path in self._runs:
+            if os.path.exists(path):
+                os.remove(path)
+        self._runs = []
+        self._buffer = []
+
+
+def merge_groups(left: Iterable[tuple], right: Iterable[tuple], key: Callable) -> Iterator[Tuple[list, list]]:
+    """
+    Merge two iterables sorted by `key`; yields (left_group, right_group) per
+    distinct key, either group possibly empty.
+    """
+    left_groups = itertools.groupby(left, key=key)
+    right_groups = itertools.groupby(right, key=key)
+    left_item = next(left_groups, None)
+    right_item = next(right_groups, None)
+    while left_item is not None or right_item is not None:
+        if right_item is None or (left_item is not None and left_item[0] < right_item[0]):
+            yield list(left_item[1]), []
+            left_item = next(left_groups, None)
+        elif left_item is None or right_item[0] < left_item[0]:
+            yield [], list(right_item[1])
+            right_item = next(right_groups, None)
+        else:
+            yield list(left_item[1]), list(right_item[1])
+            left_item = next(left_groups, None)
+            right_item = next(right_groups, None)
+
+
+# =============================================================================
+# RECONCILIATION
+# =============================================================================
+
+def _by_external_id(key: PaymentKey):
+    return key[0]
+
+
+def _by_fallback(key: PaymentKey):
+    return key[1], key[2], key[3]
+
+
+def _pair_equal_amounts(export_keys: List[PaymentKey], db_keys: List[PaymentKey]):
+    """
+    Split one external_id group into (matched pairs, mismatched pairs,
+    duplicate db keys, export leftovers, db leftovers). A duplicate is a
+    second database row with an ID and amount that already matched.
+    """
+    db_by_amount: Dict[int, List[PaymentKey]] = {}
+    for key in db_keys:
+        db_by_amount.setdefault(key[2], []).append(key)
+    matched, export_left = [], []
+    for key in export_keys:
+        candidates = db_by_amount.get(key[2])
+        if candidates:
+            matched.append((key, candidates.pop(0)))
+        else:
+            export_left.append(key)
+    matched_amounts = {export_key[2] for export_key, _ in matched}
+    duplicates = [key for amount in matched_amounts for key in db_by_amount[amount]]
+    db_left = [key for amount, keys in db_by_amount.items() if amount not in matched_amounts for key in keys]
+    mismatched = list(zip(export_left, db_left))
+    return matched, mismatched, duplicates, export_left[len(mismatched):], db_left[len(mismatched):]
+
+
+def reconcile_keys(
+    export_keys: Iterable[PaymentKey],
+    db_keys: Iterable[PaymentKey],
+    report: Optional[Callable[[str, Optional[PaymentKey], Optional[PaymentKey]], None]] = None,
+    run_size: int = RUN_SIZE,
+    tmp_dir: Optional[str] = None,
+) -> Counter:
+    """
+    Sorted-merge reconciliation of two key streams (any order).
+    Returns counts of matched_external_id / matched_fallback / amount_mismatch /
+    duplicate / missing / extra; `report(kind, export_key, db_key)` is called for every
+    row that isn't a pass-1 match.
+    """
+    counts: Counter = Counter()
+    report = report or (lambda kind, export_key, db_key: None)
+
+    export_sorted = ExternalSorter(_by_external_id, run_size, tmp_dir)
+    db_sorted = ExternalSorter(_by_external_id, run_size, tmp_dir)
+    export_left = ExternalSorter(_by_fallback, run_size, tmp_dir)
+    db_left = ExternalSorter(_by_fallback, run_size, tmp_dir)
+    try:
+        for key in export_keys:
+            (export_sorted if key[0] else export_left).add(key)
+        for key in db_keys:
+            (db_sorted if key[0] else db_left).add(key)
+
+        # Pass 1: external_id
+        for export_group, db_group in merge_groups(export_sorted, db_sorted, _by_external_id):
+            matched, mismatched, duplicates, export_rest, db_rest = _pair_equal_amounts(export_group, db_group)
+            counts['matched_external_id'] += len(matched)
+            for key in duplicates:
+                counts['duplicate'] += 1
+                report('duplicate', None, key)
+            for export_key, db_key in mismatched:
+                counts['amount_mismatch'] += 1
+                report('amount_mismatch', export_key, db_key)
+            for key in export_rest:
+                export_left.add(key)
+            for key in db_rest:
+                db_left.add(key)
+
+        # Pass 2: (email, amount, day) for everything pass 1 left over
+        for export_group, db_group in merge_groups(export_left, db_left, _by_fallback):
+            paired = min(len(export_group), len(db_group))
+            for export_key, db_key in zip(export_group[:paired], db_group[:paired]):
+                counts['matched_fallback'] += 1
+                report('matched_fallback', export_key, db_key)
+            for key in export_group[paired:]:
+                counts['missing'] += 1
+                report('missing', key, None)
+            for key in db_group[paired:]:
+                counts['extra'] += 1
+                report('extra', None, key)
+    finally:
+        for sorter in (export_sorted, db_sorted, export_left, db_left):
+            sorter.close()
+    return counts
+
+
+# =============================================================================
+# KEY SOURCES
+# =============================================================================
+
+def _text(value) -> str:
+    """None / NaN → '', anything else → stripped text."""
+    if value is None or value != value:
+        return ''
+    return str(value).strip()
+
+
+def payment_day(value) -> str:
+    """Payment timestamp → 'YYYY-MM-DD' in UTC (naive timestamps are taken as UTC, as Postgres does)."""
+    if value is None or value != value:
+        return ''
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if getattr(value, 'tzinfo', None) is not None:
+        value = value.astimezone(timezone.utc)
+    return value.strftime('%Y-%m-%d')
+
+
+def export_payment_keys(csv_path: str, source: str, amount_unit: Optional[str] = None,
+                        chunk_rows: int = EXPORT_CHUNK_ROWS, rejected: Optional[Counter] = None) -> Iterator[PaymentKey]:
+    """
+    Stream the export through the importer's mapper, chunk by chunk.
+    Rows the importer would reject are counted in `rejected` by reason.
+    """
+    from hist_csv import read_csv_chunks
+    from hist_money import coalesce_money_columns
+    from hist_parallel import map_rows
+    from import_payments import (AMOUNT_CENTS_COLUMN, DEFAULT_AMOUNT_UNITS, DENEFITS_AMOUNT_COLUMNS,
+                                 STRIPE_AMOUNT_COLUMNS, map_denefits_row, map_stripe_row)
+
+    amount_columns = STRIPE_AMOUNT_COLUMNS if source == 'stripe' else DENEFITS_AMOUNT_COLUMNS
+    mapper = map_stripe_row if source == 'stripe' else map_denefits_row
+    batch_id = uuid.uuid4()  # required by the mapper signature, not stored
+    units = amount_unit or DEFAULT_AMOUNT_UNITS[source]
+    for chunk in read_csv_chunks(csv_path, chunk_rows=chunk_rows):
+        # Cents vs. dollars is decided on the first chunk and kept for the rest of the file
+        chunk[AMOUNT_CENTS_COLUMN], detected = coalesce_money_columns(chunk, amount_columns, unit=units)
+        if isinstance(units, str):
+            units = detected
+        mapped = map_rows(chunk, mapper, batch_id)
+        if rejected is not None:
+            rejected.update(reason or 'missing_fields' for _, reason in mapped['skipped'])
+            rejected.update('map_error' for _ in mapped['errors'])
+        # map_rows keeps row order but not labels; recover the row numbers of the kept rows
+        skipped = {idx for idx, _ in mapped['skipped']} | {idx for idx, _ in mapped['errors']}
+        kept_rows = (idx for idx in chunk.index if idx not in skipped)
+        for row_number, payment in zip(kept_rows, mapped['records']):
+            yield (_text(payment['external_id']), payment['email'], int(payment['amount_cents']),
+                   payment_day(payment['payment_date']), str(row_number))
+
+
+def db_payment_keys_rest(supabase, source: str, page_size: int = PAGE_SIZE) -> Iterator[PaymentKey]:
+    """hist_payments keys for one source, keyset-paged on id through the REST API."""
+    last_id = None
+    while True:
+        query = (supabase.table('hist_payments')
+                 .select('id,external_id,email,amount,payment_date')
+                 .eq('source', source))
+        if last_id is not None:
+            query = query.gt('id', last_id)
+        rows = query.order('id').limit(page_size).execute().data
+        for row in rows:
+            yield (_text(row['external_id']), _text(row['email']).lower(), round(float(row['amount']) * 100),
+                   payment_day(row['payment_date']), row['id'])
+        if len(rows) < page_size:
+            return
+        last_id = rows[-1]['id']
+
+
+def db_payment_keys_direct(conn, source: str, page_size: int = PAGE_SIZE) -> Iterator[PaymentKey]:
+    """hist_payments keys for one source through a server-side cursor (page_size rows per fetch)."""
+    with conn.cursor(name='hist_reconcile') as cur:
+        cur.itersize = page_size
+        cur.execute(
+            """
+            SELECT coalesce(external_id, ''), lower(email), (amount * 100)::bigint,
+                   to_char(payment_date AT TIME ZONE 'UTC', 'YYYY-MM-DD'), id::text
+            FROM hist_payments
+            WHERE source = %s
+            """,
+            (source,),
+        )
+        for external_id, email, cents, day, payment_id in cur:
+            yield (external_id.strip(), email, int(cents), day, payment_id)
+
+
+# =============================================================================
+# REPORT
+# =============================================================================
+
+class ReconcileReport:
+    """Streams discrepancies to a CSV and keeps a few per kind for the console."""
+
+    def __init__(self, path: Optional[str], sample_size: int = 5):
+        self.path = path
+        self.sample_size = sample_size
+        self.samples: Dict[str, List[List]] = {}
+        self._file = open(path, 'w', newline='') if path else None
+        self._writer = csv.writer(self._file) if self._file else None
+        if self._writer:
+            self._writer.writerow(REPORT_COLUMNS)
+
+    def __call__(self, kind: str, export_key: Optional[PaymentKey], db_key: Optional[PaymentKey]):
+        base = export_key or db_key
+        row = [
+            kind,
+            base[0] or (db_key[0] if db_key else ''),
+            base[1],
+            base[3],
+            f"{export_key[2] / 100:.2f}" if export_key else '',
+            f"{db_key[2] / 100:.2f}" if db_key else '',
+            export_key[4] if export_key else '',
+            db_key[4] if db_key else '',
+        ]
+        if self._writer:
+            self._writer.writerow(row)
+        sample = self.samples.setdefault(kind, [])
+        if len(sample) < self.sample_size:
+            sample.append(row)
+
+    def close(self):
+        if self._file:
+            self._file.close()
+
+
+def reconcile_source(csv_path: str, source: str, direct_db: bool = False, amount_unit: Optional[str] = None,
+                     output: Optional[str] = None, run_size: int = RUN_SIZE, page_size: int = PAGE_SIZE) -> Counter:
+    """Reconcile one export against hist_payments rows of the same source and print the result."""
+    print(f"\n{'='*60}")
+    print(f"RECONCILING {source.upper()} EXPORT: {csv_path}")
+    print(f"{'='*60}\n")
+
+    output = output or os.path.splitext(csv_path)[0] + REPORT_SUFFIX
+    report = ReconcileReport(output)
+    rejected: Counter = Counter()
+    started = time.monotonic()
+
+    export_keys = export_payment_keys(csv_path, source, amount_unit, rejected=rejected)
+    try:
+        if direct_db:
+            from hist_copy import connect_direct
+            with connect_direct() as conn:
+                counts = reconcile_keys(export_keys, db_payment_keys_direct(conn, source, page_size),
+                                        report, run_size)
+        else:
+            from hist_supabase import create_supabase_client
+            counts = reconcile_keys(export_keys, db_payment_keys_rest(create_supabase_client(), source, page_size),
+                                    report, run_size)
+    finally:
+        report.close()
+
+    print(f"✓ Reconciled in {time.monotonic() - started:.1f}s\n")
+    print(f"  Matched on external_id:          {counts['matched_external_id']:,}")
+    print(f"  Matched on email/amount/day:     {counts['matched_fallback']:,}")
+    print(f"  Amount mismatches:               {counts['amount_mismatch']:,}")
+    print(f"  Missing from hist_payments:      {counts['missing']:,}")
+    print(f"  Extra in hist_payments:          {counts['extra']:,}")
+    print(f"  Duplicates in hist_payments:     {counts['duplicate']:,}")
+    if rejected:
+        print(f"  Export rows the importer rejects: {sum(rejected.values()):,} "
+              f"({', '.join(f'{reason}: {n}' for reason, n in rejected.most_common())})")
+
+    for kind in ('amount_mismatch', 'missing', 'extra', 'duplicate'):
+        for row in report.samples.get(kind, []):
+            print(f"    {kind}: {row[1] or '-'} {row[2]} {row[3]} export={row[4] or '-'} db={row[5] or '-'}")
+    if any(counts[kind] for kind in ('amount_mismatch', 'missing', 'extra', 'duplicate', 'matched_fallback')):
+        print(f"\n  Details: {output}")
+    else:
+        os.remove(output)
+        print("\n✅ Export and hist_payments agree")
+    return counts
+
+
+# =============================================================================
+# BENCHMARK
+# =============================================================================
+
+def run_benchmark(rows: int, run_size: int):
+    """Merge engine only: two synthetic key streams with known differences."""
+    import random
+    import resource
+
+    rng = random.Random(42)
+
+    def export_stream():
+        for i in range(rows):
+            yield (f"ch_{i:09d}", f"user{i % 50_000}@example.com", 9_700 + (i % 7) * 100, '2024-05-01', str(i))
+
+    def db_stream():
+        # Same charges in a different order, minus 0.1%, with 0.1% amount changes and 0.1% unknown rows
+        order = list(range(rows))
+        rng.shuffle(order)
+        for i in order:
+            if i % 1000 == 1:
+                continue
+            cents = 9_700 + (i % 7) * 100 + (500 if i % 1000 == 2 else 0)
+            yield (f"ch_{i:09d}", f"user{i % 50_000}@example.com", cents, '2024-05-01', f"db{i}")
+        for i in range(rows // 1000):
+            yield (f"ch_x{i:09d}", f"other{i}@example.com", 1_000, '2024-05-02', f"dbx{i}")
+
+    start = time.perf_counter()
+    counts = reconcile_keys(export_stream(), db_stream(), run_size=run_size)
+    seconds = time.perf_counter() - start
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{rows:,} keys per side, run size {run_size:,}")
+    print(f"  {seconds:.1f}s ({rows / seconds:,.0f} keys/s), peak RSS {peak_mb:,.0f} MB")
+    print(f"  {dict(counts)}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Reconcile Stripe / Denefits exports against hist_payments')
+    parser.add_argument('--stripe', help='Path to Stripe CSV export')
+    parser.add_argument('--denefits', help='Path to Denefits CSV export')
+    parser.add_argument('--direct-db', action='store_true',
+                        help='Read hist_payments via Postgres (needs SUPABASE_DB_URL) instead of the REST API')
+    parser.add_argument('--amount-unit', choices=('auto', 'dollars', 'cents'),
+                        help='Unit of the amount columns (default: detect on the first chunk for Stripe, '
+                             'dollars for Denefits)')
+    parser.add_argument('--output', help=f'Report CSV (default: <export>{REPORT_SUFFIX}; one export only)')
+    parser.add_argument('--run-size', type=int, default=RUN_SIZE, help='Keys per sorted run kept in memory')
+    parser.add_argument('--page-size', type=int, default=PAGE_SIZE, help='hist_payments rows per page')
+    parser.add_argument('--benchmark', type=int, metavar='ROWS', help='Benchmark the merge on synthetic keys')
+    args = parser.parse_args()
+
+    if args.benchmark:
+        run_benchmark(args.benchmark, args.run_size)
+        sys.exit(0)
+
+    sources = [(path, source) for path, source in ((args.stripe, 'stripe'), (args.denefits, 'denefits')) if path]
+    if not sources:
+        print("ERROR: You must specify at least one CSV file with --stripe or --denefits")
+        sys.exit(1)
+    if args.output and len(sources) > 1:
+        print("ERROR: --output needs a single export")
+        sys.exit(1)
+    for path, _ in sources:
+        if not os.path.exists(path):
+            print(f"ERROR: File not found: {path}")
+            sys.exit(1)
+
+    for path, source in sources:
+        reconcile_source(path, source, direct_db=args.direct_db, amount_unit=args.amount_unit,
+                         output=args.output, run_size=args.run_size, page_size=args.page_size)
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Reject-File Quarantine for Historical Importers
+
+The importers used to build one "Row 123: No email found" string per skipped
+row, keep them all in memory and store the whole list in
+hist_import_logs.warnings. On a large, dirty export that is most of the log
+row. Instead, rejected rows are now:
+
+- streamed to a reject file next to the input (<name>.rejects.csv) in
+  flushes of FLUSH_ROWS: the original row with _reject_row (row number in the
+  source file), _reject_reason (a short code) and _reject_detail in front
+- counted per reason; hist_import_logs.rejects stores only
+  {"file": ..., "counts": {reason: n}, "sample": [first REJECT_SAMPLE_SIZE]}
+  (migrations/20251226_004_add_hist_import_logs_rejects.sql)
+
+Reason codes:
+    no_email        row without a usable email (contact mappers return None)
+    no_amount       payment row with a missing or zero amount
+    no_date         payment row without a parseable date
+    missing_fields  payment row skipped by a mapper that returned None
+    map_error       the mapper raised; the exception text is the detail
+
+Mappers skip a row either by returning None (the importer's default reason)
+or by raising RowRejected('code') for a more specific one.
+
+Re-importing rejects: fix the rows in the reject file, then run the same
+importer on it. strip_reject_columns() restores the original row numbers, and
+rows that still fail are written back to the same reject file. Once every
+row goes through, the reject file is renamed to <name>.rejects.csv.imported,
+so running the same command again can't import those rows twice:
+    python scripts/import_google_sheets.py historical_data/export.rejects.csv
+
+Usage (from an importer):
+    from hist_rejects import RejectLog, reject_path_for, strip_reject_columns
+
+    df = strip_reject_columns(read_csv(csv_path))
+    rejects = RejectLog(df, reject_path_for(csv_path))
+    mapped = map_rows(df, map_row, batch_id)
+    rejects.add_mapped(mapped, default_reason='no_email')
+    rejects.close(source_path=csv_path)
+    log_entry['rejects'] = rejects.summary()
+"""
+
+import os
+from collections import Counter
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+REJECT_ROW_COLUMN = '_reject_row'
+REJECT_REASON_COLUMN = '_reject_reason'
+REJECT_DETAIL_COLUMN = '_reject_detail'
+REJECT_COLUMNS = [REJECT_ROW_COLUMN, REJECT_REASON_COLUMN, REJECT_DETAIL_COLUMN]
+
+# Rejects kept in memory before they are appended to the file
+FLUSH_ROWS = 5000
+
+# Rejects listed individually in hist_import_logs.rejects and the console report
+REJECT_SAMPLE_SIZE = 20
+
+REJECT_SUFFIX = '.rejects.csv'
+
+# Appended to a reject file once a re-import of it rejected nothing
+CONSUMED_SUFFIX = '.imported'
+
+
+class RowRejected(Exception):
+    """Raised by a row mapper to skip a row with a specific reason code."""
+
+    def __init__(self, reason: str, detail: Optional[str] = None):
+        super().__init__(detail or reason)
+        self.reason = reason
+        self.detail = detail
+
+
+def reject_path_for(csv_path: str) -> str:
+    """historical_data/export.csv → historical_data/export.rejects.csv (a reject file maps to itself)."""
+    if csv_path.endswith(REJECT_SUFFIX):
+        return csv_path
+    root, _ = os.path.splitext(csv_path)
+    return root + REJECT_SUFFIX
+
+
+def strip_reject_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    For a reject file being re-imported: index rows by their original row
+    number and drop the _reject_* columns so the mappers see the original row.
+    Other frames are returned unchanged.
+    """
+    if REJECT_ROW_COLUMN not in df.columns:
+        return df
+    df = df.set_index(df[REJECT_ROW_COLUMN].astype('int64').rename(None))
+    return df.drop(columns=[c for c in REJECT_COLUMNS if c in df.columns])
+
+
+def _as_text(frame: pd.DataFrame) -> pd.DataFrame:
+    """
+    Undo pandas' float upcasting so rows round-trip: a phone column read as
+    5551234567.0 (because other rows are empty) is written back as 5551234567.
+    """
+    frame = frame.copy()
+    for column in frame.columns:
+        values = frame[column]
+        if pd.api.types.is_float_dtype(values):
+            numbers = values.to_numpy(dtype='float64', na_value=np.nan)
+            integral = np.isfinite(numbers) & (numbers == np.round(numbers))
+            text = values.astype(object)
+            text[integral] = numbers[integral].astype('int64')
+            frame[column] = text
+    return frame
+
+
+class RejectLog:
+    """
+    Streams rejected rows of one source frame to a reject file and keeps
+    per-reason counts plus a bounded sample for the import log.
+    """
+
+    def __init__(self, df: pd.DataFrame, path: Optional[str], sample_size: int = REJECT_SAMPLE_SIZE):
+        self.df = df
+        self.path = path
+        # Columns at load time; private columns the importer adds later stay out of the file
+        self.columns = [c for c in df.columns if c not in REJECT_COLUMNS]
+        self.sample_size = sample_size
+        self.counts: Counter = Counter()
+        self.sample: List[str] = []
+        self.written = 0
+        self.consumed_path: Optional[str] = None
+        self._pending: List[tuple] = []
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+    def add(self, idx, reason: str, detail: Optional[str] = None):
+        """Reject source row `idx` (a label of df.index) with a reason code."""
+        self.counts[reason] += 1
+        if len(self.sample) < self.sample_size:
+            self.sample.append(f"Row {idx}: {reason}" + (f" ({detail})" if detail else ''))
+        self._pending.append((idx, reason, detail))
+        if len(self._pending) >= FLUSH_ROWS:
+            self.flush()
+
+    def add_mapped(self, mapped: Dict[str, list], default_reason: str):
+        """
+        Record the skipped rows and errors of a hist_parallel.map_rows() result.
+        Rejects are written in source row order.
+        """
+        rejected = [(idx, reason or default_reason, None) for idx, reason in mapped['skipped']]
+        rejected += [(idx, 'map_error', message) for idx, message in mapped['errors']]
+        for idx, reason, detail in sorted(rejected, key=lambda r: r[0]):
+            self.add(idx, reason, detail)
+
+    def flush(self):
+        """Append pending rejects to the reject file."""
+        if not self._pending or not self.path:
+            self._pending = []
+            return
+        indices, reasons, details = zip(*self._pending)
+        rows = _as_text(self.df.loc[list(indices), self.columns])
+        rows.insert(0, REJECT_DETAIL_COLUMN, list(details))
+        rows.insert(0, REJECT_REASON_COLUMN, list(reasons))
+        rows.insert(0, REJECT_ROW_COLUMN, list(indices))
+        rows.to_csv(self.path, mode='w' if self.written == 0 else 'a', header=self.written == 0, index=False)
+        self.written += len(rows)
+        self._pending = []
+
+    def close(self, source_path: Optional[str] = None):
+        """
+        Flush what's left. When nothing was rejected, a reject file left by an
+        earlier run of the same source is removed. If that reject file is the
+        one being imported (`source_path`), it has been fully consumed and is
+        renamed to <path>.imported instead (kept for reference, but no longer
+        a CSV the importers or hist_watch.py pick up).
+        """
+        self.flush()
+        if self.written or not self.path or not os.path.exists(self.path):
+            return
+        if source_path and os.path.abspath(source_path) == os.path.abspath(self.path):
+            self.consumed_path = self.path + CONSUMED_SUFFIX
+            os.replace(self.path, self.consumed_path)
+            return
+        os.remove(self.path)
+
+    def summary(self) -> Optional[Dict]:
+        """The hist_import_logs.rejects value: file, counts per reason and a bounded sample."""
+        if not self.counts:
+            return None
+        return {
+            'file': os.path.basename(self.path) if self.path and self.written else None,
+            'counts': dict(self.counts),
+            'sample': self.sample,
+        }
+
+    def print_summary(self):
+        """Per-reason counts and the first rejects for the end-of-import report."""
+        if not self.counts:
+            print("✓ No rows rejected")
+            if self.consumed_path:
+                print(f"  Reject file fully re-imported; moved to {self.consumed_path}")
+            return
+        print(f"🚫 Rejected rows: {self.total}")
+        for reason, count in self.counts.most_common():
+            print(f"  - {reason}: {count}")
+        for line in self.sample[:10]:
+            print(f"    {line}")
+        if self.total > 10:
+            print(f"    ... and {self.total - 10} more")
+        if self.written:
+            print(f"  Written to {self.path} (fix and re-import that file)")
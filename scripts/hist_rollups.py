@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Revenue and Funnel Rollups of the Unified Contact Build
+
+The summary at the end of create_unified_contacts.py scanned df_unified once
+per statistic, and every later question ("revenue by trigger word?",
+"conversion by month?") meant loading and rescanning every contact again.
+The build now computes rollups once:
+
+1. ONE grouped pass over the contacts, keyed by all ROLLUP_DIMENSIONS plus
+   payment_method at once, collects per-cell sums (contacts, purchasers,
+   revenue, days-to-purchase sum/count/min/max)
+2. Each rollup (one per dimension, plus an 'all' total) re-aggregates that
+   cell table, which has at most a few thousand rows
+3. The result is one long table, (dimension, value, metrics...), saved as
+   unified_rollups.csv next to unified_contacts.csv (a few KB) and optionally
+   pushed to hist_rollups (migrations/20251226_006_create_hist_rollups.sql)
+
+Dimensions: trigger_word, paid_vs_organic, platform, ab_test, source,
+subscription_month (YYYY-MM of subscription_date) and payment_method.
+Missing values are grouped under '(none)'.
+
+Metrics per value: contacts, purchasers, conversion_rate (%), total_revenue,
+stripe_revenue, denefits_revenue, revenue_per_contact, revenue_per_purchaser,
+avg/min/max days_to_purchase.
+
+Usage:
+    # during the build (always writes unified_rollups.csv)
+    python scripts/create_unified_contacts.py --push-rollups
+
+    # from an existing unified_contacts.csv
+    python scripts/hist_rollups.py historical_data/unified_contacts.csv
+    python scripts/hist_rollups.py historical_data/unified_contacts.csv --push
+"""
+
+import os
+import sys
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+
+from hist_csv import strip_compression
+
+ROLLUP_DIMENSIONS = ['trigger_word', 'paid_vs_organic', 'platform', 'ab_test', 'source', 'subscription_month']
+
+# Grouped together with the rollup dimensions so the summary's payment-method
+# breakdown comes from the same pass
+CELL_DIMENSIONS = ROLLUP_DIMENSIONS + ['payment_method']
+
+NONE_LABEL = '(none)'
+ALL_LABEL = 'all'
+
+ROLLUP_SUFFIX = '_rollups.csv'
+ROLLUP_TABLE = 'hist_rollups'
+
+ROLLUP_COLUMNS = [
+    'dimension', 'value', 'contacts', 'purchasers', 'conversion_rate',
+    'total_revenue', 'stripe_revenue', 'denefits_revenue', 'revenue_per_contact', 'revenue_per_purchaser',
+    'avg_days_to_purchase', 'min_days_to_purchase', 'max_days_to_purchase',
+]
+
+_SUM_COLUMNS = ['contacts', 'purchasers', 'total_revenue', 'purchaser_revenue', 'stripe_revenue',
+                'denefits_revenue', 'days_sum', 'days_count']
+
+
+def rollup_path_for(unified_path: str) -> str:
+    """historical_data/unified_contacts.csv[.zst] → historical_data/unified_rollups.csv"""
+    root, _ = os.path.splitext(strip_compression(unified_path))
+    if root.endswith('_contacts'):
+        root = root[:-len('_contacts')]
+    return root + ROLLUP_SUFFIX
+
+
+# =============================================================================
+# COMPUTE
+# =============================================================================
+
+def _labels(values: pd.Series) -> pd.Series:
+    """Dimension values as stripped text; missing/blank → NONE_LABEL."""
+    text = values.astype(object).where(values.notna(), '').astype(str).str.strip()
+    return text.where(text != '', NONE_LABEL)
+
+
+def _numbers(values: pd.Series) -> pd.Series:
+    return pd.to_numeric(values, errors='coerce').astype('float64')
+
+
+def _flags(values: pd.Series) -> pd.Series:
+    """has_purchase as bool, whether it came from the build (bool) or a CSV ('True'/'False')."""
+    if pd.api.types.is_bool_dtype(values):
+        return values.fillna(False).astype(bool)
+    return values.astype(object).map(lambda v: str(v).strip().lower() in ('true', '1', 't', 'yes'))
+
+
+def rollup_cells(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    The one grouped pass: per-cell sums keyed by every CELL_DIMENSIONS column.
+    Works on the in-memory build frame and on unified_contacts.csv alike.
+    """
+    def column(name):
+        return df[name] if name in df.columns else pd.Series(np.nan, index=df.index)
+
+    subscribed = pd.to_datetime(column('subscription_date'), errors='coerce', utc=True, format='mixed')
+    purchased = _flags(column('has_purchase'))
+    revenue = _numbers(column('total_revenue')).fillna(0.0)
+    days = _numbers(column('days_to_purchase'))
+
+    frame = pd.DataFrame({name: _labels(column(name)) for name in CELL_DIMENSIONS if name != 'subscription_month'})
+    frame['subscription_month'] = _labels(subscribed.dt.strftime('%Y-%m'))
+    frame['contacts'] = 1
+    frame['purchasers'] = purchased.astype('int64')
+    frame['total_revenue'] = revenue
+    frame['purchaser_revenue'] = revenue.where(purchased, 0.0)
+    frame['stripe_revenue'] = _numbers(column('stripe_revenue')).fillna(0.0)
+    frame['denefits_revenue'] = _numbers(column('denefits_revenue')).fillna(0.0)
+    frame['days_sum'] = days.fillna(0.0)
+    frame['days_count'] = days.notna().astype('int64')
+    frame['days_min'] = days
+    frame['days_max'] = days
+
+    aggregations = {name: 'sum' for name in _SUM_COLUMNS}
+    aggregations.update({'days_min': 'min', 'days_max': 'max'})
+    return frame.groupby(CELL_DIMENSIONS, sort=False).agg(aggregations).reset_index()
+
+
+def _finish(grouped: pd.DataFrame, dimension: str) -> pd.DataFrame:
+    """Sums per value → the published metrics."""
+    out = pd.DataFrame({'dimension': dimension, 'value': grouped.index.astype(str)})
+    sums = grouped.reset_index(drop=True)
+    out['contacts'] = sums['contacts'].astype('int64')
+    out['purchasers'] = sums['purchasers'].astype('int64')
+    out['conversion_rate'] = (sums['purchasers'] / sums['contacts'] * 100).round(2)
+    for name in ('total_revenue', 'stripe_revenue', 'denefits_revenue'):
+        out[name] = sums[name].round(2)
+    out['revenue_per_contact'] = (sums['total_revenue'] / sums['contacts']).round(2)
+    out['revenue_per_purchaser'] = (sums['purchaser_revenue'] / sums['purchasers'].replace(0, np.nan)).round(2)
+    out['avg_days_to_purchase'] = (sums['days_sum'] / sums['days_count'].replace(0, np.nan)).round(1)
+    out['min_days_to_purchase'] = sums['days_min'].astype('Int64')
+    out['max_days_to_purchase'] = sums['days_max'].astype('Int64')
+    return out
+
+
+def rollups_from_cells(cells: pd.DataFrame) -> pd.DataFrame:
+    """Every rollup as one long table: months in order, other dimensions by revenue."""
+    aggregations = {name: 'sum' for name in _SUM_COLUMNS}
+    aggregations.update({'days_min': 'min', 'days_max': 'max'})
+
+    totals = cells.assign(_all=ALL_LABEL).groupby('_all').agg(aggregations)
+    frames = [_finish(totals, ALL_LABEL)]
+    for dimension in CELL_DIMENSIONS:
+        grouped = cells.groupby(dimension).agg(aggregations)
+        if dimension == 'subscription_month':
+            grouped = grouped.sort_index()
+        else:
+            grouped = grouped.sort_values('total_revenue', ascending=False)
+        frames.append(_finish(grouped, dimension))
+    return pd.concat(frames, ignore_index=True)[ROLLUP_COLUMNS]
+
+
+def compute_rollups(df: pd.DataFrame) -> pd.DataFrame:
+    return rollups_from_cells(rollup_cells(df))
+
+
+# =============================================================================
+# OUTPUT
+# =============================================================================
+
+def save_rollups(rollups: pd.DataFrame, path: str):
+    rollups.to_csv(path, index=False)
+
+
+def load_rollups(path: str) -> pd.DataFrame:
+    return pd.read_csv(path, keep_default_na=False, na_values=[''], dtype={'value': str})
+
+
+def push_rollups(supabase, rollups: pd.DataFrame) -> int:
+    """Replace hist_rollups with these rows (upsert, then drop rows from older builds)."""
+    built_at = datetime.now(timezone.utc).isoformat()
+    records = rollups.astype(object).where(rollups.notna(), None).to_dict('records')
+    for record in records:
+        record['built_at'] = built_at
+    supabase.table(ROLLUP_TABLE).upsert(records).execute()
+    supabase.table(ROLLUP_TABLE).delete().lt('built_at', built_at).execute()
+    return len(records)
+
+
+def rollup(rollups: pd.DataFrame, dimension: str) -> pd.DataFrame:
+    """One dimension's rows, indexed by value."""
+    return rollups[rollups['dimension'] == dimension].set_index('value')
+
+
+def print_rollup_summary(rollups: pd.DataFrame, top: int = 10):
+    """The build's summary statistics, read from the rollups instead of the contacts."""
+    total = rollup(rollups, ALL_LABEL).iloc[0]
+    methods = rollup(rollups, 'payment_method')['contacts']
+
+    print(f"Total unique contacts: {total['contacts']}")
+    print(f"Contacts with purchases: {total['purchasers']}")
+    print(f"Conversion rate: {total['conversion_rate']:.2f}%")
+    print()
+
+    print("Revenue breakdown:")
+    print(f"  Total revenue: ${total['total_revenue']:,.2f}")
+    print(f"  From Stripe: ${total['stripe_revenue']:,.2f}")
+    print(f"  From Denefits: ${total['denefits_revenue']:,.2f}")
+    print(f"  Average per customer: ${total['revenue_per_purchaser']:,.2f}")
+    print()
+
+    print("Payment method breakdown:")
+    print(f"  Stripe only: {methods.get('Stripe', 0)}")
+    print(f"  Denefits only: {methods.get('Denefits', 0)}")
+    print(f"  Both: {methods.get('Both', 0)}")
+    print()
+
+    for dimension, title in (('source', 'Source breakdown'), ('paid_vs_organic', 'Paid vs Organic'),
+                             ('trigger_word', 'Top trigger words by revenue')):
+        rows = rollup(rollups, dimension).head(top)
+        print(f"{title}:")
+        for value, row in rows.iterrows():
+            print(f"  {value[:24]:<24} {row['contacts']:>7,} contacts  {row['conversion_rate']:6.2f}% converted  "
+                  f"${row['total_revenue']:,.2f}")
+        print()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from hist_csv import read_csv, resolve_path
+
+    parser = argparse.ArgumentParser(description='Compute revenue/funnel rollups from unified_contacts.csv')
+    parser.add_argument('unified_csv', help='Path to unified_contacts.csv')
+    parser.add_argument('--output', help=f'Rollup CSV (default: <name>{ROLLUP_SUFFIX} next to the input)')
+    parser.add_argument('--push', action='store_true', help=f'Replace the {ROLLUP_TABLE} table with the result')
+    args = parser.parse_args()
+
+    if not os.path.exists(resolve_path(args.unified_csv)):
+        print(f"ERROR: File not found: {args.unified_csv}")
+        sys.exit(1)
+
+    usecols = [c for c in CELL_DIMENSIONS if c != 'subscription_month'] + [
+        'subscription_date', 'has_purchase', 'total_revenue', 'stripe_revenue', 'denefits_revenue',
+        'days_to_purchase']
+    df = read_csv(args.unified_csv, usecols=usecols)
+    rollups = compute_rollups(df)
+    output = args.output or rollup_path_for(args.unified_csv)
+    save_rollups(rollups, output)
+    print(f"✓ {len(rollups)} rollup rows from {len(df):,} contacts → {output}\n")
+    print_rollup_summary(rollups)
+
+    if args.push:
+        from hist_supabase import create_supabase_client
+        pushed = push_rollups(create_supabase_client(), rollups)
+        print(f"✓ Replaced {ROLLUP_TABLE} with {pushed} rows")
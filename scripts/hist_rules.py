@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Declarative Data-Quality Rules for Historical Imports
+
+Suspicious-data checks used to live in per-row functions copied into each
+importer (is_suspicious_data, is_suspicious_payment), each calling
+datetime.now() per row. Here the checks are declared once as data and
+evaluated column-wise over the mapped frame:
+
+- every rule is a dict: name, label (the text that goes into
+  data_quality_notes), type and the type's parameters
+- each rule compiles to one vectorized boolean mask, so a run costs one pass
+  per rule no matter how many rows there are
+- data_quality_notes joins the labels of the rules that fired ("; ")
+- per-rule hit counts go into hist_import_logs.rule_hits
+  (migrations/20251226_003_add_hist_import_logs_rule_hits.sql)
+
+Adding a rule: append a dict to CONTACT_RULES or PAYMENT_RULES. Adding a new
+kind of check: write a mask function and register it in RULE_TYPES.
+
+Usage (from an importer):
+    from hist_rules import CONTACT_RULES, flag_records
+
+    contacts_df, rule_hits = flag_records(contacts, CONTACT_RULES)
+    # each contact dict (and contacts_df) now has is_suspicious and data_quality_notes
+"""
+
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# =============================================================================
+# RULE SETS
+# =============================================================================
+
+CONTACT_RULES: List[Dict] = [
+    {'name': 'future_first_seen', 'label': 'future first_seen date',
+     'type': 'future_date', 'column': 'first_seen'},
+    {'name': 'future_purchase_date', 'label': 'future purchase date',
+     'type': 'future_date', 'column': 'purchase_date'},
+    {'name': 'purchase_before_first_contact', 'label': 'purchase before first contact',
+     'type': 'date_before', 'column': 'purchase_date', 'other': 'first_seen'},
+    {'name': 'test_email', 'label': 'test/fake email',
+     'type': 'contains', 'column': 'email', 'patterns': ['test', 'fake', 'example']},
+]
+
+PAYMENT_RULES: List[Dict] = [
+    {'name': 'future_payment_date', 'label': 'future payment date',
+     'type': 'future_date', 'column': 'payment_date'},
+    {'name': 'negative_non_refund', 'label': 'negative amount (not a refund)',
+     'type': 'below', 'column': 'amount_cents', 'value': 0,
+     'unless': {'column': 'payment_type', 'equals': 'refund'}},
+    {'name': 'outsized_amount', 'label': 'suspiciously high amount',
+     'type': 'above', 'column': 'amount_cents', 'value': 50000 * 100},
+]
+
+
+# =============================================================================
+# MASK FUNCTIONS (one per rule type)
+# =============================================================================
+
+def _dates(frame: pd.DataFrame, column: str) -> pd.Series:
+    """Column as UTC timestamps (naive values treated as UTC); NaT when missing."""
+    if column not in frame.columns:
+        return pd.Series(pd.NaT, index=frame.index, dtype='datetime64[ns, UTC]')
+    return pd.to_datetime(frame[column], errors='coerce', utc=True)
+
+
+def _numbers(frame: pd.DataFrame, column: str) -> pd.Series:
+    if column not in frame.columns:
+        return pd.Series(np.nan, index=frame.index)
+    return pd.to_numeric(frame[column], errors='coerce')
+
+
+def _future_date(frame: pd.DataFrame, rule: Dict, now: pd.Timestamp) -> pd.Series:
+    return _dates(frame, rule['column']) > now
+
+
+def _date_before(frame: pd.DataFrame, rule: Dict, now: pd.Timestamp) -> pd.Series:
+    return _dates(frame, rule['column']) < _dates(frame, rule['other'])
+
+
+def _contains(frame: pd.DataFrame, rule: Dict, now: pd.Timestamp) -> pd.Series:
+    if rule['column'] not in frame.columns:
+        return pd.Series(False, index=frame.index)
+    pattern = '|'.join(rule['patterns'])
+    return frame[rule['column']].astype('string').str.contains(pattern, case=False, regex=True)
+
+
+def _below(frame: pd.DataFrame, rule: Dict, now: pd.Timestamp) -> pd.Series:
+    return _numbers(frame, rule['column']) < rule['value']
+
+
+def _above(frame: pd.DataFrame, rule: Dict, now: pd.Timestamp) -> pd.Series:
+    return _numbers(frame, rule['column']) > rule['value']
+
+
+RULE_TYPES: Dict[str, Callable[[pd.DataFrame, Dict, pd.Timestamp], pd.Series]] = {
+    'future_date': _future_date,
+    'date_before': _date_before,
+    'contains': _contains,
+    'below': _below,
+    'above': _above,
+}
+
+
+# =============================================================================
+# ENGINE
+# =============================================================================
+
+def evaluate_rules(frame: pd.DataFrame, rules: List[Dict], now: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+    """
+    Evaluate every rule over `frame`.
+    Returns a boolean frame with one column per rule name (missing values never fire).
+    """
+    now = now if now is not None else pd.Timestamp.now(tz='UTC')
+    masks = {}
+    for rule in rules:
+        mask = RULE_TYPES[rule['type']](frame, rule, now)
+        mask = pd.Series(mask, index=frame.index).fillna(False).astype(bool)
+        unless = rule.get('unless')
+        if unless and unless['column'] in frame.columns:
+            mask &= frame[unless['column']].ne(unless['equals']).to_numpy()
+        masks[rule['name']] = mask
+    return pd.DataFrame(masks, index=frame.index, columns=[r['name'] for r in rules])
+
+
+def join_rule_labels(masks: pd.DataFrame, rules: List[Dict]) -> pd.Series:
+    """Join the labels of the rules that fired per row ("a; b"); None where nothing fired."""
+    notes = np.full(len(masks), '', dtype=object)
+    for rule in rules:
+        fired = masks[rule['name']].to_numpy()
+        separator = np.where(notes != '', '; ', '')
+        notes = np.where(fired, notes + separator + rule['label'], notes)
+    return pd.Series(notes, index=masks.index).replace('', None)
+
+
+def apply_rules(frame: pd.DataFrame, rules: List[Dict], now: Optional[pd.Timestamp] = None) -> Dict[str, int]:
+    """
+    Evaluate `rules`, set is_suspicious and data_quality_notes on `frame` in
+    place and return {rule_name: hit_count} for the import log. Notes already
+    on a row are kept in front of the new labels.
+    """
+    masks = evaluate_rules(frame, rules, now)
+    labels = join_rule_labels(masks, rules)
+
+    frame['is_suspicious'] = masks.any(axis=1)
+    if 'data_quality_notes' in frame.columns:
+        existing = frame['data_quality_notes'].where(frame['data_quality_notes'].notna(), None)
+        both = existing.notna() & labels.notna()
+        combined = existing.where(existing.notna(), labels).astype(object)
+        combined[both] = existing[both] + '; ' + labels[both]
+        frame['data_quality_notes'] = combined.where(combined.notna(), None)
+    else:
+        frame['data_quality_notes'] = labels
+
+    return {name: int(hits) for name, hits in masks.sum().items()}
+
+
+def flag_records(records: List[Dict], rules: List[Dict], now: Optional[pd.Timestamp] = None) -> Tuple[pd.DataFrame, Dict[str, int]]:
+    """
+    Run apply_rules over mapped record dicts and copy is_suspicious and
+    data_quality_notes back onto each dict. Returns (frame, rule_hits) so the
+    caller can reuse the frame (e.g. for timeline events).
+    """
+    frame = pd.DataFrame(records)
+    rule_hits = apply_rules(frame, rules, now)
+    for record, flagged, notes in zip(records, frame['is_suspicious'].tolist(), frame['data_quality_notes'].tolist()):
+        record['is_suspicious'] = flagged
+        record['data_quality_notes'] = notes if isinstance(notes, str) else None
+    return frame, rule_hits
+
+
+def print_rule_hits(rule_hits: Dict[str, int]):
+    """Print the rules that fired for the end-of-import report."""
+    fired = {name: hits for name, hits in rule_hits.items() if hits}
+    if not fired:
+        print("✓ No data-quality rules fired")
+        return
+    print("🚩 Data-quality rules fired:")
+    for name, hits in fired.items():
+        print(f"  - {name}: {hits}")
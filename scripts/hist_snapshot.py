@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+"""
+Local DuckDB Snapshot of the hist_* Tables
+
+Ad-hoc queries against v_revenue_attribution, v_funnel_summary & co. run on
+the production database, are slow on full history and compete with webhook
+traffic. This script keeps a local columnar copy instead:
+
+1. hist_contacts, hist_payments, hist_timeline and hist_import_logs are
+   copied into a DuckDB file (historical_data/hist_snapshot.duckdb)
+2. Reads are keyset-paged (PAGE_SIZE rows per request, REST or --direct-db)
+   and incremental: each table remembers the highest watermark it has seen
+   (updated_at for contacts, created_at for payments / timeline) and the next
+   run only fetches rows at or after it, minus WATERMARK_LOOKBACK to catch rows
+   committed late. Rows are upserted by primary key, so overlap is harmless.
+   hist_import_logs is small and updated in place, so it is re-read in full
+3. The views from migrations/20250511_create_historical_views.sql are created
+   in the snapshot from that same SQL file, so v_revenue_attribution,
+   v_funnel_summary, v_payment_breakdown, ... mean the same thing locally
+
+Deleted rows are not detected by the watermark; run with --full after
+deleting or re-importing data.
+
+Usage:
+    python scripts/hist_snapshot.py                      # first run copies everything, later runs only changes
+    python scripts/hist_snapshot.py --direct-db          # page through Postgres instead of the REST API
+    python scripts/hist_snapshot.py --full               # rebuild every table from scratch
+    python scripts/hist_snapshot.py --query "SELECT * FROM v_revenue_attribution LIMIT 10"
+
+    # or from Python / a notebook
+    import duckdb
+    con = duckdb.connect('historical_data/hist_snapshot.duckdb', read_only=True)
+    con.execute("SET TimeZone = 'UTC'")   # as on Supabase; DATE_TRUNC('month', ...) depends on it
+    con.sql("SELECT * FROM v_funnel_summary").show()
+
+Requires: pip install duckdb
+"""
+
+import json
+import os
+import re
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Dict, Iterator, List, Optional, Tuple
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+import pandas as pd
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_SNAPSHOT = os.path.join(ROOT_DIR, 'historical_data', 'hist_snapshot.duckdb')
+VIEWS_SQL = os.path.join(ROOT_DIR, 'migrations', '20250511_create_historical_views.sql')
+
+# Rows per page read from Supabase
+PAGE_SIZE = 1000
+
+# Incremental runs re-read this far behind the stored watermark (late commits, clock skew)
+WATERMARK_LOOKBACK = timedelta(minutes=10)
+
+STATE_TABLE = '_snapshot_state'
+
+# Session time zone for month truncation etc., same as Supabase's
+SNAPSHOT_TIMEZONE = 'UTC'
+
+# Table → primary key, watermark column (None = always re-read in full) and
+# DuckDB columns (same names and meaning as the Postgres tables incl. later migrations)
+SNAPSHOT_TABLES: Dict[str, Dict] = {
+    'hist_contacts': {
+        'key': 'email',
+        'watermark': 'updated_at',
+        'columns': {
+            'email': 'TEXT PRIMARY KEY',
+            'first_name': 'TEXT',
+            'last_name': 'TEXT',
+            'phone': 'TEXT',
+            'source': 'TEXT',
+            'import_batch_id': 'UUID',
+            'ad_type': 'TEXT',
+            'trigger_word': 'TEXT',
+            'campaign_name': 'TEXT',
+            'reached_stage': 'TEXT',
+            'has_purchase': 'BOOLEAN',
+            'first_seen': 'TIMESTAMPTZ',
+            'last_seen': 'TIMESTAMPTZ',
+            'purchase_date': 'TIMESTAMPTZ',
+            'created_at': 'TIMESTAMPTZ',
+            'updated_at': 'TIMESTAMPTZ',
+            'data_quality_notes': 'TEXT',
+            'is_suspicious': 'BOOLEAN',
+        },
+    },
+    'hist_payments': {
+        'key': 'id',
+        'watermark': 'created_at',
+        'columns': {
+            'id': 'UUID PRIMARY KEY',
+            'email': 'TEXT',
+            'amount': 'DECIMAL(10, 2)',
+            'currency': 'TEXT',
+            'payment_date': 'TIMESTAMPTZ',
+            'source': 'TEXT',
+            'external_id': 'TEXT',
+            'payment_type': 'TEXT',
+            'import_batch_id': 'UUID',
+            'created_at': 'TIMESTAMPTZ',
+            'is_suspicious': 'BOOLEAN',
+        },
+    },
+    'hist_timeline': {
+        'key': 'id',
+        'watermark': 'created_at',
+        'columns': {
+            'id': 'UUID PRIMARY KEY',
+            'email': 'TEXT',
+            'event_type': 'TEXT',
+            'event_date': 'TIMESTAMPTZ',
+            'source': 'TEXT',
+            'event_details': 'JSON',
+            'import_batch_id': 'UUID',
+            'created_at': 'TIMESTAMPTZ',
+            'event_key': 'TEXT',
+        },
+    },
+    'hist_import_logs': {
+        'key': 'id',
+        'watermark': None,
+        'columns': {
+            'id': 'UUID PRIMARY KEY',
+            'source_file': 'TEXT',
+            'source_type': 'TEXT',
+            'rows_processed': 'INTEGER',
+            'rows_imported': 'INTEGER',
+            'rows_skipped': 'INTEGER',
+            'rows_updated': 'INTEGER',
+            'errors': 'JSON',
+            'warnings': 'JSON',
+            'rule_hits': 'JSON',
+            'rejects': 'JSON',
+            'checksums': 'JSON',
+            'progress': 'JSON',
+            'import_started_at': 'TIMESTAMPTZ',
+            'import_completed_at': 'TIMESTAMPTZ',
+            'imported_by': 'TEXT',
+            'notes': 'TEXT',
+        },
+    },
+}
+
+
+def require_duckdb():
+    """Exit with install instructions if duckdb isn't available."""
+    if duckdb is None:
+        print("ERROR: The local snapshot needs DuckDB.")
+        print("Install with: pip install duckdb")
+        sys.exit(1)
+
+
+# =============================================================================
+# PAGED READS
+# =============================================================================
+
+def _as_text(value) -> Optional[str]:
+    """Source value → text DuckDB casts into the column type on insert."""
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return format(value, 'f')
+    return str(value)
+
+
+def _quote(value: str) -> str:
+    """Quote a value for a PostgREST or=(...) filter."""
+    return '"' + str(value).replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def pages_rest(supabase, table: str, columns: List[str], key: str, watermark: Optional[str],
+               since: Optional[str], page_size: int = PAGE_SIZE) -> Iterator[List[Dict]]:
+    """
+    Keyset pages through the REST API: by (watermark, key) from `since`, or by
+    key alone for a full read.
+    """
+    after: Optional[Tuple] = None
+    while True:
+        query = supabase.table(table).select(','.join(columns))
+        if since is None:
+            if after is not None:
+                query = query.gt(key, after[-1])
+            query = query.order(key)
+        else:
+            if after is None:
+                query = query.gte(watermark, since)
+            else:
+                wm, last_key = _quote(after[0]), _quote(after[1])
+                query = query.or_(f"{watermark}.gt.{wm},and({watermark}.eq.{wm},{key}.gt.{last_key})")
+            query = query.order(watermark).order(key)
+        rows = query.limit(page_size).execute().data
+        if rows:
+            yield rows
+        if len(rows) < page_size:
+            return
+        last = rows[-1]
+        after = (last[key],) if since is None else (last[watermark], last[key])
+
+
+def pages_direct(conn, table: str, columns: List[str], key: str, watermark: Optional[str],
+                 since: Optional[str], page_size: int = PAGE_SIZE) -> Iterator[List[Dict]]:
+    """Same keyset pages as pages_rest(), straight from Postgres."""
+    select = ', '.join(columns)
+    after: Optional[Tuple] = None
+    with conn.cursor() as cur:
+        while True:
+            if since is None:
+                where, params = (f"WHERE {key} > %s", [after[-1]]) if after else ('', [])
+                order = key
+            elif after is None:
+                where, params = f"WHERE {watermark} >= %s", [since]
+                order = f"{watermark}, {key}"
+            else:
+                where, params = f"WHERE ({watermark}, {key}) > (%s, %s)", list(after)
+                order = f"{watermark}, {key}"
+            cur.execute(f"SELECT {select} FROM {table} {where} ORDER BY {order} LIMIT %s", params + [page_size])
+            rows = [dict(zip(columns, values)) for values in cur.fetchall()]
+            if rows:
+                yield rows
+            if len(rows) < page_size:
+                return
+            last = rows[-1]
+            after = (last[key],) if since is None else (last[watermark], last[key])
+
+
+# =============================================================================
+# SNAPSHOT
+# =============================================================================
+
+def open_snapshot(path: str):
+    require_duckdb()
+    con = duckdb.connect(path)
+    con.execute(f"SET TimeZone = '{SNAPSHOT_TIMEZONE}'")
+    con.execute(f"""
+        CREATE TABLE IF NOT EXISTS {STATE_TABLE} (
+            table_name TEXT PRIMARY KEY,
+            watermark TEXT,
+            synced_rows BIGINT,
+            synced_at TIMESTAMPTZ
+        )
+    """)
+    for table, spec in SNAPSHOT_TABLES.items():
+        columns = ', '.join(f"{name} {column_type}" for name, column_type in spec['columns'].items())
+        con.execute(f"CREATE TABLE IF NOT EXISTS {table} ({columns})")
+    return con
+
+
+def _stored_watermark(con, table: str) -> Optional[str]:
+    row = con.execute(f"SELECT watermark FROM {STATE_TABLE} WHERE table_name = ?", [table]).fetchone()
+    return row[0] if row else None
+
+
+def sync_table(con, table: str, fetch_pages, full: bool = False) -> Dict:
+    """Copy new/changed rows of one table; returns {'rows', 'pages', 'seconds', 'mode'}."""
+    spec = SNAPSHOT_TABLES[table]
+    columns = list(spec['columns'])
+    key, watermark = spec['key'], spec['watermark']
+    started = time.monotonic()
+
+    stored = None if full or watermark is None else _stored_watermark(con, table)
+    since = None
+    if stored:
+        since = (datetime.fromisoformat(stored) - WATERMARK_LOOKBACK).isoformat()
+    if since is None:
+        con.execute(f"DELETE FROM {table}")
+
+    rows = pages = 0
+    highest = stored
+    column_list = ', '.join(columns)
+    for page in fetch_pages(table, columns, key, watermark, since):
+        frame = pd.DataFrame([[_as_text(row.get(c)) for c in columns] for row in page], columns=columns, dtype=object)
+        con.register('snapshot_page', frame)
+        con.execute(f"INSERT OR REPLACE INTO {table} ({column_list}) SELECT {column_list} FROM snapshot_page")
+        con.unregister('snapshot_page')
+        rows += len(page)
+        pages += 1
+        if watermark:
+            page_highest = max((_as_text(row[watermark]) for row in page if row.get(watermark)), default=None,
+                               key=lambda value: datetime.fromisoformat(value))
+            if page_highest and (highest is None or
+                                 datetime.fromisoformat(page_highest) > datetime.fromisoformat(highest)):
+                highest = page_highest
+
+    con.execute(
+        f"INSERT OR REPLACE INTO {STATE_TABLE} VALUES (?, ?, (SELECT count(*) FROM {table}), now())",
+        [table, highest],
+    )
+    return {'rows': rows, 'pages': pages, 'seconds': time.monotonic() - started,
+            'mode': 'full' if since is None else f"since {since}"}
+
+
+def _view_statements(sql: str) -> List[str]:
+    """CREATE VIEW statements of a migration file (comments stripped)."""
+    sql = re.sub(r'--[^\n]*', '', sql)
+    return [s.strip() for s in sql.split(';') if re.match(r'\s*CREATE\s+(OR\s+REPLACE\s+)?VIEW', s, re.I)]
+
+
+def create_views(con, views_sql: str = VIEWS_SQL) -> List[str]:
+    """Create the Postgres analytics views in the snapshot; returns the view names created."""
+    with open(views_sql) as f:
+        statements = _view_statements(f.read())
+    created = []
+    for statement in statements:
+        name = re.search(r'VIEW\s+(\w+)', statement, re.I).group(1)
+        try:
+            con.execute(statement)
+            created.append(name)
+        except duckdb.Error as e:
+            print(f"  ⚠️  View {name} not available locally: {str(e).splitlines()[0]}")
+    return created
+
+
+def run_snapshot(path: str = DEFAULT_SNAPSHOT, direct_db: bool = False, full: bool = False,
+                 page_size: int = PAGE_SIZE):
+    print(f"\n{'='*60}")
+    print(f"SNAPSHOT hist_* TABLES → {path}")
+    print(f"{'='*60}\n")
+
+    con = open_snapshot(path)
+    conn = None
+    if direct_db:
+        from hist_copy import connect_direct
+        conn = connect_direct()
+        fetch = lambda *a: pages_direct(conn, *a, page_size=page_size)
+    else:
+        from hist_supabase import create_supabase_client, print_transport_stats
+        supabase = create_supabase_client()
+        fetch = lambda *a: pages_rest(supabase, *a, page_size=page_size)
+
+    try:
+        for table in SNAPSHOT_TABLES:
+            con.execute("BEGIN TRANSACTION")
+            try:
+                result = sync_table(con, table, fetch, full=full)
+                con.execute("COMMIT")
+            except Exception:
+                con.execute("ROLLBACK")
+                raise
+            total = con.execute(f"SELECT count(*) FROM {table}").fetchone()[0]
+            print(f"✓ {table}: {result['rows']:,} rows read in {result['pages']} pages "
+                  f"({result['seconds']:.1f}s, {result['mode']}), {total:,} in snapshot")
+    finally:
+        if conn is not None:
+            conn.close()
+
+    views = create_views(con)
+    con.close()
+    print(f"\n✓ Local views: {', '.join(views)}")
+    if not direct_db:
+        print_transport_stats()
+    print("\nQuery it with:  python scripts/hist_snapshot.py --query \"SELECT * FROM v_funnel_summary\"\n")
+
+
+def run_query(path: str, sql: str):
+    if not os.path.exists(path):
+        print(f"ERROR: No snapshot at {path}; run python scripts/hist_snapshot.py first")
+        sys.exit(1)
+    require_duckdb()
+    con = duckdb.connect(path, read_only=True)
+    con.execute(f"SET TimeZone = '{SNAPSHOT_TIMEZONE}'")
+    started = time.perf_counter()
+    result = con.execute(sql).df()
+    elapsed = time.perf_counter() - started
+    with pd.option_context('display.max_rows', 100, 'display.max_columns', None, 'display.width', 200):
+        print(result)
+    print(f"\n{len(result):,} rows in {elapsed * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Incremental local DuckDB snapshot of the hist_* tables')
+    parser.add_argument('--snapshot', default=DEFAULT_SNAPSHOT, help='DuckDB file (default: historical_data/hist_snapshot.duckdb)')
+    parser.add_argument('--direct-db', action='store_true',
+                        help='Read via Postgres (needs SUPABASE_DB_URL) instead of the REST API')
+    parser.add_argument('--full', action='store_true', help='Re-read every table instead of only changes')
+    parser.add_argument('--page-size', type=int, default=PAGE_SIZE, help='Rows per page')
+    parser.add_argument('--query', metavar='SQL', help='Run a query against the snapshot instead of syncing')
+    args = parser.parse_args()
+
+    if args.query:
+        run_query(args.snapshot, args.query)
+    else:
+        run_snapshot(args.snapshot, direct_db=args.direct_db, full=args.full, page_size=args.page_size)
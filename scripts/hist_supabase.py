@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Shared Supabase Client Factory for Historical Scripts
+
+Every script that writes to Supabase gets its client from
+create_supabase_client(), which plugs one pooled HTTP transport into
+supabase-py instead of the default per-client settings:
+
+- Connection pool with keep-alive tuning, shared by all threads in the process
+- Fast JSON encoding (orjson when installed) that handles datetime, UUID,
+  Decimal, numpy and pandas values from mapped frames
+- Optional gzip request bodies for large upserts (only enable this if your
+  gateway accepts Content-Encoding: gzip)
+- Bytes-on-wire counters (see transport_stats())
+
+Usage:
+    from hist_supabase import create_supabase_client, print_transport_stats
+
+    supabase = create_supabase_client()
+    ...
+    print_transport_stats()
+
+Importers create their module-level client with lazy_supabase_client(), so
+importing them (for --help, argument errors or the mcb_import.py CLI) needs
+no credentials and no supabase-py import; the client is built on first use.
+
+Environment Variables:
+    NEXT_PUBLIC_SUPABASE_URL   - Your Supabase project URL (required)
+    SUPABASE_SERVICE_ROLE_KEY  - Your Supabase service role key (required)
+    HIST_HTTP_MAX_CONNECTIONS  - Pool size (default 20)
+    HIST_HTTP_KEEPALIVE        - Seconds to keep idle connections open (default 60)
+    HIST_HTTP_TIMEOUT          - Request timeout in seconds (default 120)
+    HIST_HTTP_GZIP             - "1" to gzip request bodies (default off)
+    HIST_HTTP_GZIP_MIN_BYTES   - Only gzip bodies at least this large (default 65536)
+"""
+
+import gzip
+import json
+import os
+import sys
+import threading
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Dict, Optional
+
+import httpx
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+DEFAULT_MAX_CONNECTIONS = 20
+DEFAULT_KEEPALIVE_SECONDS = 60
+DEFAULT_TIMEOUT_SECONDS = 120
+DEFAULT_GZIP_MIN_BYTES = 64 * 1024
+
+
+# =============================================================================
+# JSON ENCODING
+# =============================================================================
+
+def _json_default(value):
+    """Serialize the non-JSON types our mapped rows carry."""
+    if isinstance(value, datetime):
+        # pandas NaT is a datetime subclass whose isoformat() is "NaT"
+        return None if value != value else value.isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, Decimal):
+        return float(value)
+    if np is not None and isinstance(value, np.generic):
+        return value.item()
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps_json(payload) -> bytes:
+    """Encode a request payload to JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(payload, default=_json_default, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(payload, default=_json_default, separators=(',', ':')).encode('utf-8')
+
+
+# =============================================================================
+# TRANSPORT
+# =============================================================================
+
+class TransportStats:
+    """Thread-safe request and byte counters for one HTTP client."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.body_bytes = 0       # JSON bytes before compression
+        self.bytes_sent = 0       # Request body bytes on the wire
+        self.bytes_received = 0   # Response body bytes on the wire
+
+    def record_request(self, body_bytes: int, sent_bytes: int):
+        with self._lock:
+            self.requests += 1
+            self.body_bytes += body_bytes
+            self.bytes_sent += sent_bytes
+
+    def record_response(self, received_bytes: int):
+        with self._lock:
+            self.bytes_received += received_bytes
+
+    def as_dict(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'body_bytes': self.body_bytes,
+                'bytes_sent': self.bytes_sent,
+                'bytes_received': self.bytes_received,
+            }
+
+
+class PooledClient(httpx.Client):
+    """
+    httpx.Client that encodes `json=` bodies itself (fast, datetime-aware,
+    optionally gzipped) and counts bytes on the wire.
+    """
+
+    def __init__(self, *args, gzip_bodies: bool = False, gzip_min_bytes: int = DEFAULT_GZIP_MIN_BYTES, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.gzip_bodies = gzip_bodies
+        self.gzip_min_bytes = gzip_min_bytes
+        self.stats = TransportStats()
+
+    def build_request(self, method, url, *, content=None, json=None, headers=None, **kwargs):
+        if json is None:
+            request = super().build_request(method, url, content=content, headers=headers, **kwargs)
+            size = len(content) if isinstance(content, (bytes, str)) else 0
+            self.stats.record_request(size, size)
+            return request
+
+        body = dumps_json(json)
+        headers = dict(headers or {})
+        headers['Content-Type'] = 'application/json'
+        wire_body = body
+        if self.gzip_bodies and len(body) >= self.gzip_min_bytes:
+            wire_body = gzip.compress(body, compresslevel=5)
+            headers['Content-Encoding'] = 'gzip'
+
+        self.stats.record_request(len(body), len(wire_body))
+        return super().build_request(method, url, content=wire_body, headers=headers, **kwargs)
+
+    def send(self, request, **kwargs):
+        response = super().send(request, **kwargs)
+        self.stats.record_response(response.num_bytes_downloaded)
+        return response
+
+
+_shared_client: Optional[PooledClient] = None
+_shared_lock = threading.Lock()
+
+
+def get_http_client() -> PooledClient:
+    """Return the process-wide pooled HTTP client, creating it on first use."""
+    global _shared_client
+    with _shared_lock:
+        if _shared_client is None:
+            max_connections = int(os.getenv('HIST_HTTP_MAX_CONNECTIONS', DEFAULT_MAX_CONNECTIONS))
+            _shared_client = PooledClient(
+                limits=httpx.Limits(
+                    max_connections=max_connections,
+                    max_keepalive_connections=max_connections,
+                    keepalive_expiry=float(os.getenv('HIST_HTTP_KEEPALIVE', DEFAULT_KEEPALIVE_SECONDS)),
+                ),
+                timeout=float(os.getenv('HIST_HTTP_TIMEOUT', DEFAULT_TIMEOUT_SECONDS)),
+                follow_redirects=True,
+                gzip_bodies=os.getenv('HIST_HTTP_GZIP') == '1',
+                gzip_min_bytes=int(os.getenv('HIST_HTTP_GZIP_MIN_BYTES', DEFAULT_GZIP_MIN_BYTES)),
+            )
+        return _shared_client
+
+
+def transport_stats() -> Dict[str, int]:
+    """Counters for the shared HTTP client (zeros if nothing was sent yet)."""
+    if _shared_client is None:
+        return TransportStats().as_dict()
+    return _shared_client.stats.as_dict()
+
+
+def print_transport_stats():
+    """Print a one-line network summary for the end-of-import report."""
+    stats = transport_stats()
+    mb = 1024 * 1024
+    print(
+        f"Network: {stats['requests']} requests, "
+        f"{stats['bytes_sent'] / mb:,.2f} MB sent ({stats['body_bytes'] / mb:,.2f} MB JSON), "
+        f"{stats['bytes_received'] / mb:,.2f} MB received"
+    )
+
+
+# =============================================================================
+# CLIENT FACTORY
+# =============================================================================
+
+def create_supabase_client():
+    """
+    Create a Supabase client on the shared pooled transport.
+    Exits with the usual message if credentials are missing.
+    """
+    from supabase import ClientOptions, create_client
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+    url = os.getenv("NEXT_PUBLIC_SUPABASE_URL")
+    key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+
+    if not url or not key:
+        print("ERROR: Missing Supabase credentials.")
+        print("Make sure NEXT_PUBLIC_SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY are in .env.local")
+        sys.exit(1)
+
+    return create_client(url, key, options=ClientOptions(httpx_client=get_http_client()))
+
+
+class LazySupabaseClient:
+    """Stands in for a client and creates the real one on first attribute access."""
+
+    def __init__(self):
+        self._client = None
+
+    def __getattr__(self, name):
+        if self._client is None:
+            self._client = create_supabase_client()
+        return getattr(self._client, name)
+
+
+def lazy_supabase_client() -> LazySupabaseClient:
+    """A create_supabase_client() that runs (and checks credentials) only when first used."""
+    return LazySupabaseClient()
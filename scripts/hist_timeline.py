@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Shared hist_timeline Event Builder
+
+All historical importers turn date columns into hist_timeline events
+('contact_created', 'purchased', ...). This module builds those events
+column-wise from the mapped DataFrame instead of one dict per row, and gives
+every event a deterministic natural key so re-imports don't duplicate events.
+
+Natural key:
+    event_key = md5("email|event_type|event_date|source")
+    event_date is the UTC timestamp formatted as YYYY-MM-DDTHH:MM:SS
+    (same format as migrations/20251226_001_add_hist_timeline_event_key.sql)
+
+Usage (from an importer):
+    from hist_timeline import build_timeline_events, concat_timeline_events, write_timeline_events
+
+    events = concat_timeline_events([
+        build_timeline_events(df, 'contact_created', 'first_seen', 'airtable', batch_id),
+        build_timeline_events(df, 'purchased', 'purchase_date', 'airtable', batch_id),
+    ])
+    inserted, known = write_timeline_events(supabase, events)
+"""
+
+import hashlib
+import uuid
+from typing import Dict, List, Optional, Tuple, Union
+
+import pandas as pd
+
+TIMELINE_TABLE = 'hist_timeline'
+TIMELINE_COLUMNS = ['email', 'event_type', 'event_date', 'source', 'import_batch_id', 'event_key']
+EVENT_DATE_FORMAT = '%Y-%m-%dT%H:%M:%S'
+
+# Keys per request for the "already known?" lookup and rows per upsert
+KEY_LOOKUP_CHUNK_SIZE = 200
+WRITE_CHUNK_SIZE = 500
+
+
+# =============================================================================
+# KEY + EVENT CONSTRUCTION
+# =============================================================================
+
+def format_event_dates(dates: pd.Series) -> pd.Series:
+    """
+    Normalize a column of datetimes / date strings to the canonical UTC text
+    used in the natural key. Naive values are treated as UTC.
+    Unparseable values become NaN.
+    """
+    parsed = pd.to_datetime(dates, errors='coerce', utc=True)
+    return parsed.dt.strftime(EVENT_DATE_FORMAT)
+
+
+def timeline_event_keys(events: pd.DataFrame) -> pd.Series:
+    """Compute the md5 natural key for each event row."""
+    canonical = (
+        events['email'].astype(str) + '|' +
+        events['event_type'].astype(str) + '|' +
+        events['event_date'].astype(str) + '|' +
+        events['source'].fillna('').astype(str)
+    )
+    return pd.Series(
+        [hashlib.md5(value.encode('utf-8')).hexdigest() for value in canonical],
+        index=events.index,
+        dtype=object,
+    )
+
+
+def build_timeline_events(
+    df: pd.DataFrame,
+    event_type: str,
+    date_column: str,
+    source: Union[str, pd.Series],
+    batch_id: Union[str, uuid.UUID],
+    details: Optional[Dict[str, str]] = None,
+    email_column: str = 'email',
+) -> pd.DataFrame:
+    """
+    Build one event per row of `df` that has a usable date in `date_column`.
+
+    source can be a constant ('airtable') or a Series aligned with `df`
+    (e.g. the per-contact source in the unified file).
+    details maps event_details keys to column names in `df`.
+    """
+    if df.empty or date_column not in df.columns:
+        return pd.DataFrame(columns=TIMELINE_COLUMNS)
+
+    event_dates = format_event_dates(df[date_column])
+    mask = event_dates.notna() & df[email_column].notna()
+    if not mask.any():
+        return pd.DataFrame(columns=TIMELINE_COLUMNS)
+
+    events = pd.DataFrame({
+        'email': df.loc[mask, email_column].astype(str),
+        'event_type': event_type,
+        'event_date': event_dates[mask],
+        'source': source[mask] if isinstance(source, pd.Series) else source,
+        'import_batch_id': str(batch_id),
+    })
+
+    if details:
+        detail_frame = df.loc[mask, list(details.values())]
+        detail_frame.columns = list(details.keys())
+        detail_frame = detail_frame.astype(object).where(detail_frame.notna(), None)
+        events['event_details'] = detail_frame.to_dict('records')
+
+    events['event_key'] = timeline_event_keys(events)
+    return events
+
+
+def concat_timeline_events(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """Combine event frames and drop events that share a natural key."""
+    frames = [f for f in frames if not f.empty]
+    if not frames:
+        return pd.DataFrame(columns=TIMELINE_COLUMNS)
+    events = pd.concat(frames, ignore_index=True)
+    return events.drop_duplicates(subset='event_key', keep='first').reset_index(drop=True)
+
+
+# =============================================================================
+# WRITING
+# =============================================================================
+
+def timeline_records(events: pd.DataFrame) -> List[Dict]:
+    """Convert an events frame to JSON-ready dicts (NaN → None)."""
+    return events.astype(object).where(events.notna(), None).to_dict('records')
+
+
+def fetch_known_event_keys(supabase, keys: List[str], chunk_size: int = KEY_LOOKUP_CHUNK_SIZE) -> set:
+    """Return the subset of `keys` already present in hist_timeline."""
+    known = set()
+    for i in range(0, len(keys), chunk_size):
+        chunk = keys[i:i + chunk_size]
+        response = supabase.table(TIMELINE_TABLE).select('event_key').in_('event_key', chunk).execute()
+        known.update(row['event_key'] for row in response.data)
+    return known
+
+
+def write_timeline_events(
+    supabase,
+    events: pd.DataFrame,
+    chunk_size: int = WRITE_CHUNK_SIZE,
+    progress=None,
+    written_keys: Optional[List[str]] = None,
+) -> Tuple[int, int]:
+    """
+    Write events that are not already in hist_timeline.
+
+    Known keys are dropped locally first, then the remainder is upserted in
+    chunks with ignore_duplicates so a concurrent import can't cause a
+    conflict error. Returns (events_written, events_already_known).
+    `progress` is advanced per chunk, known events included.
+    `written_keys`, if given, is extended with the event_keys written.
+    """
+    if events.empty:
+        return 0, 0
+
+    known = fetch_known_event_keys(supabase, events['event_key'].tolist())
+    records = timeline_records(events[~events['event_key'].isin(known)])
+    if written_keys is not None:
+        written_keys.extend(record['event_key'] for record in records)
+    if progress is not None:
+        progress.advance(len(events) - len(records))
+    for i in range(0, len(records), chunk_size):
+        chunk = records[i:i + chunk_size]
+        supabase.table(TIMELINE_TABLE).upsert(
+            chunk,
+            on_conflict='event_key',
+            ignore_duplicates=True,
+        ).execute()
+        if progress is not None:
+            progress.advance(len(chunk))
+
+    return len(records), len(events) - len(records)
@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+Out-of-Core Unified Contact Build (DuckDB)
+
+The in-memory build (hist_contact_store.py) needs all five exports plus the
+contact store in RAM at once. Tenants with multi-year Stripe histories don't
+fit. This mode keeps Python's share to one chunk at a time and lets an
+embedded DuckDB database do the heavy parts under a memory budget, spilling
+to disk beyond it:
+
+1. Stage: each export is streamed in CHUNK_ROWS chunks (read_csv_chunks),
+   filtered and normalized with the SAME helpers as the in-memory build
+   (source_emails, normalize_phones, parse_dates, amounts) and appended to a
+   staging table in an on-disk DuckDB file
+2. Build: one SQL statement applies the in-memory rules: first row per email
+   creates the contact, later Airtable rows overwrite IDs / fill gaps and
+   mark 'merged', Google simplified fills thread/ad IDs, Stripe and Denefits
+   are aggregated per email, then the derived metrics
+3. Output: the result is streamed back in chunks ordered by total_revenue
+   descending, then first_seen, and written through hist_output's chunked
+   writer (optionally compressed, with a manifest); rollup cells are
+   collected per chunk (hist_rollups.rollup_cells)
+
+Output columns, values and row order match the in-memory build. The DuckDB
+file and its spill directory are removed afterwards.
+
+Usage:
+    python scripts/create_unified_contacts.py --out-of-core --memory-limit 2GB
+    python scripts/create_unified_contacts.py --out-of-core --spill-dir /mnt/scratch
+
+    from hist_unified_duckdb import build_unified_out_of_core
+    counts, cells, manifest = build_unified_out_of_core(source_paths, 'unified_contacts.csv', memory_limit='2GB')
+
+Requires: pip install duckdb
+"""
+
+import os
+import shutil
+import time
+from typing import Dict, Iterator, Optional, Tuple
+
+import pandas as pd
+
+from hist_contact_store import (AIRTABLE_FIELDS, FIRST_SEEN_STRIDE, GOOGLE_MAIN_FIELDS, SOURCE_ORDER,
+                                UNIFIED_COLUMNS, amounts, column, either_column, filter_source, first_seen,
+                                normalize_phones, parse_dates, source_emails, text_values)
+from hist_csv import read_csv_chunks
+from hist_output import CsvOutputWriter
+from hist_rollups import rollup_cells
+from hist_snapshot import duckdb, require_duckdb
+
+DEFAULT_MEMORY_LIMIT = '1GB'
+
+# Rows per chunk, both when staging exports and when streaming the result out
+CHUNK_ROWS = 100_000
+
+BUILD_DB_NAME = 'unified_build.duckdb'
+
+DATE_COLUMNS = ['subscription_date', 'purchase_date', 'stripe_first_payment', 'stripe_last_payment',
+                'denefits_signup_date']
+
+# Staging tables: export → (table, DuckDB columns)
+STAGING_TABLES: Dict[str, Tuple[str, Dict[str, str]]] = {
+    'google_main': ('stage_google_main', {
+        'email': 'VARCHAR', 'seen': 'BIGINT',
+        **{field: 'VARCHAR' for field in GOOGLE_MAIN_FIELDS},
+        'phone': 'VARCHAR', 'subscription_date': 'TIMESTAMP', 'total_purchased_google': 'DOUBLE',
+        'booked': 'VARCHAR', 'attended': 'VARCHAR',
+    }),
+    'airtable': ('stage_airtable', {
+        'email': 'VARCHAR', 'seen': 'BIGINT',
+        **{field: 'VARCHAR' for field in AIRTABLE_FIELDS},
+        'phone': 'VARCHAR', 'subscription_date': 'TIMESTAMP', 'airtable_purchase_date': 'TIMESTAMP',
+    }),
+    'google_simple': ('stage_google_simple', {
+        'email': 'VARCHAR', 'seen': 'BIGINT', 'thread_id': 'VARCHAR', 'ad_id': 'VARCHAR',
+    }),
+    'stripe': ('stage_stripe', {
+        'email': 'VARCHAR', 'seen': 'BIGINT', 'amount': 'DOUBLE', 'paid_at': 'TIMESTAMP', 'package': 'VARCHAR',
+    }),
+    'denefits': ('stage_denefits', {
+        'email': 'VARCHAR', 'seen': 'BIGINT', 'amount': 'DOUBLE', 'signup': 'TIMESTAMP', 'status': 'VARCHAR',
+    }),
+}
+
+
+# =============================================================================
+# STAGE
+# =============================================================================
+
+def stage_rows(source: str, chunk: pd.DataFrame) -> pd.DataFrame:
+    """One export chunk → its staging rows (normalized, only rows with an email)."""
+    chunk = filter_source(source, chunk)
+    emails = source_emails(source, chunk)
+    present = emails.notna().to_numpy()
+    chunk = chunk[present]
+    rows = {'email': emails[present].to_numpy(dtype=object), 'seen': first_seen(source, chunk)}
+
+    if source == 'google_main':
+        for field, source_column in GOOGLE_MAIN_FIELDS.items():
+            rows[field] = text_values(column(chunk, source_column))
+        rows['phone'] = text_values(normalize_phones(column(chunk, 'Phone Number')))
+        rows['subscription_date'] = parse_dates(column(chunk, 'Subscription Date')).to_numpy()
+        rows['total_purchased_google'] = amounts(column(chunk, 'Total Purchased')).to_numpy()
+        rows['booked'] = text_values(either_column(chunk, 'Booked Paid DC', 'Booked Free DC'))
+        rows['attended'] = text_values(either_column(chunk, 'Attended Paid DC', 'Attended Free DC'))
+    elif source == 'airtable':
+        for field, source_column in AIRTABLE_FIELDS.items():
+            rows[field] = text_values(column(chunk, source_column))
+        rows['phone'] = text_values(normalize_phones(column(chunk, 'PHONE')))
+        rows['subscription_date'] = parse_dates(column(chunk, 'SUBSCRIBED_DATE')).to_numpy()
+        rows['airtable_purchase_date'] = parse_dates(column(chunk, 'DATE_SET_PURCHASE')).to_numpy()
+    elif source == 'google_simple':
+        rows['thread_id'] = text_values(column(chunk, 'Thread ID'))
+        rows['ad_id'] = text_values(column(chunk, 'Ad_Id'))
+    elif source == 'stripe':
+        rows['amount'] = amounts(column(chunk, 'Amount')).to_numpy()
+        rows['paid_at'] = parse_dates(column(chunk, 'Created date (UTC)')).to_numpy()
+        rows['package'] = text_values(column(chunk, 'package_name (metadata)'))
+    else:
+        rows['amount'] = amounts(column(chunk, 'Payment Plan Amount')).to_numpy()
+        rows['signup'] = parse_dates(column(chunk, 'Payment Plan Sign Up Date')).to_numpy()
+        rows['status'] = text_values(column(chunk, 'Payment Plan Status'))
+    return pd.DataFrame(rows)
+
+
+def stage_source(con, source: str, path: Optional[str], chunk_rows: int = CHUNK_ROWS) -> int:
+    """Create the source's staging table and stream the export into it; returns rows staged."""
+    table, columns = STAGING_TABLES[source]
+    con.execute(f"CREATE OR REPLACE TABLE {table} ({', '.join(f'{n} {t}' for n, t in columns.items())})")
+    if not path or not os.path.exists(path):
+        return 0
+
+    staged = 0
+    for chunk in read_csv_chunks(path, chunk_rows=chunk_rows):
+        rows = stage_rows(source, chunk)
+        if rows.empty:
+            continue
+        con.register('staging_chunk', rows)
+        con.execute(f"INSERT INTO {table} BY NAME SELECT * FROM staging_chunk")
+        con.unregister('staging_chunk')
+        staged += len(rows)
+    return staged
+
+
+# =============================================================================
+# BUILD
+# =============================================================================
+
+_GOOGLE_COLUMNS = ', '.join(['email', 'seen', *GOOGLE_MAIN_FIELDS, 'phone', 'subscription_date',
+                             'total_purchased_google', 'booked', 'attended'])
+_AIRTABLE_COLUMNS = ', '.join(['email', 'seen', *AIRTABLE_FIELDS, 'phone', 'subscription_date',
+                               'airtable_purchase_date'])
+
+# Same rules as hist_contact_store's stages; arg_max/arg_min by `seen` with a
+# NOT NULL filter = last/first present value in file order
+BUILD_SQL = f"""
+CREATE OR REPLACE TABLE unified AS
+WITH
+google_ranked AS (
+    SELECT *, row_number() OVER (PARTITION BY email ORDER BY seen) AS rn FROM stage_google_main
+),
+google_first AS (SELECT * FROM google_ranked WHERE rn = 1),
+airtable_ranked AS (
+    SELECT *, row_number() OVER (PARTITION BY email ORDER BY seen) AS rn FROM stage_airtable
+),
+airtable_new AS (
+    SELECT * FROM airtable_ranked a
+    WHERE rn = 1 AND NOT EXISTS (SELECT 1 FROM google_first g WHERE g.email = a.email)
+),
+airtable_merge AS (
+    SELECT email,
+        arg_max(mc_id, seen) FILTER (WHERE mc_id IS NOT NULL) AS mc_id,
+        arg_max(ghl_id, seen) FILTER (WHERE ghl_id IS NOT NULL) AS ghl_id,
+        arg_max(ad_id, seen) FILTER (WHERE ad_id IS NOT NULL) AS ad_id,
+        arg_max(thread_id, seen) FILTER (WHERE thread_id IS NOT NULL) AS thread_id,
+        arg_min(trigger_word, seen) FILTER (WHERE trigger_word IS NOT NULL) AS trigger_word,
+        arg_min(paid_vs_organic, seen) FILTER (WHERE paid_vs_organic IS NOT NULL) AS paid_vs_organic,
+        arg_max(airtable_purchase_date, seen) FILTER (WHERE airtable_purchase_date IS NOT NULL)
+            AS airtable_purchase_date
+    FROM airtable_ranked a
+    WHERE rn > 1 OR EXISTS (SELECT 1 FROM google_first g WHERE g.email = a.email)
+    GROUP BY email
+),
+base AS (
+    SELECT {_GOOGLE_COLUMNS}, 'google_sheets' AS source FROM google_first
+    UNION ALL BY NAME
+    SELECT {_AIRTABLE_COLUMNS}, 'airtable' AS source FROM airtable_new
+),
+merged AS (
+    SELECT b.* REPLACE (
+        coalesce(m.mc_id, b.mc_id) AS mc_id,
+        coalesce(m.ghl_id, b.ghl_id) AS ghl_id,
+        coalesce(m.ad_id, b.ad_id) AS ad_id,
+        coalesce(m.thread_id, b.thread_id) AS thread_id,
+        coalesce(b.trigger_word, m.trigger_word) AS trigger_word,
+        coalesce(b.paid_vs_organic, m.paid_vs_organic) AS paid_vs_organic,
+        coalesce(m.airtable_purchase_date, b.airtable_purchase_date) AS airtable_purchase_date,
+        CASE WHEN m.email IS NULL THEN b.source ELSE 'merged' END AS source
+    )
+    FROM base b LEFT JOIN airtable_merge m ON m.email = b.email
+),
+google_simple AS (
+    SELECT email,
+        arg_min(thread_id, seen) FILTER (WHERE thread_id IS NOT NULL) AS thread_id,
+        arg_min(ad_id, seen) FILTER (WHERE ad_id IS NOT NULL) AS ad_id
+    FROM stage_google_simple GROUP BY email
+),
+stripe AS (
+    SELECT email, count(*) AS payments, sum(amount) AS revenue, min(paid_at) AS first_payment,
+        max(paid_at) AS last_payment,
+        arg_min(package, seen) FILTER (WHERE package IS NOT NULL) AS package
+    FROM stage_stripe GROUP BY email
+),
+denefits AS (
+    SELECT email, count(*) AS contracts, sum(amount) AS revenue, min(signup) AS signup,
+        arg_max(status, seen) FILTER (WHERE status IS NOT NULL) AS status
+    FROM stage_denefits GROUP BY email
+),
+linked AS (
+    SELECT c.* REPLACE (
+            coalesce(c.thread_id, gs.thread_id) AS thread_id,
+            coalesce(c.ad_id, gs.ad_id) AS ad_id),
+        c.thread_id IS NULL AND gs.thread_id IS NOT NULL AS thread_enriched,
+        s.payments AS stripe_payments, s.revenue AS stripe_revenue,
+        s.first_payment AS stripe_first_payment, s.last_payment AS stripe_last_payment,
+        s.package AS stripe_package,
+        d.contracts AS denefits_contracts, d.revenue AS denefits_revenue,
+        d.signup AS denefits_signup_date, d.status AS denefits_status,
+        coalesce(s.revenue, 0) AS s_rev, coalesce(d.revenue, 0) AS d_rev,
+        coalesce(c.total_purchased_google, 0) AS g_rev
+    FROM merged c
+    LEFT JOIN google_simple gs ON gs.email = c.email
+    LEFT JOIN stripe s ON s.email = c.email
+    LEFT JOIN denefits d ON d.email = c.email
+)
+SELECT *,
+    greatest(s_rev + d_rev, g_rev) AS total_revenue,
+    s_rev > 0 OR d_rev > 0 OR g_rev > 0 AS has_purchase,
+    least(stripe_first_payment, denefits_signup_date, airtable_purchase_date) AS purchase_date,
+    CASE WHEN s_rev > 0 AND d_rev > 0 THEN 'Both' WHEN s_rev > 0 THEN 'Stripe'
+         WHEN d_rev > 0 THEN 'Denefits' END AS payment_method,
+    floor((epoch_us(least(stripe_first_payment, denefits_signup_date, airtable_purchase_date))
+           - epoch_us(subscription_date)) / 86400000000.0) AS days_to_purchase
+FROM linked
+"""
+
+COUNTS_SQL = """
+SELECT
+    (SELECT count(*) FROM stage_google_main) AS google_processed,
+    (SELECT count(*) FROM unified WHERE seen < {stride}) AS google_added,
+    (SELECT count(*) FROM stage_airtable a
+        WHERE a.seen NOT IN (SELECT seen FROM unified)) AS airtable_merged,
+    (SELECT count(*) FROM unified WHERE seen >= {stride}) AS airtable_added,
+    (SELECT count(*) FROM unified WHERE thread_enriched) AS enriched,
+    (SELECT count(*) FROM stage_stripe s SEMI JOIN unified u ON u.email = s.email) AS stripe_matched,
+    (SELECT coalesce(sum(amount), 0) FROM stage_stripe s SEMI JOIN unified u ON u.email = s.email) AS stripe_revenue,
+    (SELECT count(*) FROM stage_denefits d SEMI JOIN unified u ON u.email = d.email) AS denefits_matched,
+    (SELECT coalesce(sum(amount), 0) FROM stage_denefits d SEMI JOIN unified u ON u.email = d.email)
+        AS denefits_revenue,
+    (SELECT count(*) FROM unified) AS contacts
+"""
+
+
+def build_counts(con) -> Dict[str, Dict]:
+    """The same per-stage counts build_unified() returns."""
+    (google_processed, google_added, airtable_merged, airtable_added, enriched, stripe_matched, stripe_revenue,
+     denefits_matched, denefits_revenue, contacts) = con.execute(
+        COUNTS_SQL.format(stride=FIRST_SEEN_STRIDE)).fetchone()
+    return {
+        'google_main': {'processed': google_processed, 'added': google_added},
+        'airtable': {'merged': airtable_merged, 'added': airtable_added},
+        'google_simple': {'enriched': enriched},
+        'stripe': {'matched': stripe_matched, 'revenue': float(stripe_revenue)},
+        'denefits': {'matched': denefits_matched, 'revenue': float(denefits_revenue)},
+        'contacts': {'total': contacts},
+    }
+
+
+# =============================================================================
+# OUTPUT
+# =============================================================================
+
+def date_formats(con) -> Dict[str, str]:
+    """
+    Per date column, the format pandas would pick for the whole column: date
+    only when every value is midnight, else seconds (microseconds if any has
+    them), so chunks written separately all look like one to_csv() call.
+    """
+    formats = {}
+    for name in DATE_COLUMNS:
+        has_time, has_fraction = con.execute(f"""
+            SELECT bool_or(CAST({name} AS TIME) <> TIME '00:00:00'),
+                   bool_or(microsecond({name}) % 1000000 <> 0)
+            FROM unified""").fetchone()
+        if has_fraction:
+            formats[name] = '%Y-%m-%d %H:%M:%S.%f'
+        elif has_time:
+            formats[name] = '%Y-%m-%d %H:%M:%S'
+        else:
+            formats[name] = '%Y-%m-%d'
+    return formats
+
+
+def result_chunks(con, chunk_rows: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """The unified contacts in output order, `chunk_rows` at a time."""
+    select = ', '.join(
+        f'CAST({name} AS DOUBLE) AS {name}' if name in ('stripe_payments', 'denefits_contracts') else name
+        for name in UNIFIED_COLUMNS)
+    reader = con.execute(
+        f"SELECT {select} FROM unified ORDER BY total_revenue DESC, seen").fetch_record_batch(chunk_rows)
+    for batch in reader:
+        yield batch.to_pandas()
+
+
+def build_unified_out_of_core(source_paths: Dict[str, Optional[str]], output_path: str,
+                              memory_limit: str = DEFAULT_MEMORY_LIMIT, spill_dir: Optional[str] = None,
+                              chunk_rows: int = CHUNK_ROWS,
+                              compression: Optional[str] = None) -> Tuple[Dict[str, Dict], pd.DataFrame, Dict]:
+    """
+    Stage every export ({source name: CSV path}) into DuckDB, build there
+    and stream the result to output_path (hist_output.CsvOutputWriter,
+    optionally compressed). Returns (stage counts, rollup cells, manifest).
+    """
+    require_duckdb()
+    spill_dir = spill_dir or os.path.dirname(os.path.abspath(output_path))
+    work_dir = os.path.join(spill_dir, BUILD_DB_NAME + '.work')
+    os.makedirs(work_dir, exist_ok=True)
+    db_path = os.path.join(work_dir, BUILD_DB_NAME)
+
+    con = duckdb.connect(db_path)
+    try:
+        con.execute(f"SET memory_limit = '{memory_limit}'")
+        con.execute(f"SET temp_directory = '{os.path.join(work_dir, 'spill')}'")
+        con.execute("SET preserve_insertion_order = false")
+
+        for source in SOURCE_ORDER:
+            started = time.perf_counter()
+            staged = stage_source(con, source, source_paths.get(source), chunk_rows)
+            print(f"  ✓ Staged {staged:,} {source} rows in {time.perf_counter() - started:.1f}s")
+
+        started = time.perf_counter()
+        con.execute(BUILD_SQL)
+        counts = build_counts(con)
+        print(f"  ✓ Built {counts['contacts']['total']:,} contacts in {time.perf_counter() - started:.1f}s "
+              f"(memory limit {memory_limit})\n")
+
+        cells = []
+        with CsvOutputWriter(output_path, UNIFIED_COLUMNS, compression, date_formats(con)) as writer:
+            for chunk in result_chunks(con, chunk_rows):
+                cells.append(rollup_cells(chunk))
+                writer.write(chunk)
+    finally:
+        con.close()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    all_cells = pd.concat(cells, ignore_index=True) if cells else rollup_cells(pd.DataFrame(columns=UNIFIED_COLUMNS))
+    return counts, all_cells, writer.manifest
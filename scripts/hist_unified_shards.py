@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Hash-Partitioned Unified Contact Build
+
+build_unified() (hist_contact_store.py) runs on one core. Every rule in the
+build only ever looks at rows of ONE email: the first Google/Airtable row
+creates the contact, later rows enrich it, payments and contracts are summed
+per contact. So the build splits cleanly by email:
+
+1. Each of the five exports is hash-partitioned by the normalized email it
+   is matched on (source_emails()) into N shards; a shard keeps its rows in
+   file order, and rows without an email are dropped (they never match)
+2. Each shard's merge, purchase linking and metrics run in their own worker
+   process (build_unified on that shard's rows)
+3. The shard frames are concatenated and ordered by total_revenue
+   descending, ties by first_seen (export + row number), which is exactly
+   the order of the single-process build
+
+The result, and every stage count, is identical to build_unified() on the
+whole exports; only the wall time changes (roughly 1/N of the build, plus
+partitioning and shipping frames to and from the workers).
+
+Usage:
+    from hist_unified_shards import build_unified_sharded
+
+    df_unified, counts = build_unified_sharded(sources, shards=8)
+
+    python scripts/create_unified_contacts.py --shards 8
+    python scripts/hist_unified_shards.py --benchmark 1000000 --shards 1 2 4
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from hist_contact_store import SOURCE_ORDER, UNIFIED_COLUMNS, build_unified, revenue_order, source_emails
+from hist_parallel import _pool_context, resolve_workers
+
+
+def shard_ids(emails: pd.Series, shards: int) -> np.ndarray:
+    """
+    Shard number per row (-1 where there is no email). Uses pandas' fixed-key
+    hash, so the same email lands in the same shard in every process and run.
+    """
+    present = emails.notna().to_numpy()
+    ids = np.full(len(emails), -1, dtype=np.int64)
+    hashes = pd.util.hash_array(emails.to_numpy(dtype=object)[present], categorize=False)
+    ids[present] = (hashes % np.uint64(shards)).astype(np.int64)
+    return ids
+
+
+def partition_sources(sources: Dict[str, pd.DataFrame], shards: int) -> List[Dict[str, pd.DataFrame]]:
+    """Split every export into `shards` frames by matching email, keeping row numbers as the index."""
+    parts = [{} for _ in range(shards)]
+    for name in SOURCE_ORDER:
+        df = sources.get(name)
+        if df is None or df.empty:
+            continue
+        ids = shard_ids(source_emails(name, df), shards)
+        for shard in range(shards):
+            parts[shard][name] = df[ids == shard]
+    return parts
+
+
+def _build_shard(shard_sources: Dict[str, pd.DataFrame]) -> Tuple[pd.DataFrame, Dict[str, Dict], float]:
+    started = time.perf_counter()
+    df, counts = build_unified(shard_sources, keep_first_seen=True)
+    return df, counts, time.perf_counter() - started
+
+
+def merge_counts(all_counts: List[Dict[str, Dict]]) -> Dict[str, Dict]:
+    """Sum each stage's counts over the shards."""
+    merged: Dict[str, Dict] = {}
+    for counts in all_counts:
+        for stage, values in counts.items():
+            target = merged.setdefault(stage, {})
+            for key, value in values.items():
+                target[key] = target.get(key, 0) + value
+    return merged
+
+
+def build_unified_sharded(sources: Dict[str, pd.DataFrame], shards: int,
+                          workers: Optional[int] = None, verbose: bool = True) -> Tuple[pd.DataFrame, Dict[str, Dict]]:
+    """
+    build_unified() over `shards` hash partitions in a process pool
+    (workers: default one per shard, capped at the CPU count).
+    Same frame and counts as build_unified(sources).
+    """
+    if shards <= 1:
+        return build_unified(sources)
+
+    started = time.perf_counter()
+    parts = partition_sources(sources, shards)
+    if verbose:
+        print(f"  Partitioned into {shards} shards in {time.perf_counter() - started:.1f}s")
+
+    workers = min(resolve_workers(workers or shards), shards)
+    frames, all_counts = [], []
+    with ProcessPoolExecutor(max_workers=workers, mp_context=_pool_context()) as pool:
+        futures = [pool.submit(_build_shard, part) for part in parts]
+        del parts
+        for shard, future in enumerate(futures):
+            df, counts, elapsed = future.result()
+            frames.append(df)
+            all_counts.append(counts)
+            if verbose:
+                print(f"    ✓ Shard {shard + 1}/{shards}: {len(df):,} contacts in {elapsed:.1f}s")
+
+    df = pd.concat(frames, ignore_index=True)
+    del frames
+    order = revenue_order(df['total_revenue'].to_numpy(), df['first_seen'].to_numpy())
+    df = df.take(order)[UNIFIED_COLUMNS].reset_index(drop=True)
+    return df, merge_counts(all_counts)
+
+
+# =============================================================================
+# BENCHMARK
+# =============================================================================
+
+def run_benchmark(contacts: int, shard_counts: List[int]):
+    from hist_contact_store import _synthetic_contacts, _synthetic_payments
+
+    print(f"\n⏱️  Unified build on {contacts:,} synthetic contacts ({os.cpu_count()} CPU cores)\n")
+    people = _synthetic_contacts(0, contacts, seed=0)
+    sources = {
+        'google_main': people,
+        # Half the contacts again in Airtable (so half merge), payments for ~10%
+        'airtable': pd.DataFrame(index=people.index[::2], data={
+            'EMAIL': people['Email Address'].iloc[::2].to_numpy(),
+            'FIRST_NAME': people['First Name'].iloc[::2].to_numpy(),
+            'MC_ID': np.arange(0, contacts, 2) + 900_000_000,
+        }),
+        'stripe': _synthetic_payments(people, seed=1),
+    }
+
+    baseline = None
+    for shards in shard_counts:
+        started = time.perf_counter()
+        df, _ = build_unified_sharded(sources, shards, verbose=False)
+        elapsed = time.perf_counter() - started
+        if baseline is None:
+            baseline = (df, elapsed)
+            same = ''
+        else:
+            identical = df.astype(object).equals(baseline[0].astype(object))
+            same = '  identical output' if identical else '  ⚠️  OUTPUT DIFFERS'
+        print(f"  {shards:>3} shard(s): {elapsed:6.1f}s  ({baseline[1] / elapsed:4.2f}x){same}")
+    print()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark the hash-partitioned unified build')
+    parser.add_argument('--benchmark', type=int, metavar='CONTACTS', required=True,
+                        help='Number of synthetic contacts')
+    parser.add_argument('--shards', nargs='+', type=int, default=[1, 2, 4],
+                        help='Shard counts to compare (default: 1 2 4)')
+    args = parser.parse_args()
+    run_benchmark(args.benchmark, args.shards)
@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Watch-Folder Ingestion for historical_data/
+
+Instead of running the right importer by hand whenever an export lands in
+historical_data/, this long-running watcher:
+
+1. Polls the folder every --interval seconds (stdlib only, no inotify needed)
+2. Waits until a file's size and mtime have been stable for --debounce
+   seconds, so half-copied downloads are never imported
+3. Identifies the export by its header row (SOURCE_FINGERPRINTS), not by
+   file name: "stripe (2).csv" and "export_final.csv" route the same way
+4. Skips files whose SHA-256 content hash was already ingested (renamed or
+   re-saved copies of an imported file do nothing)
+5. Runs the importer (mcb_import.py sheets / airtable / payments) as a
+   subprocess in a bounded pool of --workers, so one slow import doesn't
+   hold up the others and a crashing import can't take the watcher down
+
+Ingested hashes are kept in <folder>/.hist_watch_state.json; each import's
+output goes to <folder>/.hist_watch_logs/. A file is recorded as ingested
+only when its import exits successfully, so a failed file is retried the
+next time it changes (or when the watcher restarts).
+
+The first run in a folder (no state file yet) records the exports already
+there as ingested instead of importing them: they were most likely imported
+by hand before the watcher existed. Pass --import-existing to import them.
+
+Usage:
+    python scripts/hist_watch.py                          # watch historical_data/
+    python scripts/hist_watch.py --direct-db --workers 3
+    python scripts/hist_watch.py --once                   # import what's there now, then exit
+    python scripts/hist_watch.py --dry-run                # show how each file would be routed
+    python scripts/hist_watch.py --mark-existing          # record current files as ingested, import nothing
+    python scripts/hist_watch.py --import-existing        # first run: import the files already there too
+
+Files that match no fingerprint (ad performance, webhook exports, unified
+outputs) are reported once and left alone; the scripts' own *.rejects.csv
+and *.reconcile.csv outputs are ignored.
+"""
+
+import csv
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DIR = os.path.join(os.path.dirname(SCRIPTS_DIR), 'historical_data')
+MCB_IMPORT = os.path.join(SCRIPTS_DIR, 'mcb_import.py')
+
+STATE_FILE = '.hist_watch_state.json'
+LOG_DIR = '.hist_watch_logs'
+
+DEFAULT_INTERVAL = 2.0
+DEFAULT_DEBOUNCE = 3.0
+DEFAULT_WORKERS = 2
+
+WATCHED_EXTENSIONS = ('.csv',)
+IGNORED_SUFFIXES = ('.rejects.csv', '.reconcile.csv', '.part', '.crdownload', '.tmp')
+
+# Header fingerprints, checked in order; header names are compared
+# case-insensitively. A file matches when it has ALL of `all` and at least
+# one of `any`. `command` is the mcb_import.py invocation (path appended).
+SOURCE_FINGERPRINTS: List[Dict] = [
+    {'source': 'stripe', 'command': ['payments', '--stripe'],
+     'all': ['amount', 'currency'],
+     'any': ['captured', 'amount refunded', 'statement descriptor', 'seller message', 'converted amount']},
+    {'source': 'denefits', 'command': ['payments', '--denefits'],
+     'all': [],
+     'any': ['payment plan id', 'contract id', 'payment plan amount', 'financed amount', 'loan amount']},
+    {'source': 'airtable', 'command': ['airtable'],
+     'all': [],
+     'any': ['dm_vs_comment', 'ig_username', 'segment_symptoms', 'ad_set_id']},
+    {'source': 'google_sheets', 'command': ['sheets'],
+     'all': ['email address'],
+     'any': ['subscription date', 'instagram name', 'last ig interaction', 'sent link', 'bought package']},
+]
+
+
+# =============================================================================
+# FINGERPRINT / HASH
+# =============================================================================
+
+def read_header(path: str) -> List[str]:
+    """First CSV row, lower-cased and stripped (BOM included)."""
+    with open(path, newline='', encoding='utf-8-sig', errors='replace') as f:
+        header = next(csv.reader(f), [])
+    return [name.strip().lower() for name in header]
+
+
+def fingerprint_source(header: List[str], fingerprints: Optional[List[Dict]] = None) -> Optional[Dict]:
+    """The first fingerprint the header matches, or None."""
+    columns = set(header)
+    for fingerprint in (fingerprints if fingerprints is not None else SOURCE_FINGERPRINTS):
+        if all(c in columns for c in fingerprint['all']) and any(c in columns for c in fingerprint['any']):
+            return fingerprint
+    return None
+
+
+def content_hash(path: str, block_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def is_watched(name: str) -> bool:
+    return (name.endswith(WATCHED_EXTENSIONS) and not name.startswith(('.', '~'))
+            and not name.endswith(IGNORED_SUFFIXES))
+
+
+# =============================================================================
+# STATE
+# =============================================================================
+
+class IngestLedger:
+    """Content hashes already ingested, persisted as JSON next to the watched files."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: Dict[str, Dict] = {}
+        self.is_new = not os.path.exists(path)  # no state yet: first run in this folder
+        if not self.is_new:
+            with open(path) as f:
+                self.entries = json.load(f).get('ingested', {})
+
+    def __contains__(self, digest: str) -> bool:
+        return digest in self.entries
+
+    def add(self, digest: str, file_path: str, source: str):
+        self.entries[digest] = {
+            'file': os.path.basename(file_path),
+            'source': source,
+            'ingested_at': datetime.now().isoformat(),
+        }
+        self.save()
+
+    def save(self):
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump({'ingested': self.entries}, f, indent=2)
+        os.replace(tmp, self.path)
+        self.is_new = False
+
+
+# =============================================================================
+# WATCHER
+# =============================================================================
+
+class FolderWatcher:
+    def __init__(self, folder: str, interval: float = DEFAULT_INTERVAL, debounce: float = DEFAULT_DEBOUNCE,
+                 workers: int = DEFAULT_WORKERS, import_args: Optional[List[str]] = None):
+        self.folder = os.path.abspath(folder)
+        self.interval = interval
+        self.debounce = debounce
+        self.import_args = import_args or []
+        self.ledger = IngestLedger(os.path.join(self.folder, STATE_FILE))
+        self.log_dir = os.path.join(self.folder, LOG_DIR)
+        self.workers = max(1, workers)
+        self.pool = ThreadPoolExecutor(max_workers=self.workers)
+
+        self._stable_since: Dict[str, Tuple[Tuple[int, int], float]] = {}  # path → (stat, first seen)
+        self._handled: Dict[str, Tuple[int, int]] = {}                     # path → stat already decided
+        self._running: Dict[str, Tuple[Future, Dict, str]] = {}            # path → (future, fingerprint, hash)
+
+    # --- scanning -------------------------------------------------------------
+
+    def stable_files(self, debounce: Optional[float] = None) -> List[Tuple[str, Tuple[int, int]]]:
+        """Watched files whose size/mtime haven't changed for `debounce` seconds."""
+        debounce = self.debounce if debounce is None else debounce
+        now = time.monotonic()
+        stable = []
+        present = set()
+        for entry in os.scandir(self.folder):
+            if not entry.is_file() or not is_watched(entry.name):
+                continue
+            present.add(entry.path)
+            info = entry.stat()
+            stat = (info.st_size, info.st_mtime_ns)
+            seen = self._stable_since.get(entry.path)
+            if seen is None or seen[0] != stat:
+                self._stable_since[entry.path] = (stat, now)
+                if debounce > 0:
+                    continue
+                seen = (stat, now)
+            if now - seen[1] >= debounce and self._handled.get(entry.path) != stat:
+                stable.append((entry.path, stat))
+        for path in list(self._stable_since):
+            if path not in present:
+                del self._stable_since[path]
+                self._handled.pop(path, None)
+        return stable
+
+    def route(self, path: str) -> Tuple[Optional[Dict], Optional[str]]:
+        """(fingerprint, content hash); fingerprint None for unrecognised files."""
+        try:
+            fingerprint = fingerprint_source(read_header(path))
+        except OSError as e:
+            print(f"⚠️  Could not read {os.path.basename(path)}: {e}")
+            return None, None
+        if fingerprint is None:
+            return None, None
+        return fingerprint, content_hash(path)
+
+    # --- importing ------------------------------------------------------------
+
+    def _run_import(self, path: str, fingerprint: Dict) -> Tuple[int, float, str]:
+        os.makedirs(self.log_dir, exist_ok=True)
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        log_path = os.path.join(self.log_dir, f"{os.path.basename(path)}.{stamp}.log")
+        command = [sys.executable, MCB_IMPORT] + fingerprint['command'] + [path] + self.import_args
+        start = time.monotonic()
+        with open(log_path, 'w') as log:
+            result = subprocess.run(command, stdout=log, stderr=subprocess.STDOUT, cwd=SCRIPTS_DIR)
+        return result.returncode, time.monotonic() - start, log_path
+
+    def submit(self, path: str, fingerprint: Dict, digest: str):
+        print(f"📥 {os.path.basename(path)} → {fingerprint['source']} import")
+        self._running[path] = (self.pool.submit(self._run_import, path, fingerprint), fingerprint, digest)
+
+    def collect(self):
+        """Record finished imports; only successful ones go into the ledger."""
+        for path, (future, fingerprint, digest) in list(self._running.items()):
+            if not future.done():
+                continue
+            del self._running[path]
+            name = os.path.basename(path)
+            try:
+                returncode, seconds, log_path = future.result()
+            except Exception as e:
+                print(f"❌ {name}: could not run importer: {e}")
+                continue
+            if returncode == 0:
+                self.ledger.add(digest, path, fingerprint['source'])
+                print(f"✅ {name} imported in {seconds:.1f}s (log: {log_path})")
+            else:
+                print(f"❌ {name} import failed (exit {returncode}) after {seconds:.1f}s, "
+                      f"see {log_path}; retried when the file changes")
+
+    def poll(self, debounce: Optional[float] = None, dry_run: bool = False, mark_only: bool = False):
+        """One scan: route every newly stable file and submit the ones not yet ingested."""
+        self.collect()
+        for path, stat in self.stable_files(debounce):
+            if path in self._running:
+                continue  # changed while importing; picked up again once that run finishes
+            self._handled[path] = stat
+            name = os.path.basename(path)
+            fingerprint, digest = self.route(path)
+            if fingerprint is None:
+                print(f"·  {name}: header matches no known export, skipped")
+                continue
+            if digest in self.ledger or any(digest == running[2] for running in self._running.values()):
+                print(f"·  {name}: same content as a file already ingested ({fingerprint['source']}), skipped")
+                continue
+            if dry_run:
+                print(f"→  {name} would be imported as {fingerprint['source']}: "
+                      f"mcb_import.py {' '.join(fingerprint['command'])} {name} {' '.join(self.import_args)}".rstrip())
+            elif mark_only:
+                self.ledger.add(digest, path, fingerprint['source'])
+                print(f"✓  {name}: marked as ingested ({fingerprint['source']})")
+            else:
+                self.submit(path, fingerprint, digest)
+
+    def wait(self):
+        """Block until every submitted import has finished."""
+        while self._running:
+            time.sleep(0.2)
+            self.collect()
+
+    def run_forever(self):
+        print(f"👀 Watching {self.folder} (every {self.interval:g}s, debounce {self.debounce:g}s, "
+              f"{self.workers} workers). Ctrl+C to stop.\n")
+        try:
+            while True:
+                self.poll()
+                time.sleep(self.interval)
+        except KeyboardInterrupt:
+            print("\n⏹  Stopping; waiting for running imports to finish...")
+            self.wait()
+        finally:
+            self.pool.shutdown(wait=True)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Watch historical_data/ and import new exports automatically')
+    parser.add_argument('--dir', default=DEFAULT_DIR, help='Folder to watch (default: historical_data/)')
+    parser.add_argument('--interval', type=float, default=DEFAULT_INTERVAL, help='Seconds between scans')
+    parser.add_argument('--debounce', type=float, default=DEFAULT_DEBOUNCE,
+                        help='Seconds a file must stay unchanged before it is imported')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='Imports running at the same time')
+    parser.add_argument('--direct-db', action='store_true', help='Pass --direct-db to the importers')
+    parser.add_argument('--import-workers', type=int, default=None,
+                        help='Pass --workers N (row-mapping processes) to the importers')
+    parser.add_argument('--once', action='store_true', help='Import the files present now, then exit')
+    parser.add_argument('--dry-run', action='store_true', help='Show how each file would be routed, import nothing')
+    parser.add_argument('--mark-existing', action='store_true',
+                        help='Record the recognised files present now as ingested without importing them')
+    parser.add_argument('--import-existing', action='store_true',
+                        help='On the first run in a folder, import the files already there '
+                             '(default: record them as ingested)')
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.dir):
+        print(f"ERROR: Folder not found: {args.dir}")
+        sys.exit(1)
+
+    import_args = ['--direct-db'] if args.direct_db else []
+    if args.import_workers is not None:
+        import_args += ['--workers', str(args.import_workers)]
+
+    watcher = FolderWatcher(args.dir, args.interval, args.debounce, args.workers, import_args)
+    if watcher.ledger.is_new and not (args.dry_run or args.mark_existing or args.import_existing):
+        # Exports already in the folder were most likely imported by hand before the
+        # watcher ran; only files that arrive (or change) from now on are imported
+        print(f"🆕 No ingest state in {args.dir} yet: recording the exports already there as ingested "
+              f"(re-run with --import-existing to import them instead)")
+        watcher.poll(debounce=0, mark_only=True)
+        watcher.ledger.save()
+        print()
+    if args.dry_run or args.mark_existing or args.once:
+        watcher.poll(debounce=0, dry_run=args.dry_run, mark_only=args.mark_existing)
+        if args.mark_existing:
+            watcher.ledger.save()  # even with nothing recognised, so the next run isn't a first run
+        watcher.wait()
+        watcher.pool.shutdown(wait=True)
+    else:
+        watcher.run_forever()
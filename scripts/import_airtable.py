@@ -19,6 +19,8 @@ Environment Variables Required:
     SUPABASE_SERVICE_KEY - Your Supabase service role key (admin access)
 
 Output:
+    - Stages raw rows in hist_contacts_staging and merges them server-side
+      (merge_hist_contacts_staging): dedupe, 'merged' source, insert/update counts
     - Updates existing contacts in hist_contacts (if email matches)
     - Inserts new contacts not found in previous imports
     - Logs import results to hist_import_logs table
@@ -28,33 +30,35 @@ import os
 import sys
 import csv
 import re
+import argparse
 from datetime import datetime
 from typing import Dict, List, Optional, Tuple, Any
 import uuid
 
 # Third-party imports
 try:
-    from supabase import create_client, Client
-    from dotenv import load_dotenv
+    from supabase import Client
     import pandas as pd
 except ImportError:
     print("ERROR: Missing required packages.")
     print("Install with: pip install supabase python-dotenv pandas")
     sys.exit(1)
 
-# Load environment variables
-load_dotenv()
+from hist_contacts_merge import merged_contact_rows, stage_and_merge_contacts
+from hist_classify import AD_SOURCE_COLUMNS, AD_TYPE_COLUMN, ad_type_for_value, classify_ad_types, is_set
+from hist_copy import connect_direct, copy_merge
+from hist_checksums import keys_checksum, table_checksum
+from hist_csv import read_csv
+from hist_parallel import map_rows
+from hist_progress import ImportProgress
+from hist_rejects import RejectLog, reject_path_for, strip_reject_columns
+from hist_rules import CONTACT_RULES, flag_records, print_rule_hits
+from hist_timeline import build_timeline_events, concat_timeline_events, timeline_records, write_timeline_events
+from hist_supabase import lazy_supabase_client, print_transport_stats
 
-# Supabase setup
-SUPABASE_URL = os.getenv("NEXT_PUBLIC_SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
-
-if not SUPABASE_URL or not SUPABASE_KEY:
-    print("ERROR: Missing Supabase credentials.")
-    print("Make sure NEXT_PUBLIC_SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY are in .env.local")
-    sys.exit(1)
-
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+# Supabase setup (pooled transport shared by all importers, see hist_supabase.py);
+# created on first use so --help and argument errors don't need credentials
+supabase: Client = lazy_supabase_client()
 
 
 # =============================================================================
@@ -111,29 +115,6 @@ def parse_date_flexible(date_str: Optional[str]) -> Optional[datetime]:
         return None
 
 
-def is_suspicious_data(contact: Dict) -> Tuple[bool, str]:
-    """Check if contact data looks suspicious."""
-    reasons = []
-    now = datetime.now()
-
-    if contact.get('first_seen') and contact['first_seen'] > now:
-        reasons.append("future first_seen date")
-    if contact.get('purchase_date') and contact['purchase_date'] > now:
-        reasons.append("future purchase date")
-
-    if contact.get('first_seen') and contact.get('purchase_date'):
-        if contact['purchase_date'] < contact['first_seen']:
-            reasons.append("purchase before first contact")
-
-    email = contact.get('email')
-    if email and ('test' in email or 'fake' in email or 'example' in email):
-        reasons.append("test/fake email")
-
-    if reasons:
-        return True, "; ".join(reasons)
-    return False, ""
-
-
 # =============================================================================
 # AIRTABLE-SPECIFIC FUNCTIONS
 # =============================================================================
@@ -187,20 +168,14 @@ def extract_ad_attribution(row: Dict) -> Dict[str, Any]:
     """
     attribution = {}
 
-    # Ad type (paid vs organic)
-    ad_type = (
-        row.get('ad_type') or
-        row.get('Ad Type') or
-        row.get('Traffic Source') or
-        row.get('traffic_source') or
-        row.get('Source')
-    )
+    # Ad type (paid vs organic), classified column-wise by import_airtable_csv()
+    # with hist_classify.classify_ad_types() (keywords in AD_TYPE_KEYWORDS there)
+    if AD_TYPE_COLUMN in row:
+        ad_type = row[AD_TYPE_COLUMN]
+    else:
+        ad_type = ad_type_for_value(next((row.get(c) for c in AD_SOURCE_COLUMNS if is_set(row.get(c))), None))
     if ad_type:
-        ad_type = str(ad_type).lower()
-        if 'paid' in ad_type or 'ad' in ad_type or 'facebook' in ad_type or 'meta' in ad_type:
-            attribution['ad_type'] = 'paid'
-        elif 'organic' in ad_type or 'free' in ad_type or 'direct' in ad_type:
-            attribution['ad_type'] = 'organic'
+        attribution['ad_type'] = ad_type
 
     # Campaign name
     attribution['campaign_name'] = (
@@ -313,12 +288,6 @@ def map_airtable_row(row: Dict, batch_id: uuid.UUID) -> Optional[Dict]:
         'purchase_date': purchase_date,
     }
 
-    # Check for suspicious data
-    is_bad, reason = is_suspicious_data(contact)
-    if is_bad:
-        contact['is_suspicious'] = True
-        contact['data_quality_notes'] = reason
-
     return contact
 
 
@@ -326,8 +295,12 @@ def map_airtable_row(row: Dict, batch_id: uuid.UUID) -> Optional[Dict]:
 # MAIN IMPORT LOGIC
 # =============================================================================
 
-def import_airtable_csv(csv_path: str):
-    """Main import function."""
+def import_airtable_csv(csv_path: str, direct_db: bool = False, workers: int = 1):
+    """
+    Main import function.
+    direct_db: load through Postgres COPY (hist_copy.py) instead of the REST API
+    workers: processes for row mapping (hist_parallel.py; 0 = one per core)
+    """
 
     print(f"\n{'='*60}")
     print(f"IMPORTING AIRTABLE CSV: {csv_path}")
@@ -339,7 +312,7 @@ def import_airtable_csv(csv_path: str):
     # Read CSV
     print("📖 Reading CSV file...")
     try:
-        df = pd.read_csv(csv_path)
+        df = strip_reject_columns(read_csv(csv_path))
         print(f"✓ Found {len(df)} rows in CSV")
         print(f"  Columns: {list(df.columns)}\n")
     except Exception as e:
@@ -351,126 +324,86 @@ def import_airtable_csv(csv_path: str):
     df = merge_duplicate_columns(df)
     print()
 
+    # Skipped and failed rows go to <name>.rejects.csv (see hist_rejects.py)
+    rejects = RejectLog(df, reject_path_for(csv_path))
+
+    # Per-stage rows/sec and ETA, mirrored to an in-progress hist_import_logs row
+    progress = ImportProgress(supabase, batch_id, os.path.basename(csv_path), 'airtable', 'import_airtable.py')
+    progress.start()
+
+    # Classify paid vs organic for every row at once; the mapper reads the result
+    df[AD_TYPE_COLUMN] = classify_ad_types(df)
+
     # Process rows
     print("🔄 Processing rows...")
-    contacts_to_upsert = []
-    skipped_rows = []
+    with progress.stage('map', len(df)) as stage:
+        mapped = map_rows(df, map_airtable_row, batch_id, workers=workers, progress=stage)
+    contacts_to_upsert = mapped['records']
+    rejects.add_mapped(mapped, default_reason='no_email')
+    rejects.close(source_path=csv_path)
     errors = []
     warnings = []
 
-    for idx, row in df.iterrows():
-        try:
-            contact = map_airtable_row(row.to_dict(), batch_id)
-            if contact:
-                contacts_to_upsert.append(contact)
-            else:
-                skipped_rows.append(idx)
-                warnings.append(f"Row {idx}: No email found")
-        except Exception as e:
-            errors.append(f"Row {idx}: {str(e)}")
-            skipped_rows.append(idx)
-
     print(f"✓ Processed {len(df)} rows")
     print(f"  - {len(contacts_to_upsert)} contacts ready to import")
-    print(f"  - {len(skipped_rows)} rows skipped\n")
+    print(f"  - {rejects.total} rows rejected\n")
 
     if not contacts_to_upsert:
         print("❌ No valid contacts to import. Exiting.")
+        progress.fail('No valid contacts to import')
         sys.exit(1)
 
-    # Dedupe by email
-    print("🔍 Deduplicating by email...")
-    email_to_contact = {}
-    for contact in contacts_to_upsert:
-        email = contact['email']
-        if email not in email_to_contact:
-            email_to_contact[email] = contact
-        else:
-            # Keep most complete record
-            existing = email_to_contact[email]
-            existing_fields = sum(1 for v in existing.values() if v is not None)
-            new_fields = sum(1 for v in contact.values() if v is not None)
-            if new_fields > existing_fields:
-                email_to_contact[email] = contact
-
-    unique_contacts = list(email_to_contact.values())
-    print(f"✓ Deduped to {len(unique_contacts)} unique contacts\n")
-
-    # Check which contacts already exist (from previous imports)
-    print("🔗 Checking for existing contacts...")
-    emails = [c['email'] for c in unique_contacts]
-    try:
-        existing_response = supabase.table('hist_contacts').select('email, source').in_('email', emails).execute()
-        existing_emails = {row['email']: row['source'] for row in existing_response.data}
-        print(f"✓ Found {len(existing_emails)} existing contacts\n")
-    except Exception as e:
-        print(f"⚠️  Warning: Could not check for existing contacts: {e}")
-        existing_emails = {}
-
-    # Merge sources for existing contacts
-    for contact in unique_contacts:
-        email = contact['email']
-        if email in existing_emails:
-            # Update source to 'merged' if coming from different source
-            existing_source = existing_emails[email]
-            if existing_source != 'airtable':
-                contact['source'] = 'merged'
-                contact['data_quality_notes'] = f"Merged from {existing_source} and airtable"
-
-    # Upsert into Supabase
-    print("💾 Upserting into Supabase...")
+    # Data-quality rules run column-wise over all mapped rows (see hist_rules.py)
+    contacts_df, rule_hits = flag_records(contacts_to_upsert, CONTACT_RULES)
+    print_rule_hits(rule_hits)
+    print()
+
+    # Stage raw rows and let Postgres dedupe (most complete wins), apply the
+    # 'merged' source rules and count inserts vs updates in one call
+    print("💾 Merging into hist_contacts (server-side)...")
     new_inserts = 0
     updates = 0
+    # Row count + key hash per table written, for `hist_checksums.py verify`
+    checksums = {}
 
     try:
-        # Upsert (insert or update)
-        for contact in unique_contacts:
-            email = contact['email']
-            if email in existing_emails:
-                updates += 1
-            else:
-                new_inserts += 1
-
-        response = supabase.table('hist_contacts').upsert(
-            unique_contacts,
-            on_conflict='email'
-        ).execute()
-
-        print(f"✓ Upserted {len(unique_contacts)} contacts")
+        with progress.stage('write', len(contacts_to_upsert)) as stage:
+            counts = stage_and_merge_contacts(supabase, contacts_to_upsert, batch_id, 'airtable',
+                                              direct_db=direct_db, progress=stage)
+        new_inserts = counts['rows_inserted']
+        updates = counts['rows_updated']
+        checksums['hist_contacts'] = table_checksum('hist_contacts', contacts_to_upsert)
+
+        print(f"✓ Merged {counts['rows_staged']} rows into {counts['rows_unique']} unique contacts")
         print(f"  - {new_inserts} new inserts")
-        print(f"  - {updates} updates to existing records\n")
+        print(f"  - {updates} updates to existing records ({counts['rows_merged']} now 'merged')\n")
     except Exception as e:
-        print(f"❌ ERROR upserting contacts: {e}")
-        errors.append(f"Database upsert failed: {str(e)}")
+        print(f"❌ ERROR merging contacts: {e}")
+        errors.append(f"Database merge failed: {str(e)}")
 
-    # Create timeline events for new purchases
+    # Create timeline events (natural-keyed, so re-imports don't duplicate them)
     print("📅 Creating timeline events...")
-    timeline_events = []
-    for contact in unique_contacts:
-        email = contact['email']
-
-        if contact.get('first_seen'):
-            timeline_events.append({
-                'email': email,
-                'event_type': 'contact_created',
-                'event_date': contact['first_seen'],
-                'source': 'airtable',
-                'import_batch_id': str(batch_id)
-            })
-
-        if contact.get('purchase_date'):
-            timeline_events.append({
-                'email': email,
-                'event_type': 'purchased',
-                'event_date': contact['purchase_date'],
-                'source': 'airtable',
-                'import_batch_id': str(batch_id)
-            })
-
-    if timeline_events:
+    # From the row per email the merge kept, so dates match hist_contacts
+    merged_df = merged_contact_rows(contacts_df)
+    timeline_events = concat_timeline_events([
+        build_timeline_events(merged_df, 'contact_created', 'first_seen', 'airtable', batch_id),
+        build_timeline_events(merged_df, 'purchased', 'purchase_date', 'airtable', batch_id),
+    ])
+
+    if not timeline_events.empty:
         try:
-            supabase.table('hist_timeline').insert(timeline_events).execute()
-            print(f"✓ Created {len(timeline_events)} timeline events\n")
+            with progress.stage('timeline', len(timeline_events)) as stage:
+                written_keys = []
+                if direct_db:
+                    with connect_direct() as conn:
+                        inserted = copy_merge(conn, 'hist_timeline', timeline_records(timeline_events), batch_id, stage,
+                                              merged_keys=written_keys)
+                    known = len(timeline_events) - inserted
+                else:
+                    inserted, known = write_timeline_events(supabase, timeline_events, progress=stage,
+                                                            written_keys=written_keys)
+            checksums['hist_timeline'] = keys_checksum(written_keys)
+            print(f"✓ Created {inserted} timeline events ({known} already existed)\n")
         except Exception as e:
             print(f"⚠️  Warning: Could not create timeline events: {e}")
             warnings.append(f"Timeline insert failed: {str(e)}")
@@ -484,10 +417,14 @@ def import_airtable_csv(csv_path: str):
         'source_type': 'airtable',
         'rows_processed': len(df),
         'rows_imported': new_inserts,
-        'rows_skipped': len(skipped_rows),
+        'rows_skipped': rejects.total,
         'rows_updated': updates,
         'errors': errors if errors else None,
         'warnings': warnings if warnings else None,
+        'rule_hits': rule_hits,
+        'rejects': rejects.summary(),
+        'progress': progress.snapshot(),
+        'checksums': checksums or None,
         'import_started_at': import_started.isoformat(),
         'import_completed_at': import_completed.isoformat(),
         'imported_by': 'import_airtable.py',
@@ -495,7 +432,7 @@ def import_airtable_csv(csv_path: str):
     }
 
     try:
-        supabase.table('hist_import_logs').insert(log_entry).execute()
+        progress.complete(log_entry)
         print("✓ Import logged\n")
     except Exception as e:
         print(f"⚠️  Warning: Could not log import: {e}\n")
@@ -507,10 +444,12 @@ def import_airtable_csv(csv_path: str):
     print(f"Total rows processed: {len(df)}")
     print(f"New contacts inserted: {new_inserts}")
     print(f"Existing contacts updated: {updates}")
-    print(f"Rows skipped: {len(skipped_rows)}")
+    print(f"Rows rejected: {rejects.total}")
     print(f"Errors: {len(errors)}")
     print(f"Warnings: {len(warnings)}")
     print(f"\nImport batch ID: {batch_id}")
+    print(f"Verify it: python scripts/hist_checksums.py verify --batch {batch_id}")
+    print_transport_stats()
     print(f"{'='*60}\n")
 
     if errors:
@@ -527,6 +466,9 @@ def import_airtable_csv(csv_path: str):
         if len(warnings) > 10:
             print(f"  ... and {len(warnings) - 10} more")
 
+    print()
+    rejects.print_summary()
+
     print("\n✓ You can now query the merged data:")
     print("  - SELECT * FROM hist_contacts WHERE source = 'merged';")
     print("  - SELECT * FROM v_revenue_attribution;")
@@ -538,14 +480,17 @@ def import_airtable_csv(csv_path: str):
 # =============================================================================
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python import_airtable.py path/to/airtable_export.csv")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description='Import an Airtable CSV export into hist_contacts')
+    parser.add_argument('csv_path', type=str, help='Path to Airtable CSV export')
+    parser.add_argument('--direct-db', action='store_true',
+                        help='Load via Postgres COPY (needs SUPABASE_DB_URL) instead of the REST API')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Processes for row mapping (0 = one per CPU core, default 1)')
 
-    csv_path = sys.argv[1]
+    args = parser.parse_args()
 
-    if not os.path.exists(csv_path):
-        print(f"ERROR: File not found: {csv_path}")
+    if not os.path.exists(args.csv_path):
+        print(f"ERROR: File not found: {args.csv_path}")
         sys.exit(1)
 
-    import_airtable_csv(csv_path)
+    import_airtable_csv(args.csv_path, direct_db=args.direct_db, workers=args.workers)
@@ -4,7 +4,7 @@ Import Google Sheets CSV Export to Historical Database
 
 This script imports messy Google Sheets contact data into the hist_contacts table.
 It handles:
-- Duplicate contacts (dedupes by email)
+- Duplicate contacts (dedupes by email server-side, see hist_contacts_merge.py)
 - Missing fields (skips rows with no email)
 - Inconsistent formatting (normalizes emails, phones, dates)
 - Row creation timestamps (if available from Google Sheets metadata)
@@ -26,33 +26,35 @@ import os
 import sys
 import csv
 import re
+import argparse
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional
 import uuid
 
 # Third-party imports (install with: pip install supabase python-dotenv pandas)
 try:
-    from supabase import create_client, Client
-    from dotenv import load_dotenv
+    from supabase import Client
     import pandas as pd
 except ImportError:
     print("ERROR: Missing required packages.")
     print("Install with: pip install supabase python-dotenv pandas")
     sys.exit(1)
 
-# Load environment variables
-load_dotenv()
+from hist_contacts_merge import merged_contact_rows, stage_and_merge_contacts
+from hist_classify import STAGE_COLUMN, infer_reached_stages, reached_stage_for_row
+from hist_copy import connect_direct, copy_merge
+from hist_checksums import keys_checksum, table_checksum
+from hist_csv import read_csv
+from hist_parallel import map_rows
+from hist_progress import ImportProgress
+from hist_rejects import RejectLog, reject_path_for, strip_reject_columns
+from hist_rules import CONTACT_RULES, flag_records, print_rule_hits
+from hist_timeline import build_timeline_events, concat_timeline_events, timeline_records, write_timeline_events
+from hist_supabase import lazy_supabase_client, print_transport_stats
 
-# Supabase setup
-SUPABASE_URL = os.getenv("NEXT_PUBLIC_SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
-
-if not SUPABASE_URL or not SUPABASE_KEY:
-    print("ERROR: Missing Supabase credentials.")
-    print("Make sure NEXT_PUBLIC_SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY are in .env.local")
-    sys.exit(1)
-
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+# Supabase setup (pooled transport shared by all importers, see hist_supabase.py);
+# created on first use so --help and argument errors don't need credentials
+supabase: Client = lazy_supabase_client()
 
 
 # =============================================================================
@@ -115,61 +117,18 @@ def parse_date_flexible(date_str: Optional[str]) -> Optional[datetime]:
         return None
 
 
-def is_suspicious_data(contact: Dict) -> Tuple[bool, str]:
-    """
-    Check if contact data looks suspicious.
-    Returns (is_suspicious, reason).
-    """
-    reasons = []
-
-    # Check for future dates
-    now = datetime.now()
-    if contact.get('first_seen') and contact['first_seen'] > now:
-        reasons.append("future first_seen date")
-    if contact.get('purchase_date') and contact['purchase_date'] > now:
-        reasons.append("future purchase date")
-
-    # Check for purchase before first contact
-    if contact.get('first_seen') and contact.get('purchase_date'):
-        if contact['purchase_date'] < contact['first_seen']:
-            reasons.append("purchase before first contact")
-
-    # Check for obviously wrong email formats
-    email = contact.get('email')
-    if email and ('test' in email or 'fake' in email or 'example' in email):
-        reasons.append("test/fake email")
-
-    if reasons:
-        return True, "; ".join(reasons)
-    return False, ""
-
-
 def infer_reached_stage(row: Dict) -> str:
     """
     Infer the furthest stage reached based on available data.
     This is a best guess based on what fields are populated.
-    """
-    # Check for purchase (highest stage)
-    if row.get('purchase_date') or row.get('has_purchase'):
-        return 'purchased'
 
-    # Check for meeting attended (check common column names)
-    attended_fields = ['meeting_held', 'attended', 'showed_up', 'attended_date']
-    if any(row.get(field) for field in attended_fields):
-        return 'attended'
-
-    # Check for meeting booked
-    booked_fields = ['meeting_booked', 'booked', 'booking_date', 'appointment_date']
-    if any(row.get(field) for field in booked_fields):
-        return 'booked'
-
-    # Check for qualified (answered questions, engaged with bot)
-    qualified_fields = ['qualified', 'dm_qualified', 'q1', 'q2', 'symptoms']
-    if any(row.get(field) for field in qualified_fields):
-        return 'qualified'
-
-    # Default: just contacted
-    return 'contacted'
+    import_google_sheets_csv() classifies the whole frame up front with
+    hist_classify.infer_reached_stages() (see STAGE_RULES there); this per-row
+    version is for callers mapping rows on their own.
+    """
+    if STAGE_COLUMN in row:
+        return row[STAGE_COLUMN]
+    return reached_stage_for_row(row)
 
 
 def map_google_sheets_row(row: Dict, batch_id: uuid.UUID) -> Optional[Dict]:
@@ -287,12 +246,6 @@ def map_google_sheets_row(row: Dict, batch_id: uuid.UUID) -> Optional[Dict]:
         'purchase_date': purchase_date,
     }
 
-    # Check for suspicious data
-    is_bad, reason = is_suspicious_data(contact)
-    if is_bad:
-        contact['is_suspicious'] = True
-        contact['data_quality_notes'] = reason
-
     return contact
 
 
@@ -300,8 +253,12 @@ def map_google_sheets_row(row: Dict, batch_id: uuid.UUID) -> Optional[Dict]:
 # MAIN IMPORT LOGIC
 # =============================================================================
 
-def import_google_sheets_csv(csv_path: str):
-    """Main import function."""
+def import_google_sheets_csv(csv_path: str, direct_db: bool = False, workers: int = 1):
+    """
+    Main import function.
+    direct_db: load through Postgres COPY (hist_copy.py) instead of the REST API
+    workers: processes for row mapping (hist_parallel.py; 0 = one per core)
+    """
 
     print(f"\n{'='*60}")
     print(f"IMPORTING GOOGLE SHEETS CSV: {csv_path}")
@@ -314,102 +271,94 @@ def import_google_sheets_csv(csv_path: str):
     # Read CSV
     print("📖 Reading CSV file...")
     try:
-        df = pd.read_csv(csv_path)
+        df = strip_reject_columns(read_csv(csv_path))
         print(f"✓ Found {len(df)} rows in CSV\n")
     except Exception as e:
         print(f"❌ ERROR reading CSV: {e}")
         sys.exit(1)
 
+    # Skipped and failed rows go to <name>.rejects.csv (see hist_rejects.py)
+    rejects = RejectLog(df, reject_path_for(csv_path))
+
+    # Per-stage rows/sec and ETA, mirrored to an in-progress hist_import_logs row
+    progress = ImportProgress(supabase, batch_id, os.path.basename(csv_path), 'google_sheets', 'import_google_sheets.py')
+    progress.start()
+
+    # Classify funnel stage for every row at once; the mapper reads the result
+    df[STAGE_COLUMN] = infer_reached_stages(df)
+
     # Process rows
     print("🔄 Processing rows...")
-    contacts_to_insert = []
-    skipped_rows = []
+    with progress.stage('map', len(df)) as stage:
+        mapped = map_rows(df, map_google_sheets_row, batch_id, workers=workers, progress=stage)
+    contacts_to_insert = mapped['records']
+    rejects.add_mapped(mapped, default_reason='no_email')
+    rejects.close(source_path=csv_path)
     errors = []
     warnings = []
 
-    for idx, row in df.iterrows():
-        try:
-            contact = map_google_sheets_row(row.to_dict(), batch_id)
-            if contact:
-                contacts_to_insert.append(contact)
-            else:
-                skipped_rows.append(idx)
-                warnings.append(f"Row {idx}: No email found")
-        except Exception as e:
-            errors.append(f"Row {idx}: {str(e)}")
-            skipped_rows.append(idx)
-
     print(f"✓ Processed {len(df)} rows")
     print(f"  - {len(contacts_to_insert)} contacts ready to import")
-    print(f"  - {len(skipped_rows)} rows skipped (no email or errors)\n")
+    print(f"  - {rejects.total} rows rejected (no email or errors)\n")
 
     if not contacts_to_insert:
         print("❌ No valid contacts to import. Exiting.")
+        progress.fail('No valid contacts to import')
         sys.exit(1)
 
-    # Dedupe by email (keep most complete record)
-    print("🔍 Deduplicating by email...")
-    email_to_contact = {}
-    for contact in contacts_to_insert:
-        email = contact['email']
-        if email not in email_to_contact:
-            email_to_contact[email] = contact
-        else:
-            # Keep record with more non-null fields
-            existing = email_to_contact[email]
-            existing_fields = sum(1 for v in existing.values() if v is not None)
-            new_fields = sum(1 for v in contact.values() if v is not None)
-            if new_fields > existing_fields:
-                email_to_contact[email] = contact
-                warnings.append(f"Duplicate email {email}: kept more complete record")
-
-    unique_contacts = list(email_to_contact.values())
-    print(f"✓ Deduped to {len(unique_contacts)} unique contacts\n")
-
-    # Insert into Supabase (using upsert to handle conflicts)
-    print("💾 Inserting into Supabase...")
-    try:
-        # Upsert contacts (insert or update if email already exists)
-        response = supabase.table('hist_contacts').upsert(
-            unique_contacts,
-            on_conflict='email'  # Update existing records with same email
-        ).execute()
+    # Data-quality rules run column-wise over all mapped rows (see hist_rules.py)
+    contacts_df, rule_hits = flag_records(contacts_to_insert, CONTACT_RULES)
+    print_rule_hits(rule_hits)
+    print()
 
-        print(f"✓ Inserted {len(unique_contacts)} contacts into hist_contacts\n")
+    # Stage raw rows and merge server-side: Postgres dedupes by email (keeps the
+    # most complete record) and counts updates. Sheets rows upsert as
+    # source='google_sheets' without the 'merged' rule, as they always have
+    print("💾 Merging into hist_contacts (server-side)...")
+    new_inserts = 0
+    updates = 0
+    unique_count = 0
+    # Row count + key hash per table written, for `hist_checksums.py verify`
+    checksums = {}
+    try:
+        with progress.stage('write', len(contacts_to_insert)) as stage:
+            counts = stage_and_merge_contacts(supabase, contacts_to_insert, batch_id, 'google_sheets',
+                                              direct_db=direct_db, progress=stage, mark_merged=False)
+        new_inserts = counts['rows_inserted']
+        updates = counts['rows_updated']
+        unique_count = counts['rows_unique']
+        checksums['hist_contacts'] = table_checksum('hist_contacts', contacts_to_insert)
+
+        print(f"✓ Deduped {counts['rows_staged']} rows to {unique_count} unique contacts")
+        print(f"  - {new_inserts} new inserts")
+        print(f"  - {updates} updates to existing records\n")
     except Exception as e:
         print(f"❌ ERROR inserting contacts: {e}")
         errors.append(f"Database insert failed: {str(e)}")
 
-    # Create timeline events
+    # Create timeline events (natural-keyed, so re-imports don't duplicate them)
     print("📅 Creating timeline events...")
-    timeline_events = []
-    for contact in unique_contacts:
-        email = contact['email']
-
-        # Add "contact_created" event if we have first_seen
-        if contact.get('first_seen'):
-            timeline_events.append({
-                'email': email,
-                'event_type': 'contact_created',
-                'event_date': contact['first_seen'],
-                'source': 'google_sheets',
-                'import_batch_id': str(batch_id)
-            })
-
-        # Add "purchased" event if we have purchase_date
-        if contact.get('purchase_date'):
-            timeline_events.append({
-                'email': email,
-                'event_type': 'purchased',
-                'event_date': contact['purchase_date'],
-                'source': 'google_sheets',
-                'import_batch_id': str(batch_id)
-            })
-
-    if timeline_events:
+    # From the row per email the merge kept, so dates match hist_contacts
+    merged_df = merged_contact_rows(contacts_df)
+    timeline_events = concat_timeline_events([
+        build_timeline_events(merged_df, 'contact_created', 'first_seen', 'google_sheets', batch_id),
+        build_timeline_events(merged_df, 'purchased', 'purchase_date', 'google_sheets', batch_id),
+    ])
+
+    if not timeline_events.empty:
         try:
-            supabase.table('hist_timeline').insert(timeline_events).execute()
-            print(f"✓ Created {len(timeline_events)} timeline events\n")
+            with progress.stage('timeline', len(timeline_events)) as stage:
+                written_keys = []
+                if direct_db:
+                    with connect_direct() as conn:
+                        inserted = copy_merge(conn, 'hist_timeline', timeline_records(timeline_events), batch_id, stage,
+                                              merged_keys=written_keys)
+                    known = len(timeline_events) - inserted
+                else:
+                    inserted, known = write_timeline_events(supabase, timeline_events, progress=stage,
+                                                            written_keys=written_keys)
+            checksums['hist_timeline'] = keys_checksum(written_keys)
+            print(f"✓ Created {inserted} timeline events ({known} already existed)\n")
         except Exception as e:
             print(f"⚠️  Warning: Could not create timeline events: {e}")
             warnings.append(f"Timeline insert failed: {str(e)}")
@@ -422,19 +371,23 @@ def import_google_sheets_csv(csv_path: str):
         'source_file': os.path.basename(csv_path),
         'source_type': 'google_sheets',
         'rows_processed': len(df),
-        'rows_imported': len(unique_contacts),
-        'rows_skipped': len(skipped_rows),
-        'rows_updated': 0,  # We don't track updates separately in this version
+        'rows_imported': new_inserts,
+        'rows_skipped': rejects.total,
+        'rows_updated': updates,
         'errors': errors if errors else None,
         'warnings': warnings if warnings else None,
+        'rule_hits': rule_hits,
+        'rejects': rejects.summary(),
+        'progress': progress.snapshot(),
+        'checksums': checksums or None,
         'import_started_at': import_started.isoformat(),
         'import_completed_at': import_completed.isoformat(),
         'imported_by': 'import_google_sheets.py',
-        'notes': f"Imported {len(unique_contacts)} unique contacts from Google Sheets export"
+        'notes': f"Imported {unique_count} unique contacts from Google Sheets export ({new_inserts} new, {updates} updated)"
     }
 
     try:
-        supabase.table('hist_import_logs').insert(log_entry).execute()
+        progress.complete(log_entry)
         print("✓ Import logged\n")
     except Exception as e:
         print(f"⚠️  Warning: Could not log import: {e}\n")
@@ -444,12 +397,16 @@ def import_google_sheets_csv(csv_path: str):
     print(f"✅ IMPORT COMPLETE")
     print(f"{'='*60}")
     print(f"Total rows processed: {len(df)}")
-    print(f"Contacts imported: {len(unique_contacts)}")
-    print(f"Rows skipped: {len(skipped_rows)}")
+    print(f"Unique contacts: {unique_count}")
+    print(f"New contacts inserted: {new_inserts}")
+    print(f"Existing contacts updated: {updates}")
+    print(f"Rows rejected: {rejects.total}")
     print(f"Errors: {len(errors)}")
     print(f"Warnings: {len(warnings)}")
     print(f"Timeline events: {len(timeline_events)}")
     print(f"\nImport batch ID: {batch_id}")
+    print(f"Verify it: python scripts/hist_checksums.py verify --batch {batch_id}")
+    print_transport_stats()
     print(f"{'='*60}\n")
 
     # Print errors/warnings if any
@@ -467,6 +424,9 @@ def import_google_sheets_csv(csv_path: str):
         if len(warnings) > 10:
             print(f"  ... and {len(warnings) - 10} more")
 
+    print()
+    rejects.print_summary()
+
     print("\n✓ You can now query the data in Supabase:")
     print("  - SELECT * FROM hist_contacts;")
     print("  - SELECT * FROM v_funnel_summary;")
@@ -479,14 +439,17 @@ def import_google_sheets_csv(csv_path: str):
 # =============================================================================
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python import_google_sheets.py path/to/google_sheets_export.csv")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description='Import a Google Sheets CSV export into hist_contacts')
+    parser.add_argument('csv_path', type=str, help='Path to Google Sheets CSV export')
+    parser.add_argument('--direct-db', action='store_true',
+                        help='Load via Postgres COPY (needs SUPABASE_DB_URL) instead of the REST API')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Processes for row mapping (0 = one per CPU core, default 1)')
 
-    csv_path = sys.argv[1]
+    args = parser.parse_args()
 
-    if not os.path.exists(csv_path):
-        print(f"ERROR: File not found: {csv_path}")
+    if not os.path.exists(args.csv_path):
+        print(f"ERROR: File not found: {args.csv_path}")
         sys.exit(1)
 
-    import_google_sheets_csv(csv_path)
+    import_google_sheets_csv(args.csv_path, direct_db=args.direct_db, workers=args.workers)
@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+Import the Instagram Historical Backup into hist_timeline
+
+backup_instagram_historical_20250107.json is a JSON array of contact records
+exported from the live contacts table (source 'instagram_historical'): the IG
+handle plus the funnel and interaction dates of each contact (subscribed,
+last IG interaction, DM qualified, link sent / clicked, booked, attended,
+checkout, purchase, package sent). This script turns those dates into
+hist_timeline events for the contacts of the unified build.
+
+It handles:
+- Reading the backup incrementally (hist_json.iter_json_chunks), so memory
+  stays flat however large the backup grows
+- Linking each record to a unified contact by IG handle (the unified
+  `instagram` column; handles compared lowercased, without '@' or an
+  instagram.com/ prefix), falling back to its emails when the handle is
+  missing or unknown
+- Writing each chunk's events through the bulk path as it is parsed
+  (COPY with --direct-db, chunked upserts otherwise), natural-keyed so
+  re-imports don't duplicate events
+
+Usage:
+    python scripts/import_instagram_backup.py
+    python scripts/import_instagram_backup.py historical_data/backup_instagram_historical_20250107.json --direct-db
+    python scripts/import_instagram_backup.py backup.json --unified historical_data/unified_contacts.csv.zst
+
+Environment Variables Required:
+    SUPABASE_URL - Your Supabase project URL
+    SUPABASE_SERVICE_KEY - Your Supabase service role key (admin access)
+
+Output:
+    - hist_timeline events (source 'instagram_historical') for linked records
+    - Logs import results (link counts, rejects, checksums) to hist_import_logs
+"""
+
+import os
+import sys
+import argparse
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import uuid
+
+# Third-party imports
+try:
+    from supabase import Client
+    import pandas as pd
+except ImportError:
+    print("ERROR: Missing required packages.")
+    print("Install with: pip install supabase python-dotenv pandas")
+    sys.exit(1)
+
+from hist_checksums import add_checksums, keys_checksum
+from hist_contact_store import column, normalize_emails, parse_dates
+from hist_copy import connect_direct, copy_merge
+from hist_csv import read_csv, resolve_path
+from hist_json import CHUNK_ITEMS, iter_json_chunks
+from hist_progress import ImportProgress
+from hist_rejects import RejectLog
+from hist_timeline import build_timeline_events, concat_timeline_events, timeline_records, write_timeline_events
+from hist_supabase import lazy_supabase_client, print_transport_stats
+
+# Supabase setup (pooled transport shared by all importers, see hist_supabase.py);
+# created on first use so --help and argument errors don't need credentials
+supabase: Client = lazy_supabase_client()
+
+SOURCE = 'instagram_historical'
+
+DEFAULT_BACKUP_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                   'historical_data', 'backup_instagram_historical_20250107.json')
+UNIFIED_FILE = '/Users/connorjohnson/CLAUDE_CODE/MCB/historical_data/unified_contacts.csv'
+
+# Backup fields tried in order for a record's email when its handle doesn't link
+EMAIL_FIELDS = ['email_primary', 'email_booking', 'email_payment']
+
+# hist_timeline event type → backup date field(s), first non-empty wins
+EVENT_FIELDS = {
+    'subscribed': ['subscribe_date', 'subscribed'],
+    'ig_interaction': ['ig_last_interaction'],
+    'qualified': ['dm_qualified_date'],
+    'link_sent': ['link_send_date'],
+    'link_clicked': ['link_click_date'],
+    'form_submitted': ['form_submit_date'],
+    'booked': ['appointment_date'],
+    'attended': ['appointment_held_date'],
+    'checkout_started': ['checkout_started'],
+    'purchased': ['purchase_date'],
+    'package_sent': ['package_sent_date'],
+}
+
+# event_details of every event (key → column of the linked chunk)
+EVENT_DETAILS = {'ig': '_handle', 'mc_id': 'mc_id', 'stage': 'stage', 'linked_by': '_linked_by'}
+
+
+# =============================================================================
+# LINKING RECORDS TO CONTACTS
+# =============================================================================
+
+def normalize_handles(values: pd.Series) -> pd.Series:
+    """'@Name', 'https://instagram.com/name/' → 'name'; NaN where missing."""
+    text = values.astype(object).where(values.notna(), '').astype(str).str.strip().str.lower()
+    text = text.str.replace(r'^(?:https?://)?(?:www\.)?instagram\.com/', '', regex=True)
+    text = text.str.strip('/').str.lstrip('@').str.strip()
+    return text.where(text != '').astype(object)
+
+
+def load_contact_index(unified_path: str) -> Tuple[Dict[str, str], set]:
+    """
+    ({handle: email}, {email}) from the unified build. A handle shared by
+    several contacts links to the first one in the file.
+    """
+    df = read_csv(unified_path, usecols=['email', 'instagram'], dtype=str)
+    emails = normalize_emails(df['email'])
+    handles = normalize_handles(df['instagram'])
+    linked = pd.DataFrame({'handle': handles, 'email': emails}).dropna()
+    linked = linked.drop_duplicates(subset='handle', keep='first')
+    return dict(zip(linked['handle'], linked['email'])), set(emails.dropna())
+
+
+def link_records(chunk: pd.DataFrame, handle_index: Dict[str, str], known_emails: set) -> pd.DataFrame:
+    """
+    Add email (the linked unified contact), _handle and _linked_by ('ig' /
+    'email') to a chunk of backup records; email is NaN when nothing links.
+    """
+    chunk = chunk.copy()
+    chunk['_handle'] = normalize_handles(column(chunk, 'ig'))
+    by_handle = chunk['_handle'].map(handle_index)
+
+    by_email = pd.Series(float('nan'), index=chunk.index, dtype=object)
+    for field in EMAIL_FIELDS:
+        emails = normalize_emails(column(chunk, field))
+        by_email = by_email.fillna(emails.where(emails.isin(known_emails)))
+
+    chunk['email'] = by_handle.fillna(by_email)
+    chunk['_linked_by'] = pd.Series('ig', index=chunk.index).where(by_handle.notna(), 'email')
+    chunk.loc[chunk['email'].isna(), '_linked_by'] = None
+    return chunk
+
+
+def chunk_events(chunk: pd.DataFrame, batch_id: uuid.UUID) -> pd.DataFrame:
+    """hist_timeline events for the linked records of a chunk."""
+    chunk = chunk.copy()
+    for name in list(EVENT_DETAILS.values()) + ['purchase_amount']:
+        chunk[name] = column(chunk, name)
+
+    frames = []
+    for event_type, fields in EVENT_FIELDS.items():
+        dates = pd.Series(pd.NaT, index=chunk.index, dtype='datetime64[ns]')
+        for field in fields:
+            dates = dates.fillna(parse_dates(column(chunk, field)))
+        chunk['_event_date'] = dates
+        details = dict(EVENT_DETAILS, amount='purchase_amount') if event_type == 'purchased' else EVENT_DETAILS
+        frames.append(build_timeline_events(chunk, event_type, '_event_date', SOURCE, batch_id, details=details))
+    return concat_timeline_events(frames)
+
+
+# =============================================================================
+# MAIN IMPORT LOGIC
+# =============================================================================
+
+def import_instagram_backup(json_path: str, unified_path: str = UNIFIED_FILE, direct_db: bool = False,
+                            chunk_items: int = CHUNK_ITEMS):
+    """
+    Main import function.
+    direct_db: load through Postgres COPY (hist_copy.py) instead of the REST API
+    chunk_items: backup records parsed, linked and written per chunk
+    """
+
+    print(f"\n{'='*60}")
+    print(f"IMPORTING INSTAGRAM BACKUP: {json_path}")
+    print(f"{'='*60}\n")
+
+    batch_id = uuid.uuid4()
+    import_started = datetime.now()
+
+    print("📖 Loading IG handles from the unified build...")
+    try:
+        unified_path = resolve_path(unified_path)  # unified_contacts.csv, or its .zst / .gz variant
+        handle_index, known_emails = load_contact_index(unified_path)
+    except Exception as e:
+        print(f"❌ ERROR reading {unified_path}: {e}")
+        print("   Run create_unified_contacts.py first (or pass --unified)")
+        sys.exit(1)
+    print(f"✓ {len(handle_index):,} handles for {len(known_emails):,} contacts\n")
+
+    # Records are JSON, not CSV rows: rejects are counted and sampled only
+    rejects = RejectLog(pd.DataFrame(), None)
+
+    # Per-stage rows/sec and ETA, mirrored to an in-progress hist_import_logs row
+    progress = ImportProgress(supabase, batch_id, os.path.basename(json_path), SOURCE, 'import_instagram_backup.py')
+    progress.start()
+
+    records_read = 0
+    linked = {'ig': 0, 'email': 0}
+    events_built = 0
+    inserted = 0
+    known = 0
+    errors = []
+    warnings = []
+    # Row count + key hash of the events written, accumulated chunk by chunk
+    timeline_checksum: Optional[Dict] = None
+
+    print("🔄 Streaming records into hist_timeline...")
+    conn = connect_direct() if direct_db else None
+    read_stage = progress.stage('read')
+    timeline_stage = progress.stage('timeline')
+    try:
+        for records in iter_json_chunks(json_path, chunk_items):
+            start = records_read
+            records_read += len(records)
+            read_stage.advance(len(records))
+
+            objects = []
+            for offset, record in enumerate(records):
+                if isinstance(record, dict):
+                    objects.append(record)
+                else:
+                    rejects.add(start + offset, 'not_an_object')
+            if not objects:
+                continue
+
+            chunk = pd.DataFrame(objects, index=range(start, start + len(objects)))
+            chunk = link_records(chunk, handle_index, known_emails)
+            for idx in chunk.index[chunk['email'].isna()]:
+                rejects.add(idx, 'no_contact', chunk.at[idx, '_handle'] if pd.notna(chunk.at[idx, '_handle']) else None)
+            for how, count in chunk['_linked_by'].value_counts().items():
+                linked[how] += int(count)
+
+            events = chunk_events(chunk[chunk['email'].notna()], batch_id)
+            events_built += len(events)
+            if events.empty:
+                continue
+
+            written_keys: List[str] = []
+            if conn is not None:
+                written = copy_merge(conn, 'hist_timeline', timeline_records(events), batch_id, timeline_stage,
+                                     merged_keys=written_keys)
+                inserted += written
+                known += len(events) - written
+            else:
+                written, already = write_timeline_events(supabase, events, progress=timeline_stage,
+                                                         written_keys=written_keys)
+                inserted += written
+                known += already
+            timeline_checksum = add_checksums(timeline_checksum, keys_checksum(written_keys))
+    except ValueError as e:
+        print(f"❌ ERROR parsing {json_path}: {e}")
+        errors.append(f"Parse failed after {records_read} records: {str(e)}")
+    except Exception as e:
+        print(f"❌ ERROR writing timeline events: {e}")
+        errors.append(f"Timeline insert failed: {str(e)}")
+    finally:
+        read_stage.finish()
+        timeline_stage.finish()
+        if conn is not None:
+            conn.close()
+
+    print(f"✓ Read {records_read} records")
+    print(f"  - {linked['ig']} linked by IG handle, {linked['email']} by email")
+    print(f"  - {rejects.total} records rejected")
+    print(f"✓ Created {inserted} timeline events ({known} already existed)\n")
+
+    # Log the import
+    print("📝 Logging import...")
+    import_completed = datetime.now()
+    checksums = {'hist_timeline': timeline_checksum} if timeline_checksum else {}
+    log_entry = {
+        'id': str(batch_id),
+        'source_file': os.path.basename(json_path),
+        'source_type': SOURCE,
+        'rows_processed': records_read,
+        'rows_imported': inserted,
+        'rows_skipped': rejects.total,
+        'rows_updated': 0,
+        'errors': errors if errors else None,
+        'warnings': warnings if warnings else None,
+        'rejects': rejects.summary(),
+        'progress': progress.snapshot(),
+        'checksums': checksums or None,
+        'import_started_at': import_started.isoformat(),
+        'import_completed_at': import_completed.isoformat(),
+        'imported_by': 'import_instagram_backup.py',
+        'notes': (f"Linked {linked['ig']} records by IG handle and {linked['email']} by email; "
+                  f"{inserted} new timeline events of {events_built}")
+    }
+
+    try:
+        progress.complete(log_entry)
+        print("✓ Import logged\n")
+    except Exception as e:
+        print(f"⚠️  Warning: Could not log import: {e}\n")
+
+    # Print summary
+    print(f"{'='*60}")
+    print("✅ IMPORT COMPLETE" if not errors else "⚠️  IMPORT STOPPED EARLY")
+    print(f"{'='*60}")
+    print(f"Records read: {records_read}")
+    print(f"Linked by IG handle: {linked['ig']}")
+    print(f"Linked by email: {linked['email']}")
+    print(f"Timeline events inserted: {inserted}")
+    print(f"Records rejected: {rejects.total}")
+    print(f"Errors: {len(errors)}")
+    print(f"\nImport batch ID: {batch_id}")
+    print(f"Verify it: python scripts/hist_checksums.py verify --batch {batch_id}")
+    print_transport_stats()
+    print(f"{'='*60}\n")
+
+    if errors:
+        print("\n❌ ERRORS:")
+        for error in errors:
+            print(f"  - {error}")
+
+    print()
+    rejects.print_summary()
+
+    print("\n✓ You can now query the events:")
+    print(f"  - SELECT event_type, COUNT(*) FROM hist_timeline WHERE source = '{SOURCE}' GROUP BY 1;")
+    print()
+
+    if errors:
+        sys.exit(1)
+
+
+# =============================================================================
+# MAIN ENTRY POINT
+# =============================================================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Import the Instagram historical backup JSON into hist_timeline')
+    parser.add_argument('json_path', nargs='?', default=DEFAULT_BACKUP_FILE,
+                        help='Path to the backup JSON (default: historical_data/backup_instagram_historical_20250107.json)')
+    parser.add_argument('--unified', default=UNIFIED_FILE,
+                        help='unified_contacts.csv (or .csv.zst / .csv.gz) whose contacts the records link to')
+    parser.add_argument('--direct-db', action='store_true',
+                        help='Load via Postgres COPY (needs SUPABASE_DB_URL) instead of the REST API')
+    parser.add_argument('--chunk-items', type=int, default=CHUNK_ITEMS,
+                        help=f'Records parsed and written per chunk (default {CHUNK_ITEMS})')
+
+    args = parser.parse_args()
+
+    if not os.path.exists(args.json_path):
+        print(f"ERROR: File not found: {args.json_path}")
+        sys.exit(1)
+
+    import_instagram_backup(args.json_path, unified_path=args.unified, direct_db=args.direct_db,
+                            chunk_items=args.chunk_items)
@@ -11,18 +11,22 @@ It handles:
 - Linking payments to contacts by email
 - Multiple payments per customer (upsells, recurring)
 - Currency normalization
+- Cents vs. dollars decided once per amount column for Stripe (see
+  hist_money.py); Denefits amounts are dollars unless --amount-unit says otherwise
 
 Usage:
     python scripts/import_payments.py --stripe path/to/stripe_export.csv
     python scripts/import_payments.py --denefits path/to/denefits_export.csv
     python scripts/import_payments.py --stripe stripe.csv --denefits denefits.csv
+    python scripts/import_payments.py --stripe stripe_api_export.csv --amount-unit cents
 
 Environment Variables Required:
     SUPABASE_URL - Your Supabase project URL
     SUPABASE_SERVICE_KEY - Your Supabase service role key (admin access)
 
 Output:
-    - Inserts payment records into hist_payments table
+    - Inserts payment records into hist_payments table (payments it already
+      holds are skipped, so re-importing an export adds nothing)
     - Updates hist_contacts to mark has_purchase = TRUE
     - Logs import results to hist_import_logs table
 """
@@ -30,36 +34,57 @@ Output:
 import os
 import sys
 import csv
-import re
 import argparse
 from datetime import datetime
+from collections import Counter
 from typing import Dict, List, Optional, Tuple
 import uuid
-from decimal import Decimal
 
 # Third-party imports
 try:
-    from supabase import create_client, Client
-    from dotenv import load_dotenv
+    from supabase import Client
     import pandas as pd
 except ImportError:
     print("ERROR: Missing required packages.")
     print("Install with: pip install supabase python-dotenv pandas")
     sys.exit(1)
 
-# Load environment variables
-load_dotenv()
+from hist_copy import connect_direct, copy_merge, is_missing
+from hist_checksums import keys_checksum, table_checksum
+from hist_csv import read_csv
+from hist_money import UNITS, cents_to_dollars, coalesce_money_columns
+from hist_parallel import map_rows
+from hist_progress import ImportProgress
+from hist_reconcile import payment_day
+from hist_rejects import RejectLog, RowRejected, reject_path_for, strip_reject_columns
+from hist_rules import PAYMENT_RULES, flag_records, print_rule_hits
+from hist_timeline import build_timeline_events, timeline_records, write_timeline_events
+from hist_supabase import lazy_supabase_client, print_transport_stats
 
-# Supabase setup
-SUPABASE_URL = os.getenv("NEXT_PUBLIC_SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+# Supabase setup (pooled transport shared by all importers, see hist_supabase.py);
+# created on first use so --help and argument errors don't need credentials
+supabase: Client = lazy_supabase_client()
 
-if not SUPABASE_URL or not SUPABASE_KEY:
-    print("ERROR: Missing Supabase credentials.")
-    print("Make sure NEXT_PUBLIC_SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY are in .env.local")
-    sys.exit(1)
+# Amount columns per source, in order of preference
+STRIPE_AMOUNT_COLUMNS = ['Amount', 'Amount (USD)', 'Gross', 'amount', 'Total']
+DENEFITS_AMOUNT_COLUMNS = ['Financed Amount', 'financed_amount', 'Amount Financed', 'Loan Amount', 'Total']
+
+# Amount unit per source when --amount-unit isn't given. Stripe exports come in
+# dollars or API-style cents; Denefits always exports dollars, and its
+# financed amounts are large enough to look like cents to auto-detection
+DEFAULT_AMOUNT_UNITS = {'stripe': 'auto', 'denefits': 'dollars'}
+
+# hist_payments rows per REST insert
+WRITE_CHUNK_SIZE = 500
+
+# IDs / emails per "already imported?" lookup
+LOOKUP_CHUNK_SIZE = 200
+
+# Column-wise amount parse result, read by the per-row mappers
+AMOUNT_CENTS_COLUMN = '_amount_cents'
 
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+# Mapped fields used during the import but not stored in hist_payments
+LOCAL_PAYMENT_FIELDS = {'amount_cents', 'data_quality_notes'}
 
 
 # =============================================================================
@@ -108,50 +133,6 @@ def parse_date_flexible(date_str: Optional[str]) -> Optional[datetime]:
         return None
 
 
-def normalize_amount(amount_str: Optional[str]) -> Optional[Decimal]:
-    """
-    Parse amount string to Decimal.
-    Handles various formats: $1,234.56, 1234.56, 1234, etc.
-    """
-    if not amount_str:
-        return None
-
-    # Convert to string if not already
-    amount_str = str(amount_str).strip()
-
-    # Remove currency symbols and commas
-    amount_str = re.sub(r'[$,€£¥]', '', amount_str)
-
-    # Try to convert to Decimal
-    try:
-        amount = Decimal(amount_str)
-        return amount
-    except:
-        return None
-
-
-def is_suspicious_payment(payment: Dict) -> Tuple[bool, str]:
-    """Check if payment data looks suspicious."""
-    reasons = []
-    now = datetime.now()
-
-    # Check for future dates
-    if payment.get('payment_date') and payment['payment_date'] > now:
-        reasons.append("future payment date")
-
-    # Check for negative amounts (except refunds)
-    if payment.get('amount') and payment['amount'] < 0 and payment.get('payment_type') != 'refund':
-        reasons.append("negative amount (not a refund)")
-
-    # Check for unreasonably high amounts (over $50k)
-    if payment.get('amount') and payment['amount'] > 50000:
-        reasons.append("suspiciously high amount")
-
-    if reasons:
-        return True, "; ".join(reasons)
-    return False, ""
-
-
 # =============================================================================
 # STRIPE-SPECIFIC FUNCTIONS
 # =============================================================================
@@ -159,7 +140,11 @@ def is_suspicious_payment(payment: Dict) -> Tuple[bool, str]:
 def map_stripe_row(row: Dict, batch_id: uuid.UUID) -> Optional[Dict]:
     """
     Map a Stripe CSV row to hist_payments schema.
-    Returns None if row should be skipped.
+    Raises RowRejected ('no_email', 'no_amount', 'no_date') if the row should be skipped.
+
+    The amount comes from row[AMOUNT_CENTS_COLUMN], the column-level parse of
+    STRIPE_AMOUNT_COLUMNS (cents vs. dollars is decided once for the whole
+    export, not per row).
 
     Stripe exports vary, but common column names include:
     - Customer Email, Email
@@ -177,26 +162,12 @@ def map_stripe_row(row: Dict, batch_id: uuid.UUID) -> Optional[Dict]:
     )
 
     if not email:
-        return None  # Skip rows with no email
-
-    # Extract amount
-    # Stripe sometimes stores amount in cents, sometimes in dollars
-    amount = normalize_amount(
-        row.get('Amount') or
-        row.get('Amount (USD)') or
-        row.get('Gross') or
-        row.get('amount') or
-        row.get('Total')
-    )
-
-    # Check if amount is in cents (Stripe often uses cents)
-    # If amount > 10000 and it's not a refund, it's probably in cents
-    if amount and amount > 10000:
-        # Likely in cents, convert to dollars
-        amount = amount / 100
+        raise RowRejected('no_email')
 
-    if not amount or amount == 0:
-        return None  # Skip zero-amount rows
+    amount_cents = row.get(AMOUNT_CENTS_COLUMN)
+    if pd.isna(amount_cents) or amount_cents == 0:
+        raise RowRejected('no_amount')
+    amount_cents = int(amount_cents)
 
     # Extract date
     payment_date = parse_date_flexible(
@@ -208,7 +179,7 @@ def map_stripe_row(row: Dict, batch_id: uuid.UUID) -> Optional[Dict]:
     )
 
     if not payment_date:
-        return None  # Skip if no date
+        raise RowRejected('no_date')
 
     # Determine payment type
     status = str(row.get('Status') or row.get('status') or '').lower()
@@ -217,7 +188,7 @@ def map_stripe_row(row: Dict, batch_id: uuid.UUID) -> Optional[Dict]:
 
     if 'refund' in status or 'refund' in description or 'refund' in payment_type_raw:
         payment_type = 'refund'
-        amount = abs(amount) * -1  # Refunds are negative
+        amount_cents = -abs(amount_cents)  # Refunds are negative
     else:
         payment_type = 'buy_in_full'  # Stripe is typically full payment
 
@@ -240,7 +211,8 @@ def map_stripe_row(row: Dict, batch_id: uuid.UUID) -> Optional[Dict]:
     # Build payment record
     payment = {
         'email': email,
-        'amount': float(amount),
+        'amount': cents_to_dollars(amount_cents),
+        'amount_cents': amount_cents,
         'currency': currency,
         'payment_date': payment_date,
         'source': 'stripe',
@@ -249,11 +221,6 @@ def map_stripe_row(row: Dict, batch_id: uuid.UUID) -> Optional[Dict]:
         'import_batch_id': str(batch_id),
     }
 
-    # Check for suspicious data
-    is_bad, reason = is_suspicious_payment(payment)
-    if is_bad:
-        payment['is_suspicious'] = True
-
     return payment
 
 
@@ -264,7 +231,10 @@ def map_stripe_row(row: Dict, batch_id: uuid.UUID) -> Optional[Dict]:
 def map_denefits_row(row: Dict, batch_id: uuid.UUID) -> Optional[Dict]:
     """
     Map a Denefits CSV row to hist_payments schema.
-    Returns None if row should be skipped.
+    Raises RowRejected ('no_email', 'no_amount', 'no_date') if the row should be skipped.
+
+    The financed amount comes from row[AMOUNT_CENTS_COLUMN], the column-level
+    parse of DENEFITS_AMOUNT_COLUMNS.
 
     Denefits exports typically include:
     - Customer email, name
@@ -280,19 +250,12 @@ def map_denefits_row(row: Dict, batch_id: uuid.UUID) -> Optional[Dict]:
     )
 
     if not email:
-        return None
-
-    # Extract financed amount (total loan value)
-    amount = normalize_amount(
-        row.get('Financed Amount') or
-        row.get('financed_amount') or
-        row.get('Amount Financed') or
-        row.get('Loan Amount') or
-        row.get('Total')
-    )
+        raise RowRejected('no_email')
 
-    if not amount or amount == 0:
-        return None
+    amount_cents = row.get(AMOUNT_CENTS_COLUMN)
+    if pd.isna(amount_cents) or amount_cents == 0:
+        raise RowRejected('no_amount')
+    amount_cents = int(amount_cents)
 
     # Extract date
     payment_date = parse_date_flexible(
@@ -304,7 +267,7 @@ def map_denefits_row(row: Dict, batch_id: uuid.UUID) -> Optional[Dict]:
     )
 
     if not payment_date:
-        return None
+        raise RowRejected('no_date')
 
     # Denefits is always BNPL
     payment_type = 'buy_now_pay_later'
@@ -320,7 +283,8 @@ def map_denefits_row(row: Dict, batch_id: uuid.UUID) -> Optional[Dict]:
     # Build payment record
     payment = {
         'email': email,
-        'amount': float(amount),
+        'amount': cents_to_dollars(amount_cents),
+        'amount_cents': amount_cents,
         'currency': 'USD',
         'payment_date': payment_date,
         'source': 'denefits',
@@ -329,22 +293,110 @@ def map_denefits_row(row: Dict, batch_id: uuid.UUID) -> Optional[Dict]:
         'import_batch_id': str(batch_id),
     }
 
-    # Check for suspicious data
-    is_bad, reason = is_suspicious_payment(payment)
-    if is_bad:
-        payment['is_suspicious'] = True
-
     return payment
 
 
+# =============================================================================
+# WRITE
+# =============================================================================
+
+def _text(value) -> str:
+    """None / NaN → '', anything else → stripped text."""
+    return '' if is_missing(value) else str(value).strip()
+
+
+def _id_key(external_id, payment_type) -> Tuple[str, str]:
+    return _text(external_id), _text(payment_type)
+
+
+def _no_id_key(email, amount_cents: int, payment_date) -> Tuple[str, str, int]:
+    return _text(email).lower(), payment_day(payment_date), int(amount_cents)
+
+
+def fetch_existing_payments(source: str, payments: List[Dict], direct_db: bool = False,
+                            chunk_size: int = LOOKUP_CHUNK_SIZE) -> Tuple[Counter, Counter]:
+    """
+    What hist_payments already holds for `source`, looked up only for these
+    payments' IDs and emails (indexed columns, not a scan of the table):
+        by_id     - row count per (external_id, payment_type)
+        by_email  - row count per (email, UTC day, amount in cents), for rows
+                    without an external_id
+    """
+    ids = sorted({_text(p['external_id']) for p in payments} - {''})
+    emails = sorted({_text(p['email']).lower() for p in payments if not _text(p['external_id'])})
+    by_id: Counter = Counter()
+    by_email: Counter = Counter()
+
+    if direct_db:
+        with connect_direct() as conn, conn.cursor() as cur:
+            cur.execute("SELECT external_id, payment_type FROM hist_payments "
+                        "WHERE source = %s AND external_id = ANY(%s)", (source, ids))
+            by_id.update(_id_key(*row) for row in cur.fetchall())
+            cur.execute("SELECT email, (amount * 100)::bigint, payment_date FROM hist_payments "
+                        "WHERE source = %s AND coalesce(external_id, '') = '' AND lower(email) = ANY(%s)",
+                        (source, emails))
+            by_email.update(_no_id_key(*row) for row in cur.fetchall())
+        return by_id, by_email
+
+    for i in range(0, len(ids), chunk_size):
+        rows = (supabase.table('hist_payments').select('external_id,payment_type')
+                .eq('source', source).in_('external_id', ids[i:i + chunk_size]).execute().data)
+        by_id.update(_id_key(row['external_id'], row['payment_type']) for row in rows)
+    for i in range(0, len(emails), chunk_size):
+        rows = (supabase.table('hist_payments').select('external_id,email,amount,payment_date')
+                .eq('source', source).in_('email', emails[i:i + chunk_size]).execute().data)
+        by_email.update(_no_id_key(row['email'], round(float(row['amount']) * 100), row['payment_date'])
+                        for row in rows if not _text(row['external_id']))
+    return by_id, by_email
+
+
+def split_new_payments(payments: List[Dict], by_id: Counter, by_email: Counter) -> Tuple[List[Dict], int]:
+    """
+    Drop payments hist_payments already holds: same external ID and payment
+    type, or, without an ID, same email, day and amount. Counts are used up as
+    they match, so an export repeating a payment keeps the copies the table
+    doesn't have yet. Returns (new payments, number already imported).
+    """
+    by_id, by_email = Counter(by_id), Counter(by_email)
+    new = []
+    for payment in payments:
+        if _text(payment['external_id']):
+            key, existing = _id_key(payment['external_id'], payment['payment_type']), by_id
+        else:
+            key, existing = _no_id_key(payment['email'], payment['amount_cents'], payment['payment_date']), by_email
+        if existing[key] > 0:
+            existing[key] -= 1
+        else:
+            new.append(payment)
+    return new, len(payments) - len(new)
+
+
+def insert_payments_rest(supabase, records: List[Dict], chunk_size: int = WRITE_CHUNK_SIZE, progress=None) -> int:
+    """
+    Insert payment records through the REST API in chunks, advancing
+    `progress` per chunk. A failed chunk raises; earlier chunks stay inserted.
+    """
+    for i in range(0, len(records), chunk_size):
+        chunk = records[i:i + chunk_size]
+        supabase.table('hist_payments').insert(chunk).execute()
+        if progress is not None:
+            progress.advance(len(chunk))
+    return len(records)
+
+
 # =============================================================================
 # MAIN IMPORT LOGIC
 # =============================================================================
 
-def import_payments_csv(csv_path: str, source: str):
+def import_payments_csv(csv_path: str, source: str, direct_db: bool = False, amount_unit: Optional[str] = None,
+                        workers: int = 1):
     """
     Import payments from CSV.
     source: 'stripe' or 'denefits'
+    direct_db: load through Postgres COPY (hist_copy.py) instead of the REST API
+    amount_unit: 'auto', 'dollars' or 'cents' for the amount columns
+                 (default: DEFAULT_AMOUNT_UNITS for the source)
+    workers: processes for row mapping (hist_parallel.py; 0 = one per core)
     """
     print(f"\n{'='*60}")
     print(f"IMPORTING {source.upper()} PAYMENTS: {csv_path}")
@@ -353,10 +405,13 @@ def import_payments_csv(csv_path: str, source: str):
     batch_id = uuid.uuid4()
     import_started = datetime.now()
 
-    # Read CSV
+    amount_columns = STRIPE_AMOUNT_COLUMNS if source == 'stripe' else DENEFITS_AMOUNT_COLUMNS
+    amount_unit = amount_unit or DEFAULT_AMOUNT_UNITS[source]
+
+    # Read CSV (amount columns as text so "2250.00" keeps its decimal point for unit detection)
     print("📖 Reading CSV file...")
     try:
-        df = pd.read_csv(csv_path)
+        df = strip_reject_columns(read_csv(csv_path, dtype={column: str for column in amount_columns}))
         print(f"✓ Found {len(df)} rows in CSV")
         print(f"  Columns: {list(df.columns)[:10]}...")  # Show first 10 columns
         print()
@@ -364,69 +419,101 @@ def import_payments_csv(csv_path: str, source: str):
         print(f"❌ ERROR reading CSV: {e}")
         sys.exit(1)
 
+    # Skipped and failed rows go to <name>.rejects.csv (see hist_rejects.py)
+    rejects = RejectLog(df, reject_path_for(csv_path))
+
+    # Per-stage rows/sec and ETA, mirrored to an in-progress hist_import_logs row
+    progress = ImportProgress(supabase, batch_id, os.path.basename(csv_path), source, 'import_payments.py')
+    progress.start()
+
+    # Parse amounts column-wise to integer cents
+    df[AMOUNT_CENTS_COLUMN], amount_units = coalesce_money_columns(df, amount_columns, unit=amount_unit)
+    for column, unit in amount_units.items():
+        print(f"💵 Amount column '{column}' read as {unit}")
+
     # Process rows
     print("🔄 Processing rows...")
-    payments_to_insert = []
-    skipped_rows = []
-    errors = []
-    warnings = []
-
     # Choose mapping function based on source
     map_func = map_stripe_row if source == 'stripe' else map_denefits_row
 
-    for idx, row in df.iterrows():
-        try:
-            payment = map_func(row.to_dict(), batch_id)
-            if payment:
-                payments_to_insert.append(payment)
-            else:
-                skipped_rows.append(idx)
-                warnings.append(f"Row {idx}: Missing required fields (email, amount, or date)")
-        except Exception as e:
-            errors.append(f"Row {idx}: {str(e)}")
-            skipped_rows.append(idx)
+    with progress.stage('map', len(df)) as stage:
+        mapped = map_rows(df, map_func, batch_id, workers=workers, progress=stage)
+    payments_to_insert = mapped['records']
+    rejects.add_mapped(mapped, default_reason='missing_fields')
+    rejects.close(source_path=csv_path)
+    errors = []
+    warnings = []
 
     print(f"✓ Processed {len(df)} rows")
     print(f"  - {len(payments_to_insert)} payments ready to import")
-    print(f"  - {len(skipped_rows)} rows skipped\n")
+    print(f"  - {rejects.total} rows rejected\n")
 
     if not payments_to_insert:
         print("❌ No valid payments to import. Exiting.")
+        progress.fail('No valid payments to import')
         sys.exit(1)
 
+    # Data-quality rules run column-wise over all mapped rows (see hist_rules.py)
+    payments_df, rule_hits = flag_records(payments_to_insert, PAYMENT_RULES)
+    print_rule_hits(rule_hits)
+    print()
+
+    # hist_payments has no natural key, so payments it already holds are dropped
+    # here: re-importing an export (or an overlapping newer one) adds only new rows
+    print("🔍 Checking hist_payments for payments already imported...")
+    try:
+        existing = fetch_existing_payments(source, payments_to_insert, direct_db)
+    except Exception as e:
+        print(f"❌ ERROR reading hist_payments: {e}")
+        progress.fail(f"Could not check existing payments: {e}")
+        return
+    new_payments, already_imported = split_new_payments(payments_to_insert, *existing)
+    print(f"✓ {already_imported} already in hist_payments, {len(new_payments)} new\n")
+
+    # amount_cents stays local for exact sums; hist_payments stores dollars and has no notes column
+    payment_records = [
+        {k: v for k, v in p.items() if k not in LOCAL_PAYMENT_FIELDS}
+        for p in new_payments
+    ]
+
+    # Row count + key hash per table written, for `hist_checksums.py verify`
+    checksums = {}
+
     # Insert payments into Supabase
     print("💾 Inserting payments into Supabase...")
     try:
-        response = supabase.table('hist_payments').insert(payments_to_insert).execute()
-        print(f"✓ Inserted {len(payments_to_insert)} payments into hist_payments\n")
+        with progress.stage('write', len(payment_records)) as stage:
+            if direct_db:
+                with connect_direct() as conn:
+                    copy_merge(conn, 'hist_payments', payment_records, batch_id, stage)
+            else:
+                insert_payments_rest(supabase, payment_records, progress=stage)
+        checksums['hist_payments'] = table_checksum('hist_payments', new_payments)
+        print(f"✓ Inserted {len(new_payments)} payments into hist_payments\n")
     except Exception as e:
         print(f"❌ ERROR inserting payments: {e}")
         errors.append(f"Database insert failed: {str(e)}")
+        progress.fail(f"Database insert failed: {e}")
         return
 
     # Update hist_contacts to mark purchases
     print("🔗 Updating contacts with purchase info...")
-    unique_emails = list(set([p['email'] for p in payments_to_insert if p['payment_type'] != 'refund']))
+    purchases_df = payments_df[payments_df['payment_type'] != 'refund']  # Refunds don't count as purchases
+    purchase_totals = purchases_df.groupby('email').agg(
+        total_cents=('amount_cents', 'sum'),
+        purchase_date=('payment_date', 'min'),
+    )
 
     updated_count = 0
-    for email in unique_emails:
+    contact_stage = progress.stage('contacts', len(purchase_totals))
+    for email, totals in purchase_totals.iterrows():
+        contact_stage.advance()
         try:
-            # Get all payments for this email (excluding refunds)
-            email_payments = [p for p in payments_to_insert if p['email'] == email and p['payment_type'] != 'refund']
-            if not email_payments:
-                continue
-
-            # Calculate total purchase amount
-            total_amount = sum(p['amount'] for p in email_payments)
-
-            # Get earliest purchase date
-            purchase_date = min(p['payment_date'] for p in email_payments)
-
             # Update contact
             update_data = {
                 'has_purchase': True,
-                'purchase_date': purchase_date.isoformat(),
-                'purchase_amount': float(total_amount),
+                'purchase_date': totals['purchase_date'].isoformat(),
+                'purchase_amount': cents_to_dollars(totals['total_cents']),
                 'reached_stage': 'purchased'
             }
 
@@ -436,29 +523,30 @@ def import_payments_csv(csv_path: str, source: str):
         except Exception as e:
             warnings.append(f"Could not update contact {email}: {str(e)}")
 
+    contact_stage.finish()
     print(f"✓ Updated {updated_count} contacts with purchase info\n")
 
-    # Create timeline events
+    # Create timeline events (natural-keyed, so re-imports don't duplicate them)
     print("📅 Creating timeline events...")
-    timeline_events = []
-    for payment in payments_to_insert:
-        if payment['payment_type'] != 'refund':  # Don't create events for refunds
-            timeline_events.append({
-                'email': payment['email'],
-                'event_type': 'purchased',
-                'event_date': payment['payment_date'],
-                'source': source,
-                'import_batch_id': str(batch_id),
-                'event_details': {
-                    'amount': payment['amount'],
-                    'payment_type': payment['payment_type']
-                }
-            })
-
-    if timeline_events:
+    timeline_events = build_timeline_events(
+        purchases_df, 'purchased', 'payment_date', source, batch_id,
+        details={'amount': 'amount', 'payment_type': 'payment_type'},
+    )
+
+    if not timeline_events.empty:
         try:
-            supabase.table('hist_timeline').insert(timeline_events).execute()
-            print(f"✓ Created {len(timeline_events)} timeline events\n")
+            with progress.stage('timeline', len(timeline_events)) as stage:
+                written_keys = []
+                if direct_db:
+                    with connect_direct() as conn:
+                        inserted = copy_merge(conn, 'hist_timeline', timeline_records(timeline_events), batch_id, stage,
+                                              merged_keys=written_keys)
+                    known = len(timeline_events) - inserted
+                else:
+                    inserted, known = write_timeline_events(supabase, timeline_events, progress=stage,
+                                                            written_keys=written_keys)
+            checksums['hist_timeline'] = keys_checksum(written_keys)
+            print(f"✓ Created {inserted} timeline events ({known} already existed)\n")
         except Exception as e:
             print(f"⚠️  Warning: Could not create timeline events: {e}")
 
@@ -470,36 +558,45 @@ def import_payments_csv(csv_path: str, source: str):
         'source_file': os.path.basename(csv_path),
         'source_type': source,
         'rows_processed': len(df),
-        'rows_imported': len(payments_to_insert),
-        'rows_skipped': len(skipped_rows),
+        'rows_imported': len(new_payments),
+        'rows_skipped': rejects.total,
         'rows_updated': updated_count,
         'errors': errors if errors else None,
         'warnings': warnings if warnings else None,
+        'rule_hits': rule_hits,
+        'rejects': rejects.summary(),
+        'progress': progress.snapshot(),
+        'checksums': checksums or None,
         'import_started_at': import_started.isoformat(),
         'import_completed_at': import_completed.isoformat(),
         'imported_by': 'import_payments.py',
-        'notes': f"Imported {len(payments_to_insert)} {source} payments, updated {updated_count} contacts"
+        'notes': (f"Imported {len(new_payments)} {source} payments ({already_imported} already in hist_payments), "
+                  f"updated {updated_count} contacts")
     }
 
     try:
-        supabase.table('hist_import_logs').insert(log_entry).execute()
+        progress.complete(log_entry)
         print("✓ Import logged\n")
     except Exception as e:
         print(f"⚠️  Warning: Could not log import: {e}\n")
 
-    # Calculate revenue stats
-    total_revenue = sum(p['amount'] for p in payments_to_insert if p['payment_type'] != 'refund')
-    refund_amount = sum(abs(p['amount']) for p in payments_to_insert if p['payment_type'] == 'refund')
-    net_revenue = total_revenue - refund_amount
+    # Calculate revenue stats (integer cents, converted for display only)
+    is_refund = payments_df['payment_type'] == 'refund'
+    total_cents = int(payments_df.loc[~is_refund, 'amount_cents'].sum())
+    refund_cents = int(payments_df.loc[is_refund, 'amount_cents'].abs().sum())
+    total_revenue = cents_to_dollars(total_cents)
+    refund_amount = cents_to_dollars(refund_cents)
+    net_revenue = cents_to_dollars(total_cents - refund_cents)
 
     # Print summary
     print(f"{'='*60}")
     print(f"✅ IMPORT COMPLETE")
     print(f"{'='*60}")
     print(f"Total rows processed: {len(df)}")
-    print(f"Payments imported: {len(payments_to_insert)}")
+    print(f"Payments imported: {len(new_payments)}")
+    print(f"Already in hist_payments: {already_imported}")
     print(f"Contacts updated: {updated_count}")
-    print(f"Rows skipped: {len(skipped_rows)}")
+    print(f"Rows rejected: {rejects.total}")
     print(f"Errors: {len(errors)}")
     print(f"Warnings: {len(warnings)}")
     print(f"\nRevenue Stats:")
@@ -507,6 +604,8 @@ def import_payments_csv(csv_path: str, source: str):
     print(f"  Refunds: ${refund_amount:,.2f}")
     print(f"  Net revenue: ${net_revenue:,.2f}")
     print(f"\nImport batch ID: {batch_id}")
+    print(f"Verify it: python scripts/hist_checksums.py verify --batch {batch_id}")
+    print_transport_stats()
     print(f"{'='*60}\n")
 
     if errors:
@@ -523,6 +622,9 @@ def import_payments_csv(csv_path: str, source: str):
         if len(warnings) > 10:
             print(f"  ... and {len(warnings) - 10} more")
 
+    print()
+    rejects.print_summary()
+
     print("\n✓ You can now query payment data:")
     print("  - SELECT * FROM hist_payments;")
     print("  - SELECT * FROM v_payment_breakdown;")
@@ -538,6 +640,13 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Import Stripe or Denefits payment data')
     parser.add_argument('--stripe', type=str, help='Path to Stripe CSV export')
     parser.add_argument('--denefits', type=str, help='Path to Denefits CSV export')
+    parser.add_argument('--direct-db', action='store_true',
+                        help='Load via Postgres COPY (needs SUPABASE_DB_URL) instead of the REST API')
+    parser.add_argument('--amount-unit', choices=UNITS,
+                        help='Unit of the amount columns (default: detect once per column for Stripe, '
+                             'dollars for Denefits)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Processes for row mapping (0 = one per CPU core, default 1)')
 
     args = parser.parse_args()
 
@@ -554,11 +663,13 @@ if __name__ == "__main__":
         if not os.path.exists(args.stripe):
             print(f"ERROR: Stripe file not found: {args.stripe}")
             sys.exit(1)
-        import_payments_csv(args.stripe, 'stripe')
+        import_payments_csv(args.stripe, 'stripe', direct_db=args.direct_db, amount_unit=args.amount_unit,
+                            workers=args.workers)
 
     # Import Denefits if provided
     if args.denefits:
         if not os.path.exists(args.denefits):
             print(f"ERROR: Denefits file not found: {args.denefits}")
             sys.exit(1)
-        import_payments_csv(args.denefits, 'denefits')
+        import_payments_csv(args.denefits, 'denefits', direct_db=args.direct_db, amount_unit=args.amount_unit,
+                            workers=args.workers)
@@ -0,0 +1,542 @@
+#!/usr/bin/env python3
+"""
+Import the Supabase Stripe Webhook Export to Fill hist_payments Gaps
+
+supabase_export_stripe_webhooks.csv is the old integration's webhook log:
+one row per Stripe event with the full event in the raw_event JSON column.
+The Stripe export (stripe_unified_payments.csv) misses some charges and has
+rows import_payments.py rejects (no email, no parseable date), so those
+payments never reach hist_payments. This script recovers them from the
+webhooks.
+
+It handles:
+- Parsing every raw_event payload in ONE bulk call with Arrow's JSON reader
+  (explicit schema, only the fields below), instead of json.loads() per row;
+  without pyarrow, or if a payload doesn't fit the schema, it falls back to
+  orjson / json per row
+- Resolving each event to its charge ID (charge events directly, payment
+  intents via latest_charge, checkout sessions via their payment intent,
+  refunds / disputes / invoices via their charge) and collapsing the events
+  of a charge into one payment: email, amount, date, paid or not
+- Joining the paid charges against the Stripe export by charge ID: export
+  values win, the webhooks fill the email, date or amount the export row is
+  missing, and charges absent from the export come from the webhooks alone.
+  The patched rows go through import_payments.map_stripe_row, so amounts,
+  refund signs and currency match a normal Stripe import
+- Skipping charges whose ID is already in hist_payments (safe to re-run)
+- Reporting how many payments each gap type recovered and how long each
+  stage took
+
+Usage:
+    python scripts/import_stripe_webhooks.py
+    python scripts/import_stripe_webhooks.py historical_data/supabase_export_stripe_webhooks.csv \\
+        --stripe historical_data/stripe_unified_payments.csv --direct-db
+
+Environment Variables Required:
+    SUPABASE_URL - Your Supabase project URL
+    SUPABASE_SERVICE_KEY - Your Supabase service role key (admin access)
+
+Output:
+    - Inserts recovered payments into hist_payments (source 'stripe', external_id = charge ID)
+    - 'purchased' hist_timeline events for them
+    - Logs recovered counts and stage timings to hist_import_logs
+"""
+
+import io
+import os
+import sys
+import json
+import argparse
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Tuple
+import uuid
+
+# Third-party imports
+try:
+    from supabase import Client
+    import pandas as pd
+except ImportError:
+    print("ERROR: Missing required packages.")
+    print("Install with: pip install supabase python-dotenv pandas")
+    sys.exit(1)
+
+try:
+    import pyarrow as pa
+    import pyarrow.json as pa_json
+except ImportError:
+    pa = None
+    pa_json = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from hist_checksums import keys_checksum, table_checksum
+from hist_contact_store import normalize_emails
+from hist_copy import connect_direct, copy_merge
+from hist_csv import read_csv
+from hist_money import UNITS, coalesce_money_columns
+from hist_parallel import map_rows
+from hist_progress import ImportProgress, format_duration
+from hist_rules import PAYMENT_RULES, flag_records, print_rule_hits
+from hist_timeline import build_timeline_events, timeline_records, write_timeline_events
+from hist_supabase import lazy_supabase_client, print_transport_stats
+from import_payments import (AMOUNT_CENTS_COLUMN, LOCAL_PAYMENT_FIELDS, STRIPE_AMOUNT_COLUMNS,
+                             fetch_existing_payments, insert_payments_rest, map_stripe_row, split_new_payments)
+
+# Supabase setup (pooled transport shared by all importers, see hist_supabase.py);
+# created on first use so --help and argument errors don't need credentials
+supabase: Client = lazy_supabase_client()
+
+HISTORICAL_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'historical_data')
+DEFAULT_WEBHOOKS_FILE = os.path.join(HISTORICAL_DATA_DIR, 'supabase_export_stripe_webhooks.csv')
+DEFAULT_STRIPE_FILE = os.path.join(HISTORICAL_DATA_DIR, 'stripe_unified_payments.csv')
+
+PAYLOAD_COLUMN = 'raw_event'
+
+# Extracted column → (path in the event JSON, Arrow type name)
+PAYLOAD_FIELDS = {
+    'event_id': ('id', 'string'),
+    'event_type': ('type', 'string'),
+    'event_created': ('created', 'int64'),
+    'object_type': ('data.object.object', 'string'),
+    'object_id': ('data.object.id', 'string'),
+    'object_created': ('data.object.created', 'int64'),
+    'amount': ('data.object.amount', 'int64'),
+    'amount_total': ('data.object.amount_total', 'int64'),
+    'amount_paid': ('data.object.amount_paid', 'int64'),
+    'currency': ('data.object.currency', 'string'),
+    'status': ('data.object.status', 'string'),
+    'payment_status': ('data.object.payment_status', 'string'),
+    'payment_intent': ('data.object.payment_intent', 'string'),
+    'latest_charge': ('data.object.latest_charge', 'string'),
+    'charge': ('data.object.charge', 'string'),
+    'billing_email': ('data.object.billing_details.email', 'string'),
+    'receipt_email': ('data.object.receipt_email', 'string'),
+    'details_email': ('data.object.customer_details.email', 'string'),
+    'customer_email': ('data.object.customer_email', 'string'),
+    'metadata_email': ('data.object.metadata.email', 'string'),
+}
+
+# Payload email fields in order of preference (then the export's own customer_email column)
+EMAIL_FIELDS = ['billing_email', 'receipt_email', 'details_email', 'customer_email', 'metadata_email']
+
+# Events that mean the charge went through (checkout.session.completed only when payment_status is 'paid')
+PAID_EVENTS = {'charge.succeeded', 'payment_intent.succeeded', 'invoice.paid',
+               'checkout.session.async_payment_succeeded'}
+
+# Stripe export columns the patched rows fill, in map_stripe_row's order of preference
+# ('Created date (UTC)' and 'email (metadata)' are the dashboard export's own columns)
+EXPORT_ID_COLUMNS = ['id', 'ID', 'Charge ID', 'charge_id', 'Transaction ID']
+EXPORT_EMAIL_COLUMNS = ['Customer Email', 'customer_email', 'Email', 'email', 'Customer', 'email (metadata)']
+EXPORT_DATE_COLUMNS = ['Created', 'created', 'Date', 'Created (UTC)', 'Timestamp', 'Created date (UTC)']
+
+
+# =============================================================================
+# PAYLOAD EXTRACTION
+# =============================================================================
+
+def _arrow_schema():
+    """Nested Arrow schema holding only the PAYLOAD_FIELDS paths."""
+    tree: Dict = {}
+    for path, type_name in PAYLOAD_FIELDS.values():
+        node = tree
+        *parents, leaf = path.split('.')
+        for part in parents:
+            node = node.setdefault(part, {})
+        node[leaf] = getattr(pa, type_name)()
+
+    def build(node):
+        return [pa.field(name, pa.struct(build(child)) if isinstance(child, dict) else child)
+                for name, child in node.items()]
+
+    return pa.schema(build(tree))
+
+
+def _extract_arrow(payloads: pd.Series) -> pd.DataFrame:
+    """All payloads as one newline-delimited JSON buffer through Arrow's reader."""
+    buffer = '\n'.join(payloads.fillna('{}').str.replace('\n', ' ', regex=False)).encode('utf-8')
+    table = pa_json.read_json(io.BytesIO(buffer), parse_options=pa_json.ParseOptions(
+        explicit_schema=_arrow_schema(), unexpected_field_behavior='ignore', newlines_in_values=False,
+    ))
+    while any(pa.types.is_struct(field.type) for field in table.schema):
+        table = table.flatten()
+    columns = {path: name for name, (path, _) in PAYLOAD_FIELDS.items()}
+    frame = table.select(list(columns)).rename_columns(list(columns.values())).to_pandas()
+    frame.index = payloads.index
+    return frame
+
+
+def _extract_rows(payloads: pd.Series) -> pd.DataFrame:
+    """Fallback: decode payload by payload (orjson when installed) and walk the same paths."""
+    loads = orjson.loads if orjson is not None else json.loads
+    paths = {name: path.split('.') for name, (path, _) in PAYLOAD_FIELDS.items()}
+    rows = []
+    for text in payloads:
+        try:
+            event = loads(text) if isinstance(text, str) else {}
+        except ValueError:
+            event = {}
+        row = {}
+        for name, parts in paths.items():
+            value = event
+            for part in parts:
+                value = value.get(part) if isinstance(value, dict) else None
+            row[name] = value if not isinstance(value, (dict, list)) else None
+        rows.append(row)
+    frame = pd.DataFrame(rows, index=payloads.index, columns=list(PAYLOAD_FIELDS))
+    for name, (_, type_name) in PAYLOAD_FIELDS.items():
+        if type_name == 'int64':
+            frame[name] = pd.to_numeric(frame[name], errors='coerce').astype('Int64')
+    return frame
+
+
+def extract_payloads(payloads: pd.Series) -> Tuple[pd.DataFrame, str]:
+    """PAYLOAD_FIELDS columns for every payload; returns (frame, parser used)."""
+    if pa_json is not None:
+        try:
+            return _extract_arrow(payloads), 'arrow'
+        except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+            print(f"  Note: bulk JSON parse failed ({str(e).splitlines()[0]}); decoding row by row")
+    return _extract_rows(payloads), 'orjson' if orjson is not None else 'json'
+
+
+# =============================================================================
+# CHARGES FROM EVENTS
+# =============================================================================
+
+def _coalesce(frame: pd.DataFrame, columns: List[str]) -> pd.Series:
+    result = pd.Series(float('nan'), index=frame.index, dtype=object)
+    for name in columns:
+        if name in frame.columns:
+            result = result.fillna(frame[name].astype(object).where(frame[name].notna()))
+    return result
+
+
+def event_charges(webhooks: pd.DataFrame, events: pd.DataFrame) -> pd.DataFrame:
+    """
+    One row per event with its charge_id, email, amount (cents), payment time
+    and whether the event means the charge was paid.
+    """
+    events = events.copy()
+    kind = events['object_type']
+
+    charge_id = events['object_id'].where(kind == 'charge')
+    charge_id = charge_id.fillna(events['latest_charge'].where(kind == 'payment_intent'))
+    charge_id = charge_id.fillna(events['charge'])
+    intent = events['object_id'].where(kind == 'payment_intent').fillna(events['payment_intent'])
+
+    # Checkout sessions only name their payment intent: borrow the charge another event tied to it
+    intent_charges = pd.DataFrame({'intent': intent, 'charge_id': charge_id}).dropna().drop_duplicates('intent')
+    charge_id = charge_id.fillna(intent.map(dict(zip(intent_charges['intent'], intent_charges['charge_id']))))
+    events['charge_id'] = charge_id.where(charge_id.str.startswith(('ch_', 'py_'), na=False))
+
+    emails = pd.DataFrame({name: normalize_emails(events[name]) for name in EMAIL_FIELDS})
+    if 'customer_email' in webhooks.columns:
+        emails['export_email'] = normalize_emails(webhooks['customer_email'])
+    events['email'] = _coalesce(emails, list(emails.columns))
+
+    events['amount_cents'] = _coalesce(events, ['amount', 'amount_total', 'amount_paid'])
+    events['paid_at'] = pd.to_datetime(events['object_created'].fillna(events['event_created']), unit='s', utc=True)
+    events['paid'] = events['event_type'].isin(PAID_EVENTS) | (
+        (events['event_type'] == 'checkout.session.completed') & (events['payment_status'] == 'paid')
+    )
+    return events
+
+
+def paid_charges(events: pd.DataFrame) -> pd.DataFrame:
+    """
+    Collapse events per charge_id, keeping charges with a paid event. The
+    amount and time come from the charge object itself when present.
+    """
+    events = events[events['charge_id'].notna()].sort_values('event_created', kind='stable')
+    is_charge = events['object_type'] == 'charge'
+    charges = events.groupby('charge_id').agg(
+        email=('email', 'first'),
+        currency=('currency', 'first'),
+        paid=('paid', 'any'),
+        events=('event_id', 'size'),
+    )
+    from_charge = events[is_charge].groupby('charge_id').agg(amount_cents=('amount_cents', 'max'),
+                                                            paid_at=('paid_at', 'min'))
+    from_any = events.groupby('charge_id').agg(amount_cents=('amount_cents', 'max'), paid_at=('paid_at', 'min'))
+    charges['amount_cents'] = from_charge['amount_cents'].reindex(charges.index).fillna(from_any['amount_cents'])
+    charges['paid_at'] = from_charge['paid_at'].reindex(charges.index).fillna(from_any['paid_at'])
+    return charges[charges['paid']].drop(columns='paid')
+
+
+# =============================================================================
+# JOIN AGAINST THE STRIPE EXPORT
+# =============================================================================
+
+def patch_export_rows(charges: pd.DataFrame, export: pd.DataFrame, batch_id: uuid.UUID) -> pd.DataFrame:
+    """
+    Stripe-export-shaped rows for every paid charge: the export's own row
+    where there is one, with the email / date / amount it lacks filled from
+    the webhooks.
+    _export: 'not_in_export', 'importable' (map_stripe_row takes the export
+    row as it is) or the reason it rejects it ('no_email', 'no_date', ...)
+    _filled: the fields the webhooks supplied, comma-separated
+    """
+    export = export.assign(_charge_id=_coalesce(export, EXPORT_ID_COLUMNS))
+    export = export[export['_charge_id'].notna()].drop_duplicates('_charge_id').set_index('_charge_id')
+    in_export = charges.index.isin(export.index)
+
+    # What a plain Stripe import makes of each export row
+    export_status = pd.Series('not_in_export', index=charges.index, dtype=object)
+    matched = export.loc[charges.index[in_export]]
+    export_status[in_export] = 'importable'
+    mapped = map_rows(matched, map_stripe_row, batch_id)
+    for charge_id, reason in mapped['skipped']:
+        export_status[charge_id] = reason or 'missing_fields'
+    for charge_id, _ in mapped['errors']:
+        export_status[charge_id] = 'map_error'
+
+    # Prefixed so the webhook values can't collide with export columns ('email', 'currency')
+    rows = charges.add_prefix('webhook_').join(export, how='left')
+    email_columns = [c for c in EXPORT_EMAIL_COLUMNS if c in rows]
+    export_email = _coalesce(pd.DataFrame({c: normalize_emails(rows[c]) for c in email_columns}), email_columns)
+    export_date = pd.to_datetime(_coalesce(rows, EXPORT_DATE_COLUMNS), errors='coerce', format='mixed', utc=True)
+    export_cents = rows[AMOUNT_CENTS_COLUMN].astype('Int64')
+
+    filled = pd.Series('', index=rows.index, dtype=object)
+    filled[export_email.isna() & rows['webhook_email'].notna()] += 'email,'
+    filled[export_date.isna() & rows['webhook_paid_at'].notna()] += 'date,'
+    filled[export_cents.isna() & rows['webhook_amount_cents'].notna()] += 'amount,'
+
+    return pd.DataFrame({
+        'id': rows.index,
+        'Customer Email': export_email.fillna(rows['webhook_email']).values,
+        'Created': export_date.fillna(rows['webhook_paid_at']).dt.strftime('%Y-%m-%d %H:%M:%S').values,
+        AMOUNT_CENTS_COLUMN: pd.array(export_cents.fillna(rows['webhook_amount_cents'].astype('Int64'))),
+        'Currency': _coalesce(rows, ['Currency', 'webhook_currency']).values,
+        'Status': rows['Status'].fillna('succeeded').values if 'Status' in rows else 'succeeded',
+        'Description': rows['Description'].values if 'Description' in rows else None,
+        '_export': export_status.values,
+        '_filled': filled.str.rstrip(',').values,
+    })
+
+
+# =============================================================================
+# MAIN IMPORT LOGIC
+# =============================================================================
+
+def import_stripe_webhooks(webhooks_path: str, stripe_path: str, direct_db: bool = False,
+                           amount_unit: str = 'auto'):
+    """
+    Main import function.
+    direct_db: load through Postgres COPY (hist_copy.py) instead of the REST API
+    amount_unit: 'auto', 'dollars' or 'cents' for the Stripe export's amount columns
+    """
+    print(f"\n{'='*60}")
+    print(f"IMPORTING STRIPE WEBHOOKS: {webhooks_path}")
+    print(f"{'='*60}\n")
+
+    batch_id = uuid.uuid4()
+    import_started = datetime.now()
+
+    # Per-stage rows/sec and ETA, mirrored to an in-progress hist_import_logs row
+    progress = ImportProgress(supabase, batch_id, os.path.basename(webhooks_path), 'stripe_webhooks',
+                              'import_stripe_webhooks.py')
+    progress.start()
+
+    print("📖 Reading CSV files...")
+    try:
+        with progress.stage('read') as stage:
+            webhooks = read_csv(webhooks_path, dtype=str)
+            export = read_csv(stripe_path, dtype=str)
+            stage.advance(len(webhooks) + len(export))
+    except Exception as e:
+        print(f"❌ ERROR reading CSV: {e}")
+        progress.fail(f"Could not read CSV: {e}")
+        sys.exit(1)
+    if PAYLOAD_COLUMN not in webhooks.columns:
+        print(f"❌ ERROR: {webhooks_path} has no {PAYLOAD_COLUMN} column")
+        progress.fail(f"No {PAYLOAD_COLUMN} column")
+        sys.exit(1)
+    print(f"✓ {len(webhooks)} webhook events, {len(export)} Stripe export rows\n")
+
+    print("🔍 Extracting payloads...")
+    with progress.stage('parse', len(webhooks)) as stage:
+        payloads, parser = extract_payloads(webhooks[PAYLOAD_COLUMN])
+        events = event_charges(webhooks, payloads)
+        stage.advance(len(webhooks))
+    charges = paid_charges(events)
+    print(f"✓ Parsed {len(webhooks)} payloads ({parser})")
+    print(f"  - {int(events['charge_id'].notna().sum())} events tied to {events['charge_id'].nunique()} charges")
+    print(f"  - {len(charges)} charges paid\n")
+
+    print("🔗 Joining against the Stripe export...")
+    with progress.stage('join', len(charges)) as stage:
+        export[AMOUNT_CENTS_COLUMN], amount_units = coalesce_money_columns(export, STRIPE_AMOUNT_COLUMNS,
+                                                                            unit=amount_unit)
+        patched = patch_export_rows(charges, export, batch_id)
+        mapped = map_rows(patched, map_stripe_row, batch_id)
+        stage.advance(len(charges))
+    try:
+        # Same dedupe rule as import_payments.py: (external_id, payment_type) among source='stripe' rows
+        existing = fetch_existing_payments('stripe', mapped['records'], direct_db)
+    except Exception as e:
+        print(f"❌ ERROR reading hist_payments: {e}")
+        progress.fail(f"Could not check existing payments: {e}")
+        return
+    payments_to_insert, already_imported = split_new_payments(mapped['records'], *existing)
+    for column, unit in amount_units.items():
+        print(f"💵 Amount column '{column}' read as {unit}")
+
+    skipped = Counter(reason or 'missing_fields' for _, reason in mapped['skipped'])
+    skipped.update('map_error' for _ in mapped['errors'])
+    dropped = {idx for idx, _ in mapped['skipped']} | {idx for idx, _ in mapped['errors']}
+    # map_rows keeps row order, so the kept rows line up with mapped['records']
+    new_records = {id(p) for p in payments_to_insert}
+    kept = [idx for idx in patched.index if idx not in dropped]
+    recovered = patched.loc[[idx for idx, p in zip(kept, mapped['records']) if id(p) in new_records]]
+    recovered_by = Counter(recovered['_export'])
+    webhook_filled = Counter(field for fields in recovered['_filled'] for field in fields.split(',') if field)
+    errors = []
+
+    print(f"✓ {len(patched)} paid charges: {already_imported} already in hist_payments, "
+          f"{len(payments_to_insert)} to recover, {sum(skipped.values())} unusable\n")
+
+    checksums = {}
+    rule_hits = None
+    if payments_to_insert:
+        # Data-quality rules run column-wise over all mapped rows (see hist_rules.py)
+        payments_df, rule_hits = flag_records(payments_to_insert, PAYMENT_RULES)
+        print_rule_hits(rule_hits)
+        print()
+
+        payment_records = [{k: v for k, v in p.items() if k not in LOCAL_PAYMENT_FIELDS} for p in payments_to_insert]
+        print("💾 Inserting recovered payments...")
+        try:
+            with progress.stage('write', len(payment_records)) as stage:
+                if direct_db:
+                    with connect_direct() as conn:
+                        copy_merge(conn, 'hist_payments', payment_records, batch_id, stage)
+                else:
+                    insert_payments_rest(supabase, payment_records, progress=stage)
+            checksums['hist_payments'] = table_checksum('hist_payments', payments_to_insert)
+            print(f"✓ Inserted {len(payment_records)} payments into hist_payments\n")
+        except Exception as e:
+            print(f"❌ ERROR inserting payments: {e}")
+            errors.append(f"Database insert failed: {str(e)}")
+
+        # Create timeline events (natural-keyed, so re-imports don't duplicate them)
+        purchases_df = payments_df[payments_df['payment_type'] != 'refund']
+        timeline_events = build_timeline_events(
+            purchases_df, 'purchased', 'payment_date', 'stripe', batch_id,
+            details={'amount': 'amount', 'payment_type': 'payment_type'},
+        )
+        if not errors and not timeline_events.empty:
+            print("📅 Creating timeline events...")
+            try:
+                with progress.stage('timeline', len(timeline_events)) as stage:
+                    written_keys = []
+                    if direct_db:
+                        with connect_direct() as conn:
+                            inserted = copy_merge(conn, 'hist_timeline', timeline_records(timeline_events), batch_id,
+                                                  stage, merged_keys=written_keys)
+                        known = len(timeline_events) - inserted
+                    else:
+                        inserted, known = write_timeline_events(supabase, timeline_events, progress=stage,
+                                                                written_keys=written_keys)
+                checksums['hist_timeline'] = keys_checksum(written_keys)
+                print(f"✓ Created {inserted} timeline events ({known} already existed)\n")
+            except Exception as e:
+                print(f"⚠️  Warning: Could not create timeline events: {e}")
+
+    recovered_count = 0 if errors else len(payments_to_insert)
+
+    # Log the import
+    print("📝 Logging import...")
+    import_completed = datetime.now()
+    log_entry = {
+        'id': str(batch_id),
+        'source_file': os.path.basename(webhooks_path),
+        'source_type': 'stripe_webhooks',
+        'rows_processed': len(webhooks),
+        'rows_imported': recovered_count,
+        'rows_skipped': sum(skipped.values()),
+        'rows_updated': 0,
+        'errors': errors if errors else None,
+        'rule_hits': rule_hits,
+        'rejects': {'file': None, 'counts': dict(skipped), 'sample': []} if skipped else None,
+        'progress': progress.snapshot(),
+        'checksums': checksums or None,
+        'import_started_at': import_started.isoformat(),
+        'import_completed_at': import_completed.isoformat(),
+        'imported_by': 'import_stripe_webhooks.py',
+        'notes': (f"Recovered {recovered_count} of {len(patched)} paid charges "
+                  f"({', '.join(f'{k}: {v}' for k, v in sorted(recovered_by.items())) or 'none'}); "
+                  f"webhook fields used: {dict(webhook_filled) or 'none'}; "
+                  f"{already_imported} already in hist_payments; joined against {os.path.basename(stripe_path)}")
+    }
+
+    try:
+        progress.complete(log_entry)
+        print("✓ Import logged\n")
+    except Exception as e:
+        print(f"⚠️  Warning: Could not log import: {e}\n")
+
+    # Print summary
+    print(f"{'='*60}")
+    print("✅ IMPORT COMPLETE" if not errors else "❌ IMPORT FAILED")
+    print(f"{'='*60}")
+    print(f"Webhook events: {len(webhooks)}")
+    print(f"Paid charges in webhooks: {len(patched)}")
+    print(f"Already in hist_payments: {already_imported}")
+    print(f"Payments recovered: {recovered_count}")
+    for how, count in recovered_by.most_common():
+        label = {'not_in_export': 'not in the Stripe export',
+                 'importable': 'in the export, importable but not yet imported'}.get(
+            how, f"in the export, rejected by import_payments ({how})")
+        print(f"  - {label}: {count}")
+    for field, count in webhook_filled.most_common():
+        print(f"  - {field} taken from the webhooks: {count}")
+    for reason, count in skipped.most_common():
+        print(f"Unusable ({reason}): {count}")
+    print("\nStage timings:")
+    for name, stage in progress.snapshot().items():
+        rate = f"{stage['rows_per_sec']:,.0f} rows/s" if stage['rows_per_sec'] else ''
+        print(f"  {name:<9} {format_duration(stage['elapsed_seconds']):>8}  {stage['done']:>7,} rows  {rate}")
+    print(f"\nImport batch ID: {batch_id}")
+    print(f"Verify it: python scripts/hist_checksums.py verify --batch {batch_id}")
+    print_transport_stats()
+    print(f"{'='*60}\n")
+
+    if errors:
+        print("\n❌ ERRORS:")
+        for error in errors:
+            print(f"  - {error}")
+        sys.exit(1)
+
+    print("✓ You can now query the recovered payments:")
+    print(f"  - SELECT * FROM hist_payments WHERE import_batch_id = '{batch_id}';")
+    print()
+
+
+# =============================================================================
+# MAIN ENTRY POINT
+# =============================================================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Recover hist_payments gaps from the Supabase Stripe webhook export')
+    parser.add_argument('webhooks_path', nargs='?', default=DEFAULT_WEBHOOKS_FILE,
+                        help='Webhook export CSV (default: historical_data/supabase_export_stripe_webhooks.csv)')
+    parser.add_argument('--stripe', default=DEFAULT_STRIPE_FILE,
+                        help='Stripe export joined by charge ID (default: historical_data/stripe_unified_payments.csv)')
+    parser.add_argument('--direct-db', action='store_true',
+                        help='Load via Postgres COPY (needs SUPABASE_DB_URL) instead of the REST API')
+    parser.add_argument('--amount-unit', choices=UNITS, default='auto',
+                        help='Unit of the Stripe export\'s amount columns (default: detect once per column)')
+
+    args = parser.parse_args()
+
+    for path in (args.webhooks_path, args.stripe):
+        if not os.path.exists(path):
+            print(f"ERROR: File not found: {path}")
+            sys.exit(1)
+
+    import_stripe_webhooks(args.webhooks_path, args.stripe, direct_db=args.direct_db, amount_unit=args.amount_unit)
@@ -3,40 +3,43 @@
 Import Unified Contacts to Supabase
 
 This script imports the unified_contacts.csv file into Supabase's hist_contacts table.
-It maps the columns from the unified file to the Supabase schema.
+It maps the columns from the unified file to the Supabase schema. A compressed
+build (unified_contacts.csv.zst / .csv.gz) is read transparently.
 
 Usage:
     python scripts/import_unified_to_supabase.py
+    python scripts/import_unified_to_supabase.py --direct-db   # Postgres COPY (needs SUPABASE_DB_URL)
 """
 
 import os
 import sys
+import argparse
 import pandas as pd
 import uuid
 from datetime import datetime
 
 # Third-party imports
 try:
-    from supabase import create_client, Client
-    from dotenv import load_dotenv
+    from supabase import Client
 except ImportError:
     print("ERROR: Missing required packages.")
     print("Install with: pip install supabase python-dotenv")
     sys.exit(1)
 
-# Load environment variables
-load_dotenv()
+from hist_checksums import keys_checksum, table_checksum
+from hist_copy import connect_direct, copy_merge
+from hist_csv import read_csv, resolve_path
+from hist_output import read_manifest
+from hist_timeline import build_timeline_events, concat_timeline_events, timeline_records, write_timeline_events
+from hist_supabase import create_supabase_client, print_transport_stats
 
-# Supabase setup
-SUPABASE_URL = os.getenv("NEXT_PUBLIC_SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+parser = argparse.ArgumentParser(description='Import unified_contacts.csv into the hist_* tables')
+parser.add_argument('--direct-db', action='store_true',
+                    help='Load via Postgres COPY (needs SUPABASE_DB_URL) instead of the REST API')
+args = parser.parse_args()
 
-if not SUPABASE_URL or not SUPABASE_KEY:
-    print("ERROR: Missing Supabase credentials.")
-    print("Make sure NEXT_PUBLIC_SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY are in .env.local")
-    sys.exit(1)
-
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+# Supabase setup (pooled transport shared by all importers, see hist_supabase.py)
+supabase: Client = create_supabase_client()
 
 # File paths
 UNIFIED_FILE = '/Users/connorjohnson/CLAUDE_CODE/MCB/historical_data/unified_contacts.csv'
@@ -56,18 +59,25 @@ import_started = datetime.now()
 # Read unified contacts
 print("📖 Reading unified contacts file...\n")
 try:
-    df = pd.read_csv(UNIFIED_FILE)
-    print(f"✓ Loaded {len(df)} contacts\n")
+    unified_path = resolve_path(UNIFIED_FILE)  # unified_contacts.csv, or its .zst / .gz variant
+    df = read_csv(unified_path)
+    print(f"✓ Loaded {len(df)} contacts from {os.path.basename(unified_path)}\n")
 except Exception as e:
     print(f"❌ ERROR reading file: {e}")
     sys.exit(1)
 
+# A manifest from the build records how many rows the complete file has
+manifest = read_manifest(unified_path)
+if manifest is not None and (manifest['file'] != os.path.basename(unified_path) or manifest['rows'] != len(df)):
+    print(f"❌ ERROR: {os.path.basename(unified_path)} doesn't match its manifest "
+          f"({manifest['file']}, {manifest['rows']} rows); re-run create_unified_contacts.py")
+    sys.exit(1)
+
 # Map columns to Supabase schema
 print("🗺️  Mapping columns to Supabase schema...\n")
 
 contacts_to_insert = []
 payments_to_insert = []
-timeline_events = []
 
 for idx, row in df.iterrows():
     email = row.get('email')
@@ -121,17 +131,6 @@ for idx, row in df.iterrows():
         }
         payments_to_insert.append(payment)
 
-        # Timeline event for Stripe purchase
-        if pd.notna(row.get('stripe_first_payment')):
-            timeline_events.append({
-                'email': email,
-                'event_type': 'purchased',
-                'event_date': pd.to_datetime(row.get('stripe_first_payment')).isoformat(),
-                'source': 'stripe',
-                'import_batch_id': str(batch_id),
-                'event_details': {'payment_count': int(row.get('stripe_payments', 0))}
-            })
-
     # Create payment records for Denefits
     if pd.notna(row.get('denefits_revenue')) and row.get('denefits_revenue') > 0:
         payment = {
@@ -147,31 +146,35 @@ for idx, row in df.iterrows():
         }
         payments_to_insert.append(payment)
 
-        # Timeline event for Denefits signup
-        if pd.notna(row.get('denefits_signup_date')):
-            timeline_events.append({
-                'email': email,
-                'event_type': 'purchased',
-                'event_date': pd.to_datetime(row.get('denefits_signup_date')).isoformat(),
-                'source': 'denefits',
-                'import_batch_id': str(batch_id),
-                'event_details': {'contract_count': int(row.get('denefits_contracts', 0))}
-            })
-
-    # Timeline event for subscription
-    if pd.notna(row.get('subscription_date')):
-        timeline_events.append({
-            'email': email,
-            'event_type': 'contact_created',
-            'event_date': pd.to_datetime(row.get('subscription_date')).isoformat(),
-            'source': row.get('source', 'unified'),
-            'import_batch_id': str(batch_id),
-        })
+# Timeline events are built column-wise with a natural key (see hist_timeline.py)
+has_stripe = df['stripe_revenue'].fillna(0) > 0
+has_denefits = df['denefits_revenue'].fillna(0) > 0
+has_email = df['email'].notna()
+timeline_events = concat_timeline_events([
+    build_timeline_events(
+        df[has_email & has_stripe], 'purchased', 'stripe_first_payment', 'stripe', batch_id,
+        details={'payment_count': 'stripe_payments'},
+    ),
+    build_timeline_events(
+        df[has_email & has_denefits], 'purchased', 'denefits_signup_date', 'denefits', batch_id,
+        details={'contract_count': 'denefits_contracts'},
+    ),
+    build_timeline_events(
+        df[has_email], 'contact_created', 'subscription_date',
+        df['source'].fillna('unified'), batch_id,
+    ),
+])
 
 print(f"✓ Mapped {len(contacts_to_insert)} contacts")
 print(f"✓ Created {len(payments_to_insert)} payment records")
 print(f"✓ Created {len(timeline_events)} timeline events\n")
 
+# Direct-database mode shares one connection across all three tables
+direct_conn = connect_direct() if args.direct_db else None
+
+# Row count + key hash per table written, for `hist_checksums.py verify`
+checksums = {}
+
 # Insert contacts into Supabase
 print("💾 Inserting contacts into Supabase...\n")
 
@@ -180,15 +183,21 @@ try:
     BATCH_SIZE = 500
     total_inserted = 0
 
-    for i in range(0, len(contacts_to_insert), BATCH_SIZE):
-        batch = contacts_to_insert[i:i+BATCH_SIZE]
-        response = supabase.table('hist_contacts').upsert(
-            batch,
-            on_conflict='email'
-        ).execute()
-        total_inserted += len(batch)
-        print(f"  ✓ Inserted batch {i//BATCH_SIZE + 1}: {len(batch)} contacts")
-
+    if direct_conn:
+        # One COPY into staging + one INSERT ... ON CONFLICT (email) DO UPDATE
+        copy_merge(direct_conn, 'hist_contacts', contacts_to_insert, batch_id)
+        total_inserted = len(contacts_to_insert)
+    else:
+        for i in range(0, len(contacts_to_insert), BATCH_SIZE):
+            batch = contacts_to_insert[i:i+BATCH_SIZE]
+            response = supabase.table('hist_contacts').upsert(
+                batch,
+                on_conflict='email'
+            ).execute()
+            total_inserted += len(batch)
+            print(f"  ✓ Inserted batch {i//BATCH_SIZE + 1}: {len(batch)} contacts")
+
+    checksums['hist_contacts'] = table_checksum('hist_contacts', contacts_to_insert)
     print(f"\n✅ Total contacts inserted: {total_inserted}\n")
 
 except Exception as e:
@@ -203,27 +212,35 @@ if payments_to_insert:
     print("💰 Inserting payments into Supabase...\n")
 
     try:
-        for i in range(0, len(payments_to_insert), BATCH_SIZE):
-            batch = payments_to_insert[i:i+BATCH_SIZE]
-            response = supabase.table('hist_payments').insert(batch).execute()
-            print(f"  ✓ Inserted batch {i//BATCH_SIZE + 1}: {len(batch)} payments")
-
+        if direct_conn:
+            copy_merge(direct_conn, 'hist_payments', payments_to_insert, batch_id)
+        else:
+            for i in range(0, len(payments_to_insert), BATCH_SIZE):
+                batch = payments_to_insert[i:i+BATCH_SIZE]
+                response = supabase.table('hist_payments').insert(batch).execute()
+                print(f"  ✓ Inserted batch {i//BATCH_SIZE + 1}: {len(batch)} payments")
+
+        checksums['hist_payments'] = table_checksum('hist_payments', payments_to_insert)
         print(f"\n✅ Total payments inserted: {len(payments_to_insert)}\n")
 
     except Exception as e:
         print(f"⚠️  Warning: Could not insert payments: {e}")
 
-# Insert timeline events
-if timeline_events:
+# Insert timeline events (events already in hist_timeline are skipped)
+if not timeline_events.empty:
     print("📅 Inserting timeline events into Supabase...\n")
 
     try:
-        for i in range(0, len(timeline_events), BATCH_SIZE):
-            batch = timeline_events[i:i+BATCH_SIZE]
-            response = supabase.table('hist_timeline').insert(batch).execute()
-            print(f"  ✓ Inserted batch {i//BATCH_SIZE + 1}: {len(batch)} events")
-
-        print(f"\n✅ Total timeline events inserted: {len(timeline_events)}\n")
+        written_keys = []
+        if direct_conn:
+            inserted = copy_merge(direct_conn, 'hist_timeline', timeline_records(timeline_events), batch_id,
+                                  merged_keys=written_keys)
+            known = len(timeline_events) - inserted
+        else:
+            inserted, known = write_timeline_events(supabase, timeline_events, chunk_size=BATCH_SIZE,
+                                                    written_keys=written_keys)
+        checksums['hist_timeline'] = keys_checksum(written_keys)
+        print(f"✅ Total timeline events inserted: {inserted} ({known} already existed)\n")
 
     except Exception as e:
         print(f"⚠️  Warning: Could not insert timeline events: {e}")
@@ -234,7 +251,7 @@ import_completed = datetime.now()
 
 log_entry = {
     'id': str(batch_id),
-    'source_file': 'unified_contacts.csv',
+    'source_file': os.path.basename(unified_path),
     'source_type': 'unified',
     'rows_processed': len(df),
     'rows_imported': len(contacts_to_insert),
@@ -242,6 +259,7 @@ log_entry = {
     'rows_updated': 0,
     'errors': None,
     'warnings': None,
+    'checksums': checksums or None,
     'import_started_at': import_started.isoformat(),
     'import_completed_at': import_completed.isoformat(),
     'imported_by': 'import_unified_to_supabase.py',
@@ -254,6 +272,9 @@ try:
 except Exception as e:
     print(f"⚠️  Warning: Could not log import: {e}\n")
 
+if direct_conn:
+    direct_conn.close()
+
 # Print summary
 print("="*60)
 print("✅ IMPORT COMPLETE")
@@ -262,6 +283,8 @@ print(f"Contacts imported: {len(contacts_to_insert)}")
 print(f"Payments created: {len(payments_to_insert)}")
 print(f"Timeline events: {len(timeline_events)}")
 print(f"\nImport batch ID: {batch_id}")
+print(f"Verify it: python scripts/hist_checksums.py verify --batch {batch_id}")
+print_transport_stats()
 print("="*60)
 print()
 print("🎉 You can now query your data in Supabase!")
@@ -0,0 +1,414 @@
+#!/usr/bin/env python3
+"""
+mcb-import: One Entry Point for the Historical Data Scripts
+
+Each historical script imports pandas and supabase-py at module top and is
+run on its own. This CLI wraps them as subcommands and loads nothing heavy
+until a subcommand actually runs: argument parsing, --help and --dry-run use
+only the standard library, so they start in milliseconds and need no
+credentials.
+
+Subcommands:
+    sheets        Google Sheets export → hist_contacts      (import_google_sheets.py)
+    airtable      Airtable export → hist_contacts           (import_airtable.py)
+    payments      Stripe / Denefits exports → hist_payments (import_payments.py)
+    instagram     Instagram backup JSON → hist_timeline     (import_instagram_backup.py)
+    webhooks      Stripe webhook export → hist_payments gaps (import_stripe_webhooks.py)
+    reconcile     Stripe / Denefits exports vs. hist_payments (hist_reconcile.py)
+    verify        Logged per-batch checksums vs. the database (hist_checksums.py)
+    snapshot      hist_* tables → local DuckDB file          (hist_snapshot.py)
+    unify         Build unified_contacts.csv                (create_unified_contacts.py)
+    load-unified  unified_contacts.csv → hist_* tables      (import_unified_to_supabase.py)
+    upload-sheet  CSV → Google Sheets                       (execution/upload-to-sheets-standard.py)
+
+--dry-run (all subcommands except upload-sheet, whose own --dry-run prints
+the sheet diff) checks input files and credentials and prints what would run.
+
+Usage:
+    python scripts/mcb_import.py --help
+    python scripts/mcb_import.py sheets historical_data/google_sheets_export.csv --direct-db --workers 0
+    python scripts/mcb_import.py payments --stripe stripe.csv --denefits denefits.csv
+    python scripts/mcb_import.py airtable historical_data/airtable_export.csv --dry-run
+    python scripts/mcb_import.py upload-sheet outputs/file.csv --key post_url
+
+Start-up time of --help / --dry-run vs. running a script directly:
+    python scripts/mcb_import.py --benchmark
+"""
+
+import argparse
+import os
+import sys
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+EXECUTION_DIR = os.path.join(os.path.dirname(SCRIPTS_DIR), 'execution')
+
+UNIFY_SCRIPT = os.path.join(SCRIPTS_DIR, 'create_unified_contacts.py')
+LOAD_UNIFIED_SCRIPT = os.path.join(SCRIPTS_DIR, 'import_unified_to_supabase.py')
+UPLOAD_SHEET_SCRIPT = os.path.join(EXECUTION_DIR, 'upload-to-sheets-standard.py')
+
+# Same as import_instagram_backup.DEFAULT_BACKUP_FILE (not imported: it pulls in pandas)
+INSTAGRAM_BACKUP_FILE = os.path.join(os.path.dirname(SCRIPTS_DIR), 'historical_data',
+                                     'backup_instagram_historical_20250107.json')
+
+# Same as import_stripe_webhooks.DEFAULT_WEBHOOKS_FILE / DEFAULT_STRIPE_FILE
+STRIPE_WEBHOOKS_FILE = os.path.join(os.path.dirname(SCRIPTS_DIR), 'historical_data',
+                                    'supabase_export_stripe_webhooks.csv')
+STRIPE_EXPORT_FILE = os.path.join(os.path.dirname(SCRIPTS_DIR), 'historical_data', 'stripe_unified_payments.csv')
+
+# Same values as hist_money.UNITS (not imported: it pulls in pandas)
+AMOUNT_UNITS = ('auto', 'dollars', 'cents')
+
+SUPABASE_ENV = ['NEXT_PUBLIC_SUPABASE_URL', 'SUPABASE_SERVICE_ROLE_KEY']
+DIRECT_DB_ENV = ['SUPABASE_DB_URL']
+
+
+# =============================================================================
+# DRY RUN
+# =============================================================================
+
+def check_inputs(paths, direct_db: bool = False) -> bool:
+    """Print missing files / credentials; True when everything needed is there."""
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+    except ImportError:
+        pass
+
+    ok = True
+    for path in paths:
+        if not os.path.exists(path):
+            print(f"❌ File not found: {path}")
+            ok = False
+        else:
+            print(f"✓ {path} ({os.path.getsize(path) / (1024 * 1024):,.1f} MB)")
+    for name in SUPABASE_ENV + (DIRECT_DB_ENV if direct_db else []):
+        if not os.getenv(name):
+            print(f"❌ {name} is not set")
+            ok = False
+    return ok
+
+
+def dry_run(description: str, paths, direct_db: bool = False):
+    ok = check_inputs(paths, direct_db)
+    print(f"✓ Would run: {description}" if ok else f"❌ Not ready to run: {description}")
+    sys.exit(0 if ok else 1)
+
+
+# =============================================================================
+# SUBCOMMANDS (heavy imports happen inside these)
+# =============================================================================
+
+def _require_file(path: str):
+    if not os.path.exists(path):
+        print(f"ERROR: File not found: {path}")
+        sys.exit(1)
+
+
+def _run_script(path: str, argv):
+    """Run a module-level script as if it were started directly."""
+    import runpy
+
+    sys.argv = [path] + list(argv)
+    sys.path.insert(0, os.path.dirname(path))
+    runpy.run_path(path, run_name='__main__')
+
+
+def cmd_sheets(args):
+    call = f"import_google_sheets_csv({args.csv_path!r}, direct_db={args.direct_db}, workers={args.workers})"
+    if args.dry_run:
+        dry_run(call, [args.csv_path], args.direct_db)
+    _require_file(args.csv_path)
+    from import_google_sheets import import_google_sheets_csv
+    import_google_sheets_csv(args.csv_path, direct_db=args.direct_db, workers=args.workers)
+
+
+def cmd_airtable(args):
+    call = f"import_airtable_csv({args.csv_path!r}, direct_db={args.direct_db}, workers={args.workers})"
+    if args.dry_run:
+        dry_run(call, [args.csv_path], args.direct_db)
+    _require_file(args.csv_path)
+    from import_airtable import import_airtable_csv
+    import_airtable_csv(args.csv_path, direct_db=args.direct_db, workers=args.workers)
+
+
+def cmd_payments(args):
+    sources = [(path, source) for path, source in ((args.stripe, 'stripe'), (args.denefits, 'denefits')) if path]
+    if not sources:
+        print("ERROR: You must specify at least one CSV file with --stripe or --denefits")
+        sys.exit(1)
+    if args.dry_run:
+        calls = '; '.join(
+            f"import_payments_csv({path!r}, {source!r}, direct_db={args.direct_db}, "
+            f"amount_unit={args.amount_unit!r}, workers={args.workers})"
+            for path, source in sources
+        )
+        dry_run(calls, [path for path, _ in sources], args.direct_db)
+    for path, _ in sources:
+        _require_file(path)
+
+    from import_payments import import_payments_csv
+    for path, source in sources:
+        import_payments_csv(path, source, direct_db=args.direct_db, amount_unit=args.amount_unit,
+                            workers=args.workers)
+
+
+def cmd_instagram(args):
+    options = f"direct_db={args.direct_db}, chunk_items={args.chunk_items}"
+    if args.unified:
+        options = f"unified_path={args.unified!r}, " + options
+    if args.dry_run:
+        dry_run(f"import_instagram_backup({args.json_path!r}, {options})", [args.json_path], args.direct_db)
+    _require_file(args.json_path)
+    from import_instagram_backup import import_instagram_backup
+    kwargs = {'unified_path': args.unified} if args.unified else {}
+    import_instagram_backup(args.json_path, direct_db=args.direct_db, chunk_items=args.chunk_items, **kwargs)
+
+
+def cmd_webhooks(args):
+    call = (f"import_stripe_webhooks({args.webhooks_path!r}, {args.stripe!r}, direct_db={args.direct_db}, "
+            f"amount_unit={args.amount_unit!r})")
+    if args.dry_run:
+        dry_run(call, [args.webhooks_path, args.stripe], args.direct_db)
+    _require_file(args.webhooks_path)
+    _require_file(args.stripe)
+    from import_stripe_webhooks import import_stripe_webhooks
+    import_stripe_webhooks(args.webhooks_path, args.stripe, direct_db=args.direct_db, amount_unit=args.amount_unit)
+
+
+def cmd_reconcile(args):
+    sources = [(path, source) for path, source in ((args.stripe, 'stripe'), (args.denefits, 'denefits')) if path]
+    if not sources:
+        print("ERROR: You must specify at least one CSV file with --stripe or --denefits")
+        sys.exit(1)
+    if args.dry_run:
+        calls = '; '.join(
+            f"reconcile_source({path!r}, {source!r}, direct_db={args.direct_db}, amount_unit={args.amount_unit!r})"
+            for path, source in sources
+        )
+        dry_run(calls, [path for path, _ in sources], args.direct_db)
+    for path, _ in sources:
+        _require_file(path)
+
+    from hist_reconcile import reconcile_source
+    for path, source in sources:
+        reconcile_source(path, source, direct_db=args.direct_db, amount_unit=args.amount_unit)
+
+
+def cmd_verify(args):
+    if args.dry_run:
+        dry_run(f"verify_batches(direct_db={args.direct_db}, batch_ids={args.batch}, last={args.last})", [],
+                args.direct_db)
+    from hist_checksums import verify_batches
+    sys.exit(1 if verify_batches(direct_db=args.direct_db, batch_ids=args.batch, last=args.last) else 0)
+
+
+def cmd_snapshot(args):
+    if args.dry_run:
+        dry_run(f"run_snapshot(direct_db={args.direct_db}, full={args.full})", [], args.direct_db)
+    from hist_snapshot import run_snapshot
+    run_snapshot(direct_db=args.direct_db, full=args.full)
+
+
+def cmd_unify(args):
+    argv = ['--push-rollups'] if args.push_rollups else []
+    if args.shards > 1:
+        argv += ['--shards', str(args.shards)]
+    if args.compression != 'none':
+        argv += ['--compression', args.compression]
+    if args.out_of_core:
+        argv += ['--out-of-core']
+        if args.memory_limit:
+            argv += ['--memory-limit', args.memory_limit]
+    if args.dry_run:
+        # Inputs and output are fixed inside the script; only --push-rollups needs credentials
+        description = f"{os.path.relpath(UNIFY_SCRIPT)} {' '.join(argv)}".strip()
+        if args.push_rollups:
+            dry_run(description, [])
+        print(f"✓ Would run: {description}")
+        sys.exit(0)
+    _run_script(UNIFY_SCRIPT, argv)
+
+
+def cmd_load_unified(args):
+    argv = ['--direct-db'] if args.direct_db else []
+    if args.dry_run:
+        dry_run(f"{os.path.relpath(LOAD_UNIFIED_SCRIPT)} {' '.join(argv)}".strip(), [], args.direct_db)
+    _run_script(LOAD_UNIFIED_SCRIPT, argv)
+
+
+def cmd_upload_sheet(args):
+    argv = [args.csv_path] if args.csv_path else []
+    if args.sheet_id:
+        argv += ['--sheet-id', args.sheet_id]
+    if args.key:
+        argv += ['--key', args.key]
+    if args.dry_run:
+        argv.append('--dry-run')
+    _run_script(UPLOAD_SHEET_SCRIPT, argv)
+
+
+# =============================================================================
+# PARSER
+# =============================================================================
+
+def _add_load_options(parser: argparse.ArgumentParser, workers: bool = True):
+    parser.add_argument('--direct-db', action='store_true',
+                        help='Load via Postgres COPY (needs SUPABASE_DB_URL) instead of the REST API')
+    if workers:
+        parser.add_argument('--workers', type=int, default=1,
+                            help='Processes for row mapping (0 = one per CPU core, default 1)')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Check files and credentials and show what would run')
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='mcb-import',
+        description='Import historical data into the hist_* tables and related exports',
+    )
+    parser.add_argument('--benchmark', action='store_true',
+                        help='Measure start-up time of --help / --dry-run vs. running the scripts directly')
+    subparsers = parser.add_subparsers(dest='command', metavar='<command>')
+
+    sheets = subparsers.add_parser('sheets', help='Import a Google Sheets CSV export into hist_contacts')
+    sheets.add_argument('csv_path', help='Path to Google Sheets CSV export')
+    _add_load_options(sheets)
+    sheets.set_defaults(func=cmd_sheets)
+
+    airtable = subparsers.add_parser('airtable', help='Import an Airtable CSV export into hist_contacts')
+    airtable.add_argument('csv_path', help='Path to Airtable CSV export')
+    _add_load_options(airtable)
+    airtable.set_defaults(func=cmd_airtable)
+
+    payments = subparsers.add_parser('payments', help='Import Stripe or Denefits payment data')
+    payments.add_argument('--stripe', help='Path to Stripe CSV export')
+    payments.add_argument('--denefits', help='Path to Denefits CSV export')
+    payments.add_argument('--amount-unit', choices=AMOUNT_UNITS,
+                          help='Unit of the amount columns (default: detect once per column for Stripe, '
+                               'dollars for Denefits)')
+    _add_load_options(payments)
+    payments.set_defaults(func=cmd_payments)
+
+    instagram = subparsers.add_parser('instagram', help='Import the Instagram backup JSON into hist_timeline')
+    instagram.add_argument('json_path', nargs='?', default=INSTAGRAM_BACKUP_FILE,
+                           help='Path to the backup JSON (default: historical_data/backup_instagram_historical_20250107.json)')
+    instagram.add_argument('--unified', help='unified_contacts.csv the records link to (default: the script\'s UNIFIED_FILE)')
+    instagram.add_argument('--chunk-items', type=int, default=1000, help='Records parsed and written per chunk')
+    _add_load_options(instagram, workers=False)
+    instagram.set_defaults(func=cmd_instagram)
+
+    webhooks = subparsers.add_parser('webhooks', help='Recover hist_payments gaps from the Stripe webhook export')
+    webhooks.add_argument('webhooks_path', nargs='?', default=STRIPE_WEBHOOKS_FILE,
+                          help='Webhook export CSV (default: historical_data/supabase_export_stripe_webhooks.csv)')
+    webhooks.add_argument('--stripe', default=STRIPE_EXPORT_FILE,
+                          help='Stripe export joined by charge ID (default: historical_data/stripe_unified_payments.csv)')
+    webhooks.add_argument('--amount-unit', choices=AMOUNT_UNITS, default='auto',
+                          help='Unit of the Stripe export\'s amount columns (default: detect once per column)')
+    _add_load_options(webhooks, workers=False)
+    webhooks.set_defaults(func=cmd_webhooks)
+
+    reconcile = subparsers.add_parser('reconcile', help='Compare Stripe / Denefits exports with hist_payments')
+    reconcile.add_argument('--stripe', help='Path to Stripe CSV export')
+    reconcile.add_argument('--denefits', help='Path to Denefits CSV export')
+    reconcile.add_argument('--amount-unit', choices=AMOUNT_UNITS,
+                           help='Unit of the amount columns (default: detect on the first chunk for Stripe, '
+                                'dollars for Denefits)')
+    reconcile.add_argument('--direct-db', action='store_true',
+                           help='Read hist_payments via Postgres (needs SUPABASE_DB_URL) instead of the REST API')
+    reconcile.add_argument('--dry-run', action='store_true', help='Check files and credentials and show what would run')
+    reconcile.set_defaults(func=cmd_reconcile)
+
+    verify = subparsers.add_parser('verify', help='Check imports against their logged per-batch checksums')
+    verify.add_argument('--batch', action='append', metavar='ID', help='Only this import batch (repeatable)')
+    verify.add_argument('--last', type=int, metavar='N', help='Only the N most recent batches')
+    verify.add_argument('--direct-db', action='store_true',
+                        help='Query Postgres directly (needs SUPABASE_DB_URL) instead of the REST API')
+    verify.add_argument('--dry-run', action='store_true', help='Check credentials and show what would run')
+    verify.set_defaults(func=cmd_verify)
+
+    snapshot = subparsers.add_parser('snapshot', help='Copy new/changed hist_* rows into the local DuckDB snapshot')
+    snapshot.add_argument('--full', action='store_true', help='Re-read every table instead of only changes')
+    snapshot.add_argument('--direct-db', action='store_true',
+                          help='Read via Postgres (needs SUPABASE_DB_URL) instead of the REST API')
+    snapshot.add_argument('--dry-run', action='store_true', help='Check credentials and show what would run')
+    snapshot.set_defaults(func=cmd_snapshot)
+
+    unify = subparsers.add_parser('unify', help='Build unified_contacts.csv from all exports')
+    unify.add_argument('--push-rollups', action='store_true',
+                       help='Also replace the hist_rollups table with the build\'s rollups')
+    unify.add_argument('--shards', type=int, default=1,
+                       help='Hash-partition the exports by email and build N shards in parallel processes')
+    unify.add_argument('--compression', choices=['none', 'zstd', 'gzip'], default='none',
+                       help='Write unified_contacts.csv.zst / .csv.gz (load-unified reads either)')
+    unify.add_argument('--out-of-core', action='store_true',
+                       help='Build in an on-disk DuckDB database (exports larger than RAM)')
+    unify.add_argument('--memory-limit', help='DuckDB memory budget for --out-of-core, e.g. 2GB')
+    unify.add_argument('--dry-run', action='store_true', help='Show what would run')
+    unify.set_defaults(func=cmd_unify)
+
+    load_unified = subparsers.add_parser('load-unified', help='Import unified_contacts.csv into the hist_* tables')
+    _add_load_options(load_unified, workers=False)
+    load_unified.set_defaults(func=cmd_load_unified)
+
+    upload = subparsers.add_parser('upload-sheet', help='Upload a CSV to Google Sheets')
+    upload.add_argument('csv_path', nargs='?', help='CSV file to upload (default: the script\'s CSV_PATH)')
+    upload.add_argument('--sheet-id', help='Spreadsheet ID (first worksheet is used)')
+    upload.add_argument('--key', metavar='COLUMN',
+                        help='Incremental sync: match rows by this column and write only changes')
+    upload.add_argument('--dry-run', action='store_true', help='With --key, print the diff without writing')
+    upload.set_defaults(func=cmd_upload_sheet)
+
+    return parser
+
+
+# =============================================================================
+# START-UP BENCHMARK
+# =============================================================================
+
+def run_benchmark(repeat: int = 7):
+    import statistics
+    import subprocess
+    import time
+
+    this = os.path.abspath(__file__)
+    sample_csv = os.path.join(os.path.dirname(SCRIPTS_DIR), 'historical_data', 'google_sheets_simplified_contacts.csv')
+    env = {k: v for k, v in os.environ.items() if k not in SUPABASE_ENV + DIRECT_DB_ENV}
+
+    commands = [
+        ('python -c pass (interpreter only)', ['-c', 'pass']),
+        ('mcb-import --help', [this, '--help']),
+        ('mcb-import sheets --help', [this, 'sheets', '--help']),
+        ('mcb-import sheets <csv> --dry-run', [this, 'sheets', sample_csv, '--dry-run']),
+        ('import_google_sheets.py --help', [os.path.join(SCRIPTS_DIR, 'import_google_sheets.py'), '--help']),
+        ('import_payments.py --help', [os.path.join(SCRIPTS_DIR, 'import_payments.py'), '--help']),
+    ]
+
+    print(f"Median wall time of {repeat} runs (no Supabase credentials in the environment)\n")
+    for label, argv in commands:
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            subprocess.run([sys.executable] + argv, env=env, cwd=SCRIPTS_DIR,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            times.append(time.perf_counter() - start)
+        print(f"  {label:<40} {statistics.median(times) * 1000:8.0f} ms")
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if args.benchmark:
+        run_benchmark()
+        return
+    if not args.command:
+        parser.print_help()
+        sys.exit(1)
+
+    if SCRIPTS_DIR not in sys.path:
+        sys.path.insert(0, SCRIPTS_DIR)
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()